@@ -0,0 +1,65 @@
+"""Benchmark serializing the arrangement list responses.
+
+The response model path, which the endpoints used before, converts every row to an ORM instance, a
+dataclass and a Pydantic model, then lets FastAPI validate and serialize the `JSendResponse`. The JSON path selects plain rows
+and formats them straight to JSON-ready dicts. Both produce the same bytes.
+
+Usage: python -m benchmarks.arrangements_json
+"""
+
+import asyncio
+
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+from src.arrangements import crud, services
+from src.arrangements.commons.dataclasses import ArrangementFilters, ArrangementResponse
+from src.arrangements.routes import _jsend_json_response
+from src.arrangements.utils import format_arrangements_response
+from src.schemas import JSendResponse
+from starlette.responses import JSONResponse
+
+from .common import create_session, print_results, seed, timed
+
+NUM_MANAGERS = 10
+TEAM_SIZE = 9  # 100 employees with arrangements
+ROW_COUNTS = [1_000, 10_000, 100_000]
+
+response_field = create_model_field(
+    name="Response_get_arrangements", type_=JSendResponse, mode="serialization"
+)
+
+
+def get_response_model_body(db) -> bytes:
+    arrangements, _ = crud.get_arrangements(db, ArrangementFilters(group_by_date=False))
+    data = [ArrangementResponse.from_dict(arrangement) for arrangement in arrangements]
+    response = JSendResponse(status="success", data=format_arrangements_response(data))
+    content = asyncio.run(
+        serialize_response(field=response_field, response_content=response, is_coroutine=False)
+    )
+    return JSONResponse(content).body
+
+
+def get_json_body(db) -> bytes:
+    data = services.get_all_arrangements_json(db, ArrangementFilters(group_by_date=False))
+    return _jsend_json_response(data).body
+
+
+def main():
+    for num_rows in ROW_COUNTS:
+        db = create_session()
+        seed(db, NUM_MANAGERS, TEAM_SIZE, num_rows // (NUM_MANAGERS * (TEAM_SIZE + 1)))
+        assert get_response_model_body(db) == get_json_body(db)
+
+        repeat = 3 if num_rows >= 100_000 else 10
+        print_results(
+            f"GET /arrangements with {num_rows} rows:",
+            {
+                "response model": timed(lambda: get_response_model_body(db), repeat),
+                "rows to JSON": timed(lambda: get_json_body(db), repeat),
+            },
+        )
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Benchmark the chunked rejection of expiring requests against the previous per-row path.
+
+The previous path rejected the expiring requests one at a time: each rejection fetched the
+arrangement, updated it, created its log, committed and reloaded it, and looked up the requester
+and the approving officer. The chunked path rejects each chunk of requests with
+one UPDATE ... RETURNING, inserts their logs with one multi-row insert, links them with one bulk
+update and commits once, and looks up the employees of the chunk in one query.
+
+Every run first resets the requests to pending, which costs the same for both paths. Emails are
+left out, as both paths hand them to the same sender.
+
+Usage: python -m benchmarks.auto_reject
+"""
+
+from sqlalchemy import delete, update
+from src.arrangements import crud
+from src.arrangements.commons import models
+from src.arrangements.commons.dataclasses import ArrangementResponse
+from src.arrangements.commons.enums import Action, ApprovalStatus
+from src.arrangements.services import AUTO_REJECT_CHUNK_SIZE, AUTO_REJECT_STATUS_REASON
+from src.employees import crud as employee_crud
+from src.tests.test_utils import count_queries
+
+from .common import create_session, print_results, seed, timed
+
+NUM_MANAGERS = 10
+TEAM_SIZE = 9
+ARRANGEMENTS_PER_EMPLOYEE = [1, 5, 20]
+REPEAT = 5
+
+
+def reset(db):
+    db.execute(delete(models.ArrangementLog))
+    db.execute(
+        update(models.LatestArrangement).values(
+            current_approval_status=ApprovalStatus.PENDING_APPROVAL, status_reason=None
+        )
+    )
+    db.commit()
+
+
+def reject_per_row(db):
+    for arrangement_id in crud.get_expiring_request_ids(db):
+        arrangement = ArrangementResponse.from_dict(crud.get_arrangement_by_id(db, arrangement_id))
+        arrangement.current_approval_status = ApprovalStatus.REJECTED
+        arrangement.status_reason = AUTO_REJECT_STATUS_REASON
+        crud.update_arrangement_approval_status(
+            db, arrangement, Action.REJECT, ApprovalStatus.PENDING_APPROVAL
+        )
+        employee_crud.get_employee_by_staff_id(db, arrangement.requester_staff_id)
+        employee_crud.get_employee_by_staff_id(db, arrangement.approving_officer)
+
+
+def reject_chunked(db):
+    arrangement_ids = crud.get_expiring_request_ids(db)
+    for i in range(0, len(arrangement_ids), AUTO_REJECT_CHUNK_SIZE):
+        rejected_arrangements = crud.reject_expiring_requests(
+            db, arrangement_ids[i : i + AUTO_REJECT_CHUNK_SIZE], AUTO_REJECT_STATUS_REASON
+        )
+        employee_crud.get_employees_by_ids(
+            db,
+            list(
+                {
+                    staff_id
+                    for arrangement in rejected_arrangements
+                    for staff_id in (
+                        arrangement["requester_staff_id"],
+                        arrangement["approving_officer"],
+                    )
+                }
+            ),
+        )
+
+
+def main():
+    for arrangements_per_employee in ARRANGEMENTS_PER_EMPLOYEE:
+        db = create_session()
+        seed(db, NUM_MANAGERS, TEAM_SIZE, arrangements_per_employee)
+        num_requests = db.query(models.LatestArrangement).count()
+
+        statement_counts = {}
+        for name, reject in [("per row", reject_per_row), ("chunked", reject_chunked)]:
+            reset(db)
+            with count_queries(db.get_bind()) as statements:
+                reject(db)
+            statement_counts[name] = len(statements)
+
+        def run(reject):
+            reset(db)
+            reject(db)
+
+        print_results(
+            f"{num_requests} expiring requests "
+            f"(statements: per row {statement_counts['per row']}, "
+            f"chunked {statement_counts['chunked']}):",
+            {
+                "per row": timed(lambda: run(reject_per_row), REPEAT),
+                "chunked": timed(lambda: run(reject_chunked), REPEAT),
+            },
+        )
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
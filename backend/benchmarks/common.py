@@ -0,0 +1,111 @@
+"""Helpers shared by the benchmark scripts.
+
+Benchmarks are run from the backend directory, e.g. `python -m benchmarks.team_arrangements`.
+"""
+
+import logging
+import statistics
+import time
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, List
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session, sessionmaker
+from src.arrangements.commons import models
+from src.arrangements.commons.enums import ApprovalStatus, WfhType
+from src.auth.models import Auth  # noqa: F401
+from src.employees.models import Employee
+from src.logger import logger
+
+CEO_STAFF_ID = 1
+
+# Per-query logging would dominate the timings
+logger.setLevel(logging.WARNING)
+
+
+def create_session(url: str = "sqlite:///:memory:") -> Session:
+    engine = create_engine(url)
+    models.Base.metadata.create_all(engine)
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+
+
+def seed(
+    db: Session,
+    num_managers: int,
+    team_size: int,
+    arrangements_per_employee: int,
+    start_date: date = date(2024, 1, 1),
+) -> Dict[str, List[int]]:
+    """Seed an org of a CEO, managers reporting to the CEO and staff reporting to the managers.
+
+    Every employee except the CEO has one arrangement per day, approved by their manager.
+
+    :return: The staff ids of the managers and of the staff
+    """
+    manager_ids = list(range(2, num_managers + 2))
+    staff_ids = list(range(num_managers + 2, num_managers + 2 + num_managers * team_size))
+    reporting_managers = {CEO_STAFF_ID: CEO_STAFF_ID}
+    reporting_managers.update({manager_id: CEO_STAFF_ID for manager_id in manager_ids})
+    reporting_managers.update(
+        {staff_id: manager_ids[i // team_size] for i, staff_id in enumerate(staff_ids)}
+    )
+
+    db.execute(
+        insert(Employee),
+        [
+            {
+                "staff_id": staff_id,
+                "staff_fname": f"First{staff_id}",
+                "staff_lname": f"Last{staff_id}",
+                "dept": f"Dept{reporting_manager % 10}",
+                "position": "Staff",
+                "country": "Singapore",
+                "email": f"staff{staff_id}@example.com",
+                "reporting_manager": reporting_manager,
+                "role": 2,
+            }
+            for staff_id, reporting_manager in reporting_managers.items()
+        ],
+    )
+    db.execute(
+        insert(models.LatestArrangement),
+        [
+            {
+                "update_datetime": datetime(2023, 12, 1),
+                "requester_staff_id": staff_id,
+                "wfh_date": start_date + timedelta(days=day),
+                "wfh_type": WfhType.FULL,
+                "current_approval_status": ApprovalStatus.PENDING_APPROVAL,
+                "approving_officer": reporting_managers[staff_id],
+                "reason_description": "Benchmark",
+                "latest_log_id": 1,
+            }
+            for staff_id in manager_ids + staff_ids
+            for day in range(arrangements_per_employee)
+        ],
+    )
+    db.commit()
+
+    return {"manager_ids": manager_ids, "staff_ids": staff_ids}
+
+
+def timed(fn: Callable, repeat: int = 20) -> Dict[str, float]:
+    """Run the function `repeat` times and return the median and best run time in ms."""
+    fn()  # warm up
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+
+    return {"median_ms": statistics.median(timings), "best_ms": min(timings)}
+
+
+def print_results(title: str, results: Dict[str, Dict[str, float]]):
+    print(title)
+    width = max(len(name) for name in results)
+    for name, timing in results.items():
+        print(
+            f"  {name:<{width}}  median {timing['median_ms']:8.2f} ms"
+            f"  best {timing['best_ms']:8.2f} ms"
+        )
@@ -0,0 +1,103 @@
+"""Benchmark the bulk creation of the arrangements of a request against the previous per-row path.
+
+The previous path added each arrangement and flushed it, created its log with another flush and
+then set its latest log id with a third flush, so a request cost about three round trips per
+occurrence. The bulk path inserts the arrangements and the logs with one multi-row insert each,
+and links them with one bulk update.
+
+Usage: python -m benchmarks.create_arrangements
+"""
+
+from dataclasses import asdict, replace
+from datetime import date, datetime, timedelta
+
+from sqlalchemy.orm import class_mapper
+from src.arrangements import crud
+from src.arrangements.commons import models
+from src.arrangements.commons.dataclasses import CreateArrangementRequest
+from src.arrangements.commons.enums import Action, ApprovalStatus, WfhType
+from src.tests.test_utils import count_queries
+
+from .common import create_session, print_results, seed, timed
+
+NUM_MANAGERS = 10
+TEAM_SIZE = 9
+ARRANGEMENTS_PER_EMPLOYEE = 10
+OCCURRENCES = [1, 52, 500]
+REPEAT = 10
+
+
+def make_requests(staff_id: int, num_occurrences: int):
+    request = CreateArrangementRequest(
+        update_datetime=datetime(2023, 12, 1),
+        requester_staff_id=staff_id,
+        wfh_date=date(2025, 1, 1),
+        wfh_type=WfhType.FULL,
+        is_recurring=num_occurrences > 1,
+        recurring_frequency_number=1,
+        recurring_frequency_unit=None,
+        recurring_occurrences=num_occurrences,
+        current_approval_status=ApprovalStatus.PENDING_APPROVAL,
+        approving_officer=2,
+        reason_description="Benchmark",
+    )
+    return [
+        replace(request, wfh_date=request.wfh_date + timedelta(weeks=week))
+        for week in range(num_occurrences)
+    ]
+
+
+def create_per_row(db, arrangements):
+    created_arrangements = []
+    for arrangement_data in arrangements:
+        arrangement_mapper = class_mapper(models.LatestArrangement)
+        arrangement = models.LatestArrangement(
+            **{
+                k: v
+                for k, v in asdict(arrangement_data).items()
+                if k in arrangement_mapper.attrs.keys()
+            },
+        )
+        db.add(arrangement)
+        db.flush()
+        created_arrangements.append(arrangement)
+        created_arrangement_log = crud.create_arrangement_log(
+            db, arrangement, Action.CREATE, previous_approval_status=None
+        )
+        arrangement.latest_log_id = created_arrangement_log.log_id
+        db.add(created_arrangement_log)
+        db.flush()
+    db.commit()
+    for arrangement in created_arrangements:
+        db.refresh(arrangement)
+    return created_arrangements
+
+
+def main():
+    db = create_session()
+    ids = seed(db, NUM_MANAGERS, TEAM_SIZE, ARRANGEMENTS_PER_EMPLOYEE)
+    staff_id = ids["staff_ids"][0]
+
+    for num_occurrences in OCCURRENCES:
+        requests = make_requests(staff_id, num_occurrences)
+        statement_counts = {}
+        for name, create in [("per row", create_per_row), ("bulk", crud.create_arrangements)]:
+            with count_queries(db.get_bind()) as statements:
+                create(db, requests)
+            statement_counts[name] = len(statements)
+
+        print_results(
+            f"Request of {num_occurrences} occurrences "
+            f"(statements: per row {statement_counts['per row']}, "
+            f"bulk {statement_counts['bulk']}):",
+            {
+                "per row": timed(lambda: create_per_row(db, requests), REPEAT),
+                "bulk": timed(lambda: crud.create_arrangements(db, requests), REPEAT),
+            },
+        )
+
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Benchmark converting rows to dataclasses with `BaseClass.from_dict`.
+
+The previous implementation inspected the class signature on every call. The converter now
+builds the per-field parsers once per class.
+
+Usage: python -m benchmarks.from_dict
+"""
+
+import inspect
+import time
+from datetime import date, datetime
+
+from src.arrangements.commons.dataclasses import ArrangementResponse
+from src.arrangements.commons.enums import ApprovalStatus, WfhType
+
+NUM_ROWS = 100_000
+
+
+def from_dict_with_signature(cls, env):
+    cls_signature = inspect.signature(cls)
+    cls_parameters = cls_signature.parameters
+    cls_type_hints = {k: v.annotation for k, v in cls_parameters.items()}
+
+    parsed_env = {}
+    for k, v in env.items():
+        if k in cls_type_hints:
+            if cls_type_hints[k] == datetime and isinstance(v, str):
+                try:
+                    parsed_env[k] = datetime.fromisoformat(v)
+                except ValueError:
+                    parsed_env[k] = datetime.strptime(v, "%Y-%m-%d %H:%M:%S")
+            elif cls_type_hints[k] == date and isinstance(v, str):
+                try:
+                    parsed_env[k] = date.fromisoformat(v)
+                except ValueError:
+                    parsed_env[k] = datetime.strptime(v, "%Y-%m-%d %H:%M:%S").date()
+            else:
+                parsed_env[k] = v
+
+    return cls(**parsed_env)
+
+
+def make_rows(as_strings: bool):
+    return [
+        {
+            "arrangement_id": i,
+            "update_datetime": "2024-01-01T09:00:00" if as_strings else datetime(2024, 1, 1, 9),
+            "requester_staff_id": 140002,
+            "wfh_date": "2024-01-02" if as_strings else date(2024, 1, 2),
+            "wfh_type": WfhType.FULL,
+            "current_approval_status": ApprovalStatus.APPROVED,
+            "approving_officer": 140001,
+            "latest_log_id": i,
+            "reason_description": "Benchmark",
+            "requester_info": None,
+        }
+        for i in range(NUM_ROWS)
+    ]
+
+
+def measure(convert, rows) -> float:
+    start = time.perf_counter()
+    for row in rows:
+        convert(ArrangementResponse, row)
+    return time.perf_counter() - start
+
+
+def main():
+    for label, rows in [("native values", make_rows(False)), ("ISO strings", make_rows(True))]:
+        print(f"Converting {NUM_ROWS} ArrangementResponse rows from {label}:")
+        for name, convert in [
+            ("signature per call", from_dict_with_signature),
+            ("cached converter", lambda cls, row: cls.from_dict(row)),
+        ]:
+            seconds = measure(convert, rows)
+            print(f"  {name:<18}  {seconds * 1000:8.1f} ms" f"  {NUM_ROWS / seconds:10,.0f} rows/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Benchmark the manager, peer and subordinate lookups using the org hierarchy index against the
+previous queries.
+
+The previous lookups filtered `employees` on `reporting_manager`, which has no index, and loaded
+the manager through the `Employee.manager` relationship. The index resolves the staff ids in
+memory, so only the employees returned are loaded, by primary key.
+
+Usage: python -m benchmarks.org_hierarchy
+"""
+
+import time
+
+from src.employees import crud as employee_crud
+from src.employees import services as employee_services
+from src.employees.hierarchy import get_org_hierarchy
+
+from .common import create_session, print_results, seed, timed
+
+# 100,000 employees
+NUM_MANAGERS = 1000
+TEAM_SIZE = 99
+ARRANGEMENTS_PER_EMPLOYEE = 1
+REPEAT = 20
+
+
+def get_manager_with_query(db, staff_id):
+    employee = employee_crud.get_employee_by_staff_id(db, staff_id)
+    if employee.manager and employee.manager.staff_id != employee.staff_id:
+        return employee.manager
+    return None
+
+
+def get_manager_with_index(db, staff_id):
+    manager_id = get_org_hierarchy(db).get_manager_id(staff_id)
+    return employee_crud.get_employee_by_staff_id(db, manager_id)
+
+
+def get_peers_with_query(db, staff_id):
+    employee = employee_crud.get_employee_by_staff_id(db, staff_id)
+    return employee_crud.get_subordinates_by_manager_id(db, employee.reporting_manager)
+
+
+def main():
+    db = create_session()
+    ids = seed(db, NUM_MANAGERS, TEAM_SIZE, ARRANGEMENTS_PER_EMPLOYEE)
+    manager_id = ids["manager_ids"][NUM_MANAGERS // 2]
+    staff_id = ids["staff_ids"][len(ids["staff_ids"]) // 2]
+
+    start = time.perf_counter()
+    get_org_hierarchy(db)
+    print(
+        f"Built the index of {NUM_MANAGERS * (TEAM_SIZE + 1) + 1} employees in "
+        f"{(time.perf_counter() - start) * 1000:.0f} ms\n"
+    )
+
+    assert get_manager_with_query(db, staff_id) is get_manager_with_index(db, staff_id)
+    print_results(
+        "Manager of a staff member:",
+        {
+            "query": timed(lambda: get_manager_with_query(db, staff_id), REPEAT),
+            "index": timed(lambda: get_manager_with_index(db, staff_id), REPEAT),
+        },
+    )
+
+    assert employee_crud.get_subordinates_by_manager_id(
+        db, manager_id
+    ) == employee_services.get_subordinates_by_manager_id(db, manager_id)
+    print_results(
+        f"Subordinates of a manager ({TEAM_SIZE}):",
+        {
+            "query": timed(
+                lambda: employee_crud.get_subordinates_by_manager_id(db, manager_id), REPEAT
+            ),
+            "index": timed(
+                lambda: employee_services.get_subordinates_by_manager_id(db, manager_id), REPEAT
+            ),
+        },
+    )
+
+    assert get_peers_with_query(db, staff_id) == employee_services.get_peers_by_staff_id(
+        db, staff_id
+    )
+    print_results(
+        f"Peers of a staff member ({TEAM_SIZE}):",
+        {
+            "query": timed(lambda: get_peers_with_query(db, staff_id), REPEAT),
+            "index": timed(lambda: employee_services.get_peers_by_staff_id(db, staff_id), REPEAT),
+        },
+    )
+
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Benchmark presigning the supporting documents of a page of arrangements against moto.
+
+The previous implementation built a new S3 client for every supporting document. The shared
+signer reuses one client and caches the URLs, so a repeated page is served from the cache.
+
+Usage: python -m benchmarks.presigned_urls
+"""
+
+import os
+
+import boto3
+from moto import mock_aws
+from src.arrangements.s3_signer import S3Signer
+
+from .common import timed
+
+BUCKET_NAME = "benchmark-bucket"
+PAGE_SIZES = [10, 100]
+DOCS_PER_ROW = 3
+REPEAT = 5  # Building a client per URL takes ~8 ms, so keep the runs short
+
+
+def create_presigned_url_with_new_client(key):
+    s3_client = boto3.client("s3")
+    return s3_client.generate_presigned_url(
+        "get_object", Params={"Bucket": BUCKET_NAME, "Key": key}, ExpiresIn=3600
+    )
+
+
+def main():
+    os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+    os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+    os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+
+    with mock_aws():
+        boto3.client("s3").create_bucket(Bucket=BUCKET_NAME)
+        signer = S3Signer(bucket_name=BUCKET_NAME)
+
+        for num_rows in PAGE_SIZES:
+            keys = [
+                f"{row}/2024-01-01T00:00:00/doc_{doc}.pdf"
+                for row in range(num_rows)
+                for doc in range(DOCS_PER_ROW)
+            ]
+
+            def sign_uncached():
+                signer.clear()
+                signer.sign_many(keys)
+
+            results = {
+                "new client per URL": timed(
+                    lambda: [create_presigned_url_with_new_client(key) for key in keys], REPEAT
+                ),
+                "shared signer, cold": timed(sign_uncached, REPEAT),
+                "shared signer, cached": timed(lambda: signer.sign_many(keys), REPEAT),
+            }
+
+            print(f"Presigning {num_rows} rows with {DOCS_PER_ROW} documents each:")
+            width = max(len(name) for name in results)
+            for name, timing in results.items():
+                print(
+                    f"  {name:<{width}}  median {timing['median_ms']:9.2f} ms"
+                    f"  per row {timing['median_ms'] * 1000 / num_rows:9.1f} us"
+                )
+
+
+if __name__ == "__main__":
+    main()
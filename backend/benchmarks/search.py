@@ -0,0 +1,121 @@
+"""Benchmark the name and reason filters using the FTS5 trigram indexes against ILIKE scans.
+
+The arrangements matching each search term are selected with the previous `ilike("%term%")`
+filters and with the trigram index filters used by `crud.get_arrangements`. Only the arrangement
+ids are loaded, so the timings are those of the filters.
+
+Usage: python -m benchmarks.search
+"""
+
+import time
+
+from sqlalchemy import func, or_, update
+from src.arrangements.commons import models
+from src.employees.models import Employee, employee_name_index
+
+from .common import create_session, print_results, seed, timed
+
+# 100,000 employees with 10 arrangements each
+NUM_MANAGERS = 1000
+TEAM_SIZE = 99
+ARRANGEMENTS_PER_EMPLOYEE = 10
+# Each reason is shared by this many arrangements
+ARRANGEMENTS_PER_REASON = 20
+REPEAT = 5
+
+
+def query_arrangement_ids(db):
+    return db.query(models.LatestArrangement.arrangement_id).join(
+        Employee, Employee.staff_id == models.LatestArrangement.requester_staff_id
+    )
+
+
+def search_name_with_ilike(db, name):
+    return (
+        query_arrangement_ids(db)
+        .filter(
+            or_(
+                Employee.staff_fname.ilike(f"%{name}%"),
+                Employee.staff_lname.ilike(f"%{name}%"),
+            )
+        )
+        .all()
+    )
+
+
+def search_name_with_index(db, name):
+    return (
+        query_arrangement_ids(db)
+        .filter(employee_name_index.search(db, name, models.LatestArrangement.requester_staff_id))
+        .all()
+    )
+
+
+def search_reason_with_ilike(db, reason):
+    return (
+        query_arrangement_ids(db)
+        .filter(models.LatestArrangement.reason_description.ilike(f"%{reason}%"))
+        .all()
+    )
+
+
+def search_reason_with_index(db, reason):
+    return (
+        query_arrangement_ids(db)
+        .filter(
+            models.arrangement_reason_index.search(
+                db, reason, models.LatestArrangement.arrangement_id
+            )
+        )
+        .all()
+    )
+
+
+def main():
+    db = create_session()
+
+    start = time.perf_counter()
+    seed(db, NUM_MANAGERS, TEAM_SIZE, ARRANGEMENTS_PER_EMPLOYEE)
+    db.execute(
+        update(models.LatestArrangement).values(
+            reason_description=func.printf(
+                "Medical appointment %d",
+                models.LatestArrangement.arrangement_id // ARRANGEMENTS_PER_REASON,
+            )
+        )
+    )
+    db.commit()
+    num_employees = db.query(Employee).count()
+    num_arrangements = db.query(models.LatestArrangement).count()
+    print(
+        f"Seeded {num_employees} employees and {num_arrangements} arrangements "
+        f"in {time.perf_counter() - start:.0f} s\n"
+    )
+
+    for name in ["First12345", "Last777"]:
+        num_matches = len(search_name_with_index(db, name))
+        assert len(search_name_with_ilike(db, name)) == num_matches
+        print_results(
+            f"Name {name!r}, {num_matches} arrangements:",
+            {
+                "ilike": timed(lambda: search_name_with_ilike(db, name), REPEAT),
+                "trigram index": timed(lambda: search_name_with_index(db, name), REPEAT),
+            },
+        )
+
+    for reason in ["appointment 4242", "ntment 31337"]:
+        num_matches = len(search_reason_with_index(db, reason))
+        assert len(search_reason_with_ilike(db, reason)) == num_matches
+        print_results(
+            f"Reason {reason!r}, {num_matches} arrangements:",
+            {
+                "ilike": timed(lambda: search_reason_with_ilike(db, reason), REPEAT),
+                "trigram index": timed(lambda: search_reason_with_index(db, reason), REPEAT),
+            },
+        )
+
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Benchmark peak memory of exporting all arrangements as one JSON document versus NDJSON.
+
+The JSON response holds every row before the first byte is sent. The NDJSON stream reads rows in
+batches and writes them as it goes, so its peak memory stays flat as the table grows.
+
+Usage: python -m benchmarks.streaming
+"""
+
+import time
+import tracemalloc
+
+from src.arrangements import services
+from src.arrangements.commons.dataclasses import ArrangementFilters
+from src.arrangements.routes import _jsend_json_response
+from src.arrangements.utils import encode_ndjson
+
+from .common import create_session, seed
+
+NUM_MANAGERS = 10
+TEAM_SIZE = 9  # 100 employees with arrangements
+ROW_COUNTS = [10_000, 50_000, 100_000]
+
+
+def export_json(db):
+    data = services.get_all_arrangements_json(db, ArrangementFilters(group_by_date=False))
+    return len(_jsend_json_response(data).body)
+
+
+def export_ndjson(db):
+    items = services.stream_all_arrangements(db, ArrangementFilters(group_by_date=False))
+    return sum(len(chunk) for chunk in encode_ndjson(items))
+
+
+def measure(fn, db):
+    tracemalloc.start()
+    start = time.perf_counter()
+    num_bytes = fn(db)
+    duration = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return num_bytes, duration, peak
+
+
+def main():
+    for num_rows in ROW_COUNTS:
+        db = create_session()
+        seed(db, NUM_MANAGERS, TEAM_SIZE, num_rows // (NUM_MANAGERS * (TEAM_SIZE + 1)))
+
+        print(f"Exporting {num_rows} arrangements:")
+        for name, fn in [("JSON document", export_json), ("NDJSON stream", export_ndjson)]:
+            num_bytes, duration, peak = measure(fn, db)
+            print(
+                f"  {name:<13}  {num_bytes / 2**20:6.1f} MiB sent"
+                f"  peak memory {peak / 2**20:7.1f} MiB  in {duration:6.2f} s"
+            )
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Benchmark the team arrangements query against the previous three round trips.
+
+The previous implementation loaded the peers of the staff member, then queried the peer
+arrangements and the subordinate arrangements separately and concatenated them in Python.
+
+Usage: python -m benchmarks.team_arrangements
+"""
+
+from src.arrangements import crud
+from src.arrangements.commons.dataclasses import ArrangementFilters, PaginationConfig
+from src.employees import crud as employee_crud
+
+from .common import create_session, print_results, seed, timed
+
+NUM_MANAGERS = 20
+TEAM_SIZE = 25
+ARRANGEMENTS_PER_EMPLOYEE = 40
+
+
+def get_team_arrangements_in_three_queries(db, staff_id, pagination):
+    employee = employee_crud.get_employee_by_staff_id(db, staff_id)
+    peers = employee_crud.get_subordinates_by_manager_id(db, employee.reporting_manager)
+
+    filters = ArrangementFilters(
+        personal_staff_id=staff_id,
+        staff_ids=[peer.staff_id for peer in peers],
+        group_by_date=False,
+    )
+    peer_arrangements, peer_count = crud.get_arrangements(db, filters, pagination)
+
+    filters.staff_ids = None
+    filters.manager_id = staff_id
+    subordinates_arrangements, subordinates_count = crud.get_arrangements(db, filters, pagination)
+
+    return peer_arrangements + subordinates_arrangements, peer_count + subordinates_count
+
+
+def get_team_arrangements_in_one_query(db, staff_id, pagination):
+    return crud.get_team_arrangements(
+        db, staff_id, ArrangementFilters(group_by_date=False), pagination
+    )
+
+
+def main():
+    db = create_session()
+    ids = seed(db, NUM_MANAGERS, TEAM_SIZE, ARRANGEMENTS_PER_EMPLOYEE)
+    staff_id = ids["manager_ids"][0]
+
+    for label, pagination in [
+        ("first page of 10", PaginationConfig(items_per_page=10, page_num=1)),
+        ("all arrangements", None),
+    ]:
+        print_results(
+            f"Team arrangements of manager {staff_id}, {label}:",
+            {
+                "three queries": timed(
+                    lambda: get_team_arrangements_in_three_queries(db, staff_id, pagination)
+                ),
+                "one query": timed(
+                    lambda: get_team_arrangements_in_one_query(db, staff_id, pagination)
+                ),
+            },
+        )
+
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
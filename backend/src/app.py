@@ -1,26 +1,26 @@
-import asyncio
 import os
 from contextlib import asynccontextmanager
 from venv import logger
 
-from apscheduler.schedulers.background import BackgroundScheduler
-from apscheduler.triggers.cron import CronTrigger
 from dotenv import load_dotenv
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from main import ENV
 
+from .arrangements import s3_signer
 from .arrangements.commons import models as arrangement_models
 from .arrangements.routes import router as arrangement_router
-from .arrangements.services import auto_reject_old_requests
 from .auth import models as auth_models
 from .auth.routes import router as auth_router
-from .database import engine
+from .database import SessionLocal, engine
 from .email.routes import router as email_router
 from .employees import models as employee_models
+from .employees.delegations import get_delegation_map
 from .employees.routes import router as employee_router
 from .health.health import router as health_router
-from .init_db import load_data
+from .init_db import load_data, migrations, rebuild_rollup
+from .jobs.definitions import JOBS
+from .jobs.runner import JobRunner
 
 """
 Create a context manager to handle the lifespan of the FastAPI application
@@ -45,6 +45,12 @@ async def lifespan(app: FastAPI):
     auth_models.Base.metadata.create_all(bind=engine)
     employee_models.Base.metadata.create_all(bind=engine)
 
+    # Migrate existing rows to the current schema
+    migrations.migrate_wfh_date_to_date(engine)
+    migrations.create_search_indexes(engine)
+    migrations.add_recurring_series_columns(engine)
+    migrations.add_arrangement_log_columns(engine)
+
     # Load employee data from CSV
     load_data.load_employee_data_from_csv("./src/init_db/employee.csv")
 
@@ -54,25 +60,28 @@ async def lifespan(app: FastAPI):
     # Load arrangements data from CSV
     load_data.load_latest_arrangement_data_from_csv("./src/init_db/latest_arrangement.csv")
 
+    # The arrangements are loaded without going through the crud functions that keep the
+    # daily WFH rollup up to date
+    rebuild_rollup.rebuild_rollup()
+
+    # Load the active delegations, so that routing the first requests needs no delegation queries
+    with SessionLocal() as db:
+        get_delegation_map(db)
+
     # Startup: Initialize services before the application starts
+    s3_signer.init_signer()
+
     print("Starting scheduler...")
-    scheduler = BackgroundScheduler()
-    scheduler.add_job(
-        lambda: asyncio.run(auto_reject_old_requests()),
-        # CronTrigger(second="*/15"),  # Run every 15 seconds
-        CronTrigger(hour=0, minute=0),  # Run every day at midnight
-        id="auto_reject_job",
-        replace_existing=True,
-        misfire_grace_time=300,  # 5 minutes grace time
-        max_instances=1,  # Ensure only one instance runs at a time
-    )
-    scheduler.start()
+    # The jobs run on the event loop of the application, each with its own session
+    job_runner = JobRunner(JOBS)
+    job_runner.start()
+    app.state.job_runner = job_runner
 
     yield
 
     # Shutdown: Clean up resources when the application is shutting down
     print("Stopping scheduler...")
-    scheduler.shutdown(wait=False)
+    job_runner.shutdown()
 
     # Drop all tables
     arrangement_models.Base.metadata.drop_all(bind=engine)
@@ -0,0 +1,316 @@
+"""Read-through cache of the arrangement list responses, invalidated by writes to arrangements.
+
+Each entry is tagged with the scopes it depends on: all arrangements, the arrangements approved by
+a staff member, or the arrangements of the employees reporting to a manager. When a session
+commits a change to arrangements, the tags of the scopes holding the changed arrangements are
+invalidated, dropping only the entries that may include them. Entries also expire after a TTL,
+and the least recently used entries are evicted when the cache is full.
+
+Arrangements written as instances are tracked automatically, by looking up their scopes before and
+after each flush. Bulk updates of arrangements and writes to recurring series, whose occurrences
+are generated when read, must mark the scopes they change with `invalidate_on_commit`.
+
+The entries are kept by a `CacheBackend`. The default backend keeps them in process, and can be
+replaced with one shared by all workers through `init_cache`.
+"""
+
+import itertools
+import json
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict, defaultdict
+from dataclasses import asdict, is_dataclass
+from datetime import date
+from enum import Enum
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Hashable,
+    Iterable,
+    Optional,
+    Set,
+    Tuple,
+    Type,
+    Union,
+)
+
+from sqlalchemy import event, inspect, select
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from ..employees.models import Employee
+from .commons.models import LatestArrangement, RecurringRequest
+
+ARRANGEMENTS_CACHE_TTL = 60
+ARRANGEMENTS_CACHE_SIZE = 1024
+
+ALL_ARRANGEMENTS_TAG = "arrangements"
+
+# Set in the info of sessions with uncommitted writes to arrangements
+_TAGS_KEY = "arrangement_cache_tags"
+
+
+def approver_tag(staff_id: int) -> str:
+    """Tag of the responses including arrangements approved by the staff member."""
+    return f"approver:{staff_id}"
+
+
+def reports_to_tag(manager_id: int) -> str:
+    """Tag of the responses including arrangements of employees reporting to the manager."""
+    return f"reports_to:{manager_id}"
+
+
+class CacheBackend(ABC):
+    """Storage of the cached responses, with tag-based invalidation.
+
+    Every tag has a generation that changes when the tag is invalidated. An entry is only stored
+    if the generation of its tags is unchanged since before it was loaded, so that a response
+    loaded before a write is not cached after the write invalidated its tags.
+    """
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Any]:
+        """Get the cached value of the key, or None if it is missing or expired."""
+
+    @abstractmethod
+    def get_generation(self, tags: Iterable[str]) -> Hashable:
+        """Get the current generation of the tags."""
+
+    @abstractmethod
+    def set(self, key: str, value: Any, tags: Iterable[str], generation: Hashable) -> bool:
+        """Cache the value if the generation of the tags is still the given one.
+
+        :return: Whether the value was cached
+        """
+
+    @abstractmethod
+    def invalidate(self, tags: Iterable[str]):
+        """Drop the entries with any of the tags."""
+
+    @abstractmethod
+    def clear(self):
+        """Drop all entries."""
+
+
+class InMemoryCacheBackend(CacheBackend):
+    """Keep the entries in this process, evicting the least recently used ones when full."""
+
+    def __init__(
+        self,
+        ttl: float = ARRANGEMENTS_CACHE_TTL,
+        max_size: int = ARRANGEMENTS_CACHE_SIZE,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._clock = clock
+        self._entries: OrderedDict[str, Tuple[Any, float, Tuple[str, ...]]] = OrderedDict()
+        self._keys_by_tag: Dict[str, Set[str]] = defaultdict(set)
+        self._generations: Dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] <= self._clock():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def get_generation(self, tags: Iterable[str]) -> Hashable:
+        with self._lock:
+            return tuple(self._generations.get(tag, 0) for tag in sorted(set(tags)))
+
+    def set(self, key: str, value: Any, tags: Iterable[str], generation: Hashable) -> bool:
+        tags = tuple(sorted(set(tags)))
+        with self._lock:
+            if tuple(self._generations.get(tag, 0) for tag in tags) != generation:
+                return False
+
+            self._remove(key)
+            self._entries[key] = (value, self._clock() + self.ttl, tags)
+            for tag in tags:
+                self._keys_by_tag[tag].add(key)
+            while len(self._entries) > self.max_size:
+                self._remove(next(iter(self._entries)))
+            return True
+
+    def invalidate(self, tags: Iterable[str]):
+        with self._lock:
+            for tag in set(tags):
+                self._generations[tag] += 1
+                for key in self._keys_by_tag.pop(tag, set()):
+                    self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_tag.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry[2]:
+            keys = self._keys_by_tag.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_tag[tag]
+
+
+_backend: Optional[CacheBackend] = None
+
+
+def init_cache(backend: Optional[CacheBackend] = None, **kwargs) -> CacheBackend:
+    """Set the cache backend, by default an `InMemoryCacheBackend` created with the kwargs."""
+    global _backend
+    _backend = backend or InMemoryCacheBackend(**kwargs)
+    return _backend
+
+
+def get_cache() -> CacheBackend:
+    if _backend is None:
+        return init_cache()
+    return _backend
+
+
+def make_key(*parts: Any) -> str:
+    """Make a cache key from the parts, which may include filter and pagination dataclasses.
+
+    Equivalent filters give the same key: the order and duplicates of list values are ignored,
+    and enums and dates are replaced by their values.
+    """
+    return json.dumps(_normalize(parts), sort_keys=True, separators=(",", ":"))
+
+
+def _normalize(value: Any) -> Any:
+    if is_dataclass(value):
+        value = asdict(value)
+    if isinstance(value, dict):
+        return {name: _normalize(item) for name, item in value.items()}
+    if isinstance(value, tuple):
+        return [_normalize(item) for item in value]
+    if isinstance(value, (list, set)):
+        return sorted({json.dumps(_normalize(item), sort_keys=True) for item in value})
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+def get_or_load(key: str, tags: Callable[[], Iterable[str]], load: Callable[[], Any]) -> Any:
+    """Get the cached value of the key, or load it and cache it with the tags.
+
+    :param tags: Gets the tags of the value. Only called on a cache miss.
+    """
+    cache = get_cache()
+    value = cache.get(key)
+    if value is not None:
+        return value
+
+    tags = list(tags())
+    generation = cache.get_generation(tags)
+    value = load()
+    if value is not None:
+        cache.set(key, value, tags, generation)
+    return value
+
+
+def get_arrangement_tags(db: Union[Session, Connection], *criteria) -> Set[str]:
+    """Get the tags of the responses that may include the arrangements matching the criteria."""
+    return _get_tags(db, LatestArrangement, criteria)
+
+
+def get_series_tags(db: Union[Session, Connection], *criteria) -> Set[str]:
+    """Get the tags of the responses that may include occurrences of the recurring series matching
+    the criteria."""
+    return _get_tags(db, RecurringRequest, criteria)
+
+
+def _get_tags(
+    db: Union[Session, Connection],
+    model: Union[Type[LatestArrangement], Type[RecurringRequest]],
+    criteria: Iterable,
+) -> Set[str]:
+    rows = db.execute(
+        select(
+            Employee.reporting_manager,
+            model.approving_officer,
+            model.delegate_approving_officer,
+        )
+        .join(Employee, Employee.staff_id == model.requester_staff_id)
+        .where(*criteria)
+        .distinct()
+    )
+    tags = {ALL_ARRANGEMENTS_TAG}
+    for reporting_manager, approving_officer, delegate_approving_officer in rows:
+        if reporting_manager is not None:
+            tags.add(reports_to_tag(reporting_manager))
+        tags.update(
+            approver_tag(staff_id)
+            for staff_id in (approving_officer, delegate_approving_officer)
+            if staff_id is not None
+        )
+    return tags
+
+
+def invalidate_on_commit(session: Session, tags: Iterable[str]):
+    """Invalidate the tags when the session commits, or forget them if it rolls back."""
+    session.info.setdefault(_TAGS_KEY, set()).update(tags)
+
+
+def _get_arrangement_ids(instances: Iterable[Any]) -> Set[int]:
+    arrangement_ids = set()
+    for instance in instances:
+        if isinstance(instance, LatestArrangement):
+            state = inspect(instance)
+            # New arrangements have no identity until the flush is finalized
+            arrangement_ids.add(
+                state.identity[0] if state.identity else state.dict.get("arrangement_id")
+            )
+    return arrangement_ids
+
+
+def _mark_arrangements(session: Session, arrangement_ids: Set[int]):
+    if arrangement_ids:
+        # Query through the connection, since the session cannot autoflush during a flush
+        tags = get_arrangement_tags(
+            session.connection(), LatestArrangement.arrangement_id.in_(arrangement_ids)
+        )
+        invalidate_on_commit(session, tags)
+
+
+@event.listens_for(Session, "before_flush")
+def _mark_arrangements_before_flush(session: Session, flush_context, instances):
+    # The scopes that the changed arrangements may leave
+    _mark_arrangements(
+        session, _get_arrangement_ids(itertools.chain(session.dirty, session.deleted))
+    )
+
+
+@event.listens_for(Session, "after_flush")
+def _mark_arrangements_after_flush(session: Session, flush_context):
+    # The scopes that the new and changed arrangements may enter
+    _mark_arrangements(session, _get_arrangement_ids(itertools.chain(session.new, session.dirty)))
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session: Session):
+    tags = session.info.pop(_TAGS_KEY, None)
+    if tags:
+        get_cache().invalidate(tags)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_rolled_back_changes(session: Session):
+    session.info.pop(_TAGS_KEY, None)
@@ -1,12 +1,47 @@
 import inspect
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import date, datetime
-from typing import List, Optional, Union
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 
 from fastapi import File
 from src.employees.models import Employee
 
-from .enums import Action, ApprovalStatus, RecurringFrequencyUnit, WfhType
+from .enums import (
+    Action,
+    ApprovalStatus,
+    PaginationMode,
+    RecurringFrequencyUnit,
+    SubordinatesScope,
+    WfhType,
+)
+
+
+def _parse_datetime(value: str) -> datetime:
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        return datetime.strptime(value, "%Y-%m-%d %H:%M:%S")
+
+
+def _parse_date(value: str) -> date:
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        return datetime.strptime(value, "%Y-%m-%d %H:%M:%S").date()
+
+
+@lru_cache(maxsize=None)
+def _get_field_parsers(cls) -> Dict[str, Optional[Callable[[str], Any]]]:
+    """Map each init parameter of the class to the parser for its string values, if any.
+
+    Built once per class, since inspecting the signature costs more than the conversion.
+    """
+    parsers = {datetime: _parse_datetime, date: _parse_date}
+    return {
+        name: parsers.get(parameter.annotation)
+        for name, parameter in inspect.signature(cls).parameters.items()
+    }
 
 
 @dataclass
@@ -15,25 +50,13 @@ class BaseClass:
 
     @classmethod
     def from_dict(cls, env):
-        cls_signature = inspect.signature(cls)
-        cls_parameters = cls_signature.parameters
-        cls_type_hints = {k: v.annotation for k, v in cls_parameters.items()}
+        field_parsers = _get_field_parsers(cls)
 
         parsed_env = {}
         for k, v in env.items():
-            if k in cls_type_hints:
-                if cls_type_hints[k] == datetime and isinstance(v, str):
-                    try:
-                        parsed_env[k] = datetime.fromisoformat(v)
-                    except ValueError:
-                        parsed_env[k] = datetime.strptime(v, "%Y-%m-%d %H:%M:%S")
-                elif cls_type_hints[k] == date and isinstance(v, str):
-                    try:
-                        parsed_env[k] = date.fromisoformat(v)
-                    except ValueError:
-                        parsed_env[k] = datetime.strptime(v, "%Y-%m-%d %H:%M:%S").date()
-                else:
-                    parsed_env[k] = v
+            if k in field_parsers:
+                parser = field_parsers[k]
+                parsed_env[k] = parser(v) if parser is not None and isinstance(v, str) else v
 
         return cls(**parsed_env)
 
@@ -53,6 +76,41 @@ class ArrangementFilters(BaseClass):
     department: Optional[str] = None
     staff_ids: Optional[Union[int, List[int]]] = None
     manager_id: Optional[int] = None
+    scope: SubordinatesScope = SubordinatesScope.DIRECT
+    depth: Optional[int] = None
+
+
+@dataclass
+class ArrangementLogFilters(BaseClass):
+    """Dataclass for arrangement log filters."""
+
+    requester_staff_id: Optional[int] = None
+    approving_officer: Optional[int] = None
+    arrangement_id: Optional[int] = None
+    action: Optional[List[Action]] = None
+    approval_status: Optional[List[ApprovalStatus]] = None
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+
+
+@dataclass
+class ArrangementStatsFilters(BaseClass):
+    """Dataclass for arrangement statistics filters."""
+
+    start_date: date
+    end_date: date
+    department: Optional[str] = None
+    current_approval_status: List[ApprovalStatus] = field(
+        default_factory=lambda: [ApprovalStatus.APPROVED]
+    )
+    manager_id: Optional[int] = None
+    scope: SubordinatesScope = SubordinatesScope.DIRECT
+    depth: Optional[int] = None
+
+    @property
+    def max_depth(self) -> Optional[int]:
+        """The depth of the reports of the manager to include, or None for all of them."""
+        return self.depth if self.scope == SubordinatesScope.SUBTREE else 1
 
 
 @dataclass
@@ -61,6 +119,9 @@ class PaginationConfig(BaseClass):
 
     items_per_page: int = 10
     page_num: int = 1
+    pagination_mode: PaginationMode = PaginationMode.OFFSET
+    cursor: Optional[str] = None
+    include_total_count: bool = True
 
 
 @dataclass
@@ -84,6 +145,7 @@ class CreateArrangementRequest(BaseClass):
     supporting_doc_1: Optional[File] = None
     supporting_doc_2: Optional[File] = None
     supporting_doc_3: Optional[File] = None
+    is_series: bool = False
 
 
 @dataclass
@@ -101,11 +163,41 @@ class UpdateArrangementRequest(BaseClass):
     auto_reject: Optional[bool] = False
 
 
+@dataclass
+class BulkUpdateArrangementRequest(BaseClass):
+    """Dataclass for an action on several arrangements, given by id or by recurring request."""
+
+    update_datetime: datetime
+    action: Action
+    approving_officer: int
+    arrangement_ids: Optional[List[int]] = None
+    batch_id: Optional[int] = None
+    status_reason: Optional[str] = None
+    auto_reject: Optional[bool] = False
+
+
+@dataclass
+class UpdateSeriesRequest(BaseClass):
+    """Dataclass for an action on a recurring series, or on one of its occurrences if a WFH date
+    is given."""
+
+    batch_id: int
+    update_datetime: datetime
+    action: Action
+    approving_officer: int
+    wfh_date: Optional[date] = None
+    status_reason: Optional[str] = None
+
+
 @dataclass
 class ArrangementResponse(BaseClass):
-    """Dataclass for created arrangement."""
+    """Dataclass for created arrangement.
 
-    arrangement_id: int
+    The occurrences of a recurring series have no arrangement id or log, as they are generated
+    from the series when read.
+    """
+
+    arrangement_id: Optional[int]
     update_datetime: datetime
     requester_staff_id: int
     wfh_date: date
@@ -142,6 +234,7 @@ class ArrangementLogResponse(BaseClass):
     supporting_doc_1: Optional[File]
     supporting_doc_2: Optional[File]
     supporting_doc_3: Optional[File]
+    status_reason: Optional[str] = None
 
 
 @dataclass
@@ -156,10 +249,11 @@ class CreatedArrangementGroupByDate(BaseClass):
 class PaginationMeta(BaseClass):
     """Dataclass for pagination meta."""
 
-    total_count: int
+    total_count: Optional[int]
     page_size: int
-    page_num: int
-    total_pages: int
+    page_num: Optional[int]
+    total_pages: Optional[int]
+    next_cursor: Optional[str] = None
 
 
 @dataclass
@@ -180,3 +274,74 @@ class CreatedRecurringRequest(RecurringRequestDetails):
     """Dataclass for created recurring request."""
 
     batch_id: int
+
+
+@dataclass
+class RecurringSeriesResponse(CreatedRecurringRequest):
+    """Dataclass for a recurring series, whose occurrences are generated when read."""
+
+    wfh_type: Optional[WfhType] = None
+    current_approval_status: Optional[ApprovalStatus] = None
+    update_datetime: Optional[datetime] = None
+    approving_officer: Optional[int] = None
+    delegate_approving_officer: Optional[int] = None
+    status_reason: Optional[str] = None
+
+
+def _empty_wfh_counts() -> Dict[str, int]:
+    return {wfh_type.value: 0 for wfh_type in WfhType}
+
+
+@dataclass
+class ArrangementCounts(BaseClass):
+    """Dataclass for the number of arrangements of each WFH type.
+
+    Arrangements with a reason starting with "OOO" are also counted as on leave.
+    """
+
+    wfh_counts: Dict[str, int] = field(default_factory=_empty_wfh_counts)
+    on_leave: int = 0
+
+    def add(self, wfh_type: str, count: int, on_leave: int):
+        self.wfh_counts[wfh_type] += count
+        self.on_leave += on_leave
+
+
+@dataclass
+class DepartmentStats(ArrangementCounts):
+    """Dataclass for the arrangement statistics of a department."""
+
+    department: str = ""
+    headcount: int = 0
+
+
+@dataclass
+class DailyStats(ArrangementCounts):
+    """Dataclass for the arrangement statistics of a WFH date."""
+
+    wfh_date: Optional[date] = None
+
+
+@dataclass
+class ArrangementStats(ArrangementCounts):
+    """Dataclass for the arrangement statistics of a date range."""
+
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+    headcount: int = 0
+    departments: List[DepartmentStats] = field(default_factory=list)
+    days: List[DailyStats] = field(default_factory=list)
+
+
+@dataclass
+class AutoRejectReport(BaseClass):
+    """Dataclass for the outcome of a run of the auto-rejection of expiring requests."""
+
+    total_count: int = 0
+    processed_count: int = 0
+    failed_count: int = 0
+    failed_ids: List[int] = field(default_factory=list)
+    # Batch ids and WFH dates of the occurrences of recurring series that failed
+    failed_occurrences: List[Tuple[int, date]] = field(default_factory=list)
+    failed_emails: List[str] = field(default_factory=list)
+    duration_seconds: float = 0.0
@@ -29,6 +29,18 @@ class RecurringFrequencyUnit(Enum):
     MONTHLY = "month"
 
 
+class PaginationMode(Enum):
+    OFFSET = "offset"
+    CURSOR = "cursor"
+
+
+class SubordinatesScope(Enum):
+    # The employees whose arrangements the manager approves, or reporting to them for statistics
+    DIRECT = "direct"
+    # The employees reporting to the manager directly or indirectly
+    SUBTREE = "subtree"
+
+
 STATUS_ACTION_MAPPING = {
     ApprovalStatus.PENDING_APPROVAL: {
         Action.APPROVE: ApprovalStatus.APPROVED,
@@ -1,3 +1,5 @@
+from datetime import date
+
 from .enums import Action, ApprovalStatus
 
 
@@ -7,13 +9,48 @@ class ArrangementNotFoundException(Exception):
         super().__init__(self.message)
 
 
+class BatchNotFoundException(Exception):
+    def __init__(self, batch_id: int):
+        self.message = f"Recurring request with batch ID {batch_id} not found"
+        super().__init__(self.message)
+
+
+class SeriesBatchNotSupportedException(Exception):
+    def __init__(self, batch_id: int):
+        self.message = (
+            f"Batch ID {batch_id} is a recurring series, "
+            f"update it with /arrangements/series/{batch_id}/status instead"
+        )
+        super().__init__(self.message)
+
+
+class SeriesOccurrenceNotFoundException(Exception):
+    def __init__(self, batch_id: int, wfh_date: date):
+        self.message = (
+            f"Occurrence on {wfh_date} of recurring series with batch ID {batch_id} not found"
+        )
+        super().__init__(self.message)
+
+
 class ArrangementActionNotAllowedException(Exception):
     def __init__(self, current_approval_status: ApprovalStatus, action: Action):
         self.message = f"Action {action} not allowed for current status {current_approval_status}"
         super().__init__(self.message)
 
 
+class ArrangementStatusChangedException(Exception):
+    def __init__(self, arrangement_id: int):
+        self.message = f"Arrangement with ID {arrangement_id} changed status during the update"
+        super().__init__(self.message)
+
+
 class S3UploadFailedException(Exception):
     def __init__(self, message: str):
         self.message = message
         super().__init__(self.message)
+
+
+class InvalidCursorException(Exception):
+    def __init__(self, cursor: str):
+        self.message = f"Invalid pagination cursor {cursor}"
+        super().__init__(self.message)
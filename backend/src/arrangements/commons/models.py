@@ -1,7 +1,18 @@
-from sqlalchemy import Column, DateTime, Enum, ForeignKey, Integer, String
+from sqlalchemy import (
+    Boolean,
+    Column,
+    Date,
+    DateTime,
+    Enum,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+)
 from sqlalchemy.orm import relationship
 
 from ...database import Base
+from ...fts import FtsIndex
 from .enums import Action, ApprovalStatus, RecurringFrequencyUnit, WfhType
 
 
@@ -31,7 +42,7 @@ class ArrangementLog(Base):
         doc="Staff ID of the employee who made the request",
     )
     wfh_date = Column(
-        String,
+        Date,
         nullable=False,
         doc="Date of the WFH arrangement",
     )
@@ -86,6 +97,11 @@ class ArrangementLog(Base):
         nullable=True,
         doc="URL of the third supporting document",
     )
+    status_reason = Column(
+        String(length=255),
+        nullable=True,
+        doc="Reason for approval or rejection",
+    )
 
     requester_info = relationship(
         "Employee",
@@ -98,6 +114,15 @@ class ArrangementLog(Base):
         back_populates="arrangement_logs_approved",
     )
 
+    __table_args__ = (
+        Index("ix_arrangement_logs_update_datetime", "update_datetime"),
+        Index(
+            "ix_arrangement_logs_arrangement_update_datetime", "arrangement_id", "update_datetime"
+        ),
+        Index(
+            "ix_arrangement_logs_requester_update_datetime", "requester_staff_id", "update_datetime"
+        ),
+    )
     # __table_args__ = (
     #     CheckConstraint("wfh_type IN ('full', 'am', 'pm')", name="check_wfh_type"),
     #     CheckConstraint(
@@ -131,7 +156,7 @@ class LatestArrangement(Base):
         doc="Staff ID of the employee who made the request",
     )
     wfh_date = Column(
-        String(length=50),
+        Date,
         doc="Date of the WFH arrangement",
     )
     wfh_type = Column(
@@ -173,17 +198,18 @@ class LatestArrangement(Base):
         nullable=True,
         doc="Unique identifier for the latest log entry",
     )
+    # Loaded per query with contains_eager / joinedload where the employee is needed
     requester_info = relationship(
         "Employee",
         back_populates="latest_arrangements_requested",
         foreign_keys=[requester_staff_id],
-        lazy="immediate",
+        lazy="select",
     )
     approving_officer_info = relationship(
         "Employee",
         back_populates="latest_arrangements_approved",
         foreign_keys=[approving_officer],
-        lazy="immediate",
+        lazy="select",
     )
     delegate_approving_officer_info = relationship(  # New relationship for delegate
         "Employee",
@@ -210,6 +236,22 @@ class LatestArrangement(Base):
         nullable=True,
         doc="Reason for approval or rejection",
     )
+
+    __table_args__ = (
+        Index("ix_latest_arrangements_requester_wfh_date", "requester_staff_id", "wfh_date"),
+        Index(
+            "ix_latest_arrangements_approver_status_wfh_date",
+            "approving_officer",
+            "current_approval_status",
+            "wfh_date",
+        ),
+        Index(
+            "ix_latest_arrangements_delegate_status",
+            "delegate_approving_officer",
+            "current_approval_status",
+        ),
+        Index("ix_latest_arrangements_status_wfh_date", "current_approval_status", "wfh_date"),
+    )
     # __table_args__ = (
     #     CheckConstraint("wfh_type IN ('full', 'am', 'pm')", name="check_wfh_type"),
     #     CheckConstraint(
@@ -219,6 +261,10 @@ class LatestArrangement(Base):
     # )
 
 
+# Index for the reason filter of arrangements
+arrangement_reason_index = FtsIndex(LatestArrangement.__table__, "reason_description")
+
+
 class RecurringRequest(Base):
     __tablename__ = "recurring_requests"
     batch_id = Column(
@@ -263,5 +309,137 @@ class RecurringRequest(Base):
         nullable=False,
         doc="Number of occurrences of the recurring WFH request",
     )
+    # The occurrences of a series are not stored as arrangements, but generated from the columns
+    # below when read, except on the dates of its exceptions
+    is_series = Column(
+        Boolean,
+        nullable=False,
+        default=False,
+        doc="Whether the occurrences are generated when read instead of stored as arrangements",
+    )
+    update_datetime = Column(
+        DateTime,
+        nullable=True,
+        doc="Date and time of the latest update of a series",
+    )
+    wfh_type = Column(
+        Enum(WfhType),
+        nullable=True,
+        doc="Type of WFH arrangement of a series: full day, AM, or PM",
+    )
+    current_approval_status = Column(
+        Enum(ApprovalStatus),
+        nullable=True,
+        doc="Current status of the occurrences of a series without an exception",
+    )
+    approving_officer = Column(
+        Integer,
+        ForeignKey("employees.staff_id"),
+        nullable=True,
+        doc="Staff ID of the approving officer of a series",
+    )
+    delegate_approving_officer = Column(
+        Integer,
+        ForeignKey("employees.staff_id"),
+        nullable=True,
+        doc="Staff ID of the delegate approving officer of a series",
+    )
+    supporting_doc_1 = Column(
+        String(length=255),
+        nullable=True,
+        doc="URL of the first supporting document",
+    )
+    supporting_doc_2 = Column(
+        String(length=255),
+        nullable=True,
+        doc="URL of the second supporting document",
+    )
+    supporting_doc_3 = Column(
+        String(length=255),
+        nullable=True,
+        doc="URL of the third supporting document",
+    )
+    status_reason = Column(
+        String(length=255),
+        nullable=True,
+        doc="Reason for approval or rejection of a series",
+    )
 
+    __table_args__ = (
+        Index("ix_recurring_requests_series_requester", "is_series", "requester_staff_id"),
+    )
     # __table_args__ = (CheckConstraint("wfh_type IN ('full', 'am', 'pm')", name="check_wfh_type"),)
+
+
+# Index for the reason filter of recurring series, matched in the same way as arrangements
+series_reason_index = FtsIndex(RecurringRequest.__table__, "reason_description")
+
+
+class RecurringRequestException(Base):
+    """Status of an occurrence of a series that differs from the status of the series, e.g. a
+    cancelled or withdrawn date."""
+
+    __tablename__ = "recurring_request_exceptions"
+    batch_id = Column(
+        Integer,
+        ForeignKey("recurring_requests.batch_id"),
+        primary_key=True,
+        doc="Unique identifier for the series",
+    )
+    wfh_date = Column(
+        Date,
+        primary_key=True,
+        doc="Date of the occurrence",
+    )
+    update_datetime = Column(
+        DateTime,
+        nullable=False,
+        doc="Date and time of the latest update of the occurrence",
+    )
+    current_approval_status = Column(
+        Enum(ApprovalStatus),
+        nullable=False,
+        doc="Current status of the occurrence: pending approval, pending withdrawal, approved, rejected, withdrawn or cancelled",
+    )
+    status_reason = Column(
+        String(length=255),
+        nullable=True,
+        doc="Reason for the status of the occurrence",
+    )
+
+
+class DailyWfhRollup(Base):
+    """Number of approved arrangements per WFH date, department and WFH type.
+
+    Kept up to date by the arrangement crud functions in the same transaction as the status change,
+    and recomputed from latest_arrangements by `crud.rebuild_daily_wfh_rollup`.
+    """
+
+    __tablename__ = "daily_wfh_rollup"
+    wfh_date = Column(
+        Date,
+        primary_key=True,
+        doc="Date of the WFH arrangements",
+    )
+    dept = Column(
+        String(length=50),
+        primary_key=True,
+        doc="Department of the requesters",
+    )
+    wfh_type = Column(
+        Enum(WfhType),
+        primary_key=True,
+        doc="Type of WFH arrangement: full day, AM, or PM",
+    )
+    count = Column(
+        Integer,
+        nullable=False,
+        default=0,
+        doc="Number of approved arrangements",
+    )
+    on_leave_count = Column(
+        Integer,
+        nullable=False,
+        default=0,
+        doc="Number of approved arrangements with a reason marking them as leave",
+    )
@@ -6,7 +6,14 @@ from pydantic import Field, ValidationInfo, field_serializer, field_validator
 from src.employees.schemas import EmployeeBase
 
 from ...base import BaseSchema
-from .enums import Action, ApprovalStatus, RecurringFrequencyUnit, WfhType
+from .enums import (
+    Action,
+    ApprovalStatus,
+    PaginationMode,
+    RecurringFrequencyUnit,
+    SubordinatesScope,
+    WfhType,
+)
 
 
 class ArrangementFilters(BaseSchema):
@@ -67,6 +74,131 @@ class ArrangementFilters(BaseSchema):
         )
 
 
+class SubordinatesScopeConfig(BaseSchema):
+    scope: SubordinatesScope = Field(
+        SubordinatesScope.DIRECT,
+        title="Arrangements approved by the manager (direct), or of all employees under the manager",
+    )
+    depth: Optional[int] = Field(
+        None,
+        ge=1,
+        title="Levels of reports under the manager to include in the subtree scope (default all)",
+    )
+
+    @classmethod
+    def as_query(
+        cls,
+        scope: SubordinatesScope = Query(SubordinatesScope.DIRECT),
+        depth: Optional[int] = Query(None, ge=1),
+    ):
+        return cls(scope=scope, depth=depth)
+
+
+class ArrangementLogFilters(BaseSchema):
+    requester_staff_id: Optional[int] = Field(
+        None,
+        title="Staff ID of the employee who made the request",
+    )
+    approving_officer: Optional[int] = Field(
+        None,
+        title="Staff ID of the approving officer",
+    )
+    arrangement_id: Optional[int] = Field(
+        None,
+        title="ID of the arrangement",
+    )
+    action: Optional[List[Action]] = Field(
+        None,
+        title="Action that was logged",
+    )
+    approval_status: Optional[List[ApprovalStatus]] = Field(
+        None,
+        title="Approval status after the logged action",
+    )
+    start_date: Optional[date] = Field(
+        None,
+        title="Start of the date range of log update datetimes",
+    )
+    end_date: Optional[date] = Field(
+        None,
+        title="End of the date range of log update datetimes (inclusive)",
+    )
+
+    @classmethod
+    def as_query(
+        cls,
+        requester_staff_id: Optional[int] = Query(None),
+        approving_officer: Optional[int] = Query(None),
+        arrangement_id: Optional[int] = Query(None),
+        action: Optional[List[Action]] = Query(None),
+        approval_status: Optional[List[ApprovalStatus]] = Query(None),
+        start_date: Optional[date] = Query(None),
+        end_date: Optional[date] = Query(None),
+    ):
+        return cls(
+            requester_staff_id=requester_staff_id,
+            approving_officer=approving_officer,
+            arrangement_id=arrangement_id,
+            action=action,
+            approval_status=approval_status,
+            start_date=start_date,
+            end_date=end_date,
+        )
+
+
+class ArrangementStatsFilters(BaseSchema):
+    start_date: date = Field(
+        datetime.now().date(),
+        title="Start of the date range of WFH dates",
+    )
+    end_date: Optional[date] = Field(
+        None,
+        title="End of the date range of WFH dates (inclusive), defaults to the start date",
+    )
+    department: Optional[str] = Field(
+        None,
+        title="Department of the employees",
+    )
+    current_approval_status: List[ApprovalStatus] = Field(
+        [ApprovalStatus.APPROVED],
+        title="Current approval statuses of the arrangements to count",
+    )
+    manager_id: Optional[int] = Field(
+        None,
+        title="Only count the employees reporting to this manager",
+    )
+    scope: SubordinatesScope = Field(
+        SubordinatesScope.DIRECT,
+        title="Count the direct reports of the manager, or all employees under the manager",
+    )
+    depth: Optional[int] = Field(
+        None,
+        ge=1,
+        title="Levels of reports under the manager to count in the subtree scope (default all)",
+    )
+
+    @classmethod
+    def as_query(
+        cls,
+        start_date: date = Query(datetime.now().date()),
+        end_date: Optional[date] = Query(None),
+        department: Optional[str] = Query(None),
+        current_approval_status: List[ApprovalStatus] = Query([ApprovalStatus.APPROVED]),
+        manager_id: Optional[int] = Query(None),
+        scope: SubordinatesScope = Query(SubordinatesScope.DIRECT),
+        depth: Optional[int] = Query(None, ge=1),
+    ):
+        return cls(
+            start_date=start_date,
+            end_date=end_date or start_date,
+            department=department,
+            current_approval_status=current_approval_status,
+            manager_id=manager_id,
+            scope=scope,
+            depth=depth,
+        )
+
+
 class PaginationConfig(BaseSchema):
     items_per_page: Optional[int] = Field(
         default=10,
@@ -76,16 +208,34 @@ class PaginationConfig(BaseSchema):
         default=1,
         title="Page number",
     )
+    pagination_mode: Optional[PaginationMode] = Field(
+        default=PaginationMode.OFFSET,
+        title="Paginate by page number (offset) or by the cursor returned with the previous page",
+    )
+    cursor: Optional[str] = Field(
+        default=None,
+        title="Cursor of the page to fetch in cursor mode, omitted for the first page",
+    )
+    include_total_count: Optional[bool] = Field(
+        default=True,
+        title="Whether to compute the total number of items",
+    )
 
     @classmethod
     def as_query(
         cls,
         items_per_page: Optional[int] = Query(10),
         page_num: Optional[int] = Query(1),
+        pagination_mode: Optional[PaginationMode] = Query(PaginationMode.OFFSET),
+        cursor: Optional[str] = Query(None),
+        include_total_count: Optional[bool] = Query(True),
     ):
         return cls(
             items_per_page=items_per_page,
             page_num=page_num,
+            pagination_mode=pagination_mode,
+            cursor=cursor,
+            include_total_count=include_total_count,
         )
 
 
@@ -101,6 +251,12 @@ class CreateArrangementRequest(BaseSchema):
                 )
         return v
 
+    @field_validator("is_series")
+    def validate_is_series(cls, v: bool, info: ValidationInfo) -> bool:
+        if v and not info.data.get("is_recurring"):
+            raise ValueError("'is_series' can only be True when 'is_recurring' is True")
+        return v
+
     @field_validator("wfh_date")
     def validate_wfh_date(cls, v: date, info: ValidationInfo) -> date:
         if (v - datetime.now().date()).days < 1:
@@ -140,6 +296,10 @@ class CreateArrangementRequest(BaseSchema):
         None,
         title="Number of times the recurring WFH request will occur",
     )
+    is_series: bool = Field(
+        False,
+        title="Flag to store a recurring WFH request as a series, whose occurrences are generated when read",
+    )
 
     @classmethod
     def as_form(
@@ -152,6 +312,7 @@ class CreateArrangementRequest(BaseSchema):
         recurring_frequency_number: Annotated[Optional[int], Form()] = None,
         recurring_frequency_unit: Annotated[Optional[RecurringFrequencyUnit], Form()] = None,
         recurring_occurrences: Annotated[Optional[int], Form()] = None,
+        is_series: Annotated[bool, Form()] = False,
     ):
         return cls(
             requester_staff_id=requester_staff_id,
@@ -162,6 +323,7 @@ class CreateArrangementRequest(BaseSchema):
             recurring_frequency_number=recurring_frequency_number,
             recurring_frequency_unit=recurring_frequency_unit,
             recurring_occurrences=recurring_occurrences,
+            is_series=is_series,
         )
 
 
@@ -193,6 +355,25 @@ class UpdateArrangementRequest(BaseSchema):
         )
 
 
+class BulkUpdateArrangementRequest(UpdateArrangementRequest):
+    arrangement_ids: Optional[List[int]] = Field(
+        None,
+        title="IDs of the arrangements to be updated",
+        min_length=1,
+    )
+    batch_id: Optional[int] = Field(
+        None,
+        title="ID of the recurring request whose arrangements are to be updated",
+        validate_default=True,
+    )
+
+    @field_validator("batch_id")
+    def validate_batch_id(cls, v: Optional[int], info: ValidationInfo) -> Optional[int]:
+        if (v is None) == (info.data.get("arrangement_ids") is None):
+            raise ValueError("Exactly one of arrangement_ids and batch_id must be provided")
+        return v
+
+
 class ArrangementResponse(BaseSchema):
     @field_serializer("wfh_date")
     def serialize_wfh_date(self, wfh_date: date) -> str:
@@ -210,9 +391,9 @@ class ArrangementResponse(BaseSchema):
     def serialize_current_approval_status(self, current_approval_status: ApprovalStatus) -> str:
         return current_approval_status.value
 
-    arrangement_id: int = Field(
+    arrangement_id: Optional[int] = Field(
         ...,
-        title="ID of the arrangement",
+        title="ID of the arrangement, or None for an occurrence of a recurring series",
     )
     update_datetime: datetime = Field(
         ...,
@@ -251,9 +432,9 @@ class ArrangementResponse(BaseSchema):
         ...,
         title="ID of the batch",
     )
-    latest_log_id: int = Field(
+    latest_log_id: Optional[int] = Field(
         ...,
-        title="ID of the latest log",
+        title="ID of the latest log, or None for an occurrence of a recurring series",
     )
     supporting_doc_1: Optional[str] = Field(
         ...,
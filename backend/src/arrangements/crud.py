@@ -1,72 +1,316 @@
+import heapq
 from dataclasses import asdict
-from datetime import datetime
-from typing import Dict, List, Optional, Union
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Tuple, Type, Union
 from zoneinfo import ZoneInfo
 
 # from pydantic import ValidationError
-from sqlalchemy import and_, func, or_
+from sqlalchemy import and_, case, event, func, insert, inspect, or_, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy.orm import Session, class_mapper
-from src.employees.models import (
-    Employee,  # Ensure Employee model is correctly defined and imported
+from sqlalchemy.orm import (
+    ORMExecuteState,
+    Query,
+    Session,
+    class_mapper,
+    contains_eager,
+    joinedload,
+    noload,
 )
+from src.employees.crud import select_reporting_subtree
+from src.employees.models import Employee, employee_name_index
 
 from ..logger import logger
+from . import cache
 from .commons import models
 from .commons.dataclasses import (
     ArrangementFilters,
+    ArrangementLogFilters,
     ArrangementResponse,
+    ArrangementStatsFilters,
     CreateArrangementRequest,
     CreatedRecurringRequest,
+    PaginationConfig,
     RecurringRequestDetails,
+    RecurringSeriesResponse,
 )
-from .commons.enums import Action, ApprovalStatus
-from .utils import get_tomorrow_date
+from .commons.enums import (
+    Action,
+    ApprovalStatus,
+    PaginationMode,
+    SubordinatesScope,
+    WfhType,
+)
+from .commons.exceptions import InvalidCursorException
+from .utils import decode_cursor, get_recurring_dates, get_tomorrow_date
 
 singapore_timezone = ZoneInfo("Asia/Singapore")
 
+# Columns of the arrangements returned by the bulk status updates and the rejection of expiring
+# requests
+UPDATED_ARRANGEMENT_COLUMNS = [
+    "arrangement_id",
+    "update_datetime",
+    "requester_staff_id",
+    "wfh_date",
+    "wfh_type",
+    "current_approval_status",
+    "approving_officer",
+    "delegate_approving_officer",
+    "reason_description",
+    "batch_id",
+    "supporting_doc_1",
+    "supporting_doc_2",
+    "supporting_doc_3",
+    "status_reason",
+]
+
+STREAM_BATCH_SIZE = 1000
+
+# Arrangements with a reason starting with this prefix are counted as leave in the statistics
+ON_LEAVE_REASON_PREFIX = "OOO"
+
+# Arrangement and requester columns selected with `as_rows=True`, for formatting rows straight to
+# JSON without building ORM instances. Requester columns are prefixed with "requester_info_".
+ARRANGEMENT_ROW_COLUMNS = [
+    *models.LatestArrangement.__table__.columns,
+    *(column.label(f"requester_info_{column.name}") for column in Employee.__table__.columns),
+]
+
+
+def _parse_cursor_value(column, value: Any) -> Any:
+    python_type = column.type.python_type
+    if python_type in (date, datetime) and isinstance(value, str):
+        return python_type.fromisoformat(value)
+    if isinstance(value, python_type):
+        return value
+    raise ValueError(f"Expected {python_type.__name__} for {column.key}")
+
+
+def filter_after_cursor(query: Query, cursor: str, columns: List, descending=False) -> Query:
+    """Filter the query to the rows that come after the cursor when sorted by the given columns.
+
+    The columns must uniquely identify a row (e.g. end with the primary key) and the query must be
+    sorted by them in the same direction for keyset pagination to be correct.
+    """
+    values = decode_cursor(cursor)
+    try:
+        if len(values) != len(columns):
+            raise ValueError("Cursor does not match the sort columns")
+        values = [_parse_cursor_value(column, value) for column, value in zip(columns, values)]
+    except (TypeError, ValueError):
+        raise InvalidCursorException(cursor)
+
+    conditions = []
+    for i, (column, value) in enumerate(zip(columns, values)):
+        previous_columns_equal = [columns[j] == values[j] for j in range(i)]
+        conditions.append(
+            and_(*previous_columns_equal, column < value if descending else column > value)
+        )
+
+    return query.filter(or_(*conditions))
+
 
 def get_arrangement_by_id(db: Session, arrangement_id: int) -> Optional[Dict]:
-    response = db.query(models.LatestArrangement).get(arrangement_id)
+    response = db.get(
+        models.LatestArrangement,
+        arrangement_id,
+        options=[joinedload(models.LatestArrangement.requester_info)],
+    )
     return response.__dict__ if response else None
 
 
+def get_arrangements_by_ids(
+    db: Session, arrangement_ids: Optional[List[int]] = None, batch_id: Optional[int] = None
+) -> List[Dict]:
+    """Get the arrangements with the ids, or the arrangements of the recurring request batch, in a
+    single query."""
+    query = db.query(models.LatestArrangement)
+    if arrangement_ids is not None:
+        query = query.filter(models.LatestArrangement.arrangement_id.in_(arrangement_ids))
+    if batch_id is not None:
+        query = query.filter(models.LatestArrangement.batch_id == batch_id)
+    arrangements = query.order_by(models.LatestArrangement.arrangement_id).all()
+    return [arrangement.__dict__ for arrangement in arrangements]
+
+
 def get_arrangements(
     db: Session,
     filters: Union[None, ArrangementFilters] = None,
-) -> List[Dict]:
+    pagination: Optional[PaginationConfig] = None,
+    as_rows: bool = False,
+) -> Tuple[List[Dict], Optional[int]]:
+    """Get arrangements matching the filters.
+
+    If a pagination config is given, only the requested page is loaded and the total count is
+    computed with a separate COUNT query. When grouping by date, the page is made up of distinct
+    WFH dates (most recent first) instead of individual arrangements.
+
+    In cursor mode, the page is made up of the arrangements after the cursor, sorted by
+    (wfh_date, arrangement_id), so deep pages cost the same as the first page. The total count is
+    None if it is not requested.
+
+    If `as_rows` is set, each arrangement is a mapping of `ARRANGEMENT_ROW_COLUMNS` instead of the
+    attributes of an ORM instance.
+
+    The occurrences of the recurring series matching the filters are generated from their rules
+    and merged with the stored arrangements, after the arrangements of their date.
+
+    :return: A tuple of the arrangements on the page and the total number of items
+    """
+    query = _query_arrangements(db, filters)
+    occurrences = _get_series_occurrences(_query_series(db, filters), filters, as_rows)
+
+    return _paginate_arrangements(query, filters, pagination, as_rows, occurrences)
+
+
+def stream_arrangements(
+    db: Session, filters: Optional[ArrangementFilters] = None
+) -> Iterator[Mapping]:
+    """Stream the arrangements matching the filters as mappings of `ARRANGEMENT_ROW_COLUMNS`.
+
+    Rows are fetched `STREAM_BATCH_SIZE` at a time, so memory does not grow with the number of
+    stored arrangements. The occurrences of recurring series are merged in as they are generated.
+    """
+    query = _query_arrangements(db, filters).with_entities(*ARRANGEMENT_ROW_COLUMNS)
+    occurrences = _get_series_occurrences(_query_series(db, filters), filters, as_rows=True)
+
+    rows = (row._mapping for row in query.yield_per(STREAM_BATCH_SIZE))
+    yield from heapq.merge(rows, occurrences, key=_arrangement_sort_key)
+
+
+def _query_arrangements(db: Session, filters: Optional[ArrangementFilters]) -> Query:
     query = db.query(models.LatestArrangement)
     query = query.join(Employee, Employee.staff_id == models.LatestArrangement.requester_staff_id)
+    return _filter_arrangements(query, filters)
 
-    if filters:
-        # Apply optional filters
-        if filters.personal_staff_id:
-            query = query.filter(
-                models.LatestArrangement.requester_staff_id != filters.personal_staff_id
-            )
-            logger.info(f"Crud: Excluding personal staff id {filters.personal_staff_id}")
 
-        if filters.staff_ids:
-            staff_ids = (
-                list(set(filters.staff_ids))
-                if isinstance(filters.staff_ids, list)
-                else filters.staff_ids
-            )
+def get_team_arrangements(
+    db: Session,
+    staff_id: int,
+    filters: ArrangementFilters,
+    pagination: Optional[PaginationConfig] = None,
+    as_rows: bool = False,
+) -> Tuple[List[Dict], Optional[int]]:
+    """Get arrangements of the peers and subordinates of a staff member matching the filters.
 
-            if isinstance(staff_ids, int):
-                query = query.filter(models.LatestArrangement.requester_staff_id == staff_ids)
-            else:
-                query = query.filter(models.LatestArrangement.requester_staff_id.in_(staff_ids))
-            logger.info(f"Crud: Including staff ids {staff_ids}")
+    Peers are the employees with the same reporting manager as the staff member. Subordinate
+    arrangements are those the staff member approves, either directly or as a delegate. Both sets
+    are selected, de-duplicated and sorted in a single query, and paginated in the same way as
+    `get_arrangements`, together with the occurrences of their recurring series. The staff
+    member's own arrangements are excluded.
+
+    :return: A tuple of the arrangements on the page and the total number of items
+    """
+    query = _query_team_arrangements(db, staff_id, filters)
+    occurrences = _get_series_occurrences(
+        _query_team_series(db, staff_id, filters), filters, as_rows
+    )
+
+    return _paginate_arrangements(query, filters, pagination, as_rows, occurrences)
+
+
+def _query_team_arrangements(db: Session, staff_id: int, filters: ArrangementFilters) -> Query:
+    query = db.query(models.LatestArrangement)
+    query = query.join(Employee, Employee.staff_id == models.LatestArrangement.requester_staff_id)
+    query = query.filter(*_is_in_team(db, staff_id, models.LatestArrangement))
+    logger.info(f"Crud: Including peers and subordinates of staff id {staff_id}")
+    query = _filter_arrangements(query, filters)
+
+    return query
+
+
+def _is_in_team(
+    db: Session,
+    staff_id: int,
+    model: Union[Type[models.LatestArrangement], Type[models.RecurringRequest]],
+) -> List:
+    """Get the criteria of the arrangements or series of the peers and subordinates of the staff
+    member, excluding their own."""
+    reporting_manager = (
+        db.query(Employee.reporting_manager).filter(Employee.staff_id == staff_id).scalar_subquery()
+    )
+    peer_ids = db.query(Employee.staff_id).filter(Employee.reporting_manager == reporting_manager)
+
+    # Keep every predicate on the model so that each branch of the OR can use an index
+    return [
+        model.requester_staff_id != staff_id,
+        or_(
+            model.requester_staff_id.in_(peer_ids.scalar_subquery()),
+            _is_approved_by(staff_id, model),
+        ),
+    ]
+
+
+def get_arrangements_version(db: Session, filters: Optional[ArrangementFilters]) -> Tuple:
+    """Get a version of the arrangements matching the filters, without loading them.
+
+    The version is the latest log id, the latest update datetime and the number of the
+    arrangements, which changes whenever an arrangement in the scope changes status or enters or
+    leaves the scope. It is followed by the latest update datetime and the number of the
+    recurring series in the scope and of their exceptions.
+    """
+    return _get_version(_query_arrangements(db, filters)) + _get_series_version(
+        _query_series(db, filters)
+    )
+
+
+def get_team_arrangements_version(db: Session, staff_id: int, filters: ArrangementFilters) -> Tuple:
+    """Get a version of the arrangements of `get_team_arrangements` in the same way as
+    `get_arrangements_version`."""
+    return _get_version(_query_team_arrangements(db, staff_id, filters)) + _get_series_version(
+        _query_team_series(db, staff_id, filters)
+    )
+
+
+def _get_version(query: Query) -> Tuple:
+    version = (
+        query.order_by(None)
+        .with_entities(
+            func.max(models.LatestArrangement.latest_log_id),
+            func.max(models.LatestArrangement.update_datetime),
+            func.count(),
+        )
+        .one()
+    )
+    return tuple(version)
 
-        if filters.name:
-            query = query.filter(
-                or_(
-                    Employee.staff_fname.ilike(f"%{filters.name}%"),
-                    Employee.staff_lname.ilike(f"%{filters.name}%"),
-                )
-            )
-            logger.info(f"Crud: Including name {filters.name}")
+
+def _get_series_version(query: Query) -> Tuple:
+    exception = models.RecurringRequestException
+    version = (
+        query.order_by(None)
+        .outerjoin(exception, exception.batch_id == models.RecurringRequest.batch_id)
+        .with_entities(
+            func.max(models.RecurringRequest.update_datetime),
+            func.count(models.RecurringRequest.batch_id.distinct()),
+            func.max(exception.update_datetime),
+            func.count(exception.batch_id),
+        )
+        .one()
+    )
+    return tuple(version)
+
+
+def _is_approved_by(
+    manager_id: int,
+    model: Union[
+        Type[models.LatestArrangement], Type[models.RecurringRequest]
+    ] = models.LatestArrangement,
+):
+    return or_(
+        and_(
+            model.approving_officer == manager_id,
+            model.delegate_approving_officer == None,  # noqa: E711
+        ),
+        model.delegate_approving_officer == manager_id,
+    )
+
+
+def _filter_arrangements(query: Query, filters: Optional[ArrangementFilters]) -> Query:
+    if filters:
+        # Apply optional filters
+        query = query.filter(*_get_shared_criteria(query, filters, models.LatestArrangement))
 
         if filters.current_approval_status:
             query = query.filter(
@@ -78,69 +322,939 @@ def get_arrangements(
                 f"Crud: Including current approval status {filters.current_approval_status}"
             )
 
-        if filters.wfh_type:
-            models.LatestArrangement.wfh_type.in_(filters.wfh_type)
-            logger.info(f"Crud: Including wfh type {filters.wfh_type}")
-
         if filters.start_date:
-            query = query.filter(func.date(models.LatestArrangement.wfh_date) >= filters.start_date)
+            query = query.filter(models.LatestArrangement.wfh_date >= filters.start_date)
             logger.info(f"Crud: Including start date {filters.start_date}")
 
         if filters.end_date:
-            query = query.filter(func.date(models.LatestArrangement.wfh_date) <= filters.end_date)
+            query = query.filter(models.LatestArrangement.wfh_date <= filters.end_date)
             logger.info(f"Crud: Including end date {filters.end_date}")
 
-        if filters.reason:
-            query = query.filter(models.LatestArrangement.reason_description.like(filters.reason))
-            logger.info(f"Crud: Including reason {filters.reason}")
+        query = query.order_by(
+            models.LatestArrangement.wfh_date.asc(), models.LatestArrangement.arrangement_id.asc()
+        )
 
-        if filters.department:
-            query = query.filter(Employee.dept == filters.department)
-            logger.info(f"Crud: Including department {filters.department}")
+    return query
 
-        if filters.manager_id:
-            query = query.filter(
-                or_(
-                    and_(
-                        models.LatestArrangement.approving_officer == filters.manager_id,
-                        models.LatestArrangement.delegate_approving_officer == None,  # noqa: E711
-                    ),
-                    models.LatestArrangement.delegate_approving_officer == filters.manager_id,
-                )
+
+def _get_shared_criteria(
+    query: Query,
+    filters: ArrangementFilters,
+    model: Union[Type[models.LatestArrangement], Type[models.RecurringRequest]],
+) -> List:
+    """Get the criteria of the filters on the requester, WFH type and reason, which select the
+    arrangements and the recurring series in the same way. The query must be joined with the
+    requesters."""
+    criteria = []
+    if filters.personal_staff_id:
+        criteria.append(model.requester_staff_id != filters.personal_staff_id)
+        logger.info(f"Crud: Excluding personal staff id {filters.personal_staff_id}")
+
+    if filters.staff_ids:
+        staff_ids = (
+            list(set(filters.staff_ids))
+            if isinstance(filters.staff_ids, list)
+            else filters.staff_ids
+        )
+
+        if isinstance(staff_ids, int):
+            criteria.append(model.requester_staff_id == staff_ids)
+        else:
+            criteria.append(model.requester_staff_id.in_(staff_ids))
+        logger.info(f"Crud: Including staff ids {staff_ids}")
+
+    if filters.name:
+        criteria.append(
+            employee_name_index.search(query.session, filters.name, model.requester_staff_id)
+        )
+        logger.info(f"Crud: Including name {filters.name}")
+
+    if filters.wfh_type:
+        criteria.append(model.wfh_type.in_(filters.wfh_type))
+        logger.info(f"Crud: Including wfh type {filters.wfh_type}")
+
+    if filters.reason:
+        reason_index = (
+            models.arrangement_reason_index
+            if model is models.LatestArrangement
+            else models.series_reason_index
+        )
+        criteria.append(
+            reason_index.search(query.session, filters.reason, getattr(model, reason_index.rowid))
+        )
+        logger.info(f"Crud: Including reason {filters.reason}")
+
+    if filters.department:
+        criteria.append(Employee.dept == filters.department)
+        logger.info(f"Crud: Including department {filters.department}")
+
+    if filters.manager_id and filters.scope == SubordinatesScope.SUBTREE:
+        criteria.append(
+            model.requester_staff_id.in_(
+                select_reporting_subtree(filters.manager_id, filters.depth)
+            )
+        )
+        logger.info(
+            f"Crud: Including reports of manager id {filters.manager_id} "
+            f"down to depth {filters.depth or 'any'}"
+        )
+    elif filters.manager_id:
+        criteria.append(_is_approved_by(filters.manager_id, model))
+        logger.info(f"Crud: Including manager id {filters.manager_id}")
+
+    return criteria
+
+
+def _query_series(db: Session, filters: Optional[ArrangementFilters]) -> Query:
+    query = db.query(models.RecurringRequest, Employee)
+    query = query.join(Employee, Employee.staff_id == models.RecurringRequest.requester_staff_id)
+    query = query.filter(models.RecurringRequest.is_series.is_(True))
+    return _filter_series(query, filters)
+
+
+def _query_team_series(db: Session, staff_id: int, filters: ArrangementFilters) -> Query:
+    query = db.query(models.RecurringRequest, Employee)
+    query = query.join(Employee, Employee.staff_id == models.RecurringRequest.requester_staff_id)
+    query = query.filter(
+        models.RecurringRequest.is_series.is_(True),
+        *_is_in_team(db, staff_id, models.RecurringRequest),
+    )
+    return _filter_series(query, filters)
+
+
+def _filter_series(query: Query, filters: Optional[ArrangementFilters]) -> Query:
+    """Filter the recurring series that may have occurrences matching the filters.
+
+    The dates and statuses of the occurrences are only known once they are generated, so they are
+    filtered by `_get_series_occurrences`, apart from excluding the series starting after the end
+    date.
+    """
+    series = models.RecurringRequest
+    if filters:
+        query = query.filter(*_get_shared_criteria(query, filters, series))
+
+        if filters.end_date:
+            # The start dates are stored as ISO dates, which sort in the same order as the dates
+            query = query.filter(series.start_date <= filters.end_date.isoformat())
+
+    return query.order_by(series.batch_id)
+
+
+def _get_series_occurrences(
+    query: Query, filters: Optional[ArrangementFilters], as_rows: bool = False
+) -> List[Dict]:
+    """Generate the occurrences of the recurring series selected by the query that match the date
+    range and statuses of the filters, sorted by WFH date and batch id.
+
+    An occurrence has the keys of an arrangement from `get_arrangements`, with no arrangement id or
+    latest log id. It has the status of its series, unless it has an exception.
+    """
+    series_rows = query.all()
+    if not series_rows:
+        return []
+
+    start_date = filters.start_date if filters else None
+    end_date = filters.end_date if filters else None
+    approval_statuses = filters.current_approval_status if filters else None
+
+    exception = models.RecurringRequestException
+    exceptions_query = query.session.query(exception).filter(
+        exception.batch_id.in_([series.batch_id for series, _ in series_rows])
+    )
+    if start_date:
+        exceptions_query = exceptions_query.filter(exception.wfh_date >= start_date)
+    if end_date:
+        exceptions_query = exceptions_query.filter(exception.wfh_date <= end_date)
+    exceptions = {(row.batch_id, row.wfh_date): row for row in exceptions_query}
+
+    occurrences = []
+    for series, employee in series_rows:
+        if as_rows:
+            requester_info = {
+                f"requester_info_{column.name}": getattr(employee, column.key)
+                for column in Employee.__table__.columns
+            }
+        else:
+            requester_info = {"requester_info": employee}
+
+        for wfh_date in _get_series_dates(series):
+            if (start_date and wfh_date < start_date) or (end_date and wfh_date > end_date):
+                continue
+            occurrence = _get_occurrence(
+                series, wfh_date, exceptions.get((series.batch_id, wfh_date))
+            )
+            if approval_statuses and occurrence["current_approval_status"] not in approval_statuses:
+                continue
+            occurrences.append({**occurrence, **requester_info})
+
+    occurrences.sort(key=_arrangement_sort_key)
+
+    logger.info(f"Crud: Generated {len(occurrences)} occurrences of {len(series_rows)} series")
+
+    return occurrences
+
+
+def _get_series_dates(series: models.RecurringRequest) -> List[date]:
+    return get_recurring_dates(
+        date.fromisoformat(series.start_date[:10]),
+        series.recurring_frequency_number,
+        series.recurring_frequency_unit,
+        series.recurring_occurrences,
+    )
+
+
+def _get_occurrence(
+    series: models.RecurringRequest,
+    wfh_date: date,
+    exception: Optional[models.RecurringRequestException],
+) -> Dict:
+    return {
+        "arrangement_id": None,
+        "update_datetime": exception.update_datetime if exception else series.update_datetime,
+        "requester_staff_id": series.requester_staff_id,
+        "wfh_date": wfh_date,
+        "wfh_type": series.wfh_type,
+        "current_approval_status": (
+            exception.current_approval_status if exception else series.current_approval_status
+        ),
+        "approving_officer": series.approving_officer,
+        "delegate_approving_officer": series.delegate_approving_officer,
+        "reason_description": series.reason_description,
+        "batch_id": series.batch_id,
+        "latest_log_id": None,
+        "supporting_doc_1": series.supporting_doc_1,
+        "supporting_doc_2": series.supporting_doc_2,
+        "supporting_doc_3": series.supporting_doc_3,
+        "status_reason": exception.status_reason if exception else series.status_reason,
+    }
+
+
+def _arrangement_sort_key(arrangement: Mapping) -> Tuple:
+    """Sort key of the arrangements and the occurrences of series, which come after the
+    arrangements of their date."""
+    if arrangement["arrangement_id"] is None:
+        return (arrangement["wfh_date"], 1, arrangement["batch_id"])
+    return (arrangement["wfh_date"], 0, arrangement["arrangement_id"])
+
+
+def _get_cursor_sort_key(cursor: str) -> Tuple:
+    """Get the sort key of the item a cursor was created from, which is [wfh_date, arrangement_id]
+    for an arrangement and [wfh_date, None, batch_id] for an occurrence of a series."""
+    values = decode_cursor(cursor)
+    try:
+        if len(values) == 2:
+            return (
+                _parse_cursor_value(models.LatestArrangement.wfh_date, values[0]),
+                0,
+                _parse_cursor_value(models.LatestArrangement.arrangement_id, values[1]),
+            )
+        if len(values) == 3 and values[1] is None:
+            return (
+                _parse_cursor_value(models.LatestArrangement.wfh_date, values[0]),
+                1,
+                _parse_cursor_value(models.RecurringRequest.batch_id, values[2]),
+            )
+    except (TypeError, ValueError):
+        pass
+    raise InvalidCursorException(cursor)
+
+
+def get_arrangement_counts(db: Session, filters: ArrangementStatsFilters) -> List[Mapping]:
+    """Count the arrangements and occurrences of recurring series matching the filters per WFH
+    date, department and WFH type.
+
+    :return: Rows of wfh_date, dept, wfh_type, count and on_leave_count
+    """
+    query = _count_arrangements(db, filters.current_approval_status)
+    query = query.filter(
+        models.LatestArrangement.wfh_date >= filters.start_date,
+        models.LatestArrangement.wfh_date <= filters.end_date,
+    )
+    if filters.department:
+        query = query.filter(Employee.dept == filters.department)
+    if filters.manager_id:
+        query = query.filter(
+            models.LatestArrangement.requester_staff_id.in_(
+                select_reporting_subtree(filters.manager_id, filters.max_depth)
+            )
+        )
+    rows = query.all()
+
+    series_filters = ArrangementFilters(
+        current_approval_status=filters.current_approval_status,
+        start_date=filters.start_date,
+        end_date=filters.end_date,
+        department=filters.department,
+        manager_id=filters.manager_id,
+        scope=SubordinatesScope.SUBTREE,
+        depth=filters.max_depth,
+    )
+    occurrences = _get_series_occurrences(
+        _query_series(db, series_filters), series_filters, as_rows=True
+    )
+    if occurrences:
+        counts = {
+            (row.wfh_date, row.dept, row.wfh_type): [row.count, row.on_leave_count or 0]
+            for row in rows
+        }
+        for occurrence in occurrences:
+            _add_to_counts(
+                counts,
+                (
+                    occurrence["wfh_date"],
+                    occurrence["requester_info_dept"],
+                    occurrence["wfh_type"],
+                ),
+                occurrence["reason_description"],
+                1,
             )
-            logger.info(f"Crud: Including manager id {filters.manager_id}")
+        rows = [
+            {
+                "wfh_date": wfh_date,
+                "dept": dept,
+                "wfh_type": wfh_type,
+                "count": count,
+                "on_leave_count": on_leave_count,
+            }
+            for (wfh_date, dept, wfh_type), (count, on_leave_count) in counts.items()
+        ]
+    else:
+        rows = [row._mapping for row in rows]
+
+    logger.info(f"Crud: Found {len(rows)} arrangement counts")
+
+    return rows
+
+
+def _add_to_counts(
+    counts: Dict[Tuple, List[int]], key: Tuple, reason_description: Optional[str], delta: int
+):
+    """Add `delta` to the count of the key, and to its count of leave if the reason is leave."""
+    count = counts.setdefault(key, [0, 0])
+    count[0] += delta
+    if (reason_description or "").startswith(ON_LEAVE_REASON_PREFIX):
+        count[1] += delta
+
+
+def _count_arrangements(db: Session, approval_statuses: List[ApprovalStatus]) -> Query:
+    wfh_date = models.LatestArrangement.wfh_date
+    wfh_type = models.LatestArrangement.wfh_type
+    is_on_leave = case(
+        (models.LatestArrangement.reason_description.like(f"{ON_LEAVE_REASON_PREFIX}%"), 1),
+        else_=0,
+    )
+
+    query = db.query(
+        wfh_date,
+        Employee.dept,
+        wfh_type,
+        func.count().label("count"),
+        func.sum(is_on_leave).label("on_leave_count"),
+    )
+    query = query.join(Employee, Employee.staff_id == models.LatestArrangement.requester_staff_id)
+    query = query.filter(models.LatestArrangement.current_approval_status.in_(approval_statuses))
+    return query.group_by(wfh_date, Employee.dept, wfh_type)
+
+
+def get_daily_wfh_rollup(db: Session, filters: ArrangementStatsFilters) -> List[Mapping]:
+    """Get the approved arrangement counts of the date range from the daily WFH rollup.
+
+    :return: Rows of wfh_date, dept, wfh_type, count and on_leave_count, in the same form as
+        `get_arrangement_counts`
+    """
+    rollup = models.DailyWfhRollup
+    query = db.query(
+        rollup.wfh_date, rollup.dept, rollup.wfh_type, rollup.count, rollup.on_leave_count
+    )
+    query = query.filter(
+        rollup.wfh_date >= filters.start_date,
+        rollup.wfh_date <= filters.end_date,
+        rollup.count > 0,
+    )
+    if filters.department:
+        query = query.filter(rollup.dept == filters.department)
+    rows = query.all()
+
+    logger.info(f"Crud: Found {len(rows)} daily WFH rollup rows")
+
+    return [row._mapping for row in rows]
+
+
+def adjust_daily_wfh_rollup(db: Session, arrangement: models.LatestArrangement, delta: int):
+    """Add `delta` to the daily WFH rollup counts of the arrangement's date, department and type.
+
+    The change is not committed, so that it is committed or rolled back with the change of the
+    arrangement's status.
+    """
+    adjust_daily_wfh_rollups(db, [arrangement], delta)
+
+    logger.info(
+        f"Crud: Adjusted daily WFH rollup by {delta} for arrangement {arrangement.arrangement_id}"
+    )
+
+
+def adjust_daily_wfh_rollups(
+    db: Session,
+    arrangements: List[
+        Union[models.LatestArrangement, CreateArrangementRequest, ArrangementResponse]
+    ],
+    delta: int,
+):
+    """Add `delta` per arrangement to the daily WFH rollup counts of the arrangements' dates,
+    departments and types, in a single upsert. The change is not committed."""
+    requester_ids = {arrangement.requester_staff_id for arrangement in arrangements}
+    depts = dict(
+        db.query(Employee.staff_id, Employee.dept).filter(Employee.staff_id.in_(requester_ids))
+    )
+
+    counts: Dict[Tuple, List[int]] = {}
+    for arrangement in arrangements:
+        key = (
+            arrangement.wfh_date,
+            depts.get(arrangement.requester_staff_id),
+            WfhType(arrangement.wfh_type),
+        )
+        _add_to_counts(counts, key, arrangement.reason_description, delta)
+
+    rollup = models.DailyWfhRollup.__table__
+    statement = sqlite_insert(rollup).values(
+        [
+            {
+                "wfh_date": wfh_date,
+                "dept": dept,
+                "wfh_type": wfh_type,
+                "count": count,
+                "on_leave_count": on_leave_count,
+            }
+            for (wfh_date, dept, wfh_type), (count, on_leave_count) in counts.items()
+        ]
+    )
+    statement = statement.on_conflict_do_update(
+        index_elements=[rollup.c.wfh_date, rollup.c.dept, rollup.c.wfh_type],
+        set_={
+            "count": rollup.c.count + statement.excluded.count,
+            "on_leave_count": rollup.c.on_leave_count + statement.excluded.on_leave_count,
+        },
+    )
+    db.execute(statement)
+
+
+def rebuild_daily_wfh_rollup(db: Session) -> int:
+    """Recompute the daily WFH rollup from the approved arrangements and occurrences of series.
+
+    :return: The number of rollup rows
+    """
+    try:
+        row_count = _rebuild_daily_wfh_rollup(db)
+        db.commit()
+
+        logger.info(f"Crud: Rebuilt daily WFH rollup with {row_count} rows")
+
+        return row_count
+    except SQLAlchemyError as e:
+        db.rollback()
+        raise e
+
+
+def _rebuild_daily_wfh_rollup(db: Session) -> int:
+    """Recompute the daily WFH rollup without committing.
+
+    :return: The number of rollup rows
+    """
+    rollup = models.DailyWfhRollup.__table__
+    counts = _count_arrangements(db, [ApprovalStatus.APPROVED])
+
+    db.execute(rollup.delete())
+    result = db.execute(
+        insert(rollup).from_select(
+            ["wfh_date", "dept", "wfh_type", "count", "on_leave_count"], counts.statement
+        )
+    )
+    row_count = result.rowcount
+
+    approved_filters = ArrangementFilters(current_approval_status=[ApprovalStatus.APPROVED])
+    approved_occurrences = _get_series_occurrences(
+        _query_series(db, approved_filters), approved_filters
+    )
+    if approved_occurrences:
+        adjust_daily_wfh_rollups(
+            db,
+            [ArrangementResponse.from_dict(occurrence) for occurrence in approved_occurrences],
+            1,
+        )
+        row_count = db.query(models.DailyWfhRollup).count()
+
+    return row_count
+
+
+# Set in the info of sessions with uncommitted changes of employee departments
+_DEPT_CHANGED_KEY = "employee_dept_changed"
+
+
+@event.listens_for(Session, "after_flush")
+def _mark_changed_departments(session: Session, flush_context):
+    if any(
+        isinstance(instance, Employee) and inspect(instance).attrs.dept.history.has_changes()
+        for instance in session.dirty
+    ):
+        session.info[_DEPT_CHANGED_KEY] = True
 
-        query = query.order_by(models.LatestArrangement.wfh_date.asc())
 
-    results = query.all()
+@event.listens_for(Session, "do_orm_execute")
+def _mark_bulk_employee_updates(orm_execute_state: ORMExecuteState):
+    # The values of a bulk update are not inspected, so any bulk update of employees counts
+    if orm_execute_state.is_update and any(
+        mapper.class_ is Employee for mapper in orm_execute_state.all_mappers
+    ):
+        orm_execute_state.session.info[_DEPT_CHANGED_KEY] = True
 
-    logger.info(f"Crud: Found {len(results)} arrangements")
 
+@event.listens_for(Session, "before_commit")
+def _rebuild_rollup_of_changed_departments(session: Session):
+    """Rebuild the daily WFH rollup in the transaction that changes employee departments.
+
+    Approving an arrangement counts it under the current department of its requester, and undoing
+    the approval removes it from the department of the requester at that time. Rebuilding when a
+    department changes keeps the two the same.
+    """
+    # The pending changes are only flushed after this event otherwise
+    session.flush()
+    if session.info.pop(_DEPT_CHANGED_KEY, False):
+        row_count = _rebuild_daily_wfh_rollup(session)
+        logger.info(
+            f"Crud: Rebuilt daily WFH rollup with {row_count} rows after departments changed"
+        )
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_changed_departments(session: Session):
+    session.info.pop(_DEPT_CHANGED_KEY, None)
+
+
+def _approved_delta(
+    previous_approval_status: Optional[ApprovalStatus], approval_status: ApprovalStatus
+) -> int:
+    """Get the change in the number of approved arrangements when the status changes."""
+    return int(approval_status == ApprovalStatus.APPROVED) - int(
+        previous_approval_status == ApprovalStatus.APPROVED
+    )
+
+
+def _to_dicts(results: List, as_rows: bool) -> List[Dict]:
+    if as_rows:
+        return [result._mapping for result in results]
     return [result.__dict__ for result in results]
 
 
+def _paginate_arrangements(
+    query: Query,
+    filters: Optional[ArrangementFilters],
+    pagination: Optional[PaginationConfig],
+    as_rows: bool = False,
+    occurrences: Optional[List[Dict]] = None,
+) -> Tuple[List[Dict], Optional[int]]:
+    """Get the page of the arrangements of the query, merged with the occurrences of series from
+    `_get_series_occurrences`, if any, in the order of `_arrangement_sort_key`."""
+    occurrences = occurrences or []
+    wfh_date = models.LatestArrangement.wfh_date
+    sort_columns = [wfh_date, models.LatestArrangement.arrangement_id]
+
+    if as_rows:
+        rows_query = query.with_entities(*ARRANGEMENT_ROW_COLUMNS)
+    else:
+        # The requester is already joined for the filters, so load it from the same rows. The
+        # approving officer is not part of the response, so it is not loaded at all.
+        rows_query = query.options(
+            contains_eager(models.LatestArrangement.requester_info),
+            noload(models.LatestArrangement.approving_officer_info),
+        )
+
+    if pagination is None:
+        results = _merge_occurrences(_to_dicts(rows_query.all(), as_rows), occurrences)
+        logger.info(f"Crud: Found {len(results)} arrangements")
+        return results, len(results)
+
+    if pagination.pagination_mode == PaginationMode.CURSOR:
+        total_count = (
+            query.order_by(None).count() + len(occurrences)
+            if pagination.include_total_count
+            else None
+        )
+        rows_query = rows_query.order_by(None).order_by(*sort_columns)
+        if pagination.cursor:
+            cursor_key = _get_cursor_sort_key(pagination.cursor)
+            if cursor_key[1] == 0:
+                rows_query = filter_after_cursor(rows_query, pagination.cursor, sort_columns)
+            else:
+                # The cursor is an occurrence, which comes after the arrangements of its date
+                rows_query = rows_query.filter(wfh_date > cursor_key[0])
+            occurrences = [
+                occurrence
+                for occurrence in occurrences
+                if _arrangement_sort_key(occurrence) > cursor_key
+            ]
+        results = _to_dicts(rows_query.limit(pagination.items_per_page).all(), as_rows)
+        results = _merge_occurrences(results, occurrences)[: pagination.items_per_page]
+
+        logger.info(f"Crud: Found {len(results)} arrangements after cursor {pagination.cursor}")
+
+        return results, total_count
+
+    offset = (pagination.page_num - 1) * pagination.items_per_page
+
+    if filters and filters.group_by_date:
+        # Paginate over distinct dates, then load all arrangements on those dates
+        dates_query = query.order_by(None).with_entities(wfh_date).distinct()
+        if occurrences:
+            dates = sorted(
+                {row[0] for row in dates_query}
+                | {occurrence["wfh_date"] for occurrence in occurrences},
+                reverse=True,
+            )
+            total_count = len(dates)
+            page_dates = dates[offset : offset + pagination.items_per_page]
+        else:
+            total_count = dates_query.count()
+            page_dates = [
+                row[0]
+                for row in dates_query.order_by(wfh_date.desc())
+                .offset(offset)
+                .limit(pagination.items_per_page)
+                .all()
+            ]
+        results = rows_query.filter(wfh_date.in_(page_dates)).all() if page_dates else []
+        results = _merge_occurrences(
+            _to_dicts(results, as_rows),
+            [occurrence for occurrence in occurrences if occurrence["wfh_date"] in page_dates],
+        )
+    elif occurrences:
+        # The page holds at most the first offset + page size arrangements
+        total_count = query.order_by(None).count() + len(occurrences)
+        results = (
+            rows_query.order_by(None)
+            .order_by(*sort_columns)
+            .limit(offset + pagination.items_per_page)
+            .all()
+        )
+        results = _merge_occurrences(_to_dicts(results, as_rows), occurrences)
+        results = results[offset : offset + pagination.items_per_page]
+    else:
+        total_count = query.order_by(None).count()
+        results = rows_query.offset(offset).limit(pagination.items_per_page).all()
+        results = _to_dicts(results, as_rows)
+
+    logger.info(f"Crud: Found {len(results)} of {total_count} arrangements")
+
+    return results, total_count
+
+
+def _merge_occurrences(arrangements: List[Dict], occurrences: List[Dict]) -> List[Dict]:
+    if not occurrences:
+        return arrangements
+    return sorted([*arrangements, *occurrences], key=_arrangement_sort_key)
+
+
 def get_arrangement_logs(
     db: Session,
-) -> List[Dict]:
-    # TODO: Pagination and filters if have time
+    filters: Optional[ArrangementLogFilters] = None,
+    pagination: Optional[PaginationConfig] = None,
+) -> Tuple[List[Dict], Optional[int]]:
+    """Get arrangement logs matching the filters, most recent first.
+
+    Logs are sorted by (update_datetime, log_id) in descending order. If a pagination config is
+    given, only the requested page is loaded, either by offset or after the cursor.
+
+    :return: A tuple of the logs and the total number of logs, which is None if it is not requested
+    """
     query = db.query(models.ArrangementLog)
-    query = query.order_by(models.ArrangementLog.update_datetime.desc())
+    query = _filter_arrangement_logs(query, filters)
+    sort_columns = [models.ArrangementLog.update_datetime, models.ArrangementLog.log_id]
+    query = query.order_by(*[column.desc() for column in sort_columns])
 
-    logs = query.all()
+    if pagination is None:
+        logs = query.all()
+        return [log.__dict__ for log in logs], len(logs)
 
-    return [log.__dict__ for log in logs]
+    if pagination.pagination_mode == PaginationMode.CURSOR:
+        total_count = query.order_by(None).count() if pagination.include_total_count else None
+        if pagination.cursor:
+            query = filter_after_cursor(query, pagination.cursor, sort_columns, descending=True)
+        logs = query.limit(pagination.items_per_page).all()
+    else:
+        total_count = query.order_by(None).count()
+        offset = (pagination.page_num - 1) * pagination.items_per_page
+        logs = query.offset(offset).limit(pagination.items_per_page).all()
 
+    logger.info(f"Crud: Found {len(logs)} of {total_count} arrangement logs")
 
-def get_expiring_requests(db: Session):
-    tomorrow_date = get_tomorrow_date()
-    query = db.query(models.LatestArrangement)
-    query = query.filter(
+    return [log.__dict__ for log in logs], total_count
+
+
+def stream_arrangement_logs(
+    db: Session, filters: Optional[ArrangementLogFilters] = None
+) -> Iterator[Mapping]:
+    """Stream the arrangement logs matching the filters, most recent first, as mappings of the log
+    columns.
+
+    Rows are fetched in batches in the same way as `stream_arrangements`.
+    """
+    query = _filter_arrangement_logs(db.query(models.ArrangementLog), filters)
+    query = query.with_entities(*models.ArrangementLog.__table__.columns).order_by(
+        models.ArrangementLog.update_datetime.desc(), models.ArrangementLog.log_id.desc()
+    )
+
+    for row in query.yield_per(STREAM_BATCH_SIZE):
+        yield row._mapping
+
+
+def _filter_arrangement_logs(query: Query, filters: Optional[ArrangementLogFilters]) -> Query:
+    if filters is None:
+        return query
+
+    if filters.requester_staff_id:
+        query = query.filter(models.ArrangementLog.requester_staff_id == filters.requester_staff_id)
+        logger.info(f"Crud: Filtering logs by requester {filters.requester_staff_id}")
+
+    if filters.approving_officer:
+        query = query.filter(models.ArrangementLog.approving_officer == filters.approving_officer)
+        logger.info(f"Crud: Filtering logs by approving officer {filters.approving_officer}")
+
+    if filters.arrangement_id:
+        query = query.filter(models.ArrangementLog.arrangement_id == filters.arrangement_id)
+        logger.info(f"Crud: Filtering logs by arrangement {filters.arrangement_id}")
+
+    if filters.action:
+        query = query.filter(models.ArrangementLog.action.in_(filters.action))
+        logger.info(f"Crud: Filtering logs by actions {filters.action}")
+
+    if filters.approval_status:
+        query = query.filter(
+            models.ArrangementLog.updated_approval_status.in_(filters.approval_status)
+        )
+        logger.info(f"Crud: Filtering logs by approval statuses {filters.approval_status}")
+
+    # Compare against datetimes so that the update_datetime index can be used
+    if filters.start_date:
+        query = query.filter(
+            models.ArrangementLog.update_datetime >= datetime.combine(filters.start_date, time.min)
+        )
+        logger.info(f"Crud: Including logs from {filters.start_date}")
+
+    if filters.end_date:
+        query = query.filter(
+            models.ArrangementLog.update_datetime
+            < datetime.combine(filters.end_date + timedelta(days=1), time.min)
+        )
+        logger.info(f"Crud: Including logs until {filters.end_date}")
+
+    return query
+
+
+def _is_expiring():
+    """Criteria of the pending requests for WFH dates before tomorrow."""
+    return and_(
         models.LatestArrangement.current_approval_status == ApprovalStatus.PENDING_APPROVAL,
-        models.LatestArrangement.wfh_date < tomorrow_date.strftime("%Y-%m-%d"),
+        models.LatestArrangement.wfh_date < get_tomorrow_date(),
     )
-    arrangements = query.all()
 
-    return [arrangement.__dict__ for arrangement in arrangements]
+
+def get_expiring_request_ids(db: Session) -> List[int]:
+    """Get the ids of the pending requests for WFH dates before tomorrow, in order."""
+    query = db.query(models.LatestArrangement.arrangement_id).filter(_is_expiring())
+    return [row.arrangement_id for row in query.order_by(models.LatestArrangement.arrangement_id)]
+
+
+def reject_expiring_requests(
+    db: Session, arrangement_ids: List[int], status_reason: str
+) -> List[Dict]:
+    """Reject the arrangements with the ids that are still expiring, in a single transaction.
+
+    The arrangements are rejected with a single UPDATE ... RETURNING, so that those approved or
+    cancelled since their ids were read are left alone. Their logs are inserted with a multi-row
+    insert and linked with a bulk update. Rejecting a pending request leaves the WFH rollup
+    unchanged.
+
+    :return: The rejected arrangements, without their requesters
+    """
+    if not arrangement_ids:
+        return []
+
+    try:
+        criteria = [models.LatestArrangement.arrangement_id.in_(arrangement_ids), _is_expiring()]
+        # The update bypasses the flush events that mark the changed scopes of the cache
+        cache.invalidate_on_commit(db, cache.get_arrangement_tags(db, *criteria))
+
+        rejected_arrangements = db.execute(
+            update(models.LatestArrangement)
+            .where(*criteria)
+            .values(
+                update_datetime=datetime.now(singapore_timezone),
+                current_approval_status=ApprovalStatus.REJECTED,
+                status_reason=status_reason,
+            )
+            .returning(
+                *(
+                    getattr(models.LatestArrangement, column)
+                    for column in UPDATED_ARRANGEMENT_COLUMNS
+                )
+            )
+            .execution_options(synchronize_session=False)
+        ).all()
+        if not rejected_arrangements:
+            db.rollback()
+            return []
+
+        inserted_logs = db.execute(
+            insert(models.ArrangementLog).returning(
+                models.ArrangementLog.log_id, models.ArrangementLog.arrangement_id
+            ),
+            [
+                _get_arrangement_log_values(
+                    arrangement, Action.REJECT, ApprovalStatus.PENDING_APPROVAL
+                )
+                for arrangement in rejected_arrangements
+            ],
+        ).all()
+        latest_log_ids = {log.arrangement_id: log.log_id for log in inserted_logs}
+        db.execute(
+            update(models.LatestArrangement),
+            [
+                {"arrangement_id": arrangement_id, "latest_log_id": log_id}
+                for arrangement_id, log_id in latest_log_ids.items()
+            ],
+        )
+
+        db.commit()
+        logger.info(f"Crud: Rejected {len(rejected_arrangements)} expiring requests")
+
+        return [
+            {**arrangement._asdict(), "latest_log_id": latest_log_ids[arrangement.arrangement_id]}
+            for arrangement in rejected_arrangements
+        ]
+    except SQLAlchemyError as e:
+        db.rollback()
+        raise e
+
+
+def get_expiring_occurrences(db: Session) -> List[Tuple[int, date]]:
+    """Get the batch ids and WFH dates of the pending occurrences of recurring series for WFH dates
+    before tomorrow, in order."""
+    filters = _get_expiring_occurrence_filters()
+    occurrences = _get_series_occurrences(_query_series(db, filters), filters)
+    return sorted((occurrence["batch_id"], occurrence["wfh_date"]) for occurrence in occurrences)
+
+
+def _get_expiring_occurrence_filters() -> ArrangementFilters:
+    return ArrangementFilters(
+        current_approval_status=[ApprovalStatus.PENDING_APPROVAL],
+        end_date=get_tomorrow_date() - timedelta(days=1),
+    )
+
+
+def reject_expiring_occurrences(
+    db: Session, occurrence_keys: List[Tuple[int, date]], status_reason: str
+) -> List[Dict]:
+    """Reject the occurrences of recurring series with the batch ids and WFH dates that are still
+    expiring, in a single transaction.
+
+    Each occurrence is rejected with an exception of its series, all written with a single
+    multi-row upsert. Exceptions approved or cancelled since the occurrences were read are left
+    alone. Rejecting a pending occurrence leaves the WFH rollup unchanged.
+
+    :return: The rejected occurrences, in the same form as the rejected arrangements
+    """
+    if not occurrence_keys:
+        return []
+
+    try:
+        series = models.RecurringRequest
+        batch_ids = {batch_id for batch_id, _ in occurrence_keys}
+        filters = _get_expiring_occurrence_filters()
+        query = _query_series(db, filters).filter(series.batch_id.in_(batch_ids))
+        keys = set(occurrence_keys)
+        occurrences = [
+            occurrence
+            for occurrence in _get_series_occurrences(query, filters)
+            if (occurrence["batch_id"], occurrence["wfh_date"]) in keys
+        ]
+        if not occurrences:
+            db.rollback()
+            return []
+
+        update_datetime = datetime.now(singapore_timezone)
+        exception = models.RecurringRequestException.__table__
+        statement = sqlite_insert(exception).values(
+            [
+                {
+                    "batch_id": occurrence["batch_id"],
+                    "wfh_date": occurrence["wfh_date"],
+                    "update_datetime": update_datetime,
+                    "current_approval_status": ApprovalStatus.REJECTED,
+                    "status_reason": status_reason,
+                }
+                for occurrence in occurrences
+            ]
+        )
+        statement = statement.on_conflict_do_update(
+            index_elements=[exception.c.batch_id, exception.c.wfh_date],
+            set_={
+                "update_datetime": statement.excluded.update_datetime,
+                "current_approval_status": statement.excluded.current_approval_status,
+                "status_reason": statement.excluded.status_reason,
+            },
+            where=exception.c.current_approval_status == ApprovalStatus.PENDING_APPROVAL,
+        )
+        rejected_keys = set(
+            tuple(row)
+            for row in db.execute(statement.returning(exception.c.batch_id, exception.c.wfh_date))
+        )
+        # The upsert bypasses the flush events that mark the changed scopes of the cache
+        cache.invalidate_on_commit(
+            db,
+            cache.get_series_tags(
+                db, series.batch_id.in_({batch_id for batch_id, _ in rejected_keys})
+            ),
+        )
+
+        db.commit()
+        logger.info(f"Crud: Rejected {len(rejected_keys)} expiring occurrences of series")
+
+        return [
+            {
+                **occurrence,
+                "update_datetime": update_datetime,
+                "current_approval_status": ApprovalStatus.REJECTED,
+                "status_reason": status_reason,
+            }
+            for occurrence in occurrences
+            if (occurrence["batch_id"], occurrence["wfh_date"]) in rejected_keys
+        ]
+    except SQLAlchemyError as e:
+        db.rollback()
+        raise e
+
+
+def _get_arrangement_log_values(
+    arrangement: Any, action: Action, previous_approval_status: Optional[ApprovalStatus]
+) -> Dict:
+    """Get the values of the log of an action on the arrangement, given as an instance, a row or
+    a dataclass with the arrangement's current values."""
+    return {
+        "arrangement_id": arrangement.arrangement_id,
+        "update_datetime": arrangement.update_datetime,
+        "requester_staff_id": arrangement.requester_staff_id,
+        "wfh_date": arrangement.wfh_date,
+        "wfh_type": arrangement.wfh_type,
+        "action": action,
+        "previous_approval_status": previous_approval_status,
+        "updated_approval_status": arrangement.current_approval_status,
+        "approving_officer": arrangement.approving_officer,
+        "reason_description": arrangement.reason_description,
+        "supporting_doc_1": arrangement.supporting_doc_1,
+        "supporting_doc_2": arrangement.supporting_doc_2,
+        "supporting_doc_3": arrangement.supporting_doc_3,
+        "status_reason": arrangement.status_reason,
+    }
 
 
 def create_arrangement_log(
@@ -153,19 +1267,7 @@ def create_arrangement_log(
         logger.info(f"Crud: Creating arrangement log for action {action}")
 
         arrangement_log = models.ArrangementLog(
-            arrangement_id=arrangement.arrangement_id,
-            update_datetime=arrangement.update_datetime,
-            requester_staff_id=arrangement.requester_staff_id,
-            wfh_date=arrangement.wfh_date,
-            wfh_type=arrangement.wfh_type,
-            action=action,
-            previous_approval_status=previous_approval_status,
-            updated_approval_status=arrangement.current_approval_status,
-            approving_officer=arrangement.approving_officer,
-            reason_description=arrangement.reason_description,
-            supporting_doc_1=arrangement.supporting_doc_1,
-            supporting_doc_2=arrangement.supporting_doc_2,
-            supporting_doc_3=arrangement.supporting_doc_3,
+            **_get_arrangement_log_values(arrangement, action, previous_approval_status)
         )
 
         db.add(arrangement_log)
@@ -198,31 +1300,87 @@ def create_arrangements(
     db: Session,
     arrangements: List[CreateArrangementRequest],
 ) -> List[ArrangementResponse]:
+    """Create the arrangements and their creation logs, with a constant number of statements.
+
+    The arrangements and the logs are each inserted with a multi-row insert. The insert of the
+    arrangements returns the values copied into their logs, and the insert of the logs returns the
+    ids linking each log to its arrangement, so no row is matched by its position. The latest log
+    ids of the arrangements are then set with a single bulk update.
+    """
+    if not arrangements:
+        return []
+
     try:
-        created_arrangements = []
-        for arrangement_data in arrangements:
-            arrangement_mapper = class_mapper(models.LatestArrangement)
-            arrangement = models.LatestArrangement(
-                **{
-                    k: v
-                    for k, v in asdict(arrangement_data).items()
-                    if k in arrangement_mapper.attrs.keys()
-                },
-            )
-            db.add(arrangement)
-            db.flush()
-            created_arrangements.append(arrangement)
-            created_arrangement_log = create_arrangement_log(
-                db, arrangement, Action.CREATE, previous_approval_status=None
-            )
-            arrangement.latest_log_id = created_arrangement_log.log_id
-            db.add(created_arrangement_log)
-            db.flush()
+        arrangement_columns = class_mapper(models.LatestArrangement).column_attrs.keys()
+        arrangement_rows = [
+            {k: v for k, v in asdict(arrangement_data).items() if k in arrangement_columns}
+            for arrangement_data in arrangements
+        ]
+        inserted_arrangements = db.execute(
+            insert(models.LatestArrangement).returning(
+                models.LatestArrangement.arrangement_id,
+                models.LatestArrangement.update_datetime,
+                models.LatestArrangement.requester_staff_id,
+                models.LatestArrangement.wfh_date,
+                models.LatestArrangement.wfh_type,
+                models.LatestArrangement.current_approval_status,
+                models.LatestArrangement.approving_officer,
+                models.LatestArrangement.reason_description,
+                models.LatestArrangement.supporting_doc_1,
+                models.LatestArrangement.supporting_doc_2,
+                models.LatestArrangement.supporting_doc_3,
+                models.LatestArrangement.status_reason,
+            ),
+            arrangement_rows,
+        ).all()
+        arrangement_ids = [arrangement.arrangement_id for arrangement in inserted_arrangements]
+        logger.info(f"Crud: Inserted {len(arrangement_ids)} arrangements")
+
+        inserted_logs = db.execute(
+            insert(models.ArrangementLog).returning(
+                models.ArrangementLog.log_id, models.ArrangementLog.arrangement_id
+            ),
+            [
+                _get_arrangement_log_values(arrangement, Action.CREATE, None)
+                for arrangement in inserted_arrangements
+            ],
+        ).all()
+
+        db.execute(
+            update(models.LatestArrangement),
+            [
+                {"arrangement_id": log.arrangement_id, "latest_log_id": log.log_id}
+                for log in inserted_logs
+            ],
+        )
+
+        approved_arrangements = [
+            arrangement_data
+            for arrangement_data in arrangements
+            if _approved_delta(None, arrangement_data.current_approval_status)
+        ]
+        if approved_arrangements:
+            adjust_daily_wfh_rollups(db, approved_arrangements, 1)
+
+        # The bulk insert bypasses the flush events that mark the changed scopes of the cache
+        cache.invalidate_on_commit(
+            db,
+            cache.get_arrangement_tags(
+                db, models.LatestArrangement.arrangement_id.in_(arrangement_ids)
+            ),
+        )
 
         db.commit()
 
-        for created_arrangement in created_arrangements:
-            db.refresh(created_arrangement)
+        # Reload the created arrangements with their requesters in a single query
+        created_arrangements = (
+            db.query(models.LatestArrangement)
+            .options(joinedload(models.LatestArrangement.requester_info))
+            .filter(models.LatestArrangement.arrangement_id.in_(arrangement_ids))
+            .order_by(models.LatestArrangement.arrangement_id)
+            .populate_existing()
+            .all()
+        )
 
         created_arrangements = [
             ArrangementResponse.from_dict(arrangement.__dict__)
@@ -235,6 +1393,174 @@ def create_arrangements(
         raise e
 
 
+def create_recurring_series(
+    db: Session, request: CreateArrangementRequest
+) -> List[ArrangementResponse]:
+    """Create a recurring series from the request with a single insert.
+
+    Only the rule of the series is stored, whatever its number of occurrences. The occurrences are
+    generated from it when read, and returned in the same way.
+    """
+    try:
+        series_columns = class_mapper(models.RecurringRequest).column_attrs.keys()
+        series = models.RecurringRequest(
+            **{k: v for k, v in asdict(request).items() if k in series_columns},
+            request_datetime=request.update_datetime.isoformat(),
+            start_date=request.wfh_date.isoformat(),
+        )
+        db.add(series)
+        db.flush()
+
+        occurrences = [
+            ArrangementResponse.from_dict(occurrence)
+            for occurrence in get_series_occurrences(db, series.batch_id)
+        ]
+        if _approved_delta(None, request.current_approval_status):
+            adjust_daily_wfh_rollups(db, occurrences, 1)
+
+        cache.invalidate_on_commit(
+            db, cache.get_series_tags(db, models.RecurringRequest.batch_id == series.batch_id)
+        )
+
+        db.commit()
+
+        logger.info(
+            f"Crud: Created recurring series {series.batch_id} of {len(occurrences)} occurrences"
+        )
+
+        return occurrences
+    except SQLAlchemyError as e:
+        db.rollback()
+        raise e
+
+
+def get_series(db: Session, batch_id: int) -> Optional[Dict]:
+    series = (
+        db.query(models.RecurringRequest)
+        .filter(
+            models.RecurringRequest.batch_id == batch_id,
+            models.RecurringRequest.is_series.is_(True),
+        )
+        .first()
+    )
+    return series.__dict__ if series else None
+
+
+def get_series_occurrences(
+    db: Session, batch_id: int, wfh_date: Optional[date] = None
+) -> List[Dict]:
+    """Get the occurrences of the recurring series, or its occurrence on the WFH date."""
+    filters = ArrangementFilters(start_date=wfh_date, end_date=wfh_date)
+    query = _query_series(db, filters).filter(models.RecurringRequest.batch_id == batch_id)
+    return _get_series_occurrences(query, filters)
+
+
+def update_series_approval_status(
+    db: Session, series_data: RecurringSeriesResponse, previous_approval_status: ApprovalStatus
+) -> List[Dict]:
+    """Update the status of a recurring series, which is the status of its occurrences without an
+    exception.
+
+    The daily WFH rollup is adjusted by the occurrences whose status changes, in the same
+    transaction.
+
+    :return: The occurrences of the series after the update
+    """
+    try:
+        series = models.RecurringRequest
+        exception = models.RecurringRequestException
+        condition = series.batch_id == series_data.batch_id
+
+        cache.invalidate_on_commit(db, cache.get_series_tags(db, condition))
+        db.execute(
+            update(series)
+            .where(condition)
+            .values(
+                update_datetime=series_data.update_datetime,
+                current_approval_status=series_data.current_approval_status,
+                status_reason=series_data.status_reason,
+            )
+        )
+
+        occurrences = get_series_occurrences(db, series_data.batch_id)
+        delta = _approved_delta(previous_approval_status, series_data.current_approval_status)
+        if delta:
+            exception_dates = {
+                row.wfh_date
+                for row in db.query(exception.wfh_date).filter(
+                    exception.batch_id == series_data.batch_id
+                )
+            }
+            changed_occurrences = [
+                ArrangementResponse.from_dict(occurrence)
+                for occurrence in occurrences
+                if occurrence["wfh_date"] not in exception_dates
+            ]
+            if changed_occurrences:
+                adjust_daily_wfh_rollups(db, changed_occurrences, delta)
+
+        db.commit()
+
+        logger.info(
+            f"Crud: Updated recurring series {series_data.batch_id} to "
+            f"{series_data.current_approval_status.value}"
+        )
+
+        return occurrences
+    except SQLAlchemyError as e:
+        db.rollback()
+        raise e
+
+
+def update_series_occurrence_approval_status(
+    db: Session, occurrence_data: ArrangementResponse, previous_approval_status: ApprovalStatus
+) -> Dict:
+    """Set the status of an occurrence of a recurring series with an exception, e.g. to cancel or
+    withdraw a single date of the series.
+
+    :return: The occurrence after the update
+    """
+    try:
+        exception = models.RecurringRequestException.__table__
+        statement = sqlite_insert(exception).values(
+            batch_id=occurrence_data.batch_id,
+            wfh_date=occurrence_data.wfh_date,
+            update_datetime=occurrence_data.update_datetime,
+            current_approval_status=occurrence_data.current_approval_status,
+            status_reason=occurrence_data.status_reason,
+        )
+        statement = statement.on_conflict_do_update(
+            index_elements=[exception.c.batch_id, exception.c.wfh_date],
+            set_={
+                "update_datetime": statement.excluded.update_datetime,
+                "current_approval_status": statement.excluded.current_approval_status,
+                "status_reason": statement.excluded.status_reason,
+            },
+        )
+        db.execute(statement)
+
+        delta = _approved_delta(previous_approval_status, occurrence_data.current_approval_status)
+        if delta:
+            adjust_daily_wfh_rollups(db, [occurrence_data], delta)
+
+        cache.invalidate_on_commit(
+            db,
+            cache.get_series_tags(db, models.RecurringRequest.batch_id == occurrence_data.batch_id),
+        )
+
+        db.commit()
+
+        logger.info(
+            f"Crud: Updated occurrence on {occurrence_data.wfh_date} of recurring series "
+            f"{occurrence_data.batch_id} to {occurrence_data.current_approval_status.value}"
+        )
+
+        return get_series_occurrences(db, occurrence_data.batch_id, occurrence_data.wfh_date)[0]
+    except SQLAlchemyError as e:
+        db.rollback()
+        raise e
+
+
 def update_arrangement_approval_status(
     db: Session,
     arrangement_data: ArrangementResponse,
@@ -263,10 +1589,140 @@ def update_arrangement_approval_status(
             log = create_arrangement_log(db, updated_arrangement, action, previous_approval_status)
             updated_arrangement.latest_log_id = log.log_id
 
+            delta = _approved_delta(
+                previous_approval_status, updated_arrangement.current_approval_status
+            )
+            if delta:
+                adjust_daily_wfh_rollup(db, updated_arrangement, delta)
+
             db.commit()
-            db.refresh(updated_arrangement)
+            updated_arrangement = db.get(
+                models.LatestArrangement,
+                arrangement_data.arrangement_id,
+                options=[joinedload(models.LatestArrangement.requester_info)],
+                populate_existing=True,
+            )
             return updated_arrangement.__dict__
         return None
     except SQLAlchemyError as e:
         db.rollback()
         raise e
+
+
+def update_arrangements_approval_status(
+    db: Session,
+    updates: List[Tuple[ArrangementResponse, ApprovalStatus]],
+    action: Action,
+) -> List[Dict]:
+    """Apply the action to the arrangements in a single transaction.
+
+    Each update pairs the arrangement with its new status and reason with the status it was read
+    with. The arrangements are updated with one UPDATE ... RETURNING per change of status and
+    reason, which only matches the arrangements still in the status they were read with, so that
+    those changed since are left alone. Their logs are inserted from the stored values with a
+    multi-row insert and linked with a bulk update.
+
+    :return: The updated arrangements with their requesters, without those changed since they were
+        read
+    """
+    if not updates:
+        return []
+
+    try:
+        update_datetime = datetime.now(singapore_timezone)
+        arrangement_ids_by_change: Dict[Tuple, List[int]] = {}
+        for arrangement_data, previous_approval_status in updates:
+            change = (
+                previous_approval_status,
+                arrangement_data.current_approval_status,
+                arrangement_data.status_reason,
+            )
+            arrangement_ids_by_change.setdefault(change, []).append(arrangement_data.arrangement_id)
+
+        # The updates bypass the flush events that mark the changed scopes of the cache
+        cache.invalidate_on_commit(
+            db,
+            cache.get_arrangement_tags(
+                db,
+                models.LatestArrangement.arrangement_id.in_(
+                    [arrangement_data.arrangement_id for arrangement_data, _ in updates]
+                ),
+            ),
+        )
+
+        updated_rows = []
+        for (
+            previous_approval_status,
+            current_approval_status,
+            status_reason,
+        ), arrangement_ids in arrangement_ids_by_change.items():
+            updated_rows.extend(
+                (arrangement, previous_approval_status)
+                for arrangement in db.execute(
+                    update(models.LatestArrangement)
+                    .where(
+                        models.LatestArrangement.arrangement_id.in_(arrangement_ids),
+                        models.LatestArrangement.current_approval_status
+                        == previous_approval_status,
+                    )
+                    .values(
+                        update_datetime=update_datetime,
+                        current_approval_status=current_approval_status,
+                        status_reason=status_reason,
+                    )
+                    .returning(
+                        *(
+                            getattr(models.LatestArrangement, column)
+                            for column in UPDATED_ARRANGEMENT_COLUMNS
+                        )
+                    )
+                    .execution_options(synchronize_session=False)
+                ).all()
+            )
+        if not updated_rows:
+            db.rollback()
+            return []
+
+        inserted_logs = db.execute(
+            insert(models.ArrangementLog).returning(
+                models.ArrangementLog.log_id, models.ArrangementLog.arrangement_id
+            ),
+            [
+                _get_arrangement_log_values(arrangement, action, previous_approval_status)
+                for arrangement, previous_approval_status in updated_rows
+            ],
+        ).all()
+        db.execute(
+            update(models.LatestArrangement),
+            [
+                {"arrangement_id": log.arrangement_id, "latest_log_id": log.log_id}
+                for log in inserted_logs
+            ],
+        )
+
+        for delta in (1, -1):
+            changed_arrangements = [
+                arrangement
+                for arrangement, previous_approval_status in updated_rows
+                if _approved_delta(previous_approval_status, arrangement.current_approval_status)
+                == delta
+            ]
+            if changed_arrangements:
+                adjust_daily_wfh_rollups(db, changed_arrangements, delta)
+
+        db.commit()
+        arrangement_ids = [arrangement.arrangement_id for arrangement, _ in updated_rows]
+        logger.info(f"Crud: Updated {len(arrangement_ids)} arrangements for action {action}")
+
+        updated_arrangements = (
+            db.query(models.LatestArrangement)
+            .options(joinedload(models.LatestArrangement.requester_info))
+            .filter(models.LatestArrangement.arrangement_id.in_(arrangement_ids))
+            .order_by(models.LatestArrangement.arrangement_id)
+            .populate_existing()
+            .all()
+        )
+        return [arrangement.__dict__ for arrangement in updated_arrangements]
+    except SQLAlchemyError as e:
+        db.rollback()
+        raise e
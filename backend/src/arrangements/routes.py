@@ -1,8 +1,20 @@
-from datetime import datetime
-from typing import Annotated, List, Optional
+from dataclasses import asdict
+from datetime import date, datetime
+from typing import Annotated, Dict, Iterator, List, Optional
 from zoneinfo import ZoneInfo
 
-from fastapi import APIRouter, Depends, File, HTTPException, UploadFile
+from fastapi import (
+    APIRouter,
+    Depends,
+    File,
+    Header,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    UploadFile,
+)
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy.orm import Session
 
 from ..database import get_db
@@ -13,6 +25,7 @@ from ..employees.exceptions import (
 from ..logger import logger
 from ..notifications.exceptions import EmailNotificationException
 from ..schemas import JSendResponse, PaginationMeta
+from ..utils import compute_etag, etag_matches
 from . import services
 from .commons import dataclasses as dc
 from .commons import schemas
@@ -20,37 +33,111 @@ from .commons.enums import ApprovalStatus
 from .commons.exceptions import (
     ArrangementActionNotAllowedException,
     ArrangementNotFoundException,
+    BatchNotFoundException,
+    InvalidCursorException,
     S3UploadFailedException,
+    SeriesBatchNotSupportedException,
+    SeriesOccurrenceNotFoundException,
+)
+from .utils import (
+    encode_ndjson,
+    format_arrangement_response,
+    format_arrangements_response,
 )
-from .utils import format_arrangement_response, format_arrangements_response
 
 router = APIRouter()
 singapore_timezone = ZoneInfo("Asia/Singapore")
 
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+def _jsend_json_response(
+    data: List[Dict],
+    pagination_meta: Optional[PaginationMeta] = None,
+    headers: Optional[Dict[str, str]] = None,
+) -> JSONResponse:
+    """Build a successful JSend response from data that is already JSON-ready.
+
+    Returning a response directly skips FastAPI's validation and serialization of the response
+    model, which would otherwise walk every item of the data again. The JSON is the same as
+    returning the `JSendResponse`.
+    """
+    content = JSendResponse(
+        status="success", data=None, pagination_meta=pagination_meta
+    ).model_dump(mode="json")
+    content["data"] = data
+    return JSONResponse(content, headers=headers)
+
+
+def _not_modified_response(etag: str) -> Response:
+    logger.info("Route: Not modified")
+    return Response(status_code=304, headers={"ETag": etag})
+
+
+def _wants_ndjson(stream: bool, accept: Optional[str]) -> bool:
+    return stream or NDJSON_MEDIA_TYPE in (accept or "")
+
+
+def _ndjson_response(db: Session, items: Iterator[Dict]) -> StreamingResponse:
+    """Stream the items as newline-delimited JSON while they are read from the database."""
+
+    def body():
+        try:
+            yield from encode_ndjson(items)
+        except Exception as e:
+            # The status has already been sent, so the stream is cut short instead
+            logger.error(f"Error occurred while streaming: {str(e)}")
+            raise
+        finally:
+            # The session is used until the last row is sent
+            db.close()
+
+    return StreamingResponse(body(), media_type=NDJSON_MEDIA_TYPE)
+
 
 @router.get("", summary="Get arrangements with optional filters")
 def get_arrangements(
     db: Session = Depends(get_db),
     request_filters: schemas.ArrangementFilters = Depends(schemas.ArrangementFilters.as_query),
+    stream: bool = Query(False, description="Stream the arrangements as newline-delimited JSON"),
+    accept: Optional[str] = Header(None),
 ) -> JSendResponse:
     try:
         # Convert to dataclasses
         filters = dc.ArrangementFilters.from_dict(request_filters.model_dump())
 
+        if _wants_ndjson(stream, accept):
+            logger.info("Route: Streaming all arrangements")
+            return _ndjson_response(db, services.stream_all_arrangements(db, filters))
+
         # Get arrangements
         logger.info("Route: Fetching all arrangements")
-        data = services.get_all_arrangements(db, filters)
+        data = services.get_all_arrangements_json(db, filters)
         logger.info(f"Route: Found {len(data)} arrangements")
 
-        response_data = data
-        # Convert to Pydantic model
-        if len(data):
-            response_data = format_arrangements_response(data)
+        return _jsend_json_response(data)
+    except Exception as e:
+        logger.error(f"Error occurred: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
 
-        return JSendResponse(
-            status="success",
-            data=response_data,
+
+@router.get("/stats", summary="Get WFH statistics per department, WFH type and date")
+def get_arrangement_stats(
+    db: Session = Depends(get_db),
+    request_filters: schemas.ArrangementStatsFilters = Depends(
+        schemas.ArrangementStatsFilters.as_query
+    ),
+) -> JSendResponse:
+    try:
+        # Convert to dataclasses
+        filters = dc.ArrangementStatsFilters.from_dict(request_filters.model_dump())
+
+        logger.info(
+            f"Route: Fetching arrangement statistics from {filters.start_date} to {filters.end_date}"
         )
+        stats = services.get_arrangement_stats(db, filters)
+
+        return JSendResponse(status="success", data=asdict(stats))
     except Exception as e:
         logger.error(f"Error occurred: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -94,22 +181,14 @@ def get_personal_arrangements(
 
         # Get arrangements
         logger.info(f"Route: Fetching personal arrangements for staff ID: {staff_id}")
-        data = services.get_personal_arrangements(
+        data = services.get_personal_arrangements_json(
             db=db,
             staff_id=staff_id,
             filters=filters,
         )
         logger.info(f"Route: Found {len(data)} arrangements for staff ID {staff_id}")
 
-        response_data = data
-        # Convert to Pydantic model
-        if len(data):
-            response_data = format_arrangements_response(data)
-
-        return JSendResponse(
-            status="success",
-            data=response_data,
-        )
+        return _jsend_json_response(data)
     except Exception as e:
         logger.error(f"Error occurred: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -121,35 +200,43 @@ def get_personal_arrangements(
 )
 def get_subordinates_arrangements(
     manager_id: int,
+    request: Request,
     request_filters: schemas.ArrangementFilters = Depends(schemas.ArrangementFilters.as_query),
+    request_scope: schemas.SubordinatesScopeConfig = Depends(
+        schemas.SubordinatesScopeConfig.as_query
+    ),
     request_pagination: schemas.PaginationConfig = Depends(schemas.PaginationConfig.as_query),
+    if_none_match: Optional[str] = Header(None),
     db: Session = Depends(get_db),
 ) -> JSendResponse:
     try:
         # Convert to dataclasses
-        filters = dc.ArrangementFilters.from_dict(request_filters.model_dump())
+        filters = dc.ArrangementFilters.from_dict(
+            {**request_filters.model_dump(), **request_scope.model_dump()}
+        )
         pagination = dc.PaginationConfig.from_dict(request_pagination.model_dump())
 
+        # Answer unchanged polls before the arrangements are loaded
+        version = services.get_subordinates_arrangements_version(db, manager_id, filters)
+        etag = compute_etag(request, version)
+        if etag_matches(etag, if_none_match):
+            return _not_modified_response(etag)
+
         # Get arrangements
         logger.info(f"Fetching arrangements for employees under manager ID: {manager_id}")
-        response_data, pagination_meta = services.get_subordinates_arrangements(
+        response_data, pagination_meta = services.get_subordinates_arrangements_json(
             db=db, manager_id=manager_id, filters=filters, pagination=pagination
         )
         logger.info(
             f"Route: Found {pagination_meta.total_count} {'dates' if filters.group_by_date else 'arrangements'}"
         )
 
-        # Convert to Pydantic model
-        if len(response_data) > 0:
-            response_data = format_arrangements_response(response_data)
-        response_pagination_meta = PaginationMeta.model_validate(pagination_meta)
-
-        return JSendResponse(
-            status="success",
-            data=response_data,
-            pagination_meta=response_pagination_meta,
+        return _jsend_json_response(
+            response_data, PaginationMeta.model_validate(pagination_meta), {"ETag": etag}
         )
 
+    except InvalidCursorException as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except ManagerWithIDNotFoundException as e:
         raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
@@ -163,8 +250,10 @@ def get_subordinates_arrangements(
 )
 def get_team_arrangements(
     staff_id: int,
+    request: Request,
     request_filters: schemas.ArrangementFilters = Depends(schemas.ArrangementFilters.as_query),
     request_pagination: schemas.PaginationConfig = Depends(schemas.PaginationConfig.as_query),
+    if_none_match: Optional[str] = Header(None),
     db: Session = Depends(get_db),
 ) -> JSendResponse:
     try:
@@ -173,36 +262,56 @@ def get_team_arrangements(
         filters = dc.ArrangementFilters.from_dict(request_filters.model_dump())
         pagination = dc.PaginationConfig.from_dict(request_pagination.model_dump())
         logger.info(filters)
+
+        # Answer unchanged polls before the arrangements are loaded
+        version = services.get_team_arrangements_version(db, staff_id, filters)
+        etag = compute_etag(request, version)
+        if etag_matches(etag, if_none_match):
+            return _not_modified_response(etag)
         # Get arrangements
         logger.info(f"Route: Fetching arrangements for team of staff ID: {staff_id}")
-        response_data, pagination_meta = services.get_team_arrangements(
+        response_data, pagination_meta = services.get_team_arrangements_json(
             db, staff_id, filters, pagination
         )
         logger.info(
             f"Route: Found {pagination_meta.total_count} {'dates' if filters.group_by_date else 'arrangements'}"
         )
 
-        # Convert to Pydantic model
-        if len(response_data) > 0:
-            response_data = format_arrangements_response(response_data)
-        response_pagination_meta = PaginationMeta.model_validate(pagination_meta)
-
-        return JSendResponse(
-            status="success",
-            data=response_data,
-            pagination_meta=response_pagination_meta,
+        return _jsend_json_response(
+            response_data, PaginationMeta.model_validate(pagination_meta), {"ETag": etag}
         )
 
+    except InvalidCursorException as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error occurred: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.get("/logs/all", summary="Get all arrangement logs")
-def get_arrangement_logs(db: Session = Depends(get_db)) -> JSendResponse:
+@router.get("/logs/all", summary="Get arrangement logs with optional filters")
+def get_arrangement_logs(
+    request_filters: schemas.ArrangementLogFilters = Depends(
+        schemas.ArrangementLogFilters.as_query
+    ),
+    request_pagination: schemas.PaginationConfig = Depends(schemas.PaginationConfig.as_query),
+    db: Session = Depends(get_db),
+    stream: bool = Query(
+        False, description="Stream all matching logs as newline-delimited JSON, without pages"
+    ),
+    accept: Optional[str] = Header(None),
+) -> JSendResponse:
     try:
+        # Convert to dataclasses
+        filters = dc.ArrangementLogFilters.from_dict(request_filters.model_dump())
+
+        if _wants_ndjson(stream, accept):
+            logger.info("Route: Streaming arrangement logs")
+            return _ndjson_response(db, services.stream_arrangement_logs(db, filters))
+
+        pagination = dc.PaginationConfig.from_dict(request_pagination.model_dump())
+
         logger.info("Route: Fetching arrangement logs")
-        data = services.get_arrangement_logs(db)
+        data, pagination_meta = services.get_arrangement_logs(db, filters, pagination)
         logger.info(f"Route: Found {len(data)} logs")
 
         arrangement_logs = [schemas.ArrangementLogResponse.model_validate(log) for log in data]
@@ -210,7 +319,12 @@ def get_arrangement_logs(db: Session = Depends(get_db)) -> JSendResponse:
         return JSendResponse(
             status="success",
             data=arrangement_logs,
+            pagination_meta=(
+                PaginationMeta.model_validate(pagination_meta) if pagination_meta else None
+            ),
         )
+    except InvalidCursorException as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -250,6 +364,40 @@ async def create_wfh_request(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.put("/status", summary="Update the status of several WFH requests or a recurring request")
+async def update_wfh_requests(
+    update: schemas.BulkUpdateArrangementRequest,
+    db: Session = Depends(get_db),
+) -> JSendResponse:
+    try:
+        # Convert to dataclasses
+        wfh_update = dc.BulkUpdateArrangementRequest(
+            update_datetime=datetime.now(singapore_timezone),
+            **update.model_dump(),
+        )
+
+        # Update arrangements
+        results = await services.update_arrangements_approval_status(db, wfh_update)
+
+        return JSendResponse(
+            status="success",
+            data=results,
+        )
+
+    except SeriesBatchNotSupportedException as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    except BatchNotFoundException as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+    except EmailNotificationException as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    except Exception as e:
+        logger.error(f"Error occurred: {str(e)}")
+        raise HTTPException(status_code=500, detail="Database error")
+
+
 @router.put("/{arrangement_id}/status", summary="Update the status of an existing WFH request")
 async def update_wfh_request(
     arrangement_id: int,
@@ -291,3 +439,63 @@ async def update_wfh_request(
     except Exception as e:
         logger.error(f"Error occurred: {str(e)}")
         raise HTTPException(status_code=500, detail="Database error")
+
+
+@router.put("/series/{batch_id}/status", summary="Update the status of a recurring series")
+async def update_series(
+    batch_id: int,
+    update: schemas.UpdateArrangementRequest = Depends(schemas.UpdateArrangementRequest.as_form),
+    db: Session = Depends(get_db),
+) -> JSendResponse:
+    return await _update_series(
+        db,
+        dc.UpdateSeriesRequest(
+            batch_id=batch_id,
+            update_datetime=datetime.now(singapore_timezone),
+            **update.model_dump(),
+        ),
+    )
+
+
+@router.put(
+    "/series/{batch_id}/occurrences/{wfh_date}/status",
+    summary="Update the status of a single date of a recurring series",
+)
+async def update_series_occurrence(
+    batch_id: int,
+    wfh_date: date,
+    update: schemas.UpdateArrangementRequest = Depends(schemas.UpdateArrangementRequest.as_form),
+    db: Session = Depends(get_db),
+) -> JSendResponse:
+    return await _update_series(
+        db,
+        dc.UpdateSeriesRequest(
+            batch_id=batch_id,
+            update_datetime=datetime.now(singapore_timezone),
+            wfh_date=wfh_date,
+            **update.model_dump(),
+        ),
+    )
+
+
+async def _update_series(db: Session, wfh_update: dc.UpdateSeriesRequest) -> JSendResponse:
+    try:
+        updated_arrangements = await services.update_series_approval_status(db, wfh_update)
+
+        return JSendResponse(
+            status="success",
+            data=format_arrangements_response(updated_arrangements),
+        )
+
+    except (BatchNotFoundException, SeriesOccurrenceNotFoundException) as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+    except ArrangementActionNotAllowedException as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    except EmailNotificationException as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    except Exception as e:
+        logger.error(f"Error occurred: {str(e)}")
+        raise HTTPException(status_code=500, detail="Database error")
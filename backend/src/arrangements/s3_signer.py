@@ -0,0 +1,117 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+import boto3
+from botocore.exceptions import ClientError
+
+from ..logger import logger
+
+PRESIGNED_URL_EXPIRATION = 3600  # 1 hour
+PRESIGNED_URL_CACHE_TTL = 3000  # Cached URLs are always valid for at least 10 more minutes
+PRESIGNED_URL_CACHE_SIZE = 10000
+
+
+class S3Signer:
+    """Create presigned GET URLs for S3 objects, reusing one S3 client and caching URLs by key.
+
+    A cached URL is handed out for `cache_ttl` seconds after it is signed, which must be shorter
+    than the URL expiry so that clients always receive a URL with time left on it.
+    """
+
+    def __init__(
+        self,
+        s3_client=None,
+        bucket_name: Optional[str] = None,
+        expiration: int = PRESIGNED_URL_EXPIRATION,
+        cache_ttl: int = PRESIGNED_URL_CACHE_TTL,
+        cache_size: int = PRESIGNED_URL_CACHE_SIZE,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if cache_ttl >= expiration:
+            raise ValueError("The cache TTL must be shorter than the presigned URL expiry")
+
+        self.s3_client = s3_client or boto3.client("s3")
+        self.bucket_name = bucket_name or os.getenv("AWS_S3_BUCKET_NAME")
+        self.expiration = expiration
+        self.cache_ttl = cache_ttl
+        self.cache_size = cache_size
+        self._clock = clock
+        self._cache: OrderedDict[str, Tuple[str, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def sign(self, key: Optional[str]) -> Optional[str]:
+        """Get a presigned URL for the object key, or None if there is no key or signing fails."""
+        if not key:
+            return None
+        return self.sign_many([key])[key]
+
+    def sign_many(self, keys: Iterable[Optional[str]]) -> Dict[str, Optional[str]]:
+        """Get presigned URLs for the object keys, mapped by key. Empty keys are skipped."""
+        now = self._clock()
+        urls: Dict[str, Optional[str]] = {}
+        to_sign = []
+
+        with self._lock:
+            for key in keys:
+                if not key or key in urls:
+                    continue
+                cached = self._cache.get(key)
+                if cached and cached[1] > now:
+                    self._cache.move_to_end(key)
+                    urls[key] = cached[0]
+                else:
+                    urls[key] = None
+                    to_sign.append(key)
+
+        signed = {}
+        for key in to_sign:
+            try:
+                signed[key] = self.s3_client.generate_presigned_url(
+                    "get_object",
+                    Params={"Bucket": self.bucket_name, "Key": key},
+                    ExpiresIn=self.expiration,
+                )
+            except ClientError as e:
+                logger.error(e)
+
+        with self._lock:
+            for key, url in signed.items():
+                self._cache[key] = (url, now + self.cache_ttl)
+                self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+        urls.update(signed)
+        return urls
+
+    def url_version(self) -> int:
+        """Get a number that changes before any URL handed out now can expire.
+
+        A URL is handed out for up to `cache_ttl` seconds after it is signed, so a response
+        containing it may be reused for `expiration - cache_ttl` seconds. Responses validated
+        with this version are never reused for longer.
+        """
+        return int(time.time() // (self.expiration - self.cache_ttl))
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+
+_signer: Optional[S3Signer] = None
+
+
+def init_signer(**kwargs) -> S3Signer:
+    """Create the shared signer. Called on startup so the S3 client is built once."""
+    global _signer
+    _signer = S3Signer(**kwargs)
+    return _signer
+
+
+def get_signer() -> S3Signer:
+    if _signer is None:
+        return init_signer()
+    return _signer
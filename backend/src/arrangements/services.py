@@ -1,6 +1,7 @@
-from dataclasses import asdict
-from datetime import datetime
-from typing import Dict, List, Tuple, Union
+import asyncio
+import time
+from dataclasses import asdict, replace
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, Union
 from zoneinfo import ZoneInfo
 
 import boto3
@@ -9,37 +10,64 @@ import botocore.exceptions
 from fastapi import File
 from sqlalchemy.orm import Session
 
-from ..database import get_db
 from ..employees import crud as employee_crud
 from ..employees import services as employee_services
+from ..employees.delegations import get_delegation_map
 from ..employees.exceptions import EmployeeNotFoundException
+from ..employees.hierarchy import get_org_hierarchy
 from ..logger import logger
 from ..notifications.commons.dataclasses import ArrangementNotificationConfig
-from ..notifications.email_notifications import craft_and_send_email
-from . import crud
+from ..notifications.email_notifications import (
+    craft_and_send_digest_emails,
+    craft_and_send_email,
+)
+from ..notifications.exceptions import EmailNotificationException
+from . import cache, crud
 from .commons import exceptions
 from .commons.dataclasses import (
     ArrangementFilters,
+    ArrangementLogFilters,
     ArrangementLogResponse,
     ArrangementResponse,
+    ArrangementStats,
+    ArrangementStatsFilters,
+    AutoRejectReport,
+    BulkUpdateArrangementRequest,
     CreateArrangementRequest,
-    CreatedArrangementGroupByDate,
+    DailyStats,
+    DepartmentStats,
     PaginationConfig,
     PaginationMeta,
     RecurringRequestDetails,
+    RecurringSeriesResponse,
     UpdateArrangementRequest,
+    UpdateSeriesRequest,
+)
+from .commons.enums import (
+    STATUS_ACTION_MAPPING,
+    Action,
+    ApprovalStatus,
+    PaginationMode,
+    SubordinatesScope,
+    WfhType,
 )
-from .commons.enums import STATUS_ACTION_MAPPING, Action, ApprovalStatus
+from .s3_signer import get_signer
 from .utils import (
+    compute_cursor_pagination_meta,
     compute_pagination_meta,
-    create_presigned_url,
     expand_recurring_arrangement,
-    group_arrangements_by_date,
+    format_arrangement_log_row,
+    format_arrangement_row,
+    format_arrangement_rows,
+    get_next_cursor,
+    group_formatted_arrangements_by_date,
     handle_multi_file_deletion,
     upload_file,
 )
 
 JACK_SIM_STAFF_ID = 130002
+AUTO_REJECT_CHUNK_SIZE = 500
+AUTO_REJECT_STATUS_REASON = "AUTO-REJECTED due to pending status one day before WFH date"
 singapore_timezone = ZoneInfo("Asia/Singapore")
 
 
@@ -52,154 +80,272 @@ def get_arrangement_by_id(db: Session, arrangement_id: int) -> ArrangementRespon
     return ArrangementResponse.from_dict(arrangement)
 
 
-def get_all_arrangements(db: Session, filters: ArrangementFilters) -> List[ArrangementResponse]:
-    arrangements: List[Dict] = crud.get_arrangements(db, filters=filters)
+def _get_arrangements_next_cursor(
+    arrangements: List[Dict], pagination: PaginationConfig
+) -> Optional[str]:
+    if pagination.pagination_mode != PaginationMode.CURSOR:
+        return None
+    keys = ["wfh_date", "arrangement_id"]
+    if arrangements and arrangements[-1]["arrangement_id"] is None:
+        # An occurrence of a recurring series has no id, so it is identified by its series
+        keys.append("batch_id")
+    return get_next_cursor(arrangements, pagination.items_per_page, *keys)
+
+
+def _compute_arrangements_pagination_meta(
+    total_count: Optional[int], pagination: PaginationConfig, next_cursor: Optional[str]
+) -> PaginationMeta:
+    if pagination.pagination_mode == PaginationMode.CURSOR:
+        return compute_cursor_pagination_meta(total_count, pagination.items_per_page, next_cursor)
+    return compute_pagination_meta(total_count, pagination.items_per_page, pagination.page_num)
+
+
+# The list endpoints get their arrangements from the *_json functions below, which format the
+# database rows straight to JSON-ready dicts, skipping the dataclass and Pydantic conversions of
+# every row.
+
+
+def get_subordinates_arrangements_version(
+    db: Session, manager_id: int, filters: ArrangementFilters
+) -> Tuple:
+    """Get a version of the response of `get_subordinates_arrangements_json` for any pagination,
+    which changes whenever the response may change, without loading the arrangements.
+
+    It combines the version of the arrangements in the scope, the version of the employees, whose
+    details are part of the response, and the version of the presigned URLs.
+    """
+    filters = replace(filters, manager_id=manager_id)
+    return (
+        crud.get_arrangements_version(db, filters),
+        employee_services.get_employees_version(),
+        get_signer().url_version(),
+    )
 
-    response = [ArrangementResponse.from_dict(arrangement) for arrangement in arrangements]
 
-    return response
+def get_team_arrangements_version(db: Session, staff_id: int, filters: ArrangementFilters) -> Tuple:
+    """Get a version of the response of `get_team_arrangements_json` in the same way as
+    `get_subordinates_arrangements_version`."""
+    return (
+        crud.get_team_arrangements_version(db, staff_id, filters),
+        employee_services.get_employees_version(),
+        get_signer().url_version(),
+    )
 
 
-def get_personal_arrangements(
-    db: Session, staff_id: int, filters: ArrangementFilters
-) -> List[ArrangementResponse]:
+# The responses of the *_json variants used by the list endpoints are cached, tagged with the
+# scopes of arrangements they include. The keys include the versions of the employees and of the
+# presigned URLs in the responses, so that cached responses are replaced when either changes.
+
+
+def _get_arrangements_cache_key(name: str, *args, presign: bool = True) -> str:
+    versions = [employee_services.get_employees_version()]
+    if presign:
+        versions.append(get_signer().url_version())
+    return cache.make_key(name, *args, *versions)
+
 
+def get_all_arrangements_json(db: Session, filters: ArrangementFilters) -> List[Dict]:
+    return cache.get_or_load(
+        _get_arrangements_cache_key("all", filters, presign=False),
+        tags=lambda: [cache.ALL_ARRANGEMENTS_TAG],
+        load=lambda: _load_all_arrangements_json(db, filters),
+    )
+
+
+def _load_all_arrangements_json(db: Session, filters: ArrangementFilters) -> List[Dict]:
+    arrangements, _ = crud.get_arrangements(db, filters=filters, as_rows=True)
+
+    return format_arrangement_rows(arrangements)
+
+
+def get_personal_arrangements_json(
+    db: Session, staff_id: int, filters: ArrangementFilters
+) -> List[Dict]:
     filters.staff_ids = [staff_id]
     logger.info(f"Service: Fetching personal arrangements for staff ID {staff_id}")
-    arrangements = crud.get_arrangements(db, filters=filters)
+    arrangements, _ = crud.get_arrangements(db, filters=filters, as_rows=True)
     logger.info(f"Service: Found {len(arrangements)} arrangements for staff ID {staff_id}")
 
-    arrangements = [ArrangementResponse.from_dict(arrangement) for arrangement in arrangements]
+    return format_arrangement_rows(arrangements, presign=True)
+
+
+def get_subordinates_arrangements_json(
+    db: Session,
+    manager_id: int,
+    filters: ArrangementFilters,
+    pagination: PaginationConfig,
+) -> Tuple[List[Dict], PaginationMeta]:
+    return cache.get_or_load(
+        _get_arrangements_cache_key("subordinates", manager_id, filters, pagination),
+        tags=lambda: _get_subordinates_cache_tags(db, manager_id, filters),
+        load=lambda: _load_subordinates_arrangements_json(db, manager_id, filters, pagination),
+    )
 
-    if len(arrangements) > 0:
-        # Get presigned URL for each supporting document in each arrangement
-        for record in arrangements:
-            record.supporting_doc_1 = create_presigned_url(record.supporting_doc_1)
-            record.supporting_doc_2 = create_presigned_url(record.supporting_doc_2)
-            record.supporting_doc_3 = create_presigned_url(record.supporting_doc_3)
 
-    logger.info(f"Service: Found {len(arrangements)} arrangements")
+def _get_subordinates_cache_tags(
+    db: Session, manager_id: int, filters: ArrangementFilters
+) -> List[str]:
+    if filters.scope != SubordinatesScope.SUBTREE:
+        return [cache.approver_tag(manager_id)]
 
-    return arrangements
+    # The subtree is made of the reports of the manager and of every manager above the last level
+    depth = filters.depth - 1 if filters.depth else None
+    managers = get_org_hierarchy(db).get_descendant_ids(manager_id, depth)
+    return [cache.reports_to_tag(staff_id) for staff_id in [manager_id, *managers]]
 
 
-def get_subordinates_arrangements(
+def _load_subordinates_arrangements_json(
     db: Session,
     manager_id: int,
     filters: ArrangementFilters,
     pagination: PaginationConfig,
-) -> Tuple[Union[List[ArrangementResponse], List[CreatedArrangementGroupByDate]], PaginationMeta]:
-
-    # Get arrangements for the subordinates
+) -> Tuple[List[Dict], PaginationMeta]:
     logger.info(f"Service: Fetching arrangements for employees under manager ID: {manager_id}")
     filters.manager_id = manager_id
-    arrangements = crud.get_arrangements(
-        db=db,
-        filters=filters,
+    arrangements, total_count = crud.get_arrangements(
+        db=db, filters=filters, pagination=pagination, as_rows=True
     )
-    arrangements = [ArrangementResponse.from_dict(arrangement) for arrangement in arrangements]
-    logger.info(f"Service: Found {len(arrangements)} arrangements")
+    logger.info(f"Service: Found {len(arrangements)} of {total_count} arrangements")
 
-    # Get presigned URL for each supporting document in each arrangement
-    for record in arrangements:
-        record.supporting_doc_1 = create_presigned_url(record.supporting_doc_1)
-        record.supporting_doc_2 = create_presigned_url(record.supporting_doc_2)
-        record.supporting_doc_3 = create_presigned_url(record.supporting_doc_3)
-
-    # Group by date if required
-    if filters.group_by_date is True:
-        arrangements = group_arrangements_by_date(arrangements)
+    return _format_arrangements_page_json(arrangements, total_count, filters, pagination)
 
-        logger.info(f"Grouped arrangements into {len(arrangements)} dates")
 
-    pagination_meta = compute_pagination_meta(
-        arrangements, pagination.items_per_page, pagination.page_num
+def get_team_arrangements_json(
+    db: Session,
+    staff_id: int,
+    filters: ArrangementFilters,
+    pagination: PaginationConfig,
+) -> Tuple[List[Dict], PaginationMeta]:
+    return cache.get_or_load(
+        _get_arrangements_cache_key("team", staff_id, filters, pagination),
+        tags=lambda: _get_team_cache_tags(db, staff_id),
+        load=lambda: _load_team_arrangements_json(db, staff_id, filters, pagination),
     )
 
-    # slice the list based on page number and items per page
-    arrangements = arrangements[
-        (pagination.page_num - 1)
-        * pagination.items_per_page : pagination.page_num
-        * pagination.items_per_page
-    ]
 
-    return arrangements, pagination_meta
+def _get_team_cache_tags(db: Session, staff_id: int) -> List[str]:
+    # The team is made of the peers, who share the reporting manager, and the subordinates
+    tags = [cache.approver_tag(staff_id)]
+    employee = employee_crud.get_employee_by_staff_id(db, staff_id)
+    if employee and employee.reporting_manager:
+        tags.append(cache.reports_to_tag(employee.reporting_manager))
+    return tags
 
 
-def get_team_arrangements(
+def _load_team_arrangements_json(
     db: Session,
     staff_id: int,
     filters: ArrangementFilters,
     pagination: PaginationConfig,
-) -> Tuple[Union[List[ArrangementResponse], List[CreatedArrangementGroupByDate]], PaginationMeta]:
+) -> Tuple[List[Dict], PaginationMeta]:
+    logger.info(f"Service: Fetching arrangements for team of staff ID {staff_id}")
+    arrangements, total_count = crud.get_team_arrangements(
+        db=db, staff_id=staff_id, filters=filters, pagination=pagination, as_rows=True
+    )
+    logger.info(f"Service: Found {len(arrangements)} of {total_count} team arrangements")
 
-    # Get peer employees
-    employees = employee_services.get_peers_by_staff_id(db, staff_id)
+    return _format_arrangements_page_json(arrangements, total_count, filters, pagination)
 
-    team_arrangements = []
 
-    # Get peer arrangements
-    filters.personal_staff_id = staff_id
-    filters.staff_ids = [employee.staff_id for employee in employees]  # type: ignore
-    logger.info(f"Service: Fetching arrangements for peers of staff ID {staff_id}")
-    peer_arrangements = crud.get_arrangements(
-        db=db,
-        filters=filters,
-    )
-    team_arrangements.extend(peer_arrangements)
-    logger.info(f"Service: Found {len(peer_arrangements)} peer arrangements")
-
-    # Get subordinate arrangements
-    filters.staff_ids = None
-    filters.manager_id = staff_id
-    logger.info(f"Service: Fetching arrangements for subordinates of staff ID {staff_id}")
-    subordinates_arrangements = crud.get_arrangements(
-        db=db,
-        filters=filters,
+def _format_arrangements_page_json(
+    arrangements: List[Dict],
+    total_count: Optional[int],
+    filters: ArrangementFilters,
+    pagination: PaginationConfig,
+) -> Tuple[List[Dict], PaginationMeta]:
+    next_cursor = _get_arrangements_next_cursor(arrangements, pagination)
+    response_data = format_arrangement_rows(arrangements, presign=True)
+
+    if filters.group_by_date is True:
+        response_data = group_formatted_arrangements_by_date(response_data)
+
+    return response_data, _compute_arrangements_pagination_meta(
+        total_count, pagination, next_cursor
     )
-    team_arrangements.extend(subordinates_arrangements)
-    logger.info(f"Service: Found {len(subordinates_arrangements)} subordinates arrangements")
 
-    # Convert to dataclasses
-    team_arrangements = [
-        ArrangementResponse.from_dict(arrangement) for arrangement in team_arrangements
+
+def get_arrangement_logs(
+    db: Session,
+    filters: Optional[ArrangementLogFilters] = None,
+    pagination: Optional[PaginationConfig] = None,
+) -> Tuple[List[ArrangementLogResponse], Optional[PaginationMeta]]:
+    arrangement_logs, total_count = crud.get_arrangement_logs(db, filters, pagination)
+    logger.info(f"Service: Found {len(arrangement_logs)} of {total_count} arrangement logs")
+
+    pagination_meta = None
+    if pagination and pagination.pagination_mode == PaginationMode.CURSOR:
+        next_cursor = get_next_cursor(
+            arrangement_logs, pagination.items_per_page, "update_datetime", "log_id"
+        )
+        pagination_meta = compute_cursor_pagination_meta(
+            total_count, pagination.items_per_page, next_cursor
+        )
+    elif pagination:
+        pagination_meta = compute_pagination_meta(
+            total_count, pagination.items_per_page, pagination.page_num
+        )
+
+    arrangement_logs = [
+        ArrangementLogResponse.from_dict(arrangement) for arrangement in arrangement_logs
     ]
 
-    # Get presigned URL for each supporting document in each arrangement
-    for record in team_arrangements:
-        record.supporting_doc_1 = create_presigned_url(record.supporting_doc_1)
-        record.supporting_doc_2 = create_presigned_url(record.supporting_doc_2)
-        record.supporting_doc_3 = create_presigned_url(record.supporting_doc_3)
+    return arrangement_logs, pagination_meta
 
-    # Group by date if required
-    if filters.group_by_date is True:
-        team_arrangements = group_arrangements_by_date(team_arrangements)
 
-        logger.info(f"Grouped arrangements into {len(team_arrangements)} dates")
+def get_arrangement_stats(db: Session, filters: ArrangementStatsFilters) -> ArrangementStats:
+    """Count the arrangements of each WFH type in the date range, overall, per department and per
+    WFH date, along with the headcount of each department.
 
-    pagination_meta = compute_pagination_meta(
-        team_arrangements, pagination.items_per_page, pagination.page_num
+    Departments without arrangements are included with zero counts. Only the WFH dates with
+    arrangements are included. Approved arrangements are counted from the daily WFH rollup, so
+    the cost does not grow with the number of arrangements. Other statuses, and the employees
+    under a manager, are counted from the arrangements and the occurrences of recurring series.
+    """
+    headcounts = employee_crud.get_headcount_by_department(
+        db, filters.department, filters.manager_id, filters.max_depth
     )
+    if filters.current_approval_status == [ApprovalStatus.APPROVED] and not filters.manager_id:
+        arrangement_counts = crud.get_daily_wfh_rollup(db, filters)
+    else:
+        arrangement_counts = crud.get_arrangement_counts(db, filters)
+    logger.info(f"Service: Found {len(arrangement_counts)} arrangement counts")
 
-    # slice the list based on page number and items per page
-    team_arrangements = team_arrangements[
-        (pagination.page_num - 1)
-        * pagination.items_per_page : pagination.page_num
-        * pagination.items_per_page
-    ]
+    stats = ArrangementStats(
+        start_date=filters.start_date,
+        end_date=filters.end_date,
+        headcount=sum(headcounts.values()),
+    )
+    departments = {
+        dept: DepartmentStats(department=dept, headcount=headcount)
+        for dept, headcount in sorted(headcounts.items())
+    }
+    days: Dict = {}
+
+    for row in arrangement_counts:
+        wfh_type = WfhType(row["wfh_type"]).value
+        count, on_leave = row["count"], row["on_leave_count"] or 0
+        stats.add(wfh_type, count, on_leave)
+        departments[row["dept"]].add(wfh_type, count, on_leave)
+        days.setdefault(row["wfh_date"], DailyStats(wfh_date=row["wfh_date"])).add(
+            wfh_type, count, on_leave
+        )
 
-    return team_arrangements, pagination_meta
+    stats.departments = list(departments.values())
+    stats.days = [days[wfh_date] for wfh_date in sorted(days)]
 
+    return stats
 
-def get_arrangement_logs(
-    db: Session,
-) -> List[ArrangementLogResponse]:
-    arrangement_logs = crud.get_arrangement_logs(db)
-    arrangement_logs = [
-        ArrangementLogResponse.from_dict(arrangement) for arrangement in arrangement_logs
-    ]
 
-    return arrangement_logs
+def stream_all_arrangements(db: Session, filters: ArrangementFilters) -> Iterator[Dict]:
+    for row in crud.stream_arrangements(db, filters):
+        yield format_arrangement_row(row)
+
+
+def stream_arrangement_logs(
+    db: Session, filters: Optional[ArrangementLogFilters] = None
+) -> Iterator[Dict]:
+    for row in crud.stream_arrangement_logs(db, filters):
+        yield format_arrangement_log_row(row)
 
 
 async def create_arrangements_from_request(
@@ -217,16 +363,14 @@ async def create_arrangements_from_request(
         approving_officer, _ = employee_services.get_manager_by_subordinate_id(
             db=db, staff_id=wfh_request.requester_staff_id
         )
-        delegation = None
+        delegate_manager_id = None
 
         # Assign approving officers
         if approving_officer:
             wfh_request.approving_officer = approving_officer.__dict__["staff_id"]
-            delegation = employee_crud.get_existing_delegation(
-                db=db, staff_id=approving_officer.staff_id, delegate_manager_id=None
-            )
-        if delegation:
-            wfh_request.delegate_approving_officer = delegation.__dict__["delegate_manager_id"]
+            delegate_manager_id = get_delegation_map(db).get_delegate_id(approving_officer.staff_id)
+        if delegate_manager_id is not None:
+            wfh_request.delegate_approving_officer = delegate_manager_id
 
         # Auto Approve Jack Sim's requests
         if wfh_request.requester_staff_id == JACK_SIM_STAFF_ID:
@@ -257,28 +401,34 @@ async def create_arrangements_from_request(
         # Create and expand recurring arrangements
         arrangements = []
 
-        if wfh_request.is_recurring:
-            batch = crud.create_recurring_request(
-                db=db,
-                request=RecurringRequestDetails.from_dict(
-                    {
-                        "request_datetime": wfh_request.update_datetime,
-                        "start_date": wfh_request.wfh_date,
-                        **asdict(wfh_request),
-                    }
-                ),
-            )
-
-            wfh_request.batch_id = batch.batch_id
-
-            arrangements = expand_recurring_arrangement(request=wfh_request)
+        if wfh_request.is_series:
+            # Only the rule is stored, and the occurrences are generated from it when read
+            logger.info("Service: Creating recurring series")
+            created_arrangements = crud.create_recurring_series(db=db, request=wfh_request)
+            logger.info(f"Service: Created series of {len(created_arrangements)} occurrences")
         else:
-            arrangements.append(wfh_request)
-
-        # Create arrangements in the database
-        logger.info(f"Service: Creating {len(arrangements)} arrangements")
-        created_arrangements = crud.create_arrangements(db=db, arrangements=arrangements)
-        logger.info(f"Service: Created {len(created_arrangements)} arrangements")
+            if wfh_request.is_recurring:
+                batch = crud.create_recurring_request(
+                    db=db,
+                    request=RecurringRequestDetails.from_dict(
+                        {
+                            "request_datetime": wfh_request.update_datetime,
+                            "start_date": wfh_request.wfh_date,
+                            **asdict(wfh_request),
+                        }
+                    ),
+                )
+
+                wfh_request.batch_id = batch.batch_id
+
+                arrangements = expand_recurring_arrangement(request=wfh_request)
+            else:
+                arrangements.append(wfh_request)
+
+            # Create arrangements in the database
+            logger.info(f"Service: Creating {len(arrangements)} arrangements")
+            created_arrangements = crud.create_arrangements(db=db, arrangements=arrangements)
+            logger.info(f"Service: Created {len(created_arrangements)} arrangements")
 
         # Create config object for email notifications
         notification_config = ArrangementNotificationConfig(
@@ -301,6 +451,20 @@ async def create_arrangements_from_request(
         raise exceptions.S3UploadFailedException(str(upload_error))
 
 
+def _get_updated_approval_status(
+    arrangement: Union[ArrangementResponse, RecurringSeriesResponse], action: Action
+) -> ApprovalStatus:
+    # Auto Withdraw Jack Sim's requests
+    if arrangement.requester_staff_id == JACK_SIM_STAFF_ID and action == Action.WITHDRAW:
+        return ApprovalStatus.WITHDRAWN
+
+    if action not in STATUS_ACTION_MAPPING[arrangement.current_approval_status]:
+        raise exceptions.ArrangementActionNotAllowedException(
+            arrangement.current_approval_status, action
+        )
+    return STATUS_ACTION_MAPPING[arrangement.current_approval_status][action]
+
+
 async def update_arrangement_approval_status(
     db: Session, wfh_update: UpdateArrangementRequest, supporting_docs: List[File]
 ) -> ArrangementResponse:
@@ -312,21 +476,10 @@ async def update_arrangement_approval_status(
         raise exceptions.ArrangementNotFoundException(wfh_update.arrangement_id)
     arrangement = ArrangementResponse.from_dict(arrangement)
 
-    # Auto Withdraw Jack Sim's requests
-    if arrangement.requester_staff_id == JACK_SIM_STAFF_ID and wfh_update.action == Action.WITHDRAW:
-        previous_approval_status = arrangement.current_approval_status
-        arrangement.current_approval_status = ApprovalStatus.WITHDRAWN
-    else:
-        if wfh_update.action not in STATUS_ACTION_MAPPING[arrangement.current_approval_status]:
-            raise exceptions.ArrangementActionNotAllowedException(
-                arrangement.current_approval_status, wfh_update.action
-            )
-
-        previous_approval_status = arrangement.current_approval_status
-        arrangement.current_approval_status = STATUS_ACTION_MAPPING[
-            arrangement.current_approval_status
-        ][wfh_update.action]
-
+    previous_approval_status = arrangement.current_approval_status
+    arrangement.current_approval_status = _get_updated_approval_status(
+        arrangement, wfh_update.action
+    )
     arrangement.approving_officer = wfh_update.approving_officer
     arrangement.status_reason = wfh_update.status_reason
 
@@ -363,54 +516,318 @@ async def update_arrangement_approval_status(
     return updated_arrangement
 
 
-async def auto_reject_old_requests():
-    db = next(get_db())
-    wfh_requests = crud.get_expiring_requests(db)
-    total_count = len(wfh_requests)
-    failure_ids = []
+async def update_series_approval_status(
+    db: Session, wfh_update: UpdateSeriesRequest
+) -> List[ArrangementResponse]:
+    """Apply the action to a recurring series, or to its occurrence on the WFH date of the update.
+
+    An action on the series changes the status of its occurrences without an exception. An action
+    on an occurrence gives it an exception, e.g. to cancel or withdraw a single date.
+
+    :return: The occurrences of the series after the update, or the updated occurrence
+    """
+    series = crud.get_series(db, wfh_update.batch_id)
+    if not series:
+        raise exceptions.BatchNotFoundException(wfh_update.batch_id)
+    series = RecurringSeriesResponse.from_dict(series)
+
+    if wfh_update.wfh_date is None:
+        previous_approval_status = series.current_approval_status
+        series.current_approval_status = _get_updated_approval_status(series, wfh_update.action)
+        series.update_datetime = wfh_update.update_datetime
+        series.status_reason = wfh_update.status_reason
+
+        logger.info(f"Service: Updating recurring series {wfh_update.batch_id}")
+        updated_arrangements = crud.update_series_approval_status(
+            db, series, previous_approval_status
+        )
+        current_approval_status = series.current_approval_status
+    else:
+        occurrences = crud.get_series_occurrences(db, wfh_update.batch_id, wfh_update.wfh_date)
+        if not occurrences:
+            raise exceptions.SeriesOccurrenceNotFoundException(
+                wfh_update.batch_id, wfh_update.wfh_date
+            )
+        occurrence = ArrangementResponse.from_dict(occurrences[0])
 
-    logger.info(f"Auto-rejecting {total_count} expiring requests")
+        previous_approval_status = occurrence.current_approval_status
+        occurrence.current_approval_status = _get_updated_approval_status(
+            occurrence, wfh_update.action
+        )
+        occurrence.update_datetime = wfh_update.update_datetime
+        occurrence.status_reason = wfh_update.status_reason
 
-    for arrangement in wfh_requests:
-        if (
-            "delegate_approving_officer" in arrangement
-            and arrangement["delegate_approving_officer"]
-        ):
-            approving_officer = arrangement["delegate_approving_officer"]
-        else:
-            approving_officer = arrangement["approving_officer"]
+        logger.info(
+            f"Service: Updating occurrence on {wfh_update.wfh_date} of recurring series "
+            f"{wfh_update.batch_id}"
+        )
+        updated_arrangements = [
+            crud.update_series_occurrence_approval_status(db, occurrence, previous_approval_status)
+        ]
+        current_approval_status = occurrence.current_approval_status
 
-        wfh_update = UpdateArrangementRequest(
-            arrangement_id=arrangement["arrangement_id"],
-            update_datetime=datetime.now(singapore_timezone),
-            action=Action.REJECT,
-            approving_officer=approving_officer,
-            status_reason="AUTO-REJECTED due to pending status one day before WFH date",
-            auto_reject=True,
+    updated_arrangements = [
+        ArrangementResponse.from_dict(arrangement) for arrangement in updated_arrangements
+    ]
+    logger.info(
+        f"Service: Updated '{wfh_update.action.value}' {len(updated_arrangements)} occurrences to "
+        f"'{current_approval_status.value}' status"
+    )
+
+    # Get required staff objects
+    employee = employee_crud.get_employee_by_staff_id(db, series.requester_staff_id)
+    approving_officer = employee_crud.get_employee_by_staff_id(db, wfh_update.approving_officer)
+
+    # Send email notifications
+    await craft_and_send_email(
+        ArrangementNotificationConfig(
+            employee=employee,
+            arrangements=updated_arrangements,
+            action=wfh_update.action,
+            current_approval_status=current_approval_status,
+            manager=approving_officer,
         )
+    )
+
+    return updated_arrangements
+
+
+async def update_arrangements_approval_status(
+    db: Session, wfh_update: BulkUpdateArrangementRequest
+) -> List[Dict]:
+    """Apply the action to the arrangements of the request in a single transaction.
+
+    Each arrangement is checked against the allowed transitions in memory. The arrangements that
+    are not found or do not allow the action are skipped, and the rest are updated together,
+    unless their status changed since they were read. Each recipient of the notifications receives
+    a single digest email.
+
+    :return: The result of the action on each arrangement, in order
+    """
+    arrangements = [
+        ArrangementResponse.from_dict(arrangement)
+        for arrangement in crud.get_arrangements_by_ids(
+            db, wfh_update.arrangement_ids, wfh_update.batch_id
+        )
+    ]
+    if wfh_update.batch_id is not None and not arrangements:
+        # A series has no arrangements, and its occurrences are updated by the series endpoints
+        if crud.get_series(db, wfh_update.batch_id):
+            raise exceptions.SeriesBatchNotSupportedException(wfh_update.batch_id)
+        raise exceptions.BatchNotFoundException(wfh_update.batch_id)
+
+    arrangements_by_id = {arrangement.arrangement_id: arrangement for arrangement in arrangements}
+    arrangement_ids = (
+        list(dict.fromkeys(wfh_update.arrangement_ids))
+        if wfh_update.arrangement_ids is not None
+        else list(arrangements_by_id)
+    )
+
+    results = {}
+    updates = []
+    for arrangement_id in arrangement_ids:
+        arrangement = arrangements_by_id.get(arrangement_id)
+        if arrangement is None:
+            error = exceptions.ArrangementNotFoundException(arrangement_id)
+            results[arrangement_id] = {"success": False, "message": error.message}
+            continue
 
         try:
-            await update_arrangement_approval_status(
-                db=db,
-                wfh_update=wfh_update,
-                supporting_docs=[],
+            updated_approval_status = _get_updated_approval_status(arrangement, wfh_update.action)
+        except exceptions.ArrangementActionNotAllowedException as e:
+            results[arrangement_id] = {"success": False, "message": e.message}
+            continue
+
+        updates.append(
+            (
+                replace(
+                    arrangement,
+                    current_approval_status=updated_approval_status,
+                    status_reason=wfh_update.status_reason,
+                ),
+                arrangement.current_approval_status,
             )
+        )
+
+    # Update arrangements in database
+    logger.info(f"Service: Updating {len(updates)} of {len(arrangement_ids)} arrangements")
+    updated_arrangements = [
+        ArrangementResponse.from_dict(arrangement)
+        for arrangement in crud.update_arrangements_approval_status(db, updates, wfh_update.action)
+    ]
+    for arrangement in updated_arrangements:
+        results[arrangement.arrangement_id] = {
+            "success": True,
+            "message": f"Updated arrangement to '{arrangement.current_approval_status.value}' status",
+        }
+    # The arrangements whose status changed since they were read are left alone
+    for arrangement_data, _ in updates:
+        if arrangement_data.arrangement_id not in results:
+            error = exceptions.ArrangementStatusChangedException(arrangement_data.arrangement_id)
+            results[arrangement_data.arrangement_id] = {"success": False, "message": error.message}
+    logger.info(
+        f"Service: Updated '{wfh_update.action.value}' {len(updated_arrangements)} arrangements"
+    )
+
+    # Send email notifications, one per requester and resulting status, combined per recipient
+    if updated_arrangements:
+        employees = employee_crud.get_employees_by_ids(
+            db,
+            list(
+                dict.fromkeys(
+                    [wfh_update.approving_officer]
+                    + [arrangement.requester_staff_id for arrangement in updated_arrangements]
+                )
+            ),
+        )
+        employees_by_id = {employee.staff_id: employee for employee in employees}
+
+        arrangements_by_group: Dict[Tuple[int, ApprovalStatus], List[ArrangementResponse]] = {}
+        for arrangement in updated_arrangements:
+            group = (arrangement.requester_staff_id, arrangement.current_approval_status)
+            arrangements_by_group.setdefault(group, []).append(arrangement)
+
+        await craft_and_send_digest_emails(
+            [
+                ArrangementNotificationConfig(
+                    employee=employees_by_id.get(requester_staff_id),
+                    arrangements=group_arrangements,
+                    action=wfh_update.action,
+                    current_approval_status=current_approval_status,
+                    manager=employees_by_id.get(wfh_update.approving_officer),
+                    auto_reject=wfh_update.auto_reject,
+                )
+                for (
+                    requester_staff_id,
+                    current_approval_status,
+                ), group_arrangements in arrangements_by_group.items()
+            ]
+        )
+
+    return [
+        {"arrangement_id": arrangement_id, **results[arrangement_id]}
+        for arrangement_id in arrangement_ids
+    ]
+
+
+async def auto_reject_old_requests(
+    db: Session, chunk_size: int = AUTO_REJECT_CHUNK_SIZE
+) -> AutoRejectReport:
+    """Reject the pending requests for WFH dates before tomorrow, chunk by chunk.
 
-            logger.info(
-                f"Auto-rejected arrangement {arrangement['arrangement_id']} for date {arrangement['wfh_date']}"
+    The pending arrangements are rejected first, then the pending occurrences of recurring series,
+    which are rejected with exceptions of their series. Each chunk is rejected in its own
+    transaction, so the writer lock is released between chunks and a failed chunk does not undo
+    the others. The notifications of each chunk are sent as digests, one per recipient. The
+    queries run in a worker thread, so that the event loop keeps serving requests while they
+    block, and only the emails are sent on the loop.
+    """
+    start_time = time.perf_counter()
+    arrangement_ids = await asyncio.to_thread(crud.get_expiring_request_ids, db)
+    occurrence_keys = await asyncio.to_thread(crud.get_expiring_occurrences, db)
+    report = AutoRejectReport(total_count=len(arrangement_ids) + len(occurrence_keys))
+
+    logger.info(f"Auto-rejecting {report.total_count} expiring requests")
+
+    await _reject_in_chunks(
+        db, arrangement_ids, crud.reject_expiring_requests, report.failed_ids, report, chunk_size
+    )
+    await _reject_in_chunks(
+        db,
+        occurrence_keys,
+        crud.reject_expiring_occurrences,
+        report.failed_occurrences,
+        report,
+        chunk_size,
+    )
+
+    report.failed_count = len(report.failed_ids) + len(report.failed_occurrences)
+    report.duration_seconds = time.perf_counter() - start_time
+
+    logger.info(
+        f"Auto-rejection processed {report.processed_count} of {report.total_count} requests "
+        f"in {report.duration_seconds:.2f}s, {report.failed_count} failed"
+    )
+    if report.failed_ids:
+        logger.info(f"The following arrangement IDs failed: {report.failed_ids}")
+    if report.failed_occurrences:
+        logger.info(f"The following series occurrences failed: {report.failed_occurrences}")
+    return report
+
+
+async def _reject_in_chunks(
+    db: Session,
+    keys: List,
+    reject: Callable[[Session, List, str], List[Dict]],
+    failed_keys: List,
+    report: AutoRejectReport,
+    chunk_size: int,
+):
+    """Reject the expiring requests with the keys chunk by chunk with `reject`, adding the keys of
+    the failed chunks to `failed_keys`."""
+    for i in range(0, len(keys), chunk_size):
+        chunk_keys = keys[i : i + chunk_size]
+        try:
+            rejected_arrangements = await asyncio.to_thread(
+                reject, db, chunk_keys, AUTO_REJECT_STATUS_REASON
             )
         except Exception as e:
             logger.error(
-                f"Error processing arrangement {arrangement['arrangement_id']}: {str(e)}",
+                f"Error auto-rejecting {chunk_keys[0]} to {chunk_keys[-1]}: {str(e)}",
                 exc_info=True,
             )
-            failure_ids.append(arrangement["arrangement_id"])
+            failed_keys.extend(chunk_keys)
+            continue
 
-    if failure_ids:
-        logger.info(f"Auto-rejection for {len(failure_ids)} of {total_count} requests failed")
-    else:
-        logger.info(f"Auto-rejection for {total_count} requests completed successfully")
-    logger.info(f"The following arrangement IDs failed: {failure_ids}")
+        report.processed_count += len(rejected_arrangements)
+        if not rejected_arrangements:
+            continue
+
+        notification_configs = await asyncio.to_thread(
+            _get_auto_reject_notification_configs,
+            db,
+            [ArrangementResponse.from_dict(arrangement) for arrangement in rejected_arrangements],
+        )
+        try:
+            await craft_and_send_digest_emails(notification_configs)
+        except EmailNotificationException as e:
+            logger.error(f"Error sending auto-rejection emails: {str(e)}")
+            report.failed_emails.extend(e.emails)
+
+
+def _get_auto_reject_notification_configs(
+    db: Session, arrangements: List[ArrangementResponse]
+) -> List[ArrangementNotificationConfig]:
+    """Get one notification per requester and approving officer of the rejected arrangements,
+    to be combined into one digest email per recipient."""
+    arrangements_by_group: Dict[Tuple[int, int], List[ArrangementResponse]] = {}
+    for arrangement in arrangements:
+        approving_officer = arrangement.delegate_approving_officer or arrangement.approving_officer
+        group = (arrangement.requester_staff_id, approving_officer)
+        arrangements_by_group.setdefault(group, []).append(arrangement)
+
+    staff_ids = list(
+        dict.fromkeys(staff_id for group in arrangements_by_group for staff_id in group)
+    )
+    employees_by_id = {
+        employee.staff_id: employee
+        for employee in employee_crud.get_employees_by_ids(db, staff_ids)
+    }
+
+    return [
+        ArrangementNotificationConfig(
+            employee=employees_by_id.get(requester_staff_id),
+            arrangements=group_arrangements,
+            action=Action.REJECT,
+            current_approval_status=ApprovalStatus.REJECTED,
+            manager=employees_by_id.get(approving_officer),
+            auto_reject=True,
+        )
+        for (
+            requester_staff_id,
+            approving_officer,
+        ), group_arrangements in arrangements_by_group.items()
+    ]
 
 
 # ============================ DEPRECATED FUNCTIONS ============================
@@ -1,8 +1,11 @@
+import base64
+import binascii
+import json
 import os
-from copy import deepcopy
+from dataclasses import replace
 from datetime import date, datetime, timedelta
 from math import ceil
-from typing import List, Union
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Union
 
 import boto3
 from botocore.exceptions import ClientError
@@ -11,7 +14,7 @@ from fastapi import HTTPException
 from fastapi.responses import JSONResponse
 
 from ..logger import logger
-from .commons import schemas
+from .commons import exceptions, schemas
 from .commons.dataclasses import (
     ArrangementResponse,
     CreateArrangementRequest,
@@ -19,6 +22,7 @@ from .commons.dataclasses import (
     PaginationMeta,
 )
 from .commons.enums import RecurringFrequencyUnit
+from .s3_signer import get_signer
 
 
 async def upload_file(staff_id, update_datetime, file_obj, s3_client=None):
@@ -93,50 +97,37 @@ async def handle_multi_file_deletion(file_paths: List[str], s3_client):
             logger.info(f"Error deleting file {path} from S3: {str(delete_error)}")
 
 
-def create_presigned_url(object_name):
-    """Generate a presigned URL to share an S3 object.
+def get_recurring_dates(
+    start_date: date,
+    frequency_number: int,
+    frequency_unit: RecurringFrequencyUnit,
+    occurrences: int,
+) -> List[date]:
+    """Get the dates of the occurrences of a recurring rule.
 
-    :param bucket_name: string
-    :param object_name: string
-    :param expiration: Time in seconds for the presigned URL to remain valid
-    :return: Presigned URL as string. If error, returns None.
+    Each date is offset from the start date rather than from the previous date, so that monthly
+    occurrences starting on the 31st fall on the last day of shorter months and on the 31st again.
     """
-    if object_name:
-        # Generate a presigned URL for the S3 object
-        s3_client = boto3.client("s3")
-
-        S3_BUCKET_NAME = os.getenv("AWS_S3_BUCKET_NAME")
-        EXPIRATION = 3600  # 1 hour
-        try:
-            response = s3_client.generate_presigned_url(
-                "get_object",
-                Params={"Bucket": S3_BUCKET_NAME, "Key": object_name},
-                ExpiresIn=EXPIRATION,
-            )
-        except ClientError as e:
-            logger.error(e)
-            return None
-
-        # The response contains the presigned URL
-        return response
+    if frequency_unit == RecurringFrequencyUnit.WEEKLY:
+        step = relativedelta(weeks=frequency_number)
+    else:
+        step = relativedelta(months=frequency_number)
+    return [start_date + step * i for i in range(occurrences)]
 
 
 def expand_recurring_arrangement(
     request: CreateArrangementRequest,
 ) -> List[CreateArrangementRequest]:
-    arrangements_list = [deepcopy(request) for _ in range(request.recurring_occurrences)]
-
-    for i in range(len(arrangements_list)):
-        if request.recurring_frequency_unit == RecurringFrequencyUnit.WEEKLY:
-            arrangements_list[i].wfh_date = request.wfh_date + relativedelta(
-                weeks=i * request.recurring_frequency_number
-            )
-        else:
-            arrangements_list[i].wfh_date = request.wfh_date + relativedelta(
-                months=i * request.recurring_frequency_number
-            )
-
-    return arrangements_list
+    # The occurrences only differ by date, so shallow copies suffice
+    return [
+        replace(request, wfh_date=wfh_date)
+        for wfh_date in get_recurring_dates(
+            request.wfh_date,
+            request.recurring_frequency_number,
+            request.recurring_frequency_unit,
+            request.recurring_occurrences,
+        )
+    ]
 
 
 def group_arrangements_by_date(
@@ -158,8 +149,7 @@ def group_arrangements_by_date(
     return result
 
 
-def compute_pagination_meta(arrangements, items_per_page: int, page_num: int) -> PaginationMeta:
-    total_count = len(arrangements)
+def compute_pagination_meta(total_count: int, items_per_page: int, page_num: int) -> PaginationMeta:
     total_pages = ceil(total_count / items_per_page)
 
     return PaginationMeta(
@@ -170,6 +160,47 @@ def compute_pagination_meta(arrangements, items_per_page: int, page_num: int) ->
     )
 
 
+def compute_cursor_pagination_meta(
+    total_count: Optional[int], items_per_page: int, next_cursor: Optional[str]
+) -> PaginationMeta:
+    return PaginationMeta(
+        total_count=total_count,
+        page_size=items_per_page,
+        page_num=None,
+        total_pages=ceil(total_count / items_per_page) if total_count is not None else None,
+        next_cursor=next_cursor,
+    )
+
+
+def encode_cursor(*values: Any) -> str:
+    """Encode the sort key of the last item on a page into an opaque cursor."""
+    payload = [
+        value.isoformat() if isinstance(value, (date, datetime)) else value for value in values
+    ]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> List[Any]:
+    """Decode a cursor created by `encode_cursor` back into the list of sort key values."""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (binascii.Error, UnicodeError, ValueError):
+        raise exceptions.InvalidCursorException(cursor)
+
+    if not isinstance(values, list):
+        raise exceptions.InvalidCursorException(cursor)
+
+    return values
+
+
+def get_next_cursor(items: List[dict], items_per_page: int, *keys: str) -> Optional[str]:
+    """Get the cursor of the page after the given items, or None if this is the last page."""
+    if len(items) < items_per_page or not items:
+        return None
+
+    return encode_cursor(*[items[-1][key] for key in keys])
+
+
 def format_arrangements_response(
     arrangements: Union[List[ArrangementResponse], List[CreatedArrangementGroupByDate]]
 ) -> List[schemas.ArrangementResponse]:
@@ -196,6 +227,122 @@ def format_arrangement_response(arrangement: ArrangementResponse) -> schemas.Arr
     return schemas.ArrangementResponse.model_validate(arrangement)
 
 
+def format_arrangement_row(
+    row: Dict, supporting_doc_urls: Optional[Dict[str, Optional[str]]] = None
+) -> Dict:
+    """Format an arrangement row from `crud.get_arrangements(..., as_rows=True)` for a JSON response.
+
+    The result serializes to the same JSON as `format_arrangement_response`, without building the
+    dataclass and the Pydantic model, so the keys follow the fields of
+    `schemas.ArrangementResponse`. If `supporting_doc_urls` is given, the supporting document keys
+    are replaced with their URLs.
+    """
+    supporting_docs = (row["supporting_doc_1"], row["supporting_doc_2"], row["supporting_doc_3"])
+    if supporting_doc_urls is not None:
+        supporting_docs = tuple(supporting_doc_urls.get(doc) for doc in supporting_docs)
+
+    return {
+        "arrangement_id": row["arrangement_id"],
+        "update_datetime": row["update_datetime"].isoformat(),
+        "requester_staff_id": row["requester_staff_id"],
+        "wfh_date": row["wfh_date"].isoformat(),
+        "wfh_type": row["wfh_type"].value,
+        "current_approval_status": row["current_approval_status"].value,
+        "approving_officer": row["approving_officer"],
+        "delegate_approving_officer": row["delegate_approving_officer"],
+        "reason_description": row["reason_description"],
+        "batch_id": row["batch_id"],
+        "latest_log_id": row["latest_log_id"],
+        "supporting_doc_1": supporting_docs[0],
+        "supporting_doc_2": supporting_docs[1],
+        "supporting_doc_3": supporting_docs[2],
+        "status_reason": row["status_reason"],
+        "requester_info": {
+            "staff_id": row["requester_info_staff_id"],
+            "staff_fname": row["requester_info_staff_fname"],
+            "staff_lname": row["requester_info_staff_lname"],
+            "dept": row["requester_info_dept"],
+            "position": row["requester_info_position"],
+            "country": row["requester_info_country"],
+            "email": row["requester_info_email"],
+            "reporting_manager": row["requester_info_reporting_manager"],
+            "role": row["requester_info_role"],
+        },
+    }
+
+
+def format_arrangement_rows(rows: List[Dict], presign: bool = False) -> List[Dict]:
+    """Format arrangement rows for a JSON response, presigning the supporting documents if needed."""
+    supporting_doc_urls = None
+    if presign:
+        supporting_doc_urls = get_signer().sign_many(
+            doc
+            for row in rows
+            for doc in (row["supporting_doc_1"], row["supporting_doc_2"], row["supporting_doc_3"])
+        )
+
+    return [format_arrangement_row(row, supporting_doc_urls) for row in rows]
+
+
+def group_formatted_arrangements_by_date(arrangements: List[Dict]) -> List[Dict]:
+    """Group formatted arrangements in the same way as `group_arrangements_by_date`."""
+    arrangements_dict = {}
+
+    # ISO dates sort in the same order as the dates
+    for arrangement in sorted(arrangements, key=lambda x: x["wfh_date"], reverse=True):
+        arrangements_dict.setdefault(arrangement["wfh_date"], []).append(arrangement)
+
+    return [{"date": key, "pending_arrangements": val} for key, val in arrangements_dict.items()]
+
+
+def format_arrangement_log_row(row: Mapping) -> Dict:
+    """Format an arrangement log row from `crud.stream_arrangement_logs` for a JSON response.
+
+    The result serializes to the same JSON as `schemas.ArrangementLogResponse`.
+    """
+    previous_approval_status = row["previous_approval_status"]
+
+    return {
+        "log_id": row["log_id"],
+        "update_datetime": row["update_datetime"].isoformat(),
+        "arrangement_id": row["arrangement_id"],
+        "requester_staff_id": row["requester_staff_id"],
+        "wfh_date": row["wfh_date"].isoformat(),
+        "wfh_type": row["wfh_type"].value,
+        "action": row["action"].value,
+        "previous_approval_status": (
+            previous_approval_status.value if previous_approval_status else None
+        ),
+        "updated_approval_status": row["updated_approval_status"].value,
+        "approving_officer": row["approving_officer"],
+        "reason_description": row["reason_description"],
+        "batch_id": row["batch_id"],
+        "supporting_doc_1": row["supporting_doc_1"],
+        "supporting_doc_2": row["supporting_doc_2"],
+        "supporting_doc_3": row["supporting_doc_3"],
+        "status_reason": row["status_reason"],
+    }
+
+
+def encode_ndjson(items: Iterable[Dict], lines_per_chunk: int = 1000) -> Iterator[bytes]:
+    """Encode JSON-ready items as newline-delimited JSON, one item per line.
+
+    Lines are yielded in chunks of `lines_per_chunk` so that each write to the client is not a
+    single row.
+    """
+    lines = []
+    for item in items:
+        lines.append(
+            json.dumps(item, ensure_ascii=False, allow_nan=False, separators=(",", ":")) + "\n"
+        )
+        if len(lines) == lines_per_chunk:
+            yield "".join(lines).encode("utf-8")
+            lines = []
+
+    if lines:
+        yield "".join(lines).encode("utf-8")
+
+
 def get_tomorrow_date() -> date:
     """Get tomorrow's date at midnight."""
     return datetime.now().date() + timedelta(days=1)
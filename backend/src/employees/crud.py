@@ -1,13 +1,14 @@
 from datetime import datetime
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 from zoneinfo import ZoneInfo
 
-from sqlalchemy import func, or_
-from sqlalchemy.orm import Session
+from sqlalchemy import Select, func, literal, select
+from sqlalchemy.orm import Session, aliased
 
-from ..arrangements.commons.models import LatestArrangement
+from ..arrangements import cache
+from ..arrangements.commons.models import LatestArrangement, RecurringRequest
 from . import models
-from .dataclasses import EmployeeFilters
+from .dataclasses import DelegationPaginationConfig, EmployeeFilters
 from .models import DelegateLog, DelegationStatus, Employee
 
 singapore_timezone = ZoneInfo("Asia/Singapore")
@@ -20,6 +21,55 @@ def get_employees(db: Session, filters: EmployeeFilters) -> List[models.Employee
     return query.all()
 
 
+def get_headcount_by_department(
+    db: Session,
+    department: Optional[str] = None,
+    manager_id: Optional[int] = None,
+    max_depth: Optional[int] = None,
+) -> Dict[str, int]:
+    """Count the employees per department.
+
+    :param manager_id: Only count the employees under this manager, down to `max_depth` levels
+    """
+    query = db.query(models.Employee.dept, func.count(models.Employee.staff_id))
+    if department:
+        query = query.filter(models.Employee.dept == department)
+    if manager_id:
+        query = query.filter(
+            models.Employee.staff_id.in_(select_reporting_subtree(manager_id, max_depth))
+        )
+    return dict(query.group_by(models.Employee.dept).all())
+
+
+def select_reporting_subtree(manager_id: int, max_depth: Optional[int] = None) -> Select:
+    """Select the staff ids of the employees reporting to the manager directly or indirectly.
+
+    The reporting lines are followed by a single recursive CTE, down to `max_depth` levels below
+    the manager if given. The manager is excluded at every level, which ends the recursion at the
+    CEO, who reports to themself, and at any other reporting cycle, since a cycle reachable from
+    the manager must go through the manager.
+    """
+    subtree = (
+        select(models.Employee.staff_id, literal(1).label("depth"))
+        .where(
+            models.Employee.reporting_manager == manager_id,
+            models.Employee.staff_id != manager_id,
+        )
+        .cte("reporting_subtree", recursive=True)
+    )
+    reports = aliased(models.Employee)
+    next_level = (
+        select(reports.staff_id, subtree.c.depth + 1)
+        .join(subtree, reports.reporting_manager == subtree.c.staff_id)
+        .where(reports.staff_id != manager_id)
+    )
+    if max_depth is not None:
+        next_level = next_level.where(subtree.c.depth < max_depth)
+    subtree = subtree.union_all(next_level)
+
+    return select(subtree.c.staff_id)
+
+
 def get_employee_by_staff_id(db: Session, staff_id: int) -> models.Employee:
     return db.query(models.Employee).filter(models.Employee.staff_id == staff_id).first()
 
@@ -32,6 +82,23 @@ def get_subordinates_by_manager_id(db: Session, manager_id: int) -> List[models.
     return db.query(models.Employee).filter(models.Employee.reporting_manager == manager_id).all()
 
 
+def get_employees_by_ids(db: Session, staff_ids: List[int]) -> List[models.Employee]:
+    """Get the employees with the staff ids in a single query, in the order of the ids."""
+    if not staff_ids:
+        return []
+    employees = db.query(models.Employee).filter(models.Employee.staff_id.in_(staff_ids)).all()
+    employees_by_id = {employee.staff_id: employee for employee in employees}
+    return [employees_by_id[staff_id] for staff_id in staff_ids if staff_id in employees_by_id]
+
+
+def get_reporting_lines(db: Session) -> List[Tuple[int, Optional[int]]]:
+    """Get the staff id and reporting manager of every employee."""
+    return [
+        tuple(row)
+        for row in db.query(models.Employee.staff_id, models.Employee.reporting_manager).all()
+    ]
+
+
 def get_existing_delegation(db: Session, staff_id: int, delegate_manager_id: int):
     return (
         db.query(models.DelegateLog)
@@ -44,10 +111,32 @@ def get_existing_delegation(db: Session, staff_id: int, delegate_manager_id: int
                 [models.DelegationStatus.pending, models.DelegationStatus.accepted]
             )
         )
+        .order_by(models.DelegateLog.id)
         .first()
     )
 
 
+def get_active_delegations(db: Session) -> List[Tuple[int, int, DelegationStatus, datetime]]:
+    """Get the manager id, delegate id, status and date of the pending and accepted delegations,
+    in the order they were created."""
+    return [
+        tuple(row)
+        for row in db.query(
+            DelegateLog.manager_id,
+            DelegateLog.delegate_manager_id,
+            DelegateLog.status_of_delegation,
+            DelegateLog.date_of_delegation,
+        )
+        .filter(
+            DelegateLog.status_of_delegation.in_(
+                [DelegationStatus.pending, DelegationStatus.accepted]
+            )
+        )
+        .order_by(DelegateLog.id)
+        .all()
+    ]
+
+
 def create_delegation(db: Session, staff_id: int, delegate_manager_id: int):
     existing_delegation = get_existing_delegation(db, staff_id, delegate_manager_id)
     if existing_delegation:
@@ -88,14 +177,22 @@ def update_delegation_status(
 def update_pending_arrangements_for_delegate(
     db: Session, manager_id: int, delegate_manager_id: int
 ):
-    db.query(LatestArrangement).filter(
-        LatestArrangement.approving_officer == manager_id,
-    ).update(
-        {
-            LatestArrangement.delegate_approving_officer: delegate_manager_id,
-            LatestArrangement.update_datetime: datetime.now(singapore_timezone),
-        },
+    condition = LatestArrangement.approving_officer == manager_id
+    series_condition = RecurringRequest.approving_officer == manager_id
+    cache.invalidate_on_commit(
+        db,
+        cache.get_arrangement_tags(db, condition)
+        | cache.get_series_tags(db, series_condition)
+        | {cache.approver_tag(delegate_manager_id)},
     )
+    update_datetime = datetime.now(singapore_timezone)
+    for model, criterion in ((LatestArrangement, condition), (RecurringRequest, series_condition)):
+        db.query(model).filter(criterion).update(
+            {
+                model.delegate_approving_officer: delegate_manager_id,
+                model.update_datetime: update_datetime,
+            },
+        )
 
     db.commit()
 
@@ -122,14 +219,19 @@ def get_delegation_log_by_manager(db: Session, staff_id: int):
 
 
 def remove_delegate_from_arrangements(db: Session, delegate_manager_id: int):
-    db.query(LatestArrangement).filter(
-        LatestArrangement.delegate_approving_officer == delegate_manager_id,
-    ).update(
-        {
-            LatestArrangement.delegate_approving_officer: None,
-            LatestArrangement.update_datetime: datetime.now(singapore_timezone),
-        }
+    condition = LatestArrangement.delegate_approving_officer == delegate_manager_id
+    series_condition = RecurringRequest.delegate_approving_officer == delegate_manager_id
+    cache.invalidate_on_commit(
+        db, cache.get_arrangement_tags(db, condition) | cache.get_series_tags(db, series_condition)
     )
+    update_datetime = datetime.now(singapore_timezone)
+    for model, criterion in ((LatestArrangement, condition), (RecurringRequest, series_condition)):
+        db.query(model).filter(criterion).update(
+            {
+                model.delegate_approving_officer: None,
+                model.update_datetime: update_datetime,
+            }
+        )
 
     db.commit()
 
@@ -175,57 +277,30 @@ def get_all_received_delegations(db: Session, staff_id: int):
     return db.query(DelegateLog).filter(DelegateLog.delegate_manager_id == staff_id).all()
 
 
-def get_employee_full_name(db: Session, staff_id: int):
-    employee = db.query(Employee).filter(Employee.staff_id == staff_id).first()
-    return f"{employee.staff_fname} {employee.staff_lname}" if employee else "Unknown"
+def get_delegations_with_names(
+    db: Session, *criteria, pagination: DelegationPaginationConfig
+) -> List[Tuple[DelegateLog, Optional[str], Optional[str], Optional[str], Optional[str]]]:
+    """Get a page of the delegations matching the criteria, latest first, in one query.
 
-
-def get_manager_of_employee(db: Session, emp: Employee) -> Employee:
-    if emp.manager and emp.manager.staff_id != emp.staff_id:
-        return emp.manager
-    return None
-
-
-def get_peer_employees(db: Session, manager_id: int) -> list[Employee]:
-    return db.query(Employee).filter(Employee.reporting_manager == manager_id).all()
-
-
-def is_employee_locked_in_delegation(db: Session, employee_id: int) -> bool:
+    Each row holds the delegation, then the first and last names of its manager and of its
+    delegate, which are None if the employee does not exist. One more row than the page size is
+    returned if there is a next page.
+    """
+    manager = aliased(Employee)
+    delegate = aliased(Employee)
     return (
-        db.query(DelegateLog)
-        .filter(
-            or_(
-                DelegateLog.manager_id == employee_id,
-                DelegateLog.delegate_manager_id == employee_id,
-            ),
-            DelegateLog.status_of_delegation.in_(
-                [DelegationStatus.pending, DelegationStatus.accepted]
-            ),
+        db.query(
+            DelegateLog,
+            manager.staff_fname,
+            manager.staff_lname,
+            delegate.staff_fname,
+            delegate.staff_lname,
         )
-        .first()
-        is not None
-    )
-
-
-def get_delegated_manager(db: Session, approving_officer_id: int) -> Optional[models.Employee]:
-    # Query for active delegation where the original approving officer has delegated to someone
-    delegation = (
-        db.query(DelegateLog)
-        .filter(
-            DelegateLog.manager_id == approving_officer_id,
-            DelegateLog.status_of_delegation == DelegationStatus.accepted,
-        )
-        .order_by(DelegateLog.date_of_delegation.desc())  # Get the most recent delegation
-        .first()
+        .outerjoin(manager, manager.staff_id == DelegateLog.manager_id)
+        .outerjoin(delegate, delegate.staff_id == DelegateLog.delegate_manager_id)
+        .filter(*criteria)
+        .order_by(DelegateLog.date_of_delegation.desc(), DelegateLog.id.desc())
+        .offset((pagination.page_num - 1) * pagination.items_per_page)
+        .limit(pagination.items_per_page + 1)
+        .all()
     )
-
-    if delegation:
-        # Get the delegate approving officer's details
-        delegate_manager = (
-            db.query(models.Employee)
-            .filter(models.Employee.staff_id == delegation.delegate_manager_id)
-            .first()
-        )
-        return delegate_manager
-
-    return None
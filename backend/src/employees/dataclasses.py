@@ -1,7 +1,35 @@
 import inspect
 from dataclasses import dataclass
 from datetime import date, datetime
-from typing import Optional
+from functools import lru_cache
+from typing import Any, Callable, Dict, Optional
+
+
+def _parse_datetime(value: str) -> datetime:
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        return datetime.strptime(value, "%Y-%m-%d %H:%M:%S")
+
+
+def _parse_date(value: str) -> date:
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        return datetime.strptime(value, "%Y-%m-%d %H:%M:%S").date()
+
+
+@lru_cache(maxsize=None)
+def _get_field_parsers(cls) -> Dict[str, Optional[Callable[[str], Any]]]:
+    """Map each init parameter of the class to the parser for its string values, if any.
+
+    Built once per class, since inspecting the signature costs more than the conversion.
+    """
+    parsers = {datetime: _parse_datetime, date: _parse_date}
+    return {
+        name: parsers.get(parameter.annotation)
+        for name, parameter in inspect.signature(cls).parameters.items()
+    }
 
 
 @dataclass
@@ -10,25 +38,13 @@ class BaseClass:
 
     @classmethod
     def from_dict(cls, env):
-        cls_signature = inspect.signature(cls)
-        cls_parameters = cls_signature.parameters
-        cls_type_hints = {k: v.annotation for k, v in cls_parameters.items()}
+        field_parsers = _get_field_parsers(cls)
 
         parsed_env = {}
         for k, v in env.items():
-            if k in cls_type_hints:
-                if cls_type_hints[k] == datetime and isinstance(v, str):
-                    try:
-                        parsed_env[k] = datetime.fromisoformat(v)
-                    except ValueError:
-                        parsed_env[k] = datetime.strptime(v, "%Y-%m-%d %H:%M:%S")
-                elif cls_type_hints[k] == date and isinstance(v, str):
-                    try:
-                        parsed_env[k] = date.fromisoformat(v)
-                    except ValueError:
-                        parsed_env[k] = datetime.strptime(v, "%Y-%m-%d %H:%M:%S").date()
-                else:
-                    parsed_env[k] = v
+            if k in field_parsers:
+                parser = field_parsers[k]
+                parsed_env[k] = parser(v) if parser is not None and isinstance(v, str) else v
 
         return cls(**parsed_env)
 
@@ -36,3 +52,9 @@ class BaseClass:
 @dataclass
 class EmployeeFilters(BaseClass):
     department: Optional[str] = None
+
+
+@dataclass
+class DelegationPaginationConfig(BaseClass):
+    items_per_page: int = 50
+    page_num: int = 1
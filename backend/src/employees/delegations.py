@@ -0,0 +1,91 @@
+"""In-memory map of the active delegations, for routing requests without querying delegate_logs.
+
+A delegation is active while it is pending or accepted. Active delegations are few and only change
+when a manager delegates, when the delegate accepts or rejects, and when the manager undelegates.
+The map is loaded from `delegate_logs` at startup or on first use, and rebuilt on the first use
+after the delegations version changes, i.e. after a session of this process commits a write to
+delegate_logs. One map is kept per database engine.
+"""
+
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Set, Tuple
+from weakref import WeakKeyDictionary
+
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from . import crud, version
+from .models import DelegationStatus
+
+
+class DelegationMap:
+    def __init__(
+        self,
+        delegations: Iterable[Tuple[int, int, DelegationStatus, datetime]],
+        version: str = "",
+    ):
+        """Index the active delegations, given as tuples of manager id, delegate id, status and
+        date of delegation, in the order they were created.
+
+        :param version: The delegations version of the delegations
+        """
+        self.version = version
+        self.delegate_by_manager: Dict[int, int] = {}
+        self.accepted_delegate_by_manager: Dict[int, int] = {}
+        self.delegate_ids: Set[int] = set()
+
+        latest_accepted: Dict[int, datetime] = {}
+        for manager_id, delegate_manager_id, status, date_of_delegation in delegations:
+            self.delegate_by_manager.setdefault(manager_id, delegate_manager_id)
+            self.delegate_ids.add(delegate_manager_id)
+            if status == DelegationStatus.accepted and (
+                manager_id not in latest_accepted
+                or date_of_delegation > latest_accepted[manager_id]
+            ):
+                latest_accepted[manager_id] = date_of_delegation
+                self.accepted_delegate_by_manager[manager_id] = delegate_manager_id
+
+    def get_delegate_id(self, manager_id: int) -> Optional[int]:
+        """Get the id of the delegate of the earliest pending or accepted delegation of the
+        manager."""
+        return self.delegate_by_manager.get(manager_id)
+
+    def get_accepted_delegate_id(self, manager_id: int) -> Optional[int]:
+        """Get the id of the delegate of the latest accepted delegation of the manager."""
+        return self.accepted_delegate_by_manager.get(manager_id)
+
+    def has_delegation(self, manager_id: int, delegate_manager_id: Optional[int]) -> bool:
+        """Check if the manager has delegated, or the delegate was delegated to, pending or
+        accepted."""
+        return manager_id in self.delegate_by_manager or delegate_manager_id in self.delegate_ids
+
+    def get_locked_staff_ids(self, staff_ids: Iterable[int]) -> Set[int]:
+        """Get the ids of the given employees who are the manager or the delegate of a pending or
+        accepted delegation."""
+        return {
+            staff_id
+            for staff_id in staff_ids
+            if staff_id in self.delegate_by_manager or staff_id in self.delegate_ids
+        }
+
+
+_maps: "WeakKeyDictionary[Engine, DelegationMap]" = WeakKeyDictionary()
+_lock = threading.Lock()
+
+
+def get_delegation_map(db: Session) -> DelegationMap:
+    """Get the map of the active delegations in the database of the session."""
+    engine = db.get_bind()
+    # Read the version before the rows, so that a write committed meanwhile triggers a rebuild
+    current_version = version.get_delegations_version()
+
+    with _lock:
+        delegation_map = _maps.get(engine)
+    if delegation_map is not None and delegation_map.version == current_version:
+        return delegation_map
+
+    delegation_map = DelegationMap(crud.get_active_delegations(db), current_version)
+    with _lock:
+        _maps[engine] = delegation_map
+    return delegation_map
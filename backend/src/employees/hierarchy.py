@@ -0,0 +1,111 @@
+"""In-memory index of the org hierarchy, for manager, peer and subordinate lookups.
+
+The index holds the reporting manager, the direct reports and the depth of every employee. It is
+loaded from `employees` on first use and rebuilt on the first use after the employees version
+changes, i.e. after a session of this process commits a write to employees. One index is kept per
+database engine.
+"""
+
+import threading
+from collections import defaultdict, deque
+from typing import Dict, Iterable, List, Optional, Tuple
+from weakref import WeakKeyDictionary
+
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from . import crud, version
+
+
+class OrgHierarchy:
+    def __init__(self, reporting_lines: Iterable[Tuple[int, Optional[int]]], version: str = ""):
+        """Index the reporting lines, given as pairs of staff id and reporting manager id.
+
+        :param version: The employees version of the reporting lines
+        """
+        self.version = version
+        self.parent: Dict[int, Optional[int]] = {}
+        self.children: Dict[Optional[int], List[int]] = defaultdict(list)
+        for staff_id, reporting_manager in sorted(reporting_lines, key=lambda line: line[0]):
+            self.parent[staff_id] = reporting_manager
+            self.children[reporting_manager].append(staff_id)
+        self.depth = self._compute_depths()
+
+    def _compute_depths(self) -> Dict[int, int]:
+        # The roots have no manager, such as the CEO who reports to themself. Employees in a
+        # reporting cycle are unreachable from the roots and have no depth.
+        roots = [staff_id for staff_id in self.parent if self.get_manager_id(staff_id) is None]
+        depth = {staff_id: 0 for staff_id in roots}
+        queue = deque(roots)
+        while queue:
+            manager_id = queue.popleft()
+            for staff_id in self.children.get(manager_id, []):
+                if staff_id not in depth:
+                    depth[staff_id] = depth[manager_id] + 1
+                    queue.append(staff_id)
+        return depth
+
+    def __contains__(self, staff_id: int) -> bool:
+        return staff_id in self.parent
+
+    def get_manager_id(self, staff_id: int) -> Optional[int]:
+        """Get the id of the manager of the employee, or None if the employee has no manager or
+        reports to themself."""
+        manager_id = self.parent.get(staff_id)
+        if manager_id == staff_id or manager_id not in self.parent:
+            return None
+        return manager_id
+
+    def get_subordinate_ids(self, manager_id: Optional[int]) -> List[int]:
+        """Get the ids of the employees whose reporting manager is the given one, in order."""
+        return self.children.get(manager_id, [])
+
+    def get_peer_ids(self, staff_id: int) -> List[int]:
+        """Get the ids of the employees with the same reporting manager as the employee,
+        including the employee."""
+        if staff_id not in self.parent:
+            return []
+        return self.get_subordinate_ids(self.parent[staff_id])
+
+    def get_descendant_ids(self, manager_id: int, max_depth: Optional[int] = None) -> List[int]:
+        """Get the ids of the employees reporting to the manager directly or indirectly, down to
+        `max_depth` levels below the manager if given, level by level."""
+        descendant_ids = []
+        visited = {manager_id}
+        level = [manager_id]
+        depth = 0
+        while level and (max_depth is None or depth < max_depth):
+            level = [
+                staff_id
+                for parent_id in level
+                for staff_id in self.get_subordinate_ids(parent_id)
+                if staff_id not in visited
+            ]
+            visited.update(level)
+            descendant_ids.extend(level)
+            depth += 1
+        return descendant_ids
+
+    def get_depth(self, staff_id: int) -> Optional[int]:
+        return self.depth.get(staff_id)
+
+
+_hierarchies: "WeakKeyDictionary[Engine, OrgHierarchy]" = WeakKeyDictionary()
+_lock = threading.Lock()
+
+
+def get_org_hierarchy(db: Session) -> OrgHierarchy:
+    """Get the hierarchy of the employees in the database of the session."""
+    engine = db.get_bind()
+    # Read the version before the rows, so that a write committed meanwhile triggers a rebuild
+    current_version = version.get_employees_version()
+
+    with _lock:
+        hierarchy = _hierarchies.get(engine)
+    if hierarchy is not None and hierarchy.version == current_version:
+        return hierarchy
+
+    hierarchy = OrgHierarchy(crud.get_reporting_lines(db), current_version)
+    with _lock:
+        _hierarchies[engine] = hierarchy
+    return hierarchy
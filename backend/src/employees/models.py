@@ -7,12 +7,14 @@ from sqlalchemy import (
     DateTime,
     Enum,
     ForeignKey,
+    Index,
     Integer,
     String,
 )
 from sqlalchemy.orm import relationship
 
 from ..database import Base
+from ..fts import FtsIndex
 
 
 class Employee(Base):
@@ -28,6 +30,9 @@ class Employee(Base):
     reporting_manager = Column(Integer, ForeignKey("employees.staff_id"), nullable=True)
     role = Column(Integer, CheckConstraint("role IN (1, 2, 3)"), nullable=False)
 
+    # For the lookups of the reports of a manager, including the recursive subtree lookups
+    __table_args__ = (Index("ix_employees_reporting_manager", "reporting_manager"),)
+
     manager = relationship("Employee", remote_side=[staff_id], lazy="select")
     auth_info = relationship("Auth", back_populates="employee")
 
@@ -57,6 +62,10 @@ class Employee(Base):
     )
 
 
+# Index for the name filter of arrangements
+employee_name_index = FtsIndex(Employee.__table__, "staff_fname", "staff_lname")
+
+
 class DelegationStatus(enum.Enum):
     pending = "pending"
     accepted = "accepted"
@@ -77,6 +86,12 @@ class DelegateLog(Base):
     )
     description = Column(String(length=255), nullable=True)
 
+    # For the lookups of the active delegations of a manager or a delegate
+    __table_args__ = (
+        Index("ix_delegate_logs_manager_status", "manager_id", "status_of_delegation"),
+        Index("ix_delegate_logs_delegate_status", "delegate_manager_id", "status_of_delegation"),
+    )
+
     # Relationships to the Employee model
     manager = relationship(
         "Employee",
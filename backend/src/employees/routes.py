@@ -1,6 +1,6 @@
 from typing import List
 
-from fastapi import APIRouter, Depends, Form, HTTPException
+from fastapi import APIRouter, Depends, Form, Header, HTTPException, Request, Response
 from pydantic import EmailStr
 from sqlalchemy.orm import Session
 
@@ -10,15 +10,27 @@ from ..employees.models import Employee
 from ..employees.schemas import DelegateLogCreate, EmployeeBase, EmployeePeerResponse
 from ..logger import logger
 from . import exceptions, schemas, services
-from .dataclasses import EmployeeFilters
+from .dataclasses import DelegationPaginationConfig, EmployeeFilters
 
 router = APIRouter()
 
 
 @router.get("/")
-def get_employees(department: str | None = None, db: Session = Depends(get_db)):
+def get_employees(
+    request: Request,
+    response: Response,
+    department: str | None = None,
+    if_none_match: str | None = Header(None),
+    db: Session = Depends(get_db),
+):
+    # Answer unchanged polls before the employees are loaded
+    etag = utils.compute_etag(request, services.get_employees_version())
+    if utils.etag_matches(etag, if_none_match):
+        return Response(status_code=304, headers={"ETag": etag})
+
     filters = EmployeeFilters(department=department)
     employees = services.get_employees(db, filters)
+    response.headers["ETag"] = etag
     return employees
 
 
@@ -155,9 +167,16 @@ async def undelegate_manager_route(staff_id: int, db: Session = Depends(get_db))
 
 
 @router.get("/manager/viewdelegations/{staff_id}", summary="View all delegations sent by a manager")
-def view_delegations_route(staff_id: int, db: Session = Depends(get_db)):
+def view_delegations_route(
+    staff_id: int,
+    request_pagination: schemas.DelegationPaginationConfig = Depends(
+        schemas.DelegationPaginationConfig.as_query
+    ),
+    db: Session = Depends(get_db),
+):
     try:
-        return services.view_delegations(staff_id, db)
+        pagination = DelegationPaginationConfig.from_dict(request_pagination.model_dump())
+        return services.view_delegations(staff_id, db, pagination)
     except Exception as e:
         print(f"Unexpected error: {str(e)}")
         raise HTTPException(
@@ -168,9 +187,16 @@ def view_delegations_route(staff_id: int, db: Session = Depends(get_db)):
 @router.get(
     "/manager/viewalldelegations/{staff_id}", summary="View all delegations received by a manager"
 )
-def view_all_delegations_route(staff_id: int, db: Session = Depends(get_db)):
+def view_all_delegations_route(
+    staff_id: int,
+    request_pagination: schemas.DelegationPaginationConfig = Depends(
+        schemas.DelegationPaginationConfig.as_query
+    ),
+    db: Session = Depends(get_db),
+):
     try:
-        return services.view_all_delegations(staff_id, db)
+        pagination = DelegationPaginationConfig.from_dict(request_pagination.model_dump())
+        return services.view_all_delegations(staff_id, db, pagination)
     except Exception as e:
         print(f"Unexpected error: {str(e)}")
         raise HTTPException(
@@ -1,6 +1,9 @@
 from datetime import datetime
 from typing import List, Optional
 
+from fastapi import Query
+from pydantic import Field
+
 from ..base import BaseSchema
 from ..employees.models import DelegationStatus
 
@@ -32,3 +35,25 @@ class DelegateLogCreate(BaseSchema):
 
     class Config:
         from_attributes = True
+
+
+class DelegationPaginationConfig(BaseSchema):
+    items_per_page: int = Field(
+        50,
+        ge=1,
+        le=200,
+        title="Number of delegations per page of each list",
+    )
+    page_num: int = Field(
+        1,
+        ge=1,
+        title="Page number",
+    )
+
+    @classmethod
+    def as_query(
+        cls,
+        items_per_page: int = Query(50, ge=1, le=200),
+        page_num: int = Query(1, ge=1),
+    ):
+        return cls(items_per_page=items_per_page, page_num=page_num)
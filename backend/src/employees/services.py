@@ -1,5 +1,5 @@
 from enum import Enum
-from typing import List, Tuple, Union
+from typing import List, Optional, Tuple, Union
 
 from sqlalchemy.orm import Session
 
@@ -7,8 +7,10 @@ from ..logger import logger
 from ..notifications.commons.dataclasses import DelegateNotificationConfig
 from ..notifications.email_notifications import craft_and_send_email
 from ..utils import convert_model_to_pydantic_schema
-from . import crud, exceptions, models, schemas
-from .dataclasses import EmployeeFilters
+from . import crud, exceptions, models, schemas, version
+from .dataclasses import DelegationPaginationConfig, EmployeeFilters
+from .delegations import get_delegation_map
+from .hierarchy import get_org_hierarchy
 
 JACK_SIM_STAFF_ID = 130002
 
@@ -19,6 +21,11 @@ def get_employees(db: Session, filters: EmployeeFilters):
     return employees_pydantic
 
 
+def get_employees_version() -> str:
+    """Get the version of the employees, which changes whenever an employee is written."""
+    return version.get_employees_version()
+
+
 def get_reporting_manager_and_peer_employees(db: Session, staff_id: int):
     # Auto Approve for Jack Sim and Skip manager check
     if staff_id == JACK_SIM_STAFF_ID:
@@ -70,24 +77,27 @@ def get_manager_by_subordinate_id(
         raise exceptions.EmployeeNotFoundException(staff_id)
 
     # Get the manager of the employee
-    manager = crud.get_manager_of_employee(db, emp)
-    if not manager:
+    hierarchy = get_org_hierarchy(db)
+    manager_id = hierarchy.get_manager_id(emp.staff_id)
+    if manager_id is None:
         return None, None  # Return None if there's no valid manager
+    manager = crud.get_employee_by_staff_id(db, manager_id)
 
     # Check if the manager has delegated their authority
-    delegated_manager = crud.get_delegated_manager(db, manager.staff_id)
-    if delegated_manager:
-        manager = delegated_manager
+    delegation_map = get_delegation_map(db)
+    delegate_manager_id = delegation_map.get_accepted_delegate_id(manager.staff_id)
+    if delegate_manager_id is not None:
+        manager = crud.get_employee_by_staff_id(db, delegate_manager_id) or manager
 
     # Retrieve all peers reporting to the manager
-    all_peers = crud.get_peer_employees(db, manager.staff_id)
+    all_peers = crud.get_employees_by_ids(db, hierarchy.get_subordinate_ids(manager.staff_id))
 
     # Filter out peers who are either locked in a delegation relationship or have the ID 130002
+    locked_staff_ids = delegation_map.get_locked_staff_ids(peer.staff_id for peer in all_peers)
     unlocked_peers = [
         peer
         for peer in all_peers
-        if not crud.is_employee_locked_in_delegation(db, peer.staff_id)
-        and peer.staff_id != JACK_SIM_STAFF_ID
+        if peer.staff_id not in locked_staff_ids and peer.staff_id != JACK_SIM_STAFF_ID
     ]
 
     logger.info(
@@ -115,7 +125,8 @@ def get_employee_by_email(db: Session, email: str) -> models.Employee:
 
 
 def get_subordinates_by_manager_id(db: Session, manager_id: int) -> List[models.Employee]:
-    employees: List[models.Employee] = crud.get_subordinates_by_manager_id(db, manager_id)
+    subordinate_ids = get_org_hierarchy(db).get_subordinate_ids(manager_id)
+    employees: List[models.Employee] = crud.get_employees_by_ids(db, subordinate_ids)
 
     if not employees:
         raise exceptions.ManagerWithIDNotFoundException(manager_id=manager_id)
@@ -125,17 +136,15 @@ def get_subordinates_by_manager_id(db: Session, manager_id: int) -> List[models.
 
 def get_peers_by_staff_id(db: Session, staff_id: int) -> List[models.Employee]:
     employee: models.Employee = get_employee_by_id(db, staff_id)
-    peer_employees: List[models.Employee] = crud.get_subordinates_by_manager_id(
-        db, employee.reporting_manager
-    )
+    peer_ids = get_org_hierarchy(db).get_peer_ids(employee.staff_id)
+    peer_employees: List[models.Employee] = crud.get_employees_by_ids(db, peer_ids)
 
     return peer_employees
 
 
 async def delegate_manager(staff_id: int, delegate_manager_id: int, db: Session):
     # Step 1: Check for existing delegation
-    existing_delegation = crud.get_existing_delegation(db, staff_id, delegate_manager_id)
-    if existing_delegation:
+    if get_delegation_map(db).has_delegation(staff_id, delegate_manager_id):
         return "Delegation already exists for either the manager or delegatee."
 
     # Step 2: Log the new delegation
@@ -226,79 +235,107 @@ async def undelegate_manager(staff_id: int, db: Session):
     return delegation_log
 
 
-def view_delegations(staff_id: int, db: Session):
-    # Retrieve sent delegations by the manager
-    sent_delegations = crud.get_sent_delegations(db, staff_id)
-    # Retrieve delegations pending approval by the manager
-    pending_approval_delegations = crud.get_pending_approval_delegations(db, staff_id)
+def _format_full_name(fname: Optional[str], lname: Optional[str]) -> str:
+    if fname is None and lname is None:
+        return "Unknown"
+    return f"{fname} {lname}"
+
+
+def _get_delegations_page(
+    db: Session, pagination: DelegationPaginationConfig, *criteria
+) -> Tuple[List[Tuple], bool]:
+    rows = crud.get_delegations_with_names(db, *criteria, pagination=pagination)
+    return rows[: pagination.items_per_page], len(rows) > pagination.items_per_page
+
+
+def view_delegations(
+    staff_id: int, db: Session, pagination: Optional[DelegationPaginationConfig] = None
+):
+    pagination = pagination or DelegationPaginationConfig()
+    active_statuses = [models.DelegationStatus.pending, models.DelegationStatus.accepted]
+
+    # Retrieve sent delegations by the manager, with the names of the delegates
+    sent_delegations, has_more_sent = _get_delegations_page(
+        db,
+        pagination,
+        models.DelegateLog.manager_id == staff_id,
+        models.DelegateLog.status_of_delegation.in_(active_statuses),
+    )
+    # Retrieve delegations pending approval by the manager, with the names of the managers
+    pending_approval_delegations, has_more_pending = _get_delegations_page(
+        db,
+        pagination,
+        models.DelegateLog.delegate_manager_id == staff_id,
+        models.DelegateLog.status_of_delegation.in_(active_statuses),
+    )
 
     # Format the sent delegations data
     sent_delegations_data = [
         {
             "staff_id": delegation.delegate_manager_id,
-            "full_name": crud.get_employee_full_name(db, delegation.delegate_manager_id),
+            "full_name": _format_full_name(delegate_fname, delegate_lname),
             "date_of_delegation": delegation.date_of_delegation,
             "status_of_delegation": delegation.status_of_delegation,
         }
-        for delegation in sent_delegations
+        for delegation, _, _, delegate_fname, delegate_lname in sent_delegations
     ]
 
     # Format the pending approval delegations data
     pending_approval_delegations_data = [
         {
             "staff_id": delegation.manager_id,
-            "full_name": crud.get_employee_full_name(db, delegation.manager_id),
+            "full_name": _format_full_name(manager_fname, manager_lname),
             "date_of_delegation": delegation.date_of_delegation,
             "status_of_delegation": delegation.status_of_delegation,
         }
-        for delegation in pending_approval_delegations
+        for delegation, manager_fname, manager_lname, _, _ in pending_approval_delegations
     ]
 
     return {
         "sent_delegations": sent_delegations_data,
         "pending_approval_delegations": pending_approval_delegations_data,
+        "pagination_meta": {
+            "page_num": pagination.page_num,
+            "items_per_page": pagination.items_per_page,
+            "has_more": has_more_sent or has_more_pending,
+        },
     }
 
 
-def view_all_delegations(staff_id: int, db: Session):
-    # Retrieve all delegations sent by the manager
-    sent_delegations = crud.get_all_sent_delegations(db, staff_id)
-    # Retrieve all delegations received by the manager
-    received_delegations = crud.get_all_received_delegations(db, staff_id)
+def _format_delegation_with_names(row: Tuple) -> dict:
+    delegation, manager_fname, manager_lname, delegate_fname, delegate_lname = row
+    return {
+        "manager_id": delegation.manager_id,
+        "manager_name": _format_full_name(manager_fname, manager_lname),
+        "delegate_manager_id": delegation.delegate_manager_id,
+        "delegate_manager_name": _format_full_name(delegate_fname, delegate_lname),
+        "date_of_delegation": delegation.date_of_delegation,
+        "updated_datetime": delegation.update_datetime,
+        "status_of_delegation": delegation.status_of_delegation,
+    }
 
-    # Format sent delegations data
-    sent_delegations_data = [
-        {
-            "manager_id": delegation.manager_id,
-            "manager_name": crud.get_employee_full_name(db, delegation.manager_id),
-            "delegate_manager_id": delegation.delegate_manager_id,
-            "delegate_manager_name": crud.get_employee_full_name(
-                db, delegation.delegate_manager_id
-            ),
-            "date_of_delegation": delegation.date_of_delegation,
-            "updated_datetime": delegation.update_datetime,
-            "status_of_delegation": delegation.status_of_delegation,
-        }
-        for delegation in sent_delegations
-    ]
 
-    # Format received delegations data
-    received_delegations_data = [
-        {
-            "manager_id": delegation.manager_id,
-            "manager_name": crud.get_employee_full_name(db, delegation.manager_id),
-            "delegate_manager_id": delegation.delegate_manager_id,
-            "delegate_manager_name": crud.get_employee_full_name(
-                db, delegation.delegate_manager_id
-            ),
-            "date_of_delegation": delegation.date_of_delegation,
-            "updated_datetime": delegation.update_datetime,
-            "status_of_delegation": delegation.status_of_delegation,
-        }
-        for delegation in received_delegations
-    ]
+def view_all_delegations(
+    staff_id: int, db: Session, pagination: Optional[DelegationPaginationConfig] = None
+):
+    pagination = pagination or DelegationPaginationConfig()
+
+    # Retrieve all delegations sent and received by the manager, with the names of both managers
+    sent_delegations, has_more_sent = _get_delegations_page(
+        db, pagination, models.DelegateLog.manager_id == staff_id
+    )
+    received_delegations, has_more_received = _get_delegations_page(
+        db, pagination, models.DelegateLog.delegate_manager_id == staff_id
+    )
 
     return {
-        "sent_delegations": sent_delegations_data,
-        "received_delegations": received_delegations_data,
+        "sent_delegations": [_format_delegation_with_names(row) for row in sent_delegations],
+        "received_delegations": [
+            _format_delegation_with_names(row) for row in received_delegations
+        ],
+        "pagination_meta": {
+            "page_num": pagination.page_num,
+            "items_per_page": pagination.items_per_page,
+            "has_more": has_more_sent or has_more_received,
+        },
     }
@@ -0,0 +1,81 @@
+"""Versions of the employees and delegate_logs tables, for validating data cached from them.
+
+The version of a table changes when a session of this process commits a write to it, either by
+flushing instances of its model or by executing an ORM insert, update or delete of the model. It
+changes on commit rather than on write, so that no reader can pair the new version with the old
+rows. It also changes when the table is created or dropped. It starts from a random epoch, so
+versions from before a restart are never reused.
+"""
+
+import itertools
+import threading
+import uuid
+
+from sqlalchemy import event
+from sqlalchemy.orm import ORMExecuteState, Session
+
+from .models import DelegateLog, Employee
+
+
+class TableVersion:
+    """Version of the table of a model, tracked through the session events."""
+
+    def __init__(self, model):
+        self.model = model
+        self._epoch = uuid.uuid4().hex[:8]
+        self._counter = 0
+        self._lock = threading.Lock()
+        # Set in the info of sessions with uncommitted writes to the table
+        self._changed_key = f"{model.__tablename__}_changed"
+
+        event.listen(Session, "after_flush", self._mark_flushed_changes)
+        event.listen(Session, "do_orm_execute", self._mark_orm_writes)
+        event.listen(model.__table__, "after_create", self._bump_after_ddl)
+        event.listen(model.__table__, "after_drop", self._bump_after_ddl)
+        event.listen(Session, "after_commit", self._bump_after_commit)
+        event.listen(Session, "after_rollback", self._forget_rolled_back_changes)
+
+    def get(self) -> str:
+        return f"{self._epoch}.{self._counter}"
+
+    def bump(self):
+        with self._lock:
+            self._counter += 1
+
+    def _mark_flushed_changes(self, session: Session, flush_context):
+        changed = itertools.chain(session.new, session.dirty, session.deleted)
+        if any(isinstance(instance, self.model) for instance in changed):
+            session.info[self._changed_key] = True
+
+    def _mark_orm_writes(self, orm_execute_state: ORMExecuteState):
+        is_write = (
+            orm_execute_state.is_insert
+            or orm_execute_state.is_update
+            or orm_execute_state.is_delete
+        )
+        if is_write and any(
+            mapper.class_ is self.model for mapper in orm_execute_state.all_mappers
+        ):
+            orm_execute_state.session.info[self._changed_key] = True
+
+    def _bump_after_ddl(self, target, connection, **kw):
+        self.bump()
+
+    def _bump_after_commit(self, session: Session):
+        if session.info.pop(self._changed_key, False):
+            self.bump()
+
+    def _forget_rolled_back_changes(self, session: Session):
+        session.info.pop(self._changed_key, None)
+
+
+_employees_version = TableVersion(Employee)
+_delegations_version = TableVersion(DelegateLog)
+
+
+def get_employees_version() -> str:
+    return _employees_version.get()
+
+
+def get_delegations_version() -> str:
+    return _delegations_version.get()
@@ -0,0 +1,82 @@
+"""SQLite FTS5 trigram indexes for substring search on text columns.
+
+An index is an external content FTS5 table, so it stores the trigrams but not a second copy of the
+text, and is kept in sync with its table by triggers. The trigram tokenizer matches substrings of
+at least 3 characters case-insensitively, like `ilike("%term%")`, without scanning the table.
+"""
+
+from typing import List
+
+from sqlalchemy import DDL, Column, Integer, Table, event, or_, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.elements import ColumnElement
+
+# Shorter terms have no trigrams to look up, so they are matched with LIKE instead
+MIN_SEARCH_TERM_LENGTH = 3
+
+
+class FtsIndex:
+    def __init__(self, table: Table, *columns: str):
+        self.table = table
+        self.columns = list(columns)
+        self.name = f"{table.name}_fts"
+        self.rowid = table.primary_key.columns.values()[0].name
+
+        # Created and dropped with the table by `metadata.create_all` and `metadata.drop_all`
+        for statement in self.create_statements():
+            event.listen(table, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+        event.listen(
+            table,
+            "before_drop",
+            DDL(f"DROP TABLE IF EXISTS {self.name}").execute_if(dialect="sqlite"),
+        )
+
+    def create_statements(self) -> List[str]:
+        """Get the statements creating the FTS table and the triggers that keep it in sync.
+
+        The statements do nothing if the FTS table and triggers already exist.
+        """
+        columns = ", ".join(self.columns)
+        new_values = ", ".join(f"new.{column}" for column in [self.rowid, *self.columns])
+        old_values = ", ".join(f"old.{column}" for column in [self.rowid, *self.columns])
+        insert_new = f"INSERT INTO {self.name}(rowid, {columns}) VALUES ({new_values});"
+        delete_old = (
+            f"INSERT INTO {self.name}({self.name}, rowid, {columns}) "
+            f"VALUES ('delete', {old_values});"
+        )
+
+        return [
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.name} USING fts5("
+            f"{columns}, content='{self.table.name}', content_rowid='{self.rowid}', "
+            "tokenize='trigram')",
+            f"CREATE TRIGGER IF NOT EXISTS {self.name}_insert AFTER INSERT ON {self.table.name} "
+            f"BEGIN {insert_new} END",
+            f"CREATE TRIGGER IF NOT EXISTS {self.name}_delete AFTER DELETE ON {self.table.name} "
+            f"BEGIN {delete_old} END",
+            f"CREATE TRIGGER IF NOT EXISTS {self.name}_update AFTER UPDATE OF {columns} "
+            f"ON {self.table.name} BEGIN {delete_old} {insert_new} END",
+        ]
+
+    def create(self, connection: Connection):
+        """Create the index on an existing table and fill it with the rows of the table."""
+        for statement in self.create_statements():
+            connection.execute(text(statement))
+        connection.execute(text(f"INSERT INTO {self.name}({self.name}) VALUES ('rebuild')"))
+
+    def search(self, session: Session, term: str, id_column: Column) -> ColumnElement:
+        """Get a filter for the rows with an indexed column containing the term, ignoring case.
+
+        :param id_column: The column to filter on, which holds the primary key of the indexed table
+        """
+        if len(term) < MIN_SEARCH_TERM_LENGTH or session.get_bind().dialect.name != "sqlite":
+            return or_(*(self.table.c[column].ilike(f"%{term}%") for column in self.columns))
+
+        # Search for the term as a phrase, so that it is matched as a substring
+        phrase = '"' + term.replace('"', '""') + '"'
+        matching_ids = (
+            text(f"SELECT rowid FROM {self.name} WHERE {self.name} MATCH :phrase")
+            .bindparams(phrase=phrase)
+            .columns(rowid=Integer)
+        )
+        return id_column.in_(matching_ids)
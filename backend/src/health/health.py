@@ -1,4 +1,7 @@
-from fastapi import APIRouter
+from dataclasses import asdict
+
+from fastapi import APIRouter, Request
+from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel
 
 from ..logger import logger
@@ -15,3 +18,11 @@ class HealthCheck(BaseModel):
 def health_check():
     logger.info("Received Health Check. Health Check OK")
     return {"status": "healthy", "version": "1.0.0"}
+
+
+@router.get("/jobs", summary="Get the timing and outcome of the runs of the scheduled jobs")
+def get_job_metrics(request: Request):
+    job_runner = getattr(request.app.state, "job_runner", None)
+    if job_runner is None:
+        return {}
+    return jsonable_encoder({name: asdict(metrics) for name, metrics in job_runner.metrics.items()})
@@ -0,0 +1,96 @@
+from typing import Dict, Optional
+
+from sqlalchemy import Table, func, inspect, text, update
+from sqlalchemy.engine import Connection, Engine
+
+from ..arrangements.commons.models import (
+    ArrangementLog,
+    LatestArrangement,
+    RecurringRequest,
+    arrangement_reason_index,
+    series_reason_index,
+)
+from ..employees.models import employee_name_index
+from ..logger import logger
+
+
+def migrate_wfh_date_to_date(engine: Engine):
+    """Convert wfh_date values stored as strings to the format of the Date column type.
+
+    Before wfh_date was a Date column, rows loaded from CSV were written as "YYYY-MM-DD HH:MM:SS"
+    and rows created through the API as "YYYY-MM-DD". SQLite stores dates as "YYYY-MM-DD" text,
+    so existing rows only need their time part dropped to be read as dates and to sort and
+    compare correctly. The indexes on latest_arrangements and arrangement_logs are created if
+    missing, as `create_all` does not add indexes to existing tables.
+
+    This is safe to run on every startup: already converted rows are left as they are.
+    """
+    with engine.begin() as connection:
+        for table in (LatestArrangement.__table__, ArrangementLog.__table__):
+            wfh_date = table.c.wfh_date
+            result = connection.execute(
+                update(table)
+                .where(func.length(wfh_date) != 10, func.date(wfh_date).is_not(None))
+                .values(wfh_date=func.date(wfh_date))
+            )
+            logger.info(f"Migration: Converted wfh_date of {result.rowcount} rows in {table.name}")
+
+        for table in (LatestArrangement.__table__, ArrangementLog.__table__):
+            for index in table.indexes:
+                index.create(connection, checkfirst=True)
+
+
+def create_search_indexes(engine: Engine):
+    """Create the full-text search indexes of tables created before the indexes existed.
+
+    `create_all` only creates the indexes with new tables. Missing indexes are created and filled
+    with the existing rows, and are kept in sync by their triggers from then on.
+    """
+    if engine.dialect.name != "sqlite":
+        return
+
+    with engine.begin() as connection:
+        for index in (employee_name_index, arrangement_reason_index, series_reason_index):
+            if not inspect(connection).has_table(index.name):
+                index.create(connection)
+                logger.info(f"Migration: Created search index {index.name}")
+
+
+def add_recurring_series_columns(engine: Engine):
+    """Add the columns of recurring series to a recurring_requests table created before series.
+
+    `create_all` neither adds columns nor indexes to existing tables. The existing recurring
+    requests are not series, and keep their stored arrangements.
+
+    This is safe to run on every startup: existing columns and indexes are left as they are.
+    """
+    table = RecurringRequest.__table__
+    with engine.begin() as connection:
+        _add_missing_columns(connection, table, defaults={"is_series": " NOT NULL DEFAULT 0"})
+
+        for index in table.indexes:
+            index.create(connection, checkfirst=True)
+
+
+def add_arrangement_log_columns(engine: Engine):
+    """Add the status_reason column to an arrangement_logs table created before logs kept it.
+
+    Existing logs keep no reason. This is safe to run on every startup.
+    """
+    with engine.begin() as connection:
+        _add_missing_columns(connection, ArrangementLog.__table__)
+
+
+def _add_missing_columns(
+    connection: Connection, table: Table, defaults: Optional[Dict[str, str]] = None
+):
+    existing_columns = {column["name"] for column in inspect(connection).get_columns(table.name)}
+    for column in table.columns:
+        if column.name in existing_columns:
+            continue
+        column_type = column.type.compile(connection.dialect)
+        default = (defaults or {}).get(column.name, "")
+        connection.execute(
+            text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}{default}")
+        )
+        logger.info(f"Migration: Added column {column.name} to {table.name}")
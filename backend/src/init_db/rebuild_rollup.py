@@ -0,0 +1,21 @@
+"""Recompute the daily WFH rollup from the arrangements in the database.
+
+Run from the backend directory with `python -m src.init_db.rebuild_rollup`.
+"""
+
+from ..arrangements import crud
+from ..database import SessionLocal
+from ..logger import logger
+
+
+def rebuild_rollup() -> int:
+    db = SessionLocal()
+    try:
+        return crud.rebuild_daily_wfh_rollup(db)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    num_rows = rebuild_rollup()
+    logger.info(f"Rebuilt daily WFH rollup with {num_rows} rows")
@@ -0,0 +1,23 @@
+"""Scheduled jobs of the application, run by the `JobRunner` started in the lifespan."""
+
+from apscheduler.triggers.cron import CronTrigger
+
+from ..arrangements import crud as arrangement_crud
+from ..arrangements.services import auto_reject_old_requests
+from .runner import Job
+
+JOBS = [
+    Job(
+        name="auto_reject_job",
+        func=auto_reject_old_requests,
+        # trigger=CronTrigger(second="*/15"),  # Run every 15 seconds
+        trigger=CronTrigger(hour=0, minute=0),  # Run every day at midnight
+    ),
+    # The rollup is kept up to date by the crud functions, the daily rebuild corrects any drift
+    # from writes that bypass them
+    Job(
+        name="rebuild_daily_wfh_rollup",
+        func=arrangement_crud.rebuild_daily_wfh_rollup,
+        trigger=CronTrigger(hour=0, minute=30),
+    ),
+]
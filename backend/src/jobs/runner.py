@@ -0,0 +1,125 @@
+"""Runner of the scheduled jobs, on the event loop of the application.
+
+Jobs are declared as `Job`s with the trigger of their schedule and scheduled with an
+AsyncIOScheduler, so they run on the event loop of the application instead of on a scheduler
+thread with a loop of its own. Every run gets its own session, closed when the run ends, and at
+most `max_concurrency` runs are in progress at a time. Synchronous jobs run in a worker thread, so
+they do not block the loop. Coroutine jobs run on the loop, so they must run their queries in a
+worker thread too. The runner records the timing and outcome of the runs of every job.
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Optional
+from zoneinfo import ZoneInfo
+
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from apscheduler.triggers.base import BaseTrigger
+from sqlalchemy.orm import Session, sessionmaker
+
+from ..database import SessionLocal
+from ..logger import logger
+
+singapore_timezone = ZoneInfo("Asia/Singapore")
+
+
+@dataclass
+class Job:
+    """A job run with a session of its own on the schedule of the trigger."""
+
+    name: str
+    func: Callable[[Session], Any]
+    trigger: BaseTrigger
+    misfire_grace_time: int = 300
+
+
+@dataclass
+class JobMetrics:
+    runs: int = 0
+    failures: int = 0
+    total_duration_seconds: float = 0.0
+    last_started_at: Optional[datetime] = None
+    last_duration_seconds: Optional[float] = None
+    last_result: Any = None
+    last_error: Optional[str] = None
+
+
+class JobRunner:
+    def __init__(
+        self,
+        jobs: Iterable[Job],
+        session_factory: sessionmaker = SessionLocal,
+        max_concurrency: int = 2,
+    ):
+        self.jobs: Dict[str, Job] = {}
+        for job in jobs:
+            if job.name in self.jobs:
+                raise ValueError(f"Job {job.name} is declared more than once")
+            self.jobs[job.name] = job
+        self.metrics: Dict[str, JobMetrics] = {name: JobMetrics() for name in self.jobs}
+        self.session_factory = session_factory
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._scheduler = AsyncIOScheduler()
+
+    def start(self):
+        """Schedule the jobs on the running event loop."""
+        for job in self.jobs.values():
+            self._scheduler.add_job(
+                self.run,
+                job.trigger,
+                args=[job.name],
+                id=job.name,
+                replace_existing=True,
+                misfire_grace_time=job.misfire_grace_time,
+                coalesce=True,
+                max_instances=1,  # Ensure only one run of a job at a time
+            )
+        self._scheduler.start()
+        logger.info(f"Job: Scheduled {len(self.jobs)} jobs")
+
+    def shutdown(self):
+        if self._scheduler.running:
+            self._scheduler.shutdown(wait=False)
+
+    async def run(self, name: str) -> Any:
+        """Run the job now, and record the timing and outcome of the run.
+
+        :return: The result of the job, or None if it failed
+        """
+        job = self.jobs[name]
+        metrics = self.metrics[name]
+
+        async with self._semaphore:
+            logger.info(f"Job: Running {name}")
+            metrics.last_started_at = datetime.now(singapore_timezone)
+            start_time = time.perf_counter()
+            result = None
+            try:
+                result = await self._call(job)
+                metrics.last_result = result
+                metrics.last_error = None
+            except Exception as e:
+                logger.error(f"Job: {name} failed: {str(e)}", exc_info=True)
+                metrics.failures += 1
+                metrics.last_error = str(e) or type(e).__name__
+            finally:
+                duration = time.perf_counter() - start_time
+                metrics.runs += 1
+                metrics.last_duration_seconds = duration
+                metrics.total_duration_seconds += duration
+                logger.info(f"Job: {name} finished in {duration:.2f}s")
+
+        return result
+
+    async def _call(self, job: Job) -> Any:
+        if asyncio.iscoroutinefunction(job.func):
+            with self.session_factory() as db:
+                return await job.func(db)
+        return await asyncio.to_thread(self._call_sync, job.func)
+
+    def _call_sync(self, func: Callable[[Session], Any]) -> Any:
+        # The session is created in the worker thread, which is the only one to use it
+        with self.session_factory() as db:
+            return func(db)
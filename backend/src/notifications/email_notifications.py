@@ -1,6 +1,7 @@
+import asyncio
 from datetime import datetime
 from os import getenv
-from typing import Union
+from typing import Dict, List, Tuple, Union
 from zoneinfo import ZoneInfo
 
 import httpx
@@ -19,6 +20,7 @@ from .commons.structs import ARRANGEMENT_SUBJECT, DELEGATION_SUBJECT
 load_dotenv()
 BASE_URL = getenv("BACKEND_BASE_URL", "http://localhost:8000")
 singapore_timezone = ZoneInfo("Asia/Singapore")
+EMAIL_CONCURRENCY = 10
 
 
 async def send_email(to_email: str, subject: str, content: str):
@@ -47,6 +49,37 @@ async def craft_and_send_email(
 ):
     logger.info("Crafting and sending email notifications...")
 
+    await _send_emails(_craft_email_list(config))
+
+
+async def craft_and_send_digest_emails(configs: List[ArrangementNotificationConfig]):
+    """Craft the emails of the notifications and send one email per recipient, combining the
+    emails to recipients of several notifications into a digest."""
+    logger.info(f"Crafting and sending digest emails for {len(configs)} notifications...")
+
+    emails_by_recipient: Dict[str, List[Tuple[str, str]]] = {}
+    for config in configs:
+        for email, subject, content in _craft_email_list(config):
+            emails_by_recipient.setdefault(email, []).append((subject, content))
+
+    email_list = []
+    for email, emails in emails_by_recipient.items():
+        if len(emails) == 1:
+            email_list.append((email, *emails[0]))
+        else:
+            digest_subject = f"[All-In-One] Digest of {len(emails)} WFH Request Notifications"
+            digest_content = f"\n\n{'-' * 40}\n\n".join(
+                f"{subject}\n\n{content}" for subject, content in emails
+            )
+            email_list.append((email, digest_subject, digest_content))
+
+    await _send_emails(email_list)
+
+
+def _craft_email_list(
+    config: Union[ArrangementNotificationConfig, DelegateNotificationConfig],
+) -> List[Tuple[str, str, str]]:
+    """Craft the emails of the notification as tuples of recipient, subject and content."""
     email_list = []
 
     email_content = craft_email_content(config)
@@ -77,21 +110,31 @@ async def craft_and_send_email(
             )
         )
 
-    email_errors = []
+    return email_list
+
 
+async def _send_emails(email_list: List[Tuple[str, str, str]]):
+    """Send the emails concurrently, up to EMAIL_CONCURRENCY at a time."""
     if getenv("TESTING") == "true":
         logger.info("Skipping email sending due to TESTING environment variable")
         return
 
-    for email, subject, content in email_list:
-        try:
-            logger.info(
-                f"Sending email to {email} with the following content:\n\n{subject}\n{content}\n\n"
-            )
-            await send_email(email, subject, content)
-            logger.info(f"Email sent successfully to {email}")
-        except HTTPException:
-            email_errors.append(email)
+    semaphore = asyncio.Semaphore(EMAIL_CONCURRENCY)
+
+    async def send(email: str, subject: str, content: str) -> bool:
+        async with semaphore:
+            try:
+                logger.info(
+                    f"Sending email to {email} with the following content:\n\n{subject}\n{content}\n\n"
+                )
+                await send_email(email, subject, content)
+                logger.info(f"Email sent successfully to {email}")
+                return True
+            except HTTPException:
+                return False
+
+    results = await asyncio.gather(*(send(*email) for email in email_list))
+    email_errors = [email for (email, _, _), sent in zip(email_list, results) if not sent]
 
     if email_errors:
         raise exceptions.EmailNotificationException(email_errors)
@@ -131,7 +174,9 @@ def format_details(config: Union[ArrangementNotificationConfig, DelegateNotifica
                 if config.action != Action.CREATE
                 else ""
             )
-            details += f"Request ID: {arrangement.arrangement_id}\n"
+            # The occurrences of recurring series are identified by their batch ID and date
+            if arrangement.arrangement_id is not None:
+                details += f"Request ID: {arrangement.arrangement_id}\n"
             details += f"WFH Date: {arrangement.wfh_date}\n"
             details += f"WFH Type: {arrangement.wfh_type.value}\n"
             details += f"Reason for WFH Request: {arrangement.reason_description}\n"
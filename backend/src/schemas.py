@@ -6,7 +6,7 @@ from .base import BaseSchema
 
 
 class PaginationMeta(BaseSchema):
-    total_count: int = Field(
+    total_count: Optional[int] = Field(
         ...,
         title="Total number of items",
     )
@@ -14,14 +14,18 @@ class PaginationMeta(BaseSchema):
         ...,
         title="Page size",
     )
-    page_num: int = Field(
+    page_num: Optional[int] = Field(
         ...,
         title="Page number",
     )
-    total_pages: int = Field(
+    total_pages: Optional[int] = Field(
         ...,
         title="Total number of pages",
     )
+    next_cursor: Optional[str] = Field(
+        None,
+        title="Cursor of the next page, if any",
+    )
 
 
 class JSendResponse(BaseSchema):
@@ -0,0 +1,368 @@
+from datetime import date, datetime
+from unittest.mock import MagicMock, patch
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from src.arrangements import cache, crud, services
+from src.arrangements.commons.dataclasses import (
+    ArrangementFilters,
+    ArrangementResponse,
+    CreateArrangementRequest,
+    PaginationConfig,
+)
+from src.arrangements.commons.enums import (
+    Action,
+    ApprovalStatus,
+    SubordinatesScope,
+    WfhType,
+)
+from src.arrangements.commons.models import LatestArrangement
+from src.auth.models import Auth  # noqa: F401
+from src.employees import crud as employee_crud
+from src.employees.models import Base, Employee
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def backend(clock):
+    return cache.InMemoryCacheBackend(ttl=60, max_size=2, clock=clock)
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache():
+    yield cache.init_cache()
+    cache.init_cache()
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+    for staff_id, reporting_manager in [(1, None), (2, 1), (3, 1), (4, 2)]:
+        db.add(
+            Employee(
+                staff_id=staff_id,
+                staff_fname=f"First{staff_id}",
+                staff_lname=f"Last{staff_id}",
+                dept="IT",
+                position="Staff",
+                country="SG",
+                email=f"staff{staff_id}@example.com",
+                role=2,
+                reporting_manager=reporting_manager,
+            )
+        )
+    db.add(
+        LatestArrangement(
+            arrangement_id=1,
+            update_datetime=datetime(2024, 1, 1),
+            requester_staff_id=2,
+            wfh_date=date(2024, 1, 2),
+            wfh_type=WfhType.FULL,
+            current_approval_status=ApprovalStatus.PENDING_APPROVAL,
+            approving_officer=1,
+            reason_description="Reason",
+        )
+    )
+    db.commit()
+    yield db
+    db.close()
+    Base.metadata.drop_all(engine)
+
+
+def cache_tags(*tags):
+    """Cache an entry for each tag, keyed by the tag."""
+    backend = cache.get_cache()
+    for tag in tags:
+        backend.set(tag, "value", [tag], backend.get_generation([tag]))
+
+
+def cached_tags(*tags):
+    return [tag for tag in tags if cache.get_cache().get(tag) is not None]
+
+
+class TestInMemoryCacheBackend:
+    def test_get_and_set(self, backend):
+        assert backend.get("key") is None
+
+        assert backend.set("key", "value", ["tag"], backend.get_generation(["tag"]))
+
+        assert backend.get("key") == "value"
+
+    def test_entries_expire_after_ttl(self, backend, clock):
+        backend.set("key", "value", [], backend.get_generation([]))
+
+        clock.now = 59
+        assert backend.get("key") == "value"
+        clock.now = 60
+        assert backend.get("key") is None
+        assert len(backend) == 0
+
+    def test_least_recently_used_entry_is_evicted(self, backend):
+        backend.set("a", 1, [], ())
+        backend.set("b", 2, [], ())
+        backend.get("a")
+
+        backend.set("c", 3, [], ())
+
+        assert [backend.get(key) for key in ["a", "b", "c"]] == [1, None, 3]
+
+    def test_invalidate_drops_tagged_entries_only(self, backend):
+        backend.set("a", 1, ["x", "y"], (0, 0))
+        backend.set("b", 2, ["z"], (0,))
+
+        backend.invalidate(["y"])
+
+        assert backend.get("a") is None
+        assert backend.get("b") == 2
+
+    def test_set_is_skipped_after_invalidation_of_tags(self, backend):
+        generation = backend.get_generation(["x", "y"])
+        backend.invalidate(["y"])
+
+        assert not backend.set("a", 1, ["y", "x"], generation)
+        assert backend.get("a") is None
+        assert backend.set("a", 1, ["y", "x"], backend.get_generation(["x", "y"]))
+
+
+class TestMakeKey:
+    def test_equivalent_filters_have_the_same_key(self):
+        filters = ArrangementFilters(
+            current_approval_status=[ApprovalStatus.APPROVED, ApprovalStatus.PENDING_APPROVAL],
+            start_date=date(2024, 1, 1),
+        )
+        same_filters = ArrangementFilters(
+            current_approval_status=[
+                ApprovalStatus.PENDING_APPROVAL,
+                ApprovalStatus.APPROVED,
+                ApprovalStatus.APPROVED,
+            ],
+            start_date=date(2024, 1, 1),
+        )
+
+        assert cache.make_key("team", 1, filters, PaginationConfig()) == cache.make_key(
+            "team", 1, same_filters, PaginationConfig()
+        )
+
+    @pytest.mark.parametrize(
+        "other_parts",
+        [
+            ("team", 2, ArrangementFilters(), PaginationConfig()),
+            ("team", 1, ArrangementFilters(name="Jane"), PaginationConfig()),
+            ("team", 1, ArrangementFilters(), PaginationConfig(page_num=2)),
+            ("subordinates", 1, ArrangementFilters(), PaginationConfig()),
+        ],
+    )
+    def test_different_parts_have_different_keys(self, other_parts):
+        parts = ("team", 1, ArrangementFilters(), PaginationConfig())
+
+        assert cache.make_key(*parts) != cache.make_key(*other_parts)
+
+
+class TestGetOrLoad:
+    def test_loads_once(self):
+        load = MagicMock(return_value=["value"])
+        tags = MagicMock(return_value=["tag"])
+
+        assert cache.get_or_load("key", tags, load) == ["value"]
+        assert cache.get_or_load("key", tags, load) == ["value"]
+
+        load.assert_called_once()
+        tags.assert_called_once()
+
+    def test_loads_again_after_invalidation(self):
+        load = MagicMock(return_value=["value"])
+        cache.get_or_load("key", lambda: ["tag"], load)
+
+        cache.get_cache().invalidate(["tag"])
+        cache.get_or_load("key", lambda: ["tag"], load)
+
+        assert load.call_count == 2
+
+
+class TestInvalidationOnCommit:
+    TAGS = [
+        cache.ALL_ARRANGEMENTS_TAG,
+        cache.approver_tag(1),
+        cache.approver_tag(2),
+        cache.approver_tag(3),
+        cache.reports_to_tag(1),
+        cache.reports_to_tag(2),
+    ]
+
+    @staticmethod
+    def approve(db, arrangement_id: int):
+        arrangement = db.get(LatestArrangement, arrangement_id)
+        arrangement_data = ArrangementResponse.from_dict(
+            {**arrangement.__dict__, "current_approval_status": ApprovalStatus.APPROVED}
+        )
+        crud.update_arrangement_approval_status(
+            db, arrangement_data, Action.APPROVE, arrangement.current_approval_status
+        )
+
+    def test_update_approval_status(self, db):
+        cache_tags(*self.TAGS)
+
+        self.approve(db, 1)
+
+        # Arrangement 1 is requested by staff 2, who reports to staff 1, and approved by staff 1
+        assert cached_tags(*self.TAGS) == [
+            cache.approver_tag(2),
+            cache.approver_tag(3),
+            cache.reports_to_tag(2),
+        ]
+
+    def test_invalidated_on_commit_only(self, db):
+        cache_tags(*self.TAGS)
+
+        arrangement = db.get(LatestArrangement, 1)
+        arrangement.approving_officer = 3
+        db.flush()
+        assert cached_tags(*self.TAGS) == self.TAGS
+        db.rollback()
+        db.commit()
+        assert cached_tags(*self.TAGS) == self.TAGS
+
+        arrangement.approving_officer = 3
+        db.commit()
+        # The arrangement leaves the scope of staff 1 and enters that of staff 3
+        assert cached_tags(*self.TAGS) == [cache.approver_tag(2), cache.reports_to_tag(2)]
+
+    def test_create_arrangements(self, db):
+        cache_tags(*self.TAGS)
+
+        db.add(
+            LatestArrangement(
+                update_datetime=datetime(2024, 1, 1),
+                requester_staff_id=4,
+                wfh_date=date(2024, 1, 3),
+                wfh_type=WfhType.AM,
+                current_approval_status=ApprovalStatus.PENDING_APPROVAL,
+                approving_officer=2,
+                reason_description="Reason",
+            )
+        )
+        db.commit()
+
+        assert cached_tags(*self.TAGS) == [
+            cache.approver_tag(1),
+            cache.approver_tag(3),
+            cache.reports_to_tag(1),
+        ]
+
+    def test_bulk_create_arrangements(self, db):
+        cache_tags(*self.TAGS)
+
+        crud.create_arrangements(
+            db,
+            [
+                CreateArrangementRequest(
+                    update_datetime=datetime(2024, 1, 1),
+                    requester_staff_id=4,
+                    wfh_date=date(2024, 1, 3),
+                    wfh_type=WfhType.AM,
+                    is_recurring=False,
+                    recurring_frequency_number=None,
+                    recurring_frequency_unit=None,
+                    recurring_occurrences=None,
+                    current_approval_status=ApprovalStatus.PENDING_APPROVAL,
+                    approving_officer=2,
+                )
+            ],
+        )
+
+        assert cached_tags(*self.TAGS) == [
+            cache.approver_tag(1),
+            cache.approver_tag(3),
+            cache.reports_to_tag(1),
+        ]
+
+    def test_delegation_updates(self, db):
+        cache_tags(*self.TAGS)
+
+        employee_crud.update_pending_arrangements_for_delegate(db, 1, 3)
+
+        assert cached_tags(*self.TAGS) == [cache.approver_tag(2), cache.reports_to_tag(2)]
+
+        cache_tags(*self.TAGS)
+
+        employee_crud.remove_delegate_from_arrangements(db, 3)
+
+        assert cached_tags(*self.TAGS) == [cache.approver_tag(2), cache.reports_to_tag(2)]
+
+
+class TestCachedServices:
+    @pytest.fixture(autouse=True)
+    def signer(self):
+        with patch("src.arrangements.services.get_signer") as mock_get_signer:
+            mock_get_signer.return_value.url_version.return_value = 1
+            yield
+
+    def test_team_arrangements_are_loaded_once(self, db):
+        filters = ArrangementFilters(group_by_date=False)
+        pagination = PaginationConfig()
+
+        response = services.get_team_arrangements_json(db, 3, filters, pagination)
+        with patch("src.arrangements.services.crud.get_team_arrangements") as mock_get_team:
+            assert services.get_team_arrangements_json(db, 3, filters, pagination) == response
+        mock_get_team.assert_not_called()
+
+        assert [arrangement["arrangement_id"] for arrangement in response[0]] == [1]
+
+    def test_team_arrangements_are_reloaded_after_change(self, db):
+        filters = ArrangementFilters(group_by_date=False)
+        pagination = PaginationConfig()
+        services.get_team_arrangements_json(db, 3, filters, pagination)
+
+        TestInvalidationOnCommit.approve(db, 1)
+        data, _ = services.get_team_arrangements_json(db, 3, filters, pagination)
+
+        assert data[0]["current_approval_status"] == ApprovalStatus.APPROVED.value
+
+    def test_subtree_arrangements_are_reloaded_after_change_below_manager(self, db):
+        filters = ArrangementFilters(group_by_date=False, scope=SubordinatesScope.SUBTREE)
+        services.get_subordinates_arrangements_json(db, 1, filters, PaginationConfig())
+
+        # Staff 4 reports to staff 2, who reports to staff 1
+        db.add(
+            LatestArrangement(
+                update_datetime=datetime(2024, 1, 1),
+                requester_staff_id=4,
+                wfh_date=date(2024, 1, 3),
+                wfh_type=WfhType.AM,
+                current_approval_status=ApprovalStatus.PENDING_APPROVAL,
+                approving_officer=2,
+                reason_description="Reason",
+            )
+        )
+        db.commit()
+        data, _ = services.get_subordinates_arrangements_json(db, 1, filters, PaginationConfig())
+
+        assert [arrangement["requester_staff_id"] for arrangement in data] == [2, 4]
+
+    def test_subordinates_arrangements_are_keyed_by_pagination(self, db):
+        filters = ArrangementFilters(group_by_date=False)
+
+        services.get_subordinates_arrangements_json(db, 1, filters, PaginationConfig())
+        with patch("src.arrangements.services.crud.get_arrangements") as mock_get_arrangements:
+            mock_get_arrangements.return_value = ([], 1)
+            data, _ = services.get_subordinates_arrangements_json(
+                db, 1, filters, PaginationConfig(page_num=2)
+            )
+
+        mock_get_arrangements.assert_called_once()
+        assert data == []
@@ -1,28 +1,41 @@
-from datetime import date, datetime
-from unittest.mock import MagicMock, patch
+from dataclasses import replace
+from datetime import date, datetime, timedelta
+from typing import List
+from unittest.mock import ANY, MagicMock, patch
 
+import freezegun
 import pytest
 from sqlalchemy import create_engine
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Query, Session, sessionmaker
-from src.arrangements import crud
+from sqlalchemy.pool import StaticPool
+from src.arrangements import crud, services
 from src.arrangements.commons import models
 from src.arrangements.commons.dataclasses import (
     ArrangementFilters,
+    ArrangementLogFilters,
     ArrangementResponse,
+    ArrangementStatsFilters,
     CreateArrangementRequest,
     CreatedRecurringRequest,
+    PaginationConfig,
     RecurringRequestDetails,
+    RecurringSeriesResponse,
 )
 from src.arrangements.commons.enums import (
     Action,
     ApprovalStatus,
+    PaginationMode,
     RecurringFrequencyUnit,
+    SubordinatesScope,
     WfhType,
 )
+from src.arrangements.commons.exceptions import InvalidCursorException
 from src.arrangements.commons.models import ArrangementLog, LatestArrangement
+from src.arrangements.utils import encode_cursor, get_next_cursor
 from src.auth.models import Auth
 from src.employees.models import Employee
+from src.tests.test_utils import count_queries
 
 
 @pytest.fixture(scope="module")
@@ -137,23 +150,74 @@ def mock_arrangement_log(mock_employee):
     return log
 
 
+@pytest.fixture
+def seeded_db():
+    # Shared across threads for the services that query through asyncio.to_thread
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    models.Base.metadata.create_all(engine)
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    db = SessionLocal()
+
+    db.add_all(
+        [
+            Employee(
+                staff_id=staff_id,
+                staff_fname=f"First{staff_id}",
+                staff_lname=f"Last{staff_id}",
+                dept="IT",
+                position="Staff",
+                country="SG",
+                email=f"staff{staff_id}@example.com",
+                reporting_manager=1,
+                role=2,
+            )
+            for staff_id in (1, 2, 3)
+        ]
+    )
+    db.flush()
+
+    # Staff 2 and 3 each have one arrangement per day from 1 to 6 Jan 2024
+    db.add_all(
+        [
+            LatestArrangement(
+                update_datetime=datetime(2023, 12, 1),
+                requester_staff_id=staff_id,
+                wfh_date=date(2024, 1, day),
+                wfh_type=WfhType.FULL,
+                current_approval_status=ApprovalStatus.PENDING_APPROVAL,
+                approving_officer=1,
+            )
+            for day in range(1, 7)
+            for staff_id in (2, 3)
+        ]
+    )
+    db.commit()
+
+    yield db
+    db.close()
+    models.Base.metadata.drop_all(engine)
+
+
 # Test Classes
 class TestGetArrangementById:
     def test_success(self, mock_db_session, mock_latest_arrangement):
         # Arrange
-        mock_db_session.query.return_value.get.return_value = mock_latest_arrangement
+        mock_db_session.get.return_value = mock_latest_arrangement
 
         # Act
         result = crud.get_arrangement_by_id(mock_db_session, arrangement_id=1)
 
         # Assert
         assert result == mock_latest_arrangement.__dict__
-        mock_db_session.query.assert_called_once_with(LatestArrangement)
-        mock_db_session.query.return_value.get.assert_called_once_with(1)
+        mock_db_session.get.assert_called_once_with(LatestArrangement, 1, options=ANY)
 
     def test_not_found(self, mock_db_session):
         # Arrange
-        mock_db_session.query.return_value.get.return_value = None
+        mock_db_session.get.return_value = None
 
         # Act
         result = crud.get_arrangement_by_id(mock_db_session, arrangement_id=999)
@@ -222,6 +286,14 @@ class TestCreateArrangementLog:
 
 
 class TestGetArrangements:
+    @pytest.fixture(autouse=True)
+    def no_series(self):
+        # The series are queried through the same mocked session, and tested with a database
+        with patch("src.arrangements.crud._query_series"), patch(
+            "src.arrangements.crud._get_series_occurrences", return_value=[]
+        ):
+            yield
+
     @pytest.fixture
     def mock_filters(self):
         return ArrangementFilters(
@@ -250,9 +322,10 @@ class TestGetArrangements:
         mock_join.filter.return_value = mock_filter
         mock_filter.filter.return_value = mock_filter
         mock_filter.order_by.return_value = mock_filter
+        mock_filter.options.return_value = mock_filter
         mock_filter.all.return_value = [mock_latest_arrangement]
 
-        result = crud.get_arrangements(mock_db_session, filters=mock_filters)
+        result, _ = crud.get_arrangements(mock_db_session, filters=mock_filters)
 
         assert len(result) == 1
         assert result[0] == mock_latest_arrangement.__dict__
@@ -271,6 +344,7 @@ class TestGetArrangements:
         mock_join.filter.return_value = mock_filter
         mock_filter.filter.return_value = mock_filter
         mock_filter.order_by.return_value = mock_filter
+        mock_filter.options.return_value = mock_filter
         mock_filter.all.return_value = [mock_latest_arrangement]
 
         mock_filters.name = "John"
@@ -278,7 +352,7 @@ class TestGetArrangements:
         mock_filters.start_date = date(2024, 1, 1)
         mock_filters.end_date = date(2024, 1, 31)
 
-        result = crud.get_arrangements(mock_db_session, filters=mock_filters)
+        result, _ = crud.get_arrangements(mock_db_session, filters=mock_filters)
 
         assert len(result) == 1
         assert result[0] == mock_latest_arrangement.__dict__
@@ -295,10 +369,11 @@ class TestGetArrangements:
         mock_joined.filter.return_value = mock_filtered
         mock_filtered.filter.return_value = mock_filtered  # For additional filters
         mock_filtered.order_by.return_value = mock_filtered
+        mock_filtered.options.return_value = mock_filtered
         mock_filtered.all.return_value = [mock_latest_arrangement]
 
         filters = ArrangementFilters(reason="Test reason", staff_ids=100)
-        result = crud.get_arrangements(mock_db_session, filters=filters)
+        result, _ = crud.get_arrangements(mock_db_session, filters=filters)
 
         assert len(result) == 1
         assert result[0] == mock_latest_arrangement.__dict__
@@ -318,10 +393,11 @@ class TestGetArrangements:
         mock_joined.filter.return_value = mock_filtered
         mock_filtered.filter.return_value = mock_filtered  # For additional filters
         mock_filtered.order_by.return_value = mock_filtered
+        mock_filtered.options.return_value = mock_filtered
         mock_filtered.all.return_value = [mock_latest_arrangement]
 
         filters = ArrangementFilters(department="IT", staff_ids=100)
-        result = crud.get_arrangements(mock_db_session, filters=filters)
+        result, _ = crud.get_arrangements(mock_db_session, filters=filters)
 
         assert len(result) == 1
         assert result[0] == mock_latest_arrangement.__dict__
@@ -329,13 +405,13 @@ class TestGetArrangements:
 
     def test_get_arrangements_without_staff_ids(self, mock_db_session, mock_latest_arrangement):
         # Test getting all arrangements without staff_ids filter
-        result = crud.get_arrangements(mock_db_session)
+        result, _ = crud.get_arrangements(mock_db_session)
         assert isinstance(result, list)
 
     def test_get_arrangements_without_filters(self, mock_db_session, mock_latest_arrangement):
         # Test getting arrangements without any filters
         filters = ArrangementFilters(staff_ids=100)
-        result = crud.get_arrangements(mock_db_session, filters=filters)
+        result, _ = crud.get_arrangements(mock_db_session, filters=filters)
         assert isinstance(result, list)
 
     def test_get_arrangements_with_single_staff_id(self, mock_db_session, mock_latest_arrangement):
@@ -349,9 +425,10 @@ class TestGetArrangements:
         mock_query.join.return_value = mock_join
         mock_join.filter.return_value = mock_filter
         mock_filter.order_by.return_value = mock_filter
+        mock_filter.options.return_value = mock_filter
         mock_filter.all.return_value = [mock_latest_arrangement]
 
-        result = crud.get_arrangements(mock_db_session, filters=filter)
+        result, _ = crud.get_arrangements(mock_db_session, filters=filter)
         assert len(result) == 1
         assert result[0] == mock_latest_arrangement.__dict__
 
@@ -365,10 +442,11 @@ class TestGetArrangements:
         mock_join.filter.return_value = mock_filter
         mock_filter.filter.return_value = mock_filter
         mock_filter.order_by.return_value = mock_filter
+        mock_filter.options.return_value = mock_filter
         mock_filter.all.return_value = [mock_latest_arrangement]
 
         filters = ArrangementFilters(name="John", staff_ids=100)
-        result = crud.get_arrangements(mock_db_session, filters=filters)
+        result, _ = crud.get_arrangements(mock_db_session, filters=filters)
         assert len(result) == 1
 
     def test_get_arrangements_with_approval_status_filter(
@@ -384,12 +462,13 @@ class TestGetArrangements:
         mock_join.filter.return_value = mock_filter
         mock_filter.filter.return_value = mock_filter
         mock_filter.order_by.return_value = mock_filter
+        mock_filter.options.return_value = mock_filter
         mock_filter.all.return_value = [mock_latest_arrangement]
 
         filters = ArrangementFilters(
             current_approval_status=[ApprovalStatus.PENDING_APPROVAL], staff_ids=100
         )
-        result = crud.get_arrangements(mock_db_session, filters=filters)
+        result, _ = crud.get_arrangements(mock_db_session, filters=filters)
         assert len(result) == 1
         assert result[0] == mock_latest_arrangement.__dict__
 
@@ -404,6 +483,7 @@ class TestGetArrangements:
         mock_join.filter.return_value = mock_filter
         mock_filter.filter.return_value = mock_filter
         mock_filter.order_by.return_value = mock_filter
+        mock_filter.options.return_value = mock_filter
         mock_filter.all.return_value = [mock_latest_arrangement]
 
         filters = ArrangementFilters(wfh_type=[WfhType.FULL], staff_ids=100)
@@ -412,7 +492,7 @@ class TestGetArrangements:
         mock_db_session.query.return_value.filter.return_value.all.return_value = [
             mock_latest_arrangement
         ]
-        result = crud.get_arrangements(mock_db_session, filters=filters)
+        result, _ = crud.get_arrangements(mock_db_session, filters=filters)
         print("Result:", result)  # returns []
         assert len(result) == 1
 
@@ -426,16 +506,502 @@ class TestGetArrangements:
         mock_query.join.return_value = mock_query  # For join operation
         mock_query.filter.return_value = mock_query  # Chain filter for each filter call
         mock_query.order_by.return_value = mock_query  # Chain order_by for each filter call
+        mock_query.options.return_value = mock_query
         mock_query.all.return_value = [mock_latest_arrangement]  # Return the expected result
 
         # Execute the function
-        result = crud.get_arrangements(mock_db_session, filters=filters)
+        result, _ = crud.get_arrangements(mock_db_session, filters=filters)
 
         # Verify the result
         assert len(result) == 1
         assert result[0] == mock_latest_arrangement.__dict__
 
 
+class TestGetArrangementsVersion:
+    def test_changes_with_arrangements_in_scope(self, seeded_db):
+        filters = ArrangementFilters(manager_id=1, wfh_type=None)
+        version = crud.get_arrangements_version(seeded_db, filters)
+        assert version[2] == 12
+
+        arrangement = seeded_db.get(LatestArrangement, 1)
+        arrangement.latest_log_id = 100
+        seeded_db.commit()
+
+        assert crud.get_arrangements_version(seeded_db, filters) != version
+
+    def test_unchanged_by_arrangements_out_of_scope(self, seeded_db):
+        filters = ArrangementFilters(staff_ids=[2])
+        version = crud.get_arrangements_version(seeded_db, filters)
+
+        # Arrangement 2 is requested by staff 3
+        arrangement = seeded_db.get(LatestArrangement, 2)
+        arrangement.latest_log_id = 100
+        arrangement.update_datetime = datetime(2024, 2, 1)
+        seeded_db.commit()
+
+        assert crud.get_arrangements_version(seeded_db, filters) == version
+
+    def test_team_version(self, seeded_db):
+        # Staff 2 and 3 are peers
+        version = crud.get_team_arrangements_version(seeded_db, 2, ArrangementFilters())
+
+        seeded_db.get(LatestArrangement, 2).update_datetime = datetime(2024, 2, 1)
+        seeded_db.commit()
+
+        assert crud.get_team_arrangements_version(seeded_db, 2, ArrangementFilters()) == (
+            None,
+            datetime(2024, 2, 1),
+            6,
+            None,
+            0,
+            None,
+            0,
+        )
+        assert version == (None, datetime(2023, 12, 1), 6, None, 0, None, 0)
+
+
+class TestSearchFilters:
+    @pytest.fixture
+    def search_db(self, seeded_db):
+        seeded_db.get(Employee, 3).staff_lname = "O'Brien"
+        for arrangement in seeded_db.query(LatestArrangement):
+            arrangement.reason_description = f"Dentist on day {arrangement.wfh_date.day}"
+        seeded_db.commit()
+        return seeded_db
+
+    @staticmethod
+    def get_requester_ids(db, **filters):
+        arrangements, _ = crud.get_arrangements(db, ArrangementFilters(**filters))
+        return sorted({arrangement["requester_staff_id"] for arrangement in arrangements})
+
+    @pytest.mark.parametrize(
+        ("name", "expected_ids"),
+        [
+            ("first2", [2]),
+            ("LAST", [2]),
+            ("brie", [3]),
+            ("O'B", [3]),
+            ("st", [2, 3]),  # shorter than a trigram
+            ("Last2 First2", []),
+            ('"', []),
+        ],
+    )
+    def test_name(self, search_db, name, expected_ids):
+        assert self.get_requester_ids(search_db, name=name) == expected_ids
+
+    @pytest.mark.parametrize(
+        ("reason", "expected_count"),
+        [("dentist", 12), ("day 3", 2), ("y 1", 2), ("on", 12), ("Doctor", 0)],
+    )
+    def test_reason(self, search_db, reason, expected_count):
+        arrangements, _ = crud.get_arrangements(search_db, ArrangementFilters(reason=reason))
+
+        assert len(arrangements) == expected_count
+
+    def test_index_follows_updates_and_deletes(self, search_db):
+        employee = search_db.get(Employee, 2)
+        employee.staff_fname = "Renamed"
+        search_db.query(LatestArrangement).filter(
+            LatestArrangement.requester_staff_id == 3, LatestArrangement.wfh_date > date(2024, 1, 1)
+        ).delete()
+        search_db.commit()
+
+        assert self.get_requester_ids(search_db, name="renamed") == [2]
+        assert self.get_requester_ids(search_db, name="First2") == []
+        assert self.get_requester_ids(search_db, reason="dentist") == [2, 3]
+        assert self.get_requester_ids(search_db, reason="day 2") == [2]
+
+
+class TestSubtreeScope:
+    @pytest.fixture
+    def org_db(self, seeded_db):
+        # Staff 1 reports to themself, like the CEO. 2 reports to 1, 3 to 2 and 4 to 3.
+        seeded_db.get(Employee, 3).reporting_manager = 2
+        seeded_db.add(
+            Employee(
+                staff_id=4,
+                staff_fname="First4",
+                staff_lname="Last4",
+                dept="Sales",
+                position="Staff",
+                country="SG",
+                email="staff4@example.com",
+                reporting_manager=3,
+                role=2,
+            )
+        )
+        seeded_db.add(
+            LatestArrangement(
+                update_datetime=datetime(2023, 12, 1),
+                requester_staff_id=4,
+                wfh_date=date(2024, 1, 1),
+                wfh_type=WfhType.AM,
+                current_approval_status=ApprovalStatus.PENDING_APPROVAL,
+                approving_officer=3,
+            )
+        )
+        seeded_db.commit()
+        return seeded_db
+
+    @staticmethod
+    def get_requester_ids(db, manager_id, **filters):
+        filters = ArrangementFilters(
+            manager_id=manager_id, start_date=date(2024, 1, 1), end_date=date(2024, 1, 1), **filters
+        )
+        arrangements, _ = crud.get_arrangements(db, filters)
+        return [arrangement["requester_staff_id"] for arrangement in arrangements]
+
+    @pytest.mark.parametrize(
+        ("manager_id", "depth", "expected_ids"),
+        [
+            (1, None, [2, 3, 4]),
+            (1, 1, [2]),
+            (1, 2, [2, 3]),
+            (2, None, [3, 4]),
+            (4, None, []),
+        ],
+    )
+    def test_subtree(self, org_db, manager_id, depth, expected_ids):
+        ids = self.get_requester_ids(
+            org_db, manager_id, scope=SubordinatesScope.SUBTREE, depth=depth
+        )
+
+        assert ids == expected_ids
+
+    def test_direct_scope_is_the_arrangements_approved_by_the_manager(self, org_db):
+        assert self.get_requester_ids(org_db, 1) == [2, 3]
+        assert self.get_requester_ids(org_db, 3) == [4]
+
+    def test_subtree_is_resolved_within_the_arrangements_query(self, org_db):
+        filters = ArrangementFilters(
+            manager_id=1, scope=SubordinatesScope.SUBTREE, group_by_date=False
+        )
+
+        with count_queries(org_db.get_bind()) as queries:
+            crud.get_arrangements(org_db, filters, PaginationConfig())
+
+        # The page, the total count and the series, without separate lookups of the reports
+        assert len(queries) == 3
+        assert all(query.startswith("WITH RECURSIVE reporting_subtree") for query in queries)
+
+    @pytest.mark.parametrize(
+        ("scope", "depth", "expected_counts"),
+        [
+            (SubordinatesScope.DIRECT, None, [("IT", "full", 1)]),
+            (SubordinatesScope.SUBTREE, None, [("IT", "full", 1), ("Sales", "am", 1)]),
+            (SubordinatesScope.SUBTREE, 1, [("IT", "full", 1)]),
+        ],
+    )
+    def test_arrangement_counts(self, org_db, scope, depth, expected_counts):
+        filters = ArrangementStatsFilters(
+            start_date=date(2024, 1, 1),
+            end_date=date(2024, 1, 1),
+            current_approval_status=[ApprovalStatus.PENDING_APPROVAL],
+            manager_id=2,
+            scope=scope,
+            depth=depth,
+        )
+
+        rows = crud.get_arrangement_counts(org_db, filters)
+
+        assert sorted((row["dept"], row["wfh_type"].value, row["count"]) for row in rows) == (
+            expected_counts
+        )
+
+
+class TestGetArrangementsPagination:
+    def test_without_pagination(self, seeded_db):
+        result, total_count = crud.get_arrangements(seeded_db, filters=ArrangementFilters())
+
+        assert len(result) == 12
+        assert total_count == 12
+
+    @pytest.mark.parametrize(
+        ("page_num", "expected_ids"),
+        [(1, [1, 2, 3, 4, 5]), (2, [6, 7, 8, 9, 10]), (3, [11, 12]), (4, [])],
+    )
+    def test_page(self, seeded_db, page_num, expected_ids):
+        result, total_count = crud.get_arrangements(
+            seeded_db,
+            filters=ArrangementFilters(manager_id=1, group_by_date=False),
+            pagination=PaginationConfig(items_per_page=5, page_num=page_num),
+        )
+
+        assert total_count == 12
+        assert sorted(arrangement["arrangement_id"] for arrangement in result) == expected_ids
+
+    def test_page_with_filters(self, seeded_db):
+        result, total_count = crud.get_arrangements(
+            seeded_db,
+            filters=ArrangementFilters(
+                staff_ids=[2], start_date=date(2024, 1, 3), group_by_date=False
+            ),
+            pagination=PaginationConfig(items_per_page=3, page_num=1),
+        )
+
+        assert total_count == 4
+        assert [arrangement["wfh_date"] for arrangement in result] == [
+            date(2024, 1, 3),
+            date(2024, 1, 4),
+            date(2024, 1, 5),
+        ]
+
+    def test_page_grouped_by_date(self, seeded_db):
+        result, total_count = crud.get_arrangements(
+            seeded_db,
+            filters=ArrangementFilters(group_by_date=True),
+            pagination=PaginationConfig(items_per_page=2, page_num=1),
+        )
+
+        # Pages are made up of the most recent dates, with all arrangements on those dates
+        assert total_count == 6
+        assert len(result) == 4
+        assert {arrangement["wfh_date"] for arrangement in result} == {
+            date(2024, 1, 6),
+            date(2024, 1, 5),
+        }
+
+    @pytest.mark.parametrize("group_by_date", [True, False])
+    def test_page_as_rows(self, seeded_db, group_by_date):
+        filters = ArrangementFilters(manager_id=1, group_by_date=group_by_date)
+        pagination = PaginationConfig(items_per_page=2, page_num=2)
+
+        instances, total_count = crud.get_arrangements(seeded_db, filters, pagination)
+        rows, rows_total_count = crud.get_arrangements(seeded_db, filters, pagination, as_rows=True)
+
+        assert rows_total_count == total_count
+        assert [row["arrangement_id"] for row in rows] == [
+            instance["arrangement_id"] for instance in instances
+        ]
+        assert rows[0]["wfh_date"] == instances[0]["wfh_date"]
+        assert rows[0]["requester_info_staff_fname"] == instances[0]["requester_info"].staff_fname
+
+
+class TestStreamArrangements:
+    def test_matches_get_arrangements(self, seeded_db):
+        filters = ArrangementFilters(staff_ids=[2], start_date=date(2024, 1, 3))
+
+        with patch("src.arrangements.crud.STREAM_BATCH_SIZE", 2):
+            rows = list(crud.stream_arrangements(seeded_db, filters))
+        arrangements, _ = crud.get_arrangements(seeded_db, filters)
+
+        assert [row["arrangement_id"] for row in rows] == [
+            arrangement["arrangement_id"] for arrangement in arrangements
+        ]
+        assert rows[0]["requester_info_staff_id"] == 2
+
+    def test_stream_arrangement_logs(self, seeded_db):
+        seeded_db.add_all(
+            [
+                ArrangementLog(
+                    update_datetime=datetime(2024, 1, day),
+                    arrangement_id=1,
+                    requester_staff_id=2,
+                    wfh_date=date(2024, 1, 1),
+                    wfh_type=WfhType.FULL,
+                    action=Action.CREATE,
+                    updated_approval_status=ApprovalStatus.PENDING_APPROVAL,
+                    approving_officer=1,
+                )
+                for day in (2, 1, 3)
+            ]
+        )
+        seeded_db.commit()
+
+        with patch("src.arrangements.crud.STREAM_BATCH_SIZE", 2):
+            rows = list(crud.stream_arrangement_logs(seeded_db))
+
+        assert [row["update_datetime"].day for row in rows] == [3, 2, 1]
+
+
+class TestGetArrangementsCursorPagination:
+    def get_all_pages(self, db, items_per_page, include_total_count=True):
+        pages = []
+        cursor = None
+        while True:
+            result, total_count = crud.get_arrangements(
+                db,
+                filters=ArrangementFilters(manager_id=1, group_by_date=False),
+                pagination=PaginationConfig(
+                    items_per_page=items_per_page,
+                    pagination_mode=PaginationMode.CURSOR,
+                    cursor=cursor,
+                    include_total_count=include_total_count,
+                ),
+            )
+            pages.append((result, total_count))
+            cursor = get_next_cursor(result, items_per_page, "wfh_date", "arrangement_id")
+            if cursor is None:
+                return pages
+
+    def test_pages(self, seeded_db):
+        pages = self.get_all_pages(seeded_db, items_per_page=5)
+
+        assert [len(result) for result, _ in pages] == [5, 5, 2]
+        assert all(total_count == 12 for _, total_count in pages)
+
+        # Pages follow (wfh_date, arrangement_id) order with no gaps or repeats
+        arrangements = [arrangement for result, _ in pages for arrangement in result]
+        assert [arrangement["arrangement_id"] for arrangement in arrangements] == list(range(1, 13))
+
+    def test_without_total_count(self, seeded_db):
+        pages = self.get_all_pages(seeded_db, items_per_page=6, include_total_count=False)
+
+        # The last page is empty as the previous page was full
+        assert [len(result) for result, _ in pages] == [6, 6, 0]
+        assert all(total_count is None for _, total_count in pages)
+
+    @pytest.mark.parametrize("cursor", ["not-a-cursor", encode_cursor(1), encode_cursor(1, 2)])
+    def test_invalid_cursor(self, seeded_db, cursor):
+        with pytest.raises(InvalidCursorException):
+            crud.get_arrangements(
+                seeded_db,
+                filters=ArrangementFilters(group_by_date=False),
+                pagination=PaginationConfig(
+                    items_per_page=5, pagination_mode=PaginationMode.CURSOR, cursor=cursor
+                ),
+            )
+
+
+class TestGetTeamArrangements:
+    @pytest.fixture
+    def team_db(self, seeded_db):
+        # Staff 4 reports to staff 2, and staff 3 (a peer of staff 2) has one arrangement
+        # delegated to staff 2, so it is both a peer and a subordinate arrangement
+        seeded_db.add(
+            Employee(
+                staff_id=4,
+                staff_fname="First4",
+                staff_lname="Last4",
+                dept="IT",
+                position="Staff",
+                country="SG",
+                email="staff4@example.com",
+                reporting_manager=2,
+                role=2,
+            )
+        )
+        seeded_db.flush()
+        seeded_db.add_all(
+            [
+                LatestArrangement(
+                    update_datetime=datetime(2023, 12, 1),
+                    requester_staff_id=staff_id,
+                    wfh_date=date(2024, 1, 2),
+                    wfh_type=WfhType.FULL,
+                    current_approval_status=ApprovalStatus.PENDING_APPROVAL,
+                    approving_officer=approving_officer,
+                    delegate_approving_officer=delegate_approving_officer,
+                )
+                for staff_id, approving_officer, delegate_approving_officer in [
+                    (4, 2, None),
+                    (3, 1, 2),
+                ]
+            ]
+        )
+        seeded_db.commit()
+        yield seeded_db
+
+    def test_peers_and_subordinates(self, team_db):
+        result, total_count = crud.get_team_arrangements(
+            team_db, staff_id=2, filters=ArrangementFilters(group_by_date=False)
+        )
+
+        # The 6 + 1 arrangements of staff 3 and the arrangement of staff 4, each listed once
+        assert total_count == 8
+        assert [arrangement["arrangement_id"] for arrangement in result] == [
+            2,
+            4,
+            13,
+            14,
+            6,
+            8,
+            10,
+            12,
+        ]
+        assert {arrangement["requester_staff_id"] for arrangement in result} == {3, 4}
+
+    def test_page(self, team_db):
+        result, total_count = crud.get_team_arrangements(
+            team_db,
+            staff_id=2,
+            filters=ArrangementFilters(group_by_date=False),
+            pagination=PaginationConfig(items_per_page=3, page_num=2),
+        )
+
+        assert total_count == 8
+        assert [arrangement["arrangement_id"] for arrangement in result] == [14, 6, 8]
+
+    def test_unknown_staff(self, team_db):
+        result, total_count = crud.get_team_arrangements(
+            team_db, staff_id=999, filters=ArrangementFilters(group_by_date=False)
+        )
+
+        assert result == []
+        assert total_count == 0
+
+
+class TestQueryCount:
+    """List queries load the requester with the arrangements instead of one query per row."""
+
+    @pytest.fixture
+    def db(self, seeded_db):
+        # Start from an empty identity map so related employees are not served from memory
+        seeded_db.expunge_all()
+        return seeded_db
+
+    @pytest.mark.parametrize(
+        ("filters", "pagination", "expected_count"),
+        [
+            (ArrangementFilters(group_by_date=False), None, 2),
+            (
+                ArrangementFilters(group_by_date=False),
+                PaginationConfig(items_per_page=5, page_num=2),
+                3,
+            ),
+            (ArrangementFilters(group_by_date=True), PaginationConfig(items_per_page=2), 4),
+            (
+                ArrangementFilters(group_by_date=False),
+                PaginationConfig(
+                    items_per_page=5,
+                    pagination_mode=PaginationMode.CURSOR,
+                    include_total_count=False,
+                ),
+                2,
+            ),
+        ],
+    )
+    def test_get_arrangements(self, db, filters, pagination, expected_count):
+        # Each count includes the query of the recurring series
+        with count_queries(db.get_bind()) as statements:
+            result, _ = crud.get_arrangements(db, filters=filters, pagination=pagination)
+            requesters = [arrangement["requester_info"].staff_fname for arrangement in result]
+
+        assert len(statements) == expected_count
+        assert requesters
+        assert all(arrangement.get("approving_officer_info") is None for arrangement in result)
+
+    def test_get_team_arrangements(self, db):
+        with count_queries(db.get_bind()) as statements:
+            result, _ = crud.get_team_arrangements(
+                db,
+                staff_id=2,
+                filters=ArrangementFilters(group_by_date=False),
+                pagination=PaginationConfig(items_per_page=5),
+            )
+            [arrangement["requester_info"].staff_fname for arrangement in result]
+
+        assert len(result) == 5
+        assert len(statements) == 3
+
+    def test_get_arrangement_by_id(self, db):
+        with count_queries(db.get_bind()) as statements:
+            result = crud.get_arrangement_by_id(db, arrangement_id=1)
+
+        assert len(statements) == 1
+        assert result["requester_info"].staff_id == 2
+
+
 class TestGetArrangementLogs:
     def test_get_arrangement_logs(self, mock_db_session, mock_arrangement_log):
         # Set up the mock chain
@@ -443,25 +1009,337 @@ class TestGetArrangementLogs:
         mock_order = mock_query.order_by.return_value
         mock_order.all.return_value = [mock_arrangement_log]
 
-        result = crud.get_arrangement_logs(mock_db_session)
+        result, total_count = crud.get_arrangement_logs(mock_db_session)
 
         assert len(result) == 1
+        assert total_count == 1
         assert result[0] == mock_arrangement_log.__dict__
 
+    def test_cursor_pagination(self, seeded_db):
+        # Logs 1 to 4 share an update datetime, so the log id breaks the tie
+        seeded_db.add_all(
+            [
+                ArrangementLog(
+                    update_datetime=datetime(2024, 1, 1 if log_id <= 4 else log_id),
+                    arrangement_id=1,
+                    requester_staff_id=2,
+                    wfh_date=date(2024, 1, 1),
+                    wfh_type=WfhType.FULL,
+                    action=Action.CREATE,
+                    updated_approval_status=ApprovalStatus.PENDING_APPROVAL,
+                    approving_officer=1,
+                )
+                for log_id in range(1, 7)
+            ]
+        )
+        seeded_db.commit()
+
+        log_ids = []
+        cursor = None
+        for _ in range(3):
+            result, total_count = crud.get_arrangement_logs(
+                seeded_db,
+                pagination=PaginationConfig(
+                    items_per_page=3, pagination_mode=PaginationMode.CURSOR, cursor=cursor
+                ),
+            )
+            assert total_count == 6
+            log_ids.extend(log["log_id"] for log in result)
+            cursor = get_next_cursor(result, 3, "update_datetime", "log_id")
 
-class TestGetExpiringRequests:
-    def test_success(self, mock_db_session, mock_latest_arrangement):
-        # Arrange
-        mock_query = mock_db_session.query.return_value
-        mock_filter = mock_query.filter.return_value
-        mock_filter.all.return_value = [mock_latest_arrangement]
+        assert log_ids == [6, 5, 4, 3, 2, 1]
 
-        # Act
-        result = crud.get_expiring_requests(mock_db_session)
+    @pytest.fixture
+    def logs_db(self, seeded_db):
+        # One log per day from 1 to 6 Jan 2024, alternating between two requesters
+        seeded_db.add_all(
+            [
+                ArrangementLog(
+                    update_datetime=datetime(2024, 1, day, 9),
+                    arrangement_id=day,
+                    requester_staff_id=2 if day % 2 else 3,
+                    wfh_date=date(2024, 1, day),
+                    wfh_type=WfhType.FULL,
+                    action=Action.APPROVE if day > 4 else Action.CREATE,
+                    previous_approval_status=(ApprovalStatus.PENDING_APPROVAL if day > 4 else None),
+                    updated_approval_status=(
+                        ApprovalStatus.APPROVED if day > 4 else ApprovalStatus.PENDING_APPROVAL
+                    ),
+                    approving_officer=1,
+                )
+                for day in range(1, 7)
+            ]
+        )
+        seeded_db.commit()
+        return seeded_db
+
+    @pytest.mark.parametrize(
+        ("filters", "expected_ids"),
+        [
+            (ArrangementLogFilters(), [6, 5, 4, 3, 2, 1]),
+            (ArrangementLogFilters(requester_staff_id=2), [5, 3, 1]),
+            (ArrangementLogFilters(approving_officer=2), []),
+            (ArrangementLogFilters(arrangement_id=4), [4]),
+            (ArrangementLogFilters(action=[Action.APPROVE]), [6, 5]),
+            (
+                ArrangementLogFilters(approval_status=[ApprovalStatus.PENDING_APPROVAL]),
+                [4, 3, 2, 1],
+            ),
+            (
+                ArrangementLogFilters(start_date=date(2024, 1, 2), end_date=date(2024, 1, 4)),
+                [4, 3, 2],
+            ),
+            (ArrangementLogFilters(requester_staff_id=3, action=[Action.CREATE]), [4, 2]),
+        ],
+    )
+    def test_filters(self, logs_db, filters, expected_ids):
+        result, total_count = crud.get_arrangement_logs(logs_db, filters)
+
+        assert [log["log_id"] for log in result] == expected_ids
+        assert total_count == len(expected_ids)
+
+    @pytest.mark.parametrize(
+        ("page_num", "expected_ids"),
+        [(1, [6, 5, 4, 3]), (2, [2, 1]), (3, [])],
+    )
+    def test_offset_pagination(self, logs_db, page_num, expected_ids):
+        result, total_count = crud.get_arrangement_logs(
+            logs_db, pagination=PaginationConfig(items_per_page=4, page_num=page_num)
+        )
 
-        # Assert
-        assert len(result) == 1
-        assert result[0] == mock_latest_arrangement.__dict__
+        assert [log["log_id"] for log in result] == expected_ids
+        assert total_count == 6
+
+    def test_stream_with_filters(self, logs_db):
+        rows = crud.stream_arrangement_logs(logs_db, ArrangementLogFilters(requester_staff_id=2))
+
+        assert [row["log_id"] for row in rows] == [5, 3, 1]
+
+
+class TestGetArrangementCounts:
+    @pytest.fixture
+    def stats_db(self, seeded_db):
+        # Staff 2 works from home in the AM on 2 and 3 Jan, with a reason marking 3 Jan as leave
+        arrangements = seeded_db.query(LatestArrangement).order_by(LatestArrangement.arrangement_id)
+        for arrangement in arrangements:
+            if arrangement.wfh_date <= date(2024, 1, 3):
+                arrangement.current_approval_status = ApprovalStatus.APPROVED
+            if arrangement.requester_staff_id == 2 and arrangement.wfh_date >= date(2024, 1, 2):
+                arrangement.wfh_type = WfhType.AM
+            if arrangement.requester_staff_id == 2 and arrangement.wfh_date == date(2024, 1, 3):
+                arrangement.reason_description = "OOO - Annual leave"
+        seeded_db.commit()
+        return seeded_db
+
+    def test_counts_approved_arrangements_per_date_department_and_type(self, stats_db):
+        filters = ArrangementStatsFilters(start_date=date(2024, 1, 2), end_date=date(2024, 1, 6))
+
+        rows = crud.get_arrangement_counts(stats_db, filters)
+
+        assert sorted(
+            (
+                row["wfh_date"],
+                row["dept"],
+                row["wfh_type"].value,
+                row["count"],
+                row["on_leave_count"],
+            )
+            for row in rows
+        ) == [
+            (date(2024, 1, 2), "IT", "am", 1, 0),
+            (date(2024, 1, 2), "IT", "full", 1, 0),
+            (date(2024, 1, 3), "IT", "am", 1, 1),
+            (date(2024, 1, 3), "IT", "full", 1, 0),
+        ]
+
+    @pytest.mark.parametrize(
+        "filters",
+        [
+            ArrangementStatsFilters(
+                start_date=date(2024, 1, 1), end_date=date(2024, 1, 6), department="HR"
+            ),
+            ArrangementStatsFilters(start_date=date(2024, 1, 4), end_date=date(2024, 1, 6)),
+        ],
+    )
+    def test_no_matches(self, stats_db, filters):
+        assert crud.get_arrangement_counts(stats_db, filters) == []
+
+    def test_approval_status_filter(self, stats_db):
+        filters = ArrangementStatsFilters(
+            start_date=date(2024, 1, 1),
+            end_date=date(2024, 1, 6),
+            current_approval_status=[ApprovalStatus.PENDING_APPROVAL],
+        )
+
+        rows = crud.get_arrangement_counts(stats_db, filters)
+
+        assert sum(row["count"] for row in rows) == 6
+
+
+class TestDailyWfhRollup:
+    @staticmethod
+    def approve(db, arrangement_id: int, approval_status=ApprovalStatus.APPROVED):
+        arrangement = db.get(LatestArrangement, arrangement_id)
+        previous_approval_status = arrangement.current_approval_status
+        arrangement_data = ArrangementResponse.from_dict(
+            {**arrangement.__dict__, "current_approval_status": approval_status}
+        )
+        crud.update_arrangement_approval_status(
+            db, arrangement_data, Action.APPROVE, previous_approval_status
+        )
+
+    @staticmethod
+    def get_rollup(db):
+        filters = ArrangementStatsFilters(start_date=date(2024, 1, 1), end_date=date(2024, 1, 6))
+        return sorted(
+            (row["wfh_date"], row["dept"], row["wfh_type"].value, row["count"])
+            for row in crud.get_daily_wfh_rollup(db, filters)
+        )
+
+    def test_rebuild_matches_counts(self, seeded_db):
+        seeded_db.query(LatestArrangement).filter(
+            LatestArrangement.wfh_date <= date(2024, 1, 2)
+        ).update({LatestArrangement.current_approval_status: ApprovalStatus.APPROVED})
+        seeded_db.commit()
+
+        num_rows = crud.rebuild_daily_wfh_rollup(seeded_db)
+
+        assert num_rows == 2
+        assert self.get_rollup(seeded_db) == [
+            (date(2024, 1, 1), "IT", "full", 2),
+            (date(2024, 1, 2), "IT", "full", 2),
+        ]
+
+    def test_status_changes_adjust_rollup(self, seeded_db):
+        # Arrangements 1 and 2 are the arrangements of staff 2 and 3 on 1 Jan
+        self.approve(seeded_db, 1)
+        self.approve(seeded_db, 2)
+        assert self.get_rollup(seeded_db) == [(date(2024, 1, 1), "IT", "full", 2)]
+
+        self.approve(seeded_db, 1, ApprovalStatus.PENDING_WITHDRAWAL)
+        assert self.get_rollup(seeded_db) == [(date(2024, 1, 1), "IT", "full", 1)]
+
+        self.approve(seeded_db, 2, ApprovalStatus.WITHDRAWN)
+        assert self.get_rollup(seeded_db) == []
+
+    @pytest.mark.parametrize("bulk_update", [False, True])
+    def test_department_changes_rebuild_rollup(self, seeded_db, bulk_update):
+        # Arrangement 1 is the arrangement of staff 2 on 1 Jan
+        self.approve(seeded_db, 1)
+
+        if bulk_update:
+            seeded_db.query(Employee).filter(Employee.staff_id == 2).update(
+                {Employee.dept: "Sales"}
+            )
+        else:
+            seeded_db.get(Employee, 2).dept = "Sales"
+        seeded_db.commit()
+        assert self.get_rollup(seeded_db) == [(date(2024, 1, 1), "Sales", "full", 1)]
+
+        self.approve(seeded_db, 1, ApprovalStatus.CANCELLED)
+        assert seeded_db.query(models.DailyWfhRollup.count).all() == [(0,)]
+
+    def test_department_changes_are_rolled_back_with_the_transaction(self, seeded_db):
+        self.approve(seeded_db, 1)
+
+        seeded_db.get(Employee, 2).dept = "Sales"
+        seeded_db.flush()
+        seeded_db.rollback()
+        seeded_db.commit()
+
+        assert self.get_rollup(seeded_db) == [(date(2024, 1, 1), "IT", "full", 1)]
+
+    def test_status_changes_outside_approved_do_not_adjust_rollup(self, seeded_db):
+        self.approve(seeded_db, 1, ApprovalStatus.REJECTED)
+
+        assert seeded_db.query(models.DailyWfhRollup).count() == 0
+
+    def test_create_approved_arrangement_adjusts_rollup(self, seeded_db):
+        arrangement = CreateArrangementRequest(
+            update_datetime=datetime(2023, 12, 1),
+            requester_staff_id=1,
+            wfh_date=date(2024, 1, 3),
+            wfh_type=WfhType.AM,
+            is_recurring=False,
+            recurring_frequency_number=None,
+            recurring_frequency_unit=None,
+            recurring_occurrences=None,
+            current_approval_status=ApprovalStatus.APPROVED,
+            approving_officer=1,
+            reason_description="OOO - Annual leave",
+        )
+
+        crud.create_arrangements(seeded_db, [arrangement])
+
+        rollup = seeded_db.query(models.DailyWfhRollup).one()
+        assert (rollup.wfh_date, rollup.dept, rollup.wfh_type) == (
+            date(2024, 1, 3),
+            "IT",
+            WfhType.AM,
+        )
+        assert (rollup.count, rollup.on_leave_count) == (1, 1)
+
+    def test_adjustment_is_rolled_back_with_the_transaction(self, seeded_db):
+        crud.adjust_daily_wfh_rollup(seeded_db, seeded_db.get(LatestArrangement, 1), 1)
+
+        seeded_db.rollback()
+
+        assert seeded_db.query(models.DailyWfhRollup).count() == 0
+
+
+class TestRejectExpiringRequests:
+    def test_get_expiring_request_ids(self, seeded_db):
+        seeded_db.get(LatestArrangement, 2).current_approval_status = ApprovalStatus.APPROVED
+        seeded_db.commit()
+
+        assert crud.get_expiring_request_ids(seeded_db) == [1] + list(range(3, 13))
+
+    def test_rejects_requests_that_are_still_expiring(self, seeded_db):
+        seeded_db.get(LatestArrangement, 2).current_approval_status = ApprovalStatus.APPROVED
+        seeded_db.commit()
+
+        result = crud.reject_expiring_requests(seeded_db, [1, 2, 3], "Expired")
+
+        logs = {log.arrangement_id: log for log in seeded_db.query(models.ArrangementLog)}
+        assert [arrangement["arrangement_id"] for arrangement in result] == [1, 3]
+        assert sorted(logs) == [1, 3]
+        for arrangement in result:
+            stored = seeded_db.get(LatestArrangement, arrangement["arrangement_id"])
+            assert stored.current_approval_status == ApprovalStatus.REJECTED
+            assert stored.status_reason == "Expired"
+            assert stored.latest_log_id == arrangement["latest_log_id"]
+            assert (
+                logs[stored.arrangement_id].action,
+                logs[stored.arrangement_id].previous_approval_status,
+                logs[stored.arrangement_id].updated_approval_status,
+                logs[stored.arrangement_id].status_reason,
+            ) == (
+                Action.REJECT,
+                ApprovalStatus.PENDING_APPROVAL,
+                ApprovalStatus.REJECTED,
+                "Expired",
+            )
+        assert (
+            seeded_db.get(LatestArrangement, 2).current_approval_status == ApprovalStatus.APPROVED
+        )
+        assert seeded_db.get(LatestArrangement, 4).current_approval_status == (
+            ApprovalStatus.PENDING_APPROVAL
+        )
+
+    def test_number_of_statements_is_independent_of_requests(self, seeded_db):
+        statement_counts = []
+        for arrangement_ids in [[1], list(range(2, 13))]:
+            with count_queries(seeded_db.get_bind()) as statements:
+                crud.reject_expiring_requests(seeded_db, arrangement_ids, "Expired")
+            statement_counts.append(len(statements))
+
+        assert statement_counts[0] == statement_counts[1]
+
+    @pytest.mark.parametrize("arrangement_ids", [[], [99]])
+    def test_nothing_to_reject(self, seeded_db, arrangement_ids):
+        assert crud.reject_expiring_requests(seeded_db, arrangement_ids, "Expired") == []
+
+        assert seeded_db.query(models.ArrangementLog).count() == 0
 
 
 class TestCreateRecurringRequest:
@@ -504,6 +1382,433 @@ class TestCreateRecurringRequest:
         mock_db_session.rollback.assert_called_once()
 
 
+class TestRecurringSeries:
+    @staticmethod
+    def create_series(db, approval_status=ApprovalStatus.PENDING_APPROVAL, requester_staff_id=2):
+        # Weekly on 3, 10 and 17 Jan 2024
+        return crud.create_recurring_series(
+            db,
+            CreateArrangementRequest(
+                update_datetime=datetime(2023, 12, 2),
+                requester_staff_id=requester_staff_id,
+                wfh_date=date(2024, 1, 3),
+                wfh_type=WfhType.AM,
+                is_recurring=True,
+                recurring_frequency_number=1,
+                recurring_frequency_unit=RecurringFrequencyUnit.WEEKLY,
+                recurring_occurrences=3,
+                current_approval_status=approval_status,
+                approving_officer=1,
+                reason_description="Weekly class",
+                is_series=True,
+            ),
+        )
+
+    @staticmethod
+    def set_occurrence_status(db, batch_id, wfh_date, approval_status):
+        occurrence = ArrangementResponse.from_dict(
+            crud.get_series_occurrences(db, batch_id, wfh_date)[0]
+        )
+        previous_approval_status = occurrence.current_approval_status
+        occurrence.current_approval_status = approval_status
+        occurrence.update_datetime = datetime(2023, 12, 3)
+        return crud.update_series_occurrence_approval_status(
+            db, occurrence, previous_approval_status
+        )
+
+    @staticmethod
+    def get_keys(arrangements):
+        return [
+            (arrangement["wfh_date"].day, arrangement["arrangement_id"])
+            for arrangement in arrangements
+        ]
+
+    def test_create_stores_only_the_rule(self, seeded_db):
+        occurrences = self.create_series(seeded_db)
+
+        assert seeded_db.query(LatestArrangement).count() == 12
+        assert seeded_db.query(models.RecurringRequest).one().is_series is True
+        assert [occurrence.wfh_date.day for occurrence in occurrences] == [3, 10, 17]
+        assert all(occurrence.arrangement_id is None for occurrence in occurrences)
+        assert all(occurrence.batch_id == 1 for occurrence in occurrences)
+        assert occurrences[0].requester_info.staff_id == 2
+
+    def test_occurrences_in_date_range(self, seeded_db):
+        self.create_series(seeded_db)
+
+        arrangements, total_count = crud.get_arrangements(
+            seeded_db,
+            ArrangementFilters(
+                staff_ids=[2], start_date=date(2024, 1, 3), end_date=date(2024, 1, 10)
+            ),
+        )
+
+        # Arrangements 5, 7, 9 and 11 are staff 2's on 3 to 6 Jan, and the occurrences come after
+        # the arrangements of their date
+        assert self.get_keys(arrangements) == [
+            (3, 5),
+            (3, None),
+            (4, 7),
+            (5, 9),
+            (6, 11),
+            (10, None),
+        ]
+        assert total_count == 6
+        assert arrangements[1]["current_approval_status"] == ApprovalStatus.PENDING_APPROVAL
+        assert arrangements[1]["requester_info"].staff_id == 2
+
+    @pytest.mark.parametrize(
+        ("filters", "expected_count"),
+        [
+            ({"staff_ids": [3]}, 0),
+            ({"personal_staff_id": 2}, 0),
+            ({"name": "last2"}, 3),
+            ({"wfh_type": [WfhType.FULL]}, 0),
+            ({"reason": "weekly"}, 3),
+            ({"reason": "dentist"}, 0),
+            ({"department": "Sales"}, 0),
+            ({"manager_id": 1}, 3),
+            ({"manager_id": 2}, 0),
+            ({"manager_id": 1, "scope": SubordinatesScope.SUBTREE}, 3),
+            ({"end_date": date(2024, 1, 2)}, 0),
+            ({"current_approval_status": [ApprovalStatus.APPROVED]}, 0),
+        ],
+    )
+    def test_filters(self, seeded_db, filters, expected_count):
+        self.create_series(seeded_db)
+        filters = ArrangementFilters(start_date=date(2024, 1, 3), **filters)
+
+        arrangements, _ = crud.get_arrangements(seeded_db, filters)
+
+        occurrences = [arrangement for arrangement in arrangements if arrangement["batch_id"]]
+        assert len(occurrences) == expected_count
+
+    @pytest.mark.parametrize(
+        ("filters", "expected_keys"),
+        [
+            # The arrangements are for full days and the occurrences for mornings
+            ({"wfh_type": [WfhType.AM]}, [(3, None), (10, None)]),
+            ({"wfh_type": [WfhType.FULL]}, [(3, 5), (4, 7), (5, 9), (6, 11)]),
+            # The reasons are matched with the search indexes of both tables
+            ({"reason": "EEKLY CLA"}, [(3, None), (10, None)]),
+            ({"reason": "doctor"}, [(4, 7)]),
+        ],
+    )
+    def test_filters_select_arrangements_and_occurrences_alike(
+        self, seeded_db, filters, expected_keys
+    ):
+        self.create_series(seeded_db)
+        seeded_db.get(LatestArrangement, 7).reason_description = "Doctor's appointment"
+        seeded_db.commit()
+        filters = ArrangementFilters(
+            staff_ids=[2], start_date=date(2024, 1, 3), end_date=date(2024, 1, 10), **filters
+        )
+
+        arrangements, _ = crud.get_arrangements(seeded_db, filters)
+
+        assert self.get_keys(arrangements) == expected_keys
+
+    def test_exception_overrides_the_series_status(self, seeded_db):
+        self.create_series(seeded_db)
+
+        occurrence = self.set_occurrence_status(
+            seeded_db, 1, date(2024, 1, 10), ApprovalStatus.CANCELLED
+        )
+
+        assert occurrence["current_approval_status"] == ApprovalStatus.CANCELLED
+        assert seeded_db.query(LatestArrangement).count() == 12
+        assert seeded_db.query(models.RecurringRequestException).count() == 1
+
+        cancelled, _ = crud.get_arrangements(
+            seeded_db, ArrangementFilters(current_approval_status=[ApprovalStatus.CANCELLED])
+        )
+        pending, _ = crud.get_arrangements(
+            seeded_db,
+            ArrangementFilters(
+                current_approval_status=[ApprovalStatus.PENDING_APPROVAL],
+                start_date=date(2024, 1, 7),
+            ),
+        )
+        assert self.get_keys(cancelled) == [(10, None)]
+        assert self.get_keys(pending) == [(17, None)]
+
+    def test_series_status_applies_to_occurrences_without_exception(self, seeded_db):
+        self.create_series(seeded_db)
+        self.set_occurrence_status(seeded_db, 1, date(2024, 1, 10), ApprovalStatus.WITHDRAWN)
+        series = RecurringSeriesResponse.from_dict(crud.get_series(seeded_db, 1))
+        series.current_approval_status = ApprovalStatus.APPROVED
+        series.update_datetime = datetime(2023, 12, 4)
+
+        occurrences = crud.update_series_approval_status(
+            seeded_db, series, ApprovalStatus.PENDING_APPROVAL
+        )
+
+        assert [occurrence["current_approval_status"] for occurrence in occurrences] == [
+            ApprovalStatus.APPROVED,
+            ApprovalStatus.WITHDRAWN,
+            ApprovalStatus.APPROVED,
+        ]
+        assert TestDailyWfhRollup.get_rollup(seeded_db) == [(date(2024, 1, 3), "IT", "am", 1)]
+
+    def test_rollup(self, seeded_db):
+        self.create_series(seeded_db, ApprovalStatus.APPROVED)
+        self.set_occurrence_status(seeded_db, 1, date(2024, 1, 10), ApprovalStatus.CANCELLED)
+        rollup = [
+            (row.wfh_date.day, row.count)
+            for row in seeded_db.query(models.DailyWfhRollup).order_by(
+                models.DailyWfhRollup.wfh_date
+            )
+        ]
+
+        num_rows = crud.rebuild_daily_wfh_rollup(seeded_db)
+
+        assert rollup == [(3, 1), (10, 0), (17, 1)]
+        assert num_rows == 2
+        assert [
+            (row.wfh_date.day, row.count)
+            for row in seeded_db.query(models.DailyWfhRollup).order_by(
+                models.DailyWfhRollup.wfh_date
+            )
+        ] == [(3, 1), (17, 1)]
+
+    @pytest.mark.parametrize("stats_filters", [{}, {"manager_id": 1}, {"department": "IT"}])
+    def test_counts(self, seeded_db, stats_filters):
+        self.create_series(seeded_db)
+        self.set_occurrence_status(seeded_db, 1, date(2024, 1, 10), ApprovalStatus.CANCELLED)
+        filters = ArrangementStatsFilters(
+            start_date=date(2024, 1, 3),
+            end_date=date(2024, 1, 17),
+            current_approval_status=[ApprovalStatus.PENDING_APPROVAL],
+            **stats_filters,
+        )
+
+        rows = crud.get_arrangement_counts(seeded_db, filters)
+
+        # The arrangements of staff 2 and 3 on 3 to 6 Jan, and the pending occurrences
+        assert sorted(
+            (row["wfh_date"].day, row["dept"], row["wfh_type"].value, row["count"]) for row in rows
+        ) == [
+            (3, "IT", "am", 1),
+            (3, "IT", "full", 2),
+            (4, "IT", "full", 2),
+            (5, "IT", "full", 2),
+            (6, "IT", "full", 2),
+            (17, "IT", "am", 1),
+        ]
+
+    def test_counts_match_the_rollup(self, seeded_db):
+        self.create_series(seeded_db, ApprovalStatus.APPROVED)
+        self.set_occurrence_status(seeded_db, 1, date(2024, 1, 10), ApprovalStatus.CANCELLED)
+        filters = ArrangementStatsFilters(start_date=date(2024, 1, 1), end_date=date(2024, 1, 31))
+
+        def get_counts(rows):
+            return sorted(
+                (row["wfh_date"], row["dept"], row["wfh_type"], row["count"]) for row in rows
+            )
+
+        assert get_counts(crud.get_arrangement_counts(seeded_db, filters)) == get_counts(
+            crud.get_daily_wfh_rollup(seeded_db, filters)
+        )
+        assert len(crud.get_arrangement_counts(seeded_db, filters)) == 2
+
+    @pytest.mark.parametrize("as_rows", [True, False])
+    def test_pages(self, seeded_db, as_rows):
+        self.create_series(seeded_db)
+        filters = ArrangementFilters(staff_ids=[2], group_by_date=False)
+        expected_keys = [
+            (1, 1),
+            (2, 3),
+            (3, 5),
+            (3, None),
+            (4, 7),
+            (5, 9),
+            (6, 11),
+            (10, None),
+            (17, None),
+        ]
+
+        pages = [
+            crud.get_arrangements(
+                seeded_db, filters, PaginationConfig(items_per_page=4, page_num=page_num), as_rows
+            )
+            for page_num in (1, 2, 3)
+        ]
+
+        assert [self.get_keys(result) for result, _ in pages] == [
+            expected_keys[:4],
+            expected_keys[4:8],
+            expected_keys[8:],
+        ]
+        assert all(total_count == 9 for _, total_count in pages)
+
+    def test_pages_grouped_by_date(self, seeded_db):
+        self.create_series(seeded_db)
+        filters = ArrangementFilters(staff_ids=[2], group_by_date=True)
+
+        result, total_count = crud.get_arrangements(
+            seeded_db, filters, PaginationConfig(items_per_page=3, page_num=1)
+        )
+
+        # The dates with only occurrences are paginated with the dates of the arrangements
+        assert total_count == 8
+        assert self.get_keys(result) == [(6, 11), (10, None), (17, None)]
+
+    def test_cursor_pages(self, seeded_db):
+        self.create_series(seeded_db)
+        filters = ArrangementFilters(staff_ids=[2], group_by_date=False)
+        pages = []
+        cursor = None
+        while True:
+            result, total_count = crud.get_arrangements(
+                seeded_db,
+                filters,
+                PaginationConfig(
+                    items_per_page=2, pagination_mode=PaginationMode.CURSOR, cursor=cursor
+                ),
+            )
+            pages.append(self.get_keys(result))
+            if len(result) < 2:
+                break
+            last = result[-1]
+            cursor = (
+                encode_cursor(last["wfh_date"], None, last["batch_id"])
+                if last["arrangement_id"] is None
+                else encode_cursor(last["wfh_date"], last["arrangement_id"])
+            )
+
+        assert total_count == 9
+        assert pages == [
+            [(1, 1), (2, 3)],
+            [(3, 5), (3, None)],
+            [(4, 7), (5, 9)],
+            [(6, 11), (10, None)],
+            [(17, None)],
+        ]
+
+    @pytest.mark.parametrize(
+        "cursor", [encode_cursor("2024-01-03", 1, 1), encode_cursor("2024-01-03", None, "1")]
+    )
+    def test_invalid_cursor(self, seeded_db, cursor):
+        with pytest.raises(InvalidCursorException):
+            crud.get_arrangements(
+                seeded_db,
+                filters=ArrangementFilters(group_by_date=False),
+                pagination=PaginationConfig(
+                    items_per_page=5, pagination_mode=PaginationMode.CURSOR, cursor=cursor
+                ),
+            )
+
+    def test_team_arrangements(self, seeded_db):
+        # Staff 2 and 3 are peers
+        self.create_series(seeded_db, requester_staff_id=3)
+
+        peer_arrangements, _ = crud.get_team_arrangements(
+            seeded_db, 2, ArrangementFilters(start_date=date(2024, 1, 6))
+        )
+        own_arrangements, _ = crud.get_team_arrangements(
+            seeded_db, 3, ArrangementFilters(start_date=date(2024, 1, 6))
+        )
+
+        assert self.get_keys(peer_arrangements) == [(6, 12), (10, None), (17, None)]
+        assert self.get_keys(own_arrangements) == [(6, 11)]
+
+    def test_stream(self, seeded_db):
+        self.create_series(seeded_db)
+        filters = ArrangementFilters(staff_ids=[2], start_date=date(2024, 1, 5))
+
+        rows = list(crud.stream_arrangements(seeded_db, filters))
+
+        assert self.get_keys(rows) == [(5, 9), (6, 11), (10, None), (17, None)]
+        assert rows[-1]["requester_info_staff_id"] == 2
+
+    @freezegun.freeze_time("2024-01-18")
+    def test_reject_expiring_occurrences(self, seeded_db):
+        self.create_series(seeded_db)
+        self.set_occurrence_status(seeded_db, 1, date(2024, 1, 10), ApprovalStatus.APPROVED)
+        occurrence_keys = crud.get_expiring_occurrences(seeded_db)
+
+        rejected = crud.reject_expiring_occurrences(seeded_db, occurrence_keys, "Expired")
+
+        assert occurrence_keys == [(1, date(2024, 1, 3)), (1, date(2024, 1, 17))]
+        assert [occurrence["wfh_date"].day for occurrence in rejected] == [3, 17]
+        assert all(occurrence["status_reason"] == "Expired" for occurrence in rejected)
+        assert [
+            (occurrence["wfh_date"].day, occurrence["current_approval_status"])
+            for occurrence in crud.get_series_occurrences(seeded_db, 1)
+        ] == [
+            (3, ApprovalStatus.REJECTED),
+            (10, ApprovalStatus.APPROVED),
+            (17, ApprovalStatus.REJECTED),
+        ]
+        assert crud.get_expiring_occurrences(seeded_db) == []
+
+    @freezegun.freeze_time("2024-01-18")
+    def test_reject_expiring_occurrences_skips_changed_occurrences(self, seeded_db):
+        self.create_series(seeded_db)
+        occurrence_keys = crud.get_expiring_occurrences(seeded_db)
+        self.set_occurrence_status(seeded_db, 1, date(2024, 1, 3), ApprovalStatus.APPROVED)
+
+        rejected = crud.reject_expiring_occurrences(seeded_db, occurrence_keys, "Expired")
+
+        assert [occurrence["wfh_date"].day for occurrence in rejected] == [10, 17]
+        assert (
+            crud.get_series_occurrences(seeded_db, 1, date(2024, 1, 3))[0][
+                "current_approval_status"
+            ]
+            == ApprovalStatus.APPROVED
+        )
+
+    @pytest.mark.asyncio
+    @freezegun.freeze_time("2024-02-01")
+    @patch("src.arrangements.services.craft_and_send_digest_emails")
+    async def test_auto_reject_old_requests(self, mock_send, seeded_db):
+        crud.create_recurring_series(
+            seeded_db,
+            CreateArrangementRequest(
+                update_datetime=datetime(2023, 12, 2),
+                requester_staff_id=2,
+                wfh_date=date(2024, 1, 3),
+                wfh_type=WfhType.AM,
+                is_recurring=True,
+                recurring_frequency_number=1,
+                recurring_frequency_unit=RecurringFrequencyUnit.WEEKLY,
+                recurring_occurrences=4,
+                current_approval_status=ApprovalStatus.PENDING_APPROVAL,
+                approving_officer=1,
+                reason_description="Weekly class",
+                is_series=True,
+            ),
+        )
+
+        report = await services.auto_reject_old_requests(seeded_db)
+
+        # The 12 arrangements and the 4 occurrences
+        assert (report.total_count, report.processed_count, report.failed_count) == (16, 16, 0)
+        occurrences, _ = crud.get_arrangements(
+            seeded_db, ArrangementFilters(staff_ids=[2], start_date=date(2024, 1, 7))
+        )
+        assert [
+            (occurrence["current_approval_status"], occurrence["status_reason"])
+            for occurrence in occurrences
+        ] == [(ApprovalStatus.REJECTED, services.AUTO_REJECT_STATUS_REASON)] * 3
+        assert mock_send.call_count == 2
+
+    def test_version_changes_with_exceptions(self, seeded_db):
+        self.create_series(seeded_db)
+        filters = ArrangementFilters(staff_ids=[2])
+        version = crud.get_arrangements_version(seeded_db, filters)
+
+        self.set_occurrence_status(seeded_db, 1, date(2024, 1, 10), ApprovalStatus.CANCELLED)
+
+        assert version[3:] == (datetime(2023, 12, 2), 1, None, 0)
+        assert crud.get_arrangements_version(seeded_db, filters)[3:] == (
+            datetime(2023, 12, 2),
+            1,
+            datetime(2023, 12, 3),
+            1,
+        )
+
+
 class TestUpdateArrangementApprovalStatus:
     def test_update_approval_status_success(self, mock_db_session, mock_latest_arrangement):
         # Set up mock chain
@@ -511,6 +1816,7 @@ class TestUpdateArrangementApprovalStatus:
         mock_filter = mock_query.filter.return_value
         mock_filter.update.return_value = None
         mock_query.get.return_value = mock_latest_arrangement
+        mock_db_session.get.return_value = mock_latest_arrangement
 
         arrangement_response = ArrangementResponse(
             arrangement_id=1,
@@ -606,6 +1912,77 @@ class TestCreateArrangements:
         assert result[0].requester_staff_id == 100
         assert result[0].reason_description == "Test"
 
+    @staticmethod
+    def make_requests(num_occurrences: int, **kwargs) -> List[CreateArrangementRequest]:
+        return [
+            CreateArrangementRequest(
+                update_datetime=datetime(2023, 12, 1),
+                requester_staff_id=2,
+                wfh_date=date(2024, 1, 1) + timedelta(weeks=week),
+                wfh_type=WfhType.PM,
+                is_recurring=num_occurrences > 1,
+                recurring_frequency_number=1 if num_occurrences > 1 else None,
+                recurring_frequency_unit=None,
+                recurring_occurrences=num_occurrences if num_occurrences > 1 else None,
+                current_approval_status=ApprovalStatus.PENDING_APPROVAL,
+                approving_officer=1,
+                reason_description="Recurring",
+                **kwargs,
+            )
+            for week in range(num_occurrences)
+        ]
+
+    def test_create_arrangements_links_latest_logs(self, seeded_db):
+        result = crud.create_arrangements(seeded_db, self.make_requests(3))
+
+        logs = {log.arrangement_id: log for log in seeded_db.query(models.ArrangementLog)}
+        assert len(logs) == 3
+        assert all(
+            arrangement.latest_log_id == logs[arrangement.arrangement_id].log_id
+            and arrangement.wfh_date == logs[arrangement.arrangement_id].wfh_date
+            for arrangement in result
+        )
+        assert [arrangement.wfh_date for arrangement in result] == [
+            date(2024, 1, 1),
+            date(2024, 1, 8),
+            date(2024, 1, 15),
+        ]
+        assert all(log.action == Action.CREATE for log in logs.values())
+        assert all(
+            log.updated_approval_status == ApprovalStatus.PENDING_APPROVAL for log in logs.values()
+        )
+
+    def test_number_of_statements_is_independent_of_occurrences(self, seeded_db):
+        statement_counts = []
+        for num_occurrences in [1, 52]:
+            with count_queries(seeded_db.get_bind()) as statements:
+                crud.create_arrangements(
+                    seeded_db,
+                    self.make_requests(num_occurrences, batch_id=num_occurrences),
+                )
+            statement_counts.append(len(statements))
+
+        assert statement_counts[0] == statement_counts[1]
+        assert seeded_db.query(models.ArrangementLog).count() == 53
+
+    def test_create_approved_arrangements_adjusts_rollup_once_per_day(self, seeded_db):
+        requests = self.make_requests(2, batch_id=1) + self.make_requests(1, batch_id=2)
+        for request in requests:
+            request.current_approval_status = ApprovalStatus.APPROVED
+
+        crud.create_arrangements(seeded_db, requests)
+
+        rollups = seeded_db.query(models.DailyWfhRollup).order_by(models.DailyWfhRollup.wfh_date)
+        assert [(rollup.wfh_date, rollup.count) for rollup in rollups] == [
+            (date(2024, 1, 1), 2),
+            (date(2024, 1, 8), 1),
+        ]
+
+    def test_create_no_arrangements(self, mock_db_session):
+        assert crud.create_arrangements(mock_db_session, []) == []
+
+        mock_db_session.commit.assert_not_called()
+
     def test_create_arrangements_error(self, mock_db_session):
         arrangements = [
             CreateArrangementRequest(
@@ -623,9 +2000,152 @@ class TestCreateArrangements:
             )
         ]
 
-        mock_db_session.add.side_effect = SQLAlchemyError()
+        mock_db_session.execute.side_effect = SQLAlchemyError()
 
         with pytest.raises(SQLAlchemyError):
             crud.create_arrangements(mock_db_session, arrangements)
 
         mock_db_session.rollback.assert_called_once()
+
+
+class TestGetArrangementsByIds:
+    def test_by_ids(self, seeded_db):
+        result = crud.get_arrangements_by_ids(seeded_db, arrangement_ids=[3, 1, 99])
+
+        assert [arrangement["arrangement_id"] for arrangement in result] == [1, 3]
+
+    def test_by_batch_id(self, seeded_db):
+        seeded_db.query(LatestArrangement).filter(
+            LatestArrangement.arrangement_id.in_([2, 4])
+        ).update({LatestArrangement.batch_id: 7})
+        seeded_db.commit()
+
+        result = crud.get_arrangements_by_ids(seeded_db, batch_id=7)
+
+        assert [arrangement["arrangement_id"] for arrangement in result] == [2, 4]
+
+
+class TestUpdateArrangementsApprovalStatus:
+    @staticmethod
+    def make_updates(db, arrangement_ids, approval_status=ApprovalStatus.APPROVED):
+        updates = []
+        for arrangement_id in arrangement_ids:
+            arrangement = db.get(LatestArrangement, arrangement_id)
+            arrangement_data = ArrangementResponse.from_dict(
+                {
+                    **arrangement.__dict__,
+                    "current_approval_status": approval_status,
+                    "status_reason": "Bulk",
+                }
+            )
+            updates.append((arrangement_data, arrangement.current_approval_status))
+        return updates
+
+    def test_updates_arrangements_and_links_latest_logs(self, seeded_db):
+        result = crud.update_arrangements_approval_status(
+            seeded_db, self.make_updates(seeded_db, [1, 3]), Action.APPROVE
+        )
+
+        logs = {log.arrangement_id: log for log in seeded_db.query(models.ArrangementLog)}
+        assert [arrangement["arrangement_id"] for arrangement in result] == [1, 3]
+        assert all(
+            arrangement["current_approval_status"] == ApprovalStatus.APPROVED
+            and arrangement["status_reason"] == "Bulk"
+            and arrangement["latest_log_id"] == logs[arrangement["arrangement_id"]].log_id
+            and arrangement["requester_info"] is not None
+            for arrangement in result
+        )
+        assert all(
+            (
+                log.action,
+                log.previous_approval_status,
+                log.updated_approval_status,
+                log.status_reason,
+            )
+            == (Action.APPROVE, ApprovalStatus.PENDING_APPROVAL, ApprovalStatus.APPROVED, "Bulk")
+            for log in logs.values()
+        )
+        assert (
+            seeded_db.get(LatestArrangement, 2).current_approval_status
+            == ApprovalStatus.PENDING_APPROVAL
+        )
+
+    def test_adjusts_rollup(self, seeded_db):
+        # Arrangements 1 and 2 are on 1 Jan, and arrangement 3 on 2 Jan
+        crud.update_arrangements_approval_status(
+            seeded_db, self.make_updates(seeded_db, [1, 2, 3]), Action.APPROVE
+        )
+        assert TestDailyWfhRollup.get_rollup(seeded_db) == [
+            (date(2024, 1, 1), "IT", "full", 2),
+            (date(2024, 1, 2), "IT", "full", 1),
+        ]
+
+        crud.update_arrangements_approval_status(
+            seeded_db,
+            self.make_updates(seeded_db, [1, 3], ApprovalStatus.PENDING_WITHDRAWAL),
+            Action.WITHDRAW,
+        )
+        assert TestDailyWfhRollup.get_rollup(seeded_db) == [(date(2024, 1, 1), "IT", "full", 1)]
+
+    def test_skips_arrangements_changed_since_read(self, seeded_db):
+        updates = self.make_updates(seeded_db, [1, 2])
+        seeded_db.get(LatestArrangement, 2).current_approval_status = ApprovalStatus.CANCELLED
+        seeded_db.commit()
+
+        result = crud.update_arrangements_approval_status(seeded_db, updates, Action.APPROVE)
+
+        assert [arrangement["arrangement_id"] for arrangement in result] == [1]
+        assert (
+            seeded_db.get(LatestArrangement, 2).current_approval_status == ApprovalStatus.CANCELLED
+        )
+        assert [log.arrangement_id for log in seeded_db.query(models.ArrangementLog)] == [1]
+        assert TestDailyWfhRollup.get_rollup(seeded_db) == [(date(2024, 1, 1), "IT", "full", 1)]
+
+    def test_no_arrangements_unchanged_since_read(self, seeded_db):
+        updates = self.make_updates(seeded_db, [1])
+        seeded_db.get(LatestArrangement, 1).current_approval_status = ApprovalStatus.CANCELLED
+        seeded_db.commit()
+
+        result = crud.update_arrangements_approval_status(seeded_db, updates, Action.APPROVE)
+
+        assert result == []
+        assert seeded_db.query(models.ArrangementLog).count() == 0
+
+    def test_logs_stored_approving_officer(self, seeded_db):
+        updates = [
+            (replace(arrangement_data, approving_officer=3), previous_approval_status)
+            for arrangement_data, previous_approval_status in self.make_updates(seeded_db, [1])
+        ]
+
+        crud.update_arrangements_approval_status(seeded_db, updates, Action.APPROVE)
+
+        assert seeded_db.query(models.ArrangementLog).one().approving_officer == 1
+        assert seeded_db.get(LatestArrangement, 1).approving_officer == 1
+
+    def test_number_of_statements_is_independent_of_arrangements(self, seeded_db):
+        statement_counts = []
+        for arrangement_ids in [[1], [2, 3, 4, 5, 6, 7, 8]]:
+            updates = self.make_updates(seeded_db, arrangement_ids)
+            with count_queries(seeded_db.get_bind()) as statements:
+                crud.update_arrangements_approval_status(seeded_db, updates, Action.APPROVE)
+            statement_counts.append(len(statements))
+
+        assert statement_counts[0] == statement_counts[1]
+
+    def test_no_updates(self, mock_db_session):
+        assert crud.update_arrangements_approval_status(mock_db_session, [], Action.APPROVE) == []
+
+        mock_db_session.commit.assert_not_called()
+
+    def test_error(self, seeded_db):
+        updates = self.make_updates(seeded_db, [1])
+
+        with patch.object(seeded_db, "commit", side_effect=SQLAlchemyError()):
+            with pytest.raises(SQLAlchemyError):
+                crud.update_arrangements_approval_status(seeded_db, updates, Action.APPROVE)
+
+        assert (
+            seeded_db.get(LatestArrangement, 1).current_approval_status
+            == ApprovalStatus.PENDING_APPROVAL
+        )
+        assert seeded_db.query(models.ArrangementLog).count() == 0
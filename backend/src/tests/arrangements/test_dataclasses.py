@@ -0,0 +1,84 @@
+from datetime import date, datetime
+from unittest.mock import patch
+
+import pytest
+from src.arrangements.commons import dataclasses as dc
+from src.arrangements.commons.enums import ApprovalStatus, WfhType
+
+
+@pytest.fixture
+def arrangement_dict():
+    return {
+        "arrangement_id": 1,
+        "update_datetime": "2024-01-01T09:00:00",
+        "requester_staff_id": 140002,
+        "wfh_date": "2024-01-02",
+        "wfh_type": WfhType.FULL,
+        "current_approval_status": ApprovalStatus.APPROVED,
+        "approving_officer": 140001,
+    }
+
+
+class TestFromDict:
+    def test_parses_iso_strings(self, arrangement_dict):
+        # Act
+        result = dc.ArrangementResponse.from_dict(arrangement_dict)
+
+        # Assert
+        assert result.update_datetime == datetime(2024, 1, 1, 9)
+        assert result.wfh_date == date(2024, 1, 2)
+
+    def test_parses_datetime_strings(self, arrangement_dict):
+        # Arrange
+        arrangement_dict["wfh_date"] = "2024-01-02 00:00:00"
+
+        # Act
+        result = dc.ArrangementResponse.from_dict(arrangement_dict)
+
+        # Assert
+        assert result.wfh_date == date(2024, 1, 2)
+
+    def test_keeps_native_values(self, arrangement_dict):
+        # Arrange
+        arrangement_dict["update_datetime"] = datetime(2024, 1, 1, 9)
+        arrangement_dict["wfh_date"] = date(2024, 1, 2)
+
+        # Act
+        result = dc.ArrangementResponse.from_dict(arrangement_dict)
+
+        # Assert
+        assert result.update_datetime == datetime(2024, 1, 1, 9)
+        assert result.wfh_date == date(2024, 1, 2)
+
+    def test_ignores_unknown_keys(self, arrangement_dict):
+        # Arrange
+        arrangement_dict["unknown"] = "value"
+
+        # Act
+        result = dc.ArrangementResponse.from_dict(arrangement_dict)
+
+        # Assert
+        assert not hasattr(result, "unknown")
+
+    def test_does_not_coerce_optional_dates(self):
+        # Act
+        result = dc.ArrangementFilters.from_dict({"start_date": "2024-01-02"})
+
+        # Assert
+        assert result.start_date == "2024-01-02"
+
+    def test_inspects_each_class_once(self, arrangement_dict):
+        # Arrange
+        dc._get_field_parsers.cache_clear()
+
+        # Act
+        with patch(
+            "src.arrangements.commons.dataclasses.inspect.signature",
+            wraps=dc.inspect.signature,
+        ) as mock_signature:
+            dc.ArrangementResponse.from_dict(arrangement_dict)
+            dc.ArrangementResponse.from_dict(arrangement_dict)
+            dc.ArrangementFilters.from_dict({})
+
+        # Assert
+        assert mock_signature.call_count == 2
@@ -1,4 +1,4 @@
-from datetime import datetime
+from datetime import date, datetime
 from zoneinfo import ZoneInfo
 
 import pytest
@@ -127,7 +127,7 @@ def create_test_arrangement(db_session, employee, approver=None, **kwargs):
     default_values = {
         "update_datetime": datetime.now(singapore_timezone),
         "requester_staff_id": employee.staff_id,
-        "wfh_date": "2024-11-05",
+        "wfh_date": date(2024, 11, 5),
         "wfh_type": WfhType.FULL,
         "current_approval_status": ApprovalStatus.PENDING_APPROVAL,
         "approving_officer": approver.staff_id if approver else None,
@@ -184,7 +184,7 @@ class TestArrangementLog:
             update_datetime=datetime.now(singapore_timezone),
             arrangement_id=1,
             requester_staff_id=100,
-            wfh_date="2024-11-05",
+            wfh_date=date(2024, 11, 5),
             wfh_type=WfhType.FULL,
             action=Action.CREATE,
             updated_approval_status=ApprovalStatus.PENDING_APPROVAL,
@@ -200,7 +200,7 @@ class TestArrangementLog:
         """Test that required fields raise appropriate errors when missing."""
         log = ArrangementLog(
             # Missing required fields
-            wfh_date="2024-11-05",
+            wfh_date=date(2024, 11, 5),
         )
         with pytest.raises(IntegrityError):
             db_session.add(log)
@@ -227,7 +227,7 @@ class TestArrangementLog:
             update_datetime=datetime.now(singapore_timezone),
             arrangement_id=1,
             requester_staff_id=employee.staff_id,
-            wfh_date="2024-11-05",
+            wfh_date=date(2024, 11, 5),
             wfh_type=WfhType.FULL,
             action=Action.CREATE,
             updated_approval_status=ApprovalStatus.PENDING_APPROVAL,
@@ -245,7 +245,7 @@ class TestLatestArrangement:
         arrangement = LatestArrangement(
             update_datetime=datetime.now(singapore_timezone),
             requester_staff_id=100,
-            wfh_date="2024-11-05",
+            wfh_date=date(2024, 11, 5),
             wfh_type=WfhType.FULL,
             current_approval_status=ApprovalStatus.PENDING_APPROVAL,
         )
@@ -263,7 +263,7 @@ class TestLatestArrangement:
         arrangement = LatestArrangement(
             update_datetime=datetime.now(singapore_timezone),
             requester_staff_id=test_employee.staff_id,
-            wfh_date="2024-11-05",
+            wfh_date=date(2024, 11, 5),
             wfh_type=WfhType.FULL,
             current_approval_status=ApprovalStatus.PENDING_APPROVAL,
             approving_officer=test_approver.staff_id,
@@ -351,7 +351,7 @@ class TestIntegration:
         arrangement = LatestArrangement(
             update_datetime=datetime.now(singapore_timezone),
             requester_staff_id=100,
-            wfh_date="2024-11-05",
+            wfh_date=date(2024, 11, 5),
             wfh_type=WfhType.FULL,
             current_approval_status=ApprovalStatus.PENDING_APPROVAL,
             batch_id=recurring_request.batch_id,
@@ -364,7 +364,7 @@ class TestIntegration:
             update_datetime=datetime.now(singapore_timezone),
             arrangement_id=arrangement.arrangement_id,
             requester_staff_id=100,
-            wfh_date="2024-11-05",
+            wfh_date=date(2024, 11, 5),
             wfh_type=WfhType.FULL,
             action=Action.CREATE,
             updated_approval_status=ApprovalStatus.PENDING_APPROVAL,
@@ -1,20 +1,42 @@
+import json
+from datetime import date, datetime
 from unittest.mock import MagicMock, patch
 
 import pytest
+from fastapi import FastAPI
 from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
 from src.app import app
+from src.arrangements import services
 from src.arrangements.commons import dataclasses as dc
-from src.arrangements.commons.enums import Action, ApprovalStatus
+from src.arrangements.commons import models
+from src.arrangements.commons.enums import (
+    Action,
+    ApprovalStatus,
+    PaginationMode,
+    SubordinatesScope,
+    WfhType,
+)
 from src.arrangements.commons.exceptions import (
     ArrangementActionNotAllowedException,
     ArrangementNotFoundException,
+    BatchNotFoundException,
+    InvalidCursorException,
     S3UploadFailedException,
+    SeriesBatchNotSupportedException,
 )
+from src.arrangements.routes import _jsend_json_response
+from src.arrangements.s3_signer import S3Signer
+from src.database import get_db
 from src.employees.exceptions import (
     EmployeeNotFoundException,
     ManagerWithIDNotFoundException,
 )
+from src.employees.models import Employee
 from src.notifications.exceptions import EmailNotificationException
+from src.schemas import JSendResponse, PaginationMeta
 from src.tests.test_utils import mock_db_session  # noqa: F401, E261
 
 client = TestClient(app)
@@ -77,13 +99,11 @@ def mock_supporting_docs():
         file.close()
 
 
-@patch("src.arrangements.services.get_all_arrangements")
+@patch("src.arrangements.services.get_all_arrangements_json")
 @patch("src.arrangements.commons.dataclasses.ArrangementFilters.from_dict")
 class TestGetArrangements:
-    @patch("src.arrangements.routes.format_arrangements_response")
     def test_success(
         self,
-        mock_format_response,
         mock_filters_from_dict,
         mock_get_arrangements,
         mock_filter_params,
@@ -91,8 +111,7 @@ class TestGetArrangements:
     ):
         # Arrange
         mock_filters_from_dict.return_value = MagicMock(spec=dc.ArrangementFilters)
-        mock_get_arrangements.return_value = [MagicMock(spec=dc.ArrangementResponse)] * 2
-        mock_format_response.return_value = []
+        mock_get_arrangements.return_value = [{"arrangement_id": 1}, {"arrangement_id": 2}]
 
         # Act
         response = client.get(
@@ -104,6 +123,31 @@ class TestGetArrangements:
         assert response.status_code == 200
         assert "data" in response.json()
 
+    @pytest.mark.parametrize(
+        ("params", "headers"),
+        [({"stream": True}, {}), ({}, {"Accept": "application/x-ndjson"})],
+    )
+    @patch("src.arrangements.services.stream_all_arrangements")
+    def test_stream(
+        self,
+        mock_stream_arrangements,
+        mock_filters_from_dict,
+        mock_get_arrangements,
+        params,
+        headers,
+    ):
+        # Arrange
+        mock_stream_arrangements.return_value = iter([{"arrangement_id": 1}, {"arrangement_id": 2}])
+
+        # Act
+        response = client.get("/arrangements", params=params, headers=headers)
+
+        # Assert
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+        assert response.text == '{"arrangement_id":1}\n{"arrangement_id":2}\n'
+        mock_get_arrangements.assert_not_called()
+
     def test_failure_unknown(self, mock_filters_from_dict, mock_get_arrangements):
         # Arrange
         mock_filters_from_dict.return_value = MagicMock(spec=dc.ArrangementFilters)
@@ -116,6 +160,52 @@ class TestGetArrangements:
         assert response.status_code == 500
 
 
+@patch("src.arrangements.services.get_arrangement_stats")
+class TestGetArrangementStats:
+    def test_success(self, mock_get_stats):
+        # Arrange
+        mock_get_stats.return_value = dc.ArrangementStats(
+            start_date=date(2024, 1, 1),
+            end_date=date(2024, 1, 1),
+            headcount=5,
+            departments=[dc.DepartmentStats(department="IT", headcount=5)],
+            days=[dc.DailyStats(wfh_date=date(2024, 1, 1), on_leave=1)],
+        )
+
+        # Act
+        result = client.get(
+            "/arrangements/stats", params={"start_date": "2024-01-01", "department": "IT"}
+        )
+
+        # Assert
+        assert result.status_code == 200
+        data = result.json()["data"]
+        assert data["headcount"] == 5
+        assert data["departments"][0]["department"] == "IT"
+        assert data["days"][0] == {
+            "wfh_counts": {"am": 0, "pm": 0, "full": 0},
+            "on_leave": 1,
+            "wfh_date": "2024-01-01",
+        }
+        _, filters = mock_get_stats.call_args.args
+        assert filters == dc.ArrangementStatsFilters(
+            start_date=date(2024, 1, 1),
+            end_date=date(2024, 1, 1),
+            department="IT",
+            current_approval_status=[ApprovalStatus.APPROVED],
+        )
+
+    def test_failure_unknown(self, mock_get_stats):
+        # Arrange
+        mock_get_stats.side_effect = Exception()
+
+        # Act
+        result = client.get("/arrangements/stats")
+
+        # Assert
+        assert result.status_code == 500
+
+
 @patch("src.arrangements.services.get_arrangement_by_id")
 class TestGetArrangementById:
     @patch("src.arrangements.routes.format_arrangement_response")
@@ -155,12 +245,12 @@ class TestGetArrangementById:
         assert response.status_code == 500
 
 
-@patch("src.arrangements.services.get_personal_arrangements")
+@patch("src.arrangements.services.get_personal_arrangements_json")
 class TestGetPersonalArrangements:
-    @patch("src.arrangements.routes.format_arrangements_response")
-    def test_success(self, mock_format_response, mock_get_personal_arrangements):
+    def test_success(self, mock_get_personal_arrangements):
         # Arrange
         staff_id = 1
+        mock_get_personal_arrangements.return_value = [{"arrangement_id": 1}]
 
         # Act
         response = client.get(
@@ -186,16 +276,13 @@ class TestGetPersonalArrangements:
         assert response.status_code == 500
 
 
-@patch("src.arrangements.services.get_subordinates_arrangements")
+@patch("src.arrangements.services.get_subordinates_arrangements_json")
 @patch("src.arrangements.commons.dataclasses.PaginationConfig.from_dict")
 @patch("src.arrangements.commons.dataclasses.ArrangementFilters.from_dict")
+@patch("src.arrangements.services.get_subordinates_arrangements_version", new=MagicMock())
 class TestGetSubordinatesArrangements:
-    @patch("src.arrangements.routes.PaginationMeta.model_validate")
-    @patch("src.arrangements.routes.format_arrangements_response")
     def test_success(
         self,
-        mock_format_response,
-        mock_pagination_validate,
         mock_filters_from_dict,
         mock_pagination_from_dict,
         mock_get_subordinates_arrangements,
@@ -204,12 +291,12 @@ class TestGetSubordinatesArrangements:
     ):
         # Arrange
         manager_id = 1
-        mock_pagination_meta_dc = MagicMock(spec=dc.PaginationMeta)
-        mock_pagination_meta_dc.total_count = 1
+        pagination_meta = dc.PaginationMeta(total_count=2, page_size=10, page_num=1, total_pages=1)
 
         mock_get_subordinates_arrangements.return_value = [
-            [MagicMock(spec=dc.ArrangementResponse)] * 2
-        ], mock_pagination_meta_dc
+            {"arrangement_id": 1},
+            {"arrangement_id": 2},
+        ], pagination_meta
 
         # Act
         response = client.get(
@@ -254,17 +341,49 @@ class TestGetSubordinatesArrangements:
         # Assert
         assert response.status_code == 500
 
+    def test_subtree_scope(
+        self,
+        mock_filters_from_dict,
+        mock_pagination_from_dict,
+        mock_get_subordinates_arrangements,
+    ):
+        # Arrange
+        pagination_meta = dc.PaginationMeta(total_count=0, page_size=10, page_num=1, total_pages=0)
+        mock_get_subordinates_arrangements.return_value = [], pagination_meta
+
+        # Act
+        response = client.get(
+            "/arrangements/subordinates/1", params={"scope": "subtree", "depth": 2}
+        )
+
+        # Assert
+        assert response.status_code == 200
+        filters_dict = mock_filters_from_dict.call_args.args[0]
+        assert filters_dict["scope"] == SubordinatesScope.SUBTREE
+        assert filters_dict["depth"] == 2
 
-@patch("src.arrangements.services.get_team_arrangements")
+    def test_invalid_depth(
+        self,
+        mock_filters_from_dict,
+        mock_pagination_from_dict,
+        mock_get_subordinates_arrangements,
+    ):
+        # Act
+        response = client.get(
+            "/arrangements/subordinates/1", params={"scope": "subtree", "depth": 0}
+        )
+
+        # Assert
+        assert response.status_code == 422
+
+
+@patch("src.arrangements.services.get_team_arrangements_json")
 @patch("src.arrangements.commons.dataclasses.PaginationConfig.from_dict")
 @patch("src.arrangements.commons.dataclasses.ArrangementFilters.from_dict")
+@patch("src.arrangements.services.get_team_arrangements_version", new=MagicMock())
 class TestGetTeamArrangements:
-    @patch("src.arrangements.routes.PaginationMeta.model_validate")
-    @patch("src.arrangements.routes.format_arrangements_response")
     def test_success(
         self,
-        mock_format_response,
-        mock_pagination_validate,
         mock_filters_from_dict,
         mock_pagination_from_dict,
         mock_get_team_arrangements,
@@ -273,12 +392,12 @@ class TestGetTeamArrangements:
     ):
         # Arrange
         staff_id = 1
-        mock_pagination_meta_dc = MagicMock(spec=dc.PaginationMeta)
-        mock_pagination_meta_dc.total_count = 1
+        pagination_meta = dc.PaginationMeta(total_count=2, page_size=10, page_num=1, total_pages=1)
 
         mock_get_team_arrangements.return_value = [
-            [MagicMock(spec=dc.ArrangementResponse)] * 2
-        ], mock_pagination_meta_dc
+            {"arrangement_id": 1},
+            {"arrangement_id": 2},
+        ], pagination_meta
 
         # Act
         response = client.get(
@@ -291,6 +410,25 @@ class TestGetTeamArrangements:
         assert "data" in response.json()
         assert "pagination_meta" in response.json()
 
+    def test_failure_invalid_cursor(
+        self,
+        mock_filters_from_dict,
+        mock_pagination_from_dict,
+        mock_get_team_arrangements,
+    ):
+        # Arrange
+        staff_id = 1
+        mock_get_team_arrangements.side_effect = InvalidCursorException("abc")
+
+        # Act
+        response = client.get(
+            f"/arrangements/team/{staff_id}",
+            params={"pagination_mode": "cursor", "cursor": "abc"},
+        )
+
+        # Assert
+        assert response.status_code == 400
+
     def test_failure_unknown(
         self,
         mock_get_team_arrangements,
@@ -308,13 +446,389 @@ class TestGetTeamArrangements:
         assert response.status_code == 500
 
 
+@pytest.fixture
+def arrangements_db():
+    # Share one connection so that routes running in another thread see the same database
+    engine = create_engine(
+        "sqlite:///:memory:", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    models.Base.metadata.create_all(engine)
+    db = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+
+    db.add_all(
+        [
+            Employee(
+                staff_id=staff_id,
+                staff_fname=fname,
+                staff_lname="Tan",
+                dept="Engineering",
+                position="Staff",
+                country="Singapore",
+                email=f"staff{staff_id}@example.com",
+                reporting_manager=reporting_manager,
+                role=2,
+            )
+            for staff_id, fname, reporting_manager in [
+                (1, "Zoë", None),
+                (2, "Ming", 1),
+                (3, "José", 1),
+            ]
+        ]
+    )
+    db.flush()
+    db.add_all(
+        [
+            models.LatestArrangement(
+                update_datetime=datetime(2024, 1, 1, 9, 30, 15, 123456),
+                requester_staff_id=2,
+                wfh_date=date(2024, 1, 2),
+                wfh_type=WfhType.AM,
+                current_approval_status=ApprovalStatus.APPROVED,
+                approving_officer=1,
+                reason_description='Doctor\'s "appointment" 看医生',
+                batch_id=1,
+                latest_log_id=1,
+                supporting_doc_1="2/2024-01-01T09:30:15/mc.pdf",
+                supporting_doc_2="2/2024-01-01T09:30:15/receipt.png",
+                status_reason="Approved ✓",
+            ),
+            models.LatestArrangement(
+                update_datetime=datetime(2024, 1, 3),
+                requester_staff_id=3,
+                wfh_date=date(2024, 1, 2),
+                wfh_type=WfhType.FULL,
+                current_approval_status=ApprovalStatus.PENDING_APPROVAL,
+                approving_officer=1,
+                delegate_approving_officer=2,
+                latest_log_id=2,
+            ),
+            models.LatestArrangement(
+                update_datetime=datetime(2024, 1, 4),
+                requester_staff_id=3,
+                wfh_date=date(2024, 1, 5),
+                wfh_type=WfhType.PM,
+                current_approval_status=ApprovalStatus.REJECTED,
+                approving_officer=1,
+                latest_log_id=3,
+            ),
+            models.ArrangementLog(
+                update_datetime=datetime(2024, 1, 1, 9, 30, 15, 123456),
+                arrangement_id=1,
+                requester_staff_id=2,
+                wfh_date=date(2024, 1, 2),
+                wfh_type=WfhType.AM,
+                action=Action.CREATE,
+                updated_approval_status=ApprovalStatus.PENDING_APPROVAL,
+                approving_officer=1,
+                reason_description='Doctor\'s "appointment" 看医生',
+                supporting_doc_1="2/2024-01-01T09:30:15/mc.pdf",
+            ),
+            models.ArrangementLog(
+                update_datetime=datetime(2024, 1, 2),
+                arrangement_id=1,
+                requester_staff_id=2,
+                wfh_date=date(2024, 1, 2),
+                wfh_type=WfhType.AM,
+                action=Action.APPROVE,
+                previous_approval_status=ApprovalStatus.PENDING_APPROVAL,
+                updated_approval_status=ApprovalStatus.APPROVED,
+                approving_officer=1,
+                batch_id=1,
+            ),
+        ]
+    )
+    db.commit()
+
+    yield db
+    db.close()
+    models.Base.metadata.drop_all(engine)
+
+
+REQUESTER_INFO_JSON = {
+    staff_id: (
+        f'{{"staff_id":{staff_id},"staff_fname":"{fname}","staff_lname":"Tan","dept":"Engineering",'
+        f'"position":"Staff","country":"Singapore","email":"staff{staff_id}@example.com",'
+        f'"reporting_manager":1,"role":2}}'
+    )
+    for staff_id, fname in [(2, "Ming"), (3, "José")]
+}
+
+
+def presigned_url(key: str) -> str:
+    return f"https://bucket.s3.amazonaws.com/{key}?X-Amz-Expires=3600"
+
+
+def get_arrangement_json(arrangement_id: int, presigned: bool = True) -> str:
+    """The JSON of an arrangement of `arrangements_db`, as serialized by the response model."""
+    if arrangement_id == 1:
+        doc_1 = "2/2024-01-01T09:30:15/mc.pdf"
+        doc_2 = "2/2024-01-01T09:30:15/receipt.png"
+        if presigned:
+            doc_1, doc_2 = presigned_url(doc_1), presigned_url(doc_2)
+        return (
+            '{"arrangement_id":1,"update_datetime":"2024-01-01T09:30:15.123456",'
+            '"requester_staff_id":2,"wfh_date":"2024-01-02","wfh_type":"am",'
+            '"current_approval_status":"approved","approving_officer":1,'
+            '"delegate_approving_officer":null,'
+            '"reason_description":"Doctor\'s \\"appointment\\" 看医生","batch_id":1,'
+            f'"latest_log_id":1,"supporting_doc_1":"{doc_1}","supporting_doc_2":"{doc_2}",'
+            '"supporting_doc_3":null,"status_reason":"Approved ✓",'
+            f'"requester_info":{REQUESTER_INFO_JSON[2]}}}'
+        )
+    if arrangement_id == 2:
+        return (
+            '{"arrangement_id":2,"update_datetime":"2024-01-03T00:00:00","requester_staff_id":3,'
+            '"wfh_date":"2024-01-02","wfh_type":"full",'
+            '"current_approval_status":"pending approval","approving_officer":1,'
+            '"delegate_approving_officer":2,"reason_description":null,"batch_id":null,'
+            '"latest_log_id":2,"supporting_doc_1":null,"supporting_doc_2":null,'
+            '"supporting_doc_3":null,"status_reason":null,'
+            f'"requester_info":{REQUESTER_INFO_JSON[3]}}}'
+        )
+    return (
+        '{"arrangement_id":3,"update_datetime":"2024-01-04T00:00:00","requester_staff_id":3,'
+        '"wfh_date":"2024-01-05","wfh_type":"pm","current_approval_status":"rejected",'
+        '"approving_officer":1,"delegate_approving_officer":null,"reason_description":null,'
+        '"batch_id":null,"latest_log_id":3,"supporting_doc_1":null,"supporting_doc_2":null,'
+        '"supporting_doc_3":null,"status_reason":null,'
+        f'"requester_info":{REQUESTER_INFO_JSON[3]}}}'
+    )
+
+
+def get_jsend_json(data: str, pagination_meta: str = "null") -> bytes:
+    return (
+        f'{{"status":"success","data":{data},"pagination_meta":{pagination_meta},' '"message":null}'
+    ).encode()
+
+
+class TestArrangementsJsonFastPath:
+    """The list endpoints serialize rows straight to JSON, which must match the response model."""
+
+    @staticmethod
+    def get_content(response_fn) -> bytes:
+        test_app = FastAPI()
+
+        @test_app.get("/")
+        def route() -> JSendResponse:
+            return response_fn()
+
+        return TestClient(test_app).get("/").content
+
+    @pytest.fixture(autouse=True)
+    def mock_signer(self):
+        s3_client = MagicMock()
+        s3_client.generate_presigned_url.side_effect = lambda _, Params, ExpiresIn: (
+            f"https://bucket.s3.amazonaws.com/{Params['Key']}?X-Amz-Expires={ExpiresIn}"
+        )
+        with patch(
+            "src.arrangements.utils.get_signer",
+            return_value=S3Signer(s3_client=s3_client, bucket_name="bucket"),
+        ):
+            yield
+
+    @pytest.mark.parametrize(
+        ("staff_id", "arrangement_ids"),
+        [(1, []), (2, [1]), (3, [2, 3])],
+    )
+    def test_personal_arrangements(self, arrangements_db, staff_id, arrangement_ids):
+        # Arrange
+        json_data = services.get_personal_arrangements_json(
+            arrangements_db, staff_id, dc.ArrangementFilters(group_by_date=False)
+        )
+
+        # Act
+        result = self.get_content(lambda: _jsend_json_response(json_data))
+
+        # Assert
+        data = ",".join(get_arrangement_json(arrangement_id) for arrangement_id in arrangement_ids)
+        assert result == get_jsend_json(f"[{data}]")
+
+    def test_all_arrangements(self, arrangements_db):
+        # Arrange
+        json_data = services.get_all_arrangements_json(
+            arrangements_db, dc.ArrangementFilters(group_by_date=False)
+        )
+
+        # Act
+        result = self.get_content(lambda: _jsend_json_response(json_data))
+
+        # Assert
+        data = ",".join(
+            get_arrangement_json(arrangement_id, presigned=False) for arrangement_id in [1, 2, 3]
+        )
+        assert result == get_jsend_json(f"[{data}]")
+
+    @pytest.mark.parametrize("group_by_date", [True, False])
+    @pytest.mark.parametrize(
+        ("pagination", "pagination_meta", "has_data"),
+        [
+            (
+                dc.PaginationConfig(items_per_page=2, page_num=1),
+                '{"total_count":2,"page_size":2,"page_num":1,"total_pages":1,"next_cursor":null}',
+                True,
+            ),
+            (
+                dc.PaginationConfig(items_per_page=2, page_num=5),
+                '{"total_count":2,"page_size":2,"page_num":5,"total_pages":1,"next_cursor":null}',
+                False,
+            ),
+            (
+                dc.PaginationConfig(items_per_page=2, pagination_mode=PaginationMode.CURSOR),
+                '{"total_count":2,"page_size":2,"page_num":null,"total_pages":1,'
+                '"next_cursor":"WyIyMDI0LTAxLTA1IiwgM10="}',
+                True,
+            ),
+        ],
+    )
+    @pytest.mark.parametrize(
+        ("get_arrangements_json", "staff_id", "arrangement_id_on_2024_01_02"),
+        [
+            (services.get_subordinates_arrangements_json, 1, 1),
+            (services.get_team_arrangements_json, 2, 2),
+        ],
+    )
+    def test_paginated_arrangements(
+        self,
+        arrangements_db,
+        get_arrangements_json,
+        staff_id,
+        arrangement_id_on_2024_01_02,
+        pagination,
+        pagination_meta,
+        has_data,
+        group_by_date,
+    ):
+        # Arrange
+        json_data, json_meta = get_arrangements_json(
+            arrangements_db,
+            staff_id,
+            dc.ArrangementFilters(group_by_date=group_by_date),
+            pagination,
+        )
+
+        # Act
+        result = self.get_content(
+            lambda: _jsend_json_response(json_data, PaginationMeta.model_validate(json_meta))
+        )
+
+        # Assert
+        arrangement_on_2024_01_02 = get_arrangement_json(arrangement_id_on_2024_01_02)
+        arrangement_on_2024_01_05 = get_arrangement_json(3)
+        if not has_data:
+            data = "[]"
+        elif group_by_date:
+            data = (
+                f'[{{"date":"2024-01-05","pending_arrangements":[{arrangement_on_2024_01_05}]}},'
+                f'{{"date":"2024-01-02","pending_arrangements":[{arrangement_on_2024_01_02}]}}]'
+            )
+        else:
+            data = f"[{arrangement_on_2024_01_02},{arrangement_on_2024_01_05}]"
+        assert result == get_jsend_json(data, pagination_meta)
+
+
+class TestStreaming:
+    @pytest.fixture(autouse=True)
+    def override_get_db(self, arrangements_db):
+        def _override_get_db():
+            yield arrangements_db
+
+        app.dependency_overrides[get_db] = _override_get_db
+        yield
+        app.dependency_overrides = {}
+
+    @pytest.mark.parametrize(
+        ("url", "params"),
+        [
+            ("/arrangements", {"start_date": "2024-01-01"}),
+            ("/arrangements", {"start_date": "2024-01-03"}),
+            ("/arrangements/logs/all", {}),
+        ],
+    )
+    def test_lines_match_response_data(self, url, params):
+        # Act
+        response = client.get(url, params=params)
+        stream_response = client.get(url, params={**params, "stream": True})
+
+        # Assert
+        assert stream_response.status_code == 200
+        lines = stream_response.text.splitlines()
+        assert lines
+        assert len(lines) == len(response.json()["data"])
+        assert [json.loads(line) for line in lines] == response.json()["data"]
+
+
+class TestConditionalGet:
+    @pytest.fixture(autouse=True)
+    def override_get_db(self, arrangements_db):
+        def _override_get_db():
+            yield arrangements_db
+
+        app.dependency_overrides[get_db] = _override_get_db
+        signer = S3Signer(s3_client=MagicMock(), bucket_name="bucket")
+        signer.s3_client.generate_presigned_url.return_value = "https://bucket.s3.amazonaws.com"
+        with patch("src.arrangements.services.get_signer", return_value=signer), patch(
+            "src.arrangements.utils.get_signer", return_value=signer
+        ):
+            yield
+        app.dependency_overrides = {}
+
+    @pytest.mark.parametrize(
+        ("url", "get_json"),
+        [
+            ("/arrangements/subordinates/1", "get_subordinates_arrangements_json"),
+            ("/arrangements/team/2", "get_team_arrangements_json"),
+        ],
+    )
+    def test_not_modified_until_arrangements_change(self, arrangements_db, url, get_json):
+        params = {"start_date": "2024-01-01"}
+        etag = client.get(url, params=params).headers["ETag"]
+
+        # An unchanged scope is not loaded again
+        with patch(f"src.arrangements.services.{get_json}") as mock_get_json:
+            response = client.get(url, params=params, headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.headers["ETag"] == etag
+        mock_get_json.assert_not_called()
+
+        # Other pages have their own ETag
+        response = client.get(
+            url, params={**params, "page_num": 2}, headers={"If-None-Match": etag}
+        )
+        assert response.status_code == 200
+
+        # Arrangement 3 is approved by staff 1 and requested by a peer of staff 2
+        arrangement = arrangements_db.get(models.LatestArrangement, 3)
+        arrangement.current_approval_status = ApprovalStatus.WITHDRAWN
+        arrangement.latest_log_id = 10
+        arrangements_db.commit()
+
+        response = client.get(url, params=params, headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etag
+
+    def test_not_modified_until_employees_change(self, arrangements_db):
+        etag = client.get("/employees/").headers["ETag"]
+
+        with patch("src.employees.services.get_employees") as mock_get_employees:
+            response = client.get("/employees/", headers={"If-None-Match": f'{etag}, W/"other"'})
+        assert response.status_code == 304
+        mock_get_employees.assert_not_called()
+
+        arrangements_db.get(Employee, 2).staff_fname = "Renamed"
+        arrangements_db.commit()
+
+        response = client.get("/employees/", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.json()[1]["staff_fname"] == "Renamed"
+
+
 @patch("src.arrangements.services.get_arrangement_logs")
 class TestGetArrangementLogs:
     @patch("src.arrangements.commons.schemas.ArrangementLogResponse.model_validate")
     def test_success(self, mock_pydantic, mock_get_logs):
         # Arrange
         num_logs = 3
-        mock_get_logs.return_value = [MagicMock(spec=dc.ArrangementLogResponse)] * num_logs
+        mock_get_logs.return_value = [MagicMock(spec=dc.ArrangementLogResponse)] * num_logs, None
         mock_pydantic.return_value = MagicMock()
 
         # Act
@@ -327,6 +841,47 @@ class TestGetArrangementLogs:
         mock_pydantic.assert_called()
         assert mock_pydantic.call_count == num_logs
 
+    def test_filters(self, mock_get_logs):
+        # Arrange
+        mock_get_logs.return_value = [], None
+
+        # Act
+        result = client.get(
+            "/arrangements/logs/all",
+            params={
+                "requester_staff_id": 2,
+                "action": ["approve", "reject"],
+                "approval_status": ["approved"],
+                "start_date": "2024-01-01",
+                "page_num": 2,
+            },
+        )
+
+        # Assert
+        assert result.status_code == 200
+        _, filters, pagination = mock_get_logs.call_args.args
+        assert filters == dc.ArrangementLogFilters(
+            requester_staff_id=2,
+            action=[Action.APPROVE, Action.REJECT],
+            approval_status=[ApprovalStatus.APPROVED],
+            start_date=date(2024, 1, 1),
+        )
+        assert pagination.page_num == 2
+
+    @patch("src.arrangements.services.stream_arrangement_logs")
+    def test_stream(self, mock_stream_logs, mock_get_logs):
+        # Arrange
+        mock_stream_logs.return_value = iter([{"log_id": 2}, {"log_id": 1}])
+
+        # Act
+        result = client.get("/arrangements/logs/all", params={"stream": True})
+
+        # Assert
+        assert result.status_code == 200
+        assert result.headers["content-type"] == "application/x-ndjson"
+        assert result.text == '{"log_id":2}\n{"log_id":1}\n'
+        mock_get_logs.assert_not_called()
+
     def test_failure_unknown(self, mock_get_logs):
         # Arrange
         mock_get_logs.side_effect = Exception()
@@ -513,3 +1068,64 @@ class TestUpdateWfhRequest:
 
         # Assert
         assert result.status_code == 500
+
+
+@patch("src.arrangements.services.update_arrangements_approval_status")
+class TestUpdateWfhRequests:
+    def test_success(self, mock_update_arrangements):
+        # Arrange
+        results = [
+            {"arrangement_id": 1, "success": True, "message": "Updated"},
+            {"arrangement_id": 2, "success": False, "message": "Not found"},
+        ]
+        mock_update_arrangements.return_value = results
+
+        # Act
+        result = client.put(
+            "/arrangements/status",
+            json={"action": "approve", "approving_officer": 1, "arrangement_ids": [1, 2]},
+        )
+
+        # Assert
+        assert result.status_code == 200
+        assert result.json()["data"] == results
+        wfh_update = mock_update_arrangements.call_args.args[1]
+        assert (wfh_update.arrangement_ids, wfh_update.batch_id) == ([1, 2], None)
+        assert wfh_update.action == Action.APPROVE
+
+    @pytest.mark.parametrize(
+        "targets",
+        [{}, {"arrangement_ids": [1], "batch_id": 1}, {"arrangement_ids": []}],
+    )
+    def test_invalid_targets(self, mock_update_arrangements, targets):
+        # Act
+        result = client.put(
+            "/arrangements/status",
+            json={"action": "reject", "approving_officer": 1, **targets},
+        )
+
+        # Assert
+        assert result.status_code == 422
+        mock_update_arrangements.assert_not_called()
+
+    @pytest.mark.parametrize(
+        ("exception", "status_code"),
+        [
+            (SeriesBatchNotSupportedException(1), 400),
+            (BatchNotFoundException(1), 404),
+            (EmailNotificationException(["A"]), 500),
+            (Exception(), 500),
+        ],
+    )
+    def test_failure(self, mock_update_arrangements, exception, status_code):
+        # Arrange
+        mock_update_arrangements.side_effect = exception
+
+        # Act
+        result = client.put(
+            "/arrangements/status",
+            json={"action": "cancel", "approving_officer": 1, "batch_id": 1},
+        )
+
+        # Assert
+        assert result.status_code == status_code
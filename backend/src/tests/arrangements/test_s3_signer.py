@@ -0,0 +1,157 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+from botocore.exceptions import ClientError
+from src.arrangements import s3_signer
+from src.arrangements.s3_signer import S3Signer
+
+
+@pytest.fixture
+def mock_s3_client():
+    s3_client = MagicMock()
+    s3_client.generate_presigned_url.side_effect = lambda _, Params, ExpiresIn: (
+        f"https://presigned-url.com/{Params['Key']}"
+    )
+    return s3_client
+
+
+@pytest.fixture
+def mock_clock():
+    clock = MagicMock(return_value=0.0)
+    return clock
+
+
+@pytest.fixture
+def signer(mock_s3_client, mock_clock):
+    return S3Signer(
+        s3_client=mock_s3_client,
+        bucket_name="test-bucket",
+        expiration=3600,
+        cache_ttl=3000,
+        cache_size=2,
+        clock=mock_clock,
+    )
+
+
+class TestS3Signer:
+    def test_cache_ttl_must_be_shorter_than_expiration(self, mock_s3_client):
+        with pytest.raises(ValueError):
+            S3Signer(s3_client=mock_s3_client, expiration=3600, cache_ttl=3600)
+
+    def test_sign(self, signer, mock_s3_client):
+        # Act
+        result = signer.sign("a.pdf")
+
+        # Assert
+        assert result == "https://presigned-url.com/a.pdf"
+        mock_s3_client.generate_presigned_url.assert_called_once_with(
+            "get_object",
+            Params={"Bucket": "test-bucket", "Key": "a.pdf"},
+            ExpiresIn=3600,
+        )
+
+    @pytest.mark.parametrize("key", [None, ""])
+    def test_sign_empty_key(self, signer, mock_s3_client, key):
+        assert signer.sign(key) is None
+        mock_s3_client.generate_presigned_url.assert_not_called()
+
+    def test_sign_many(self, signer, mock_s3_client):
+        # Act
+        result = signer.sign_many(["a.pdf", None, "b.pdf", "a.pdf"])
+
+        # Assert
+        assert result == {
+            "a.pdf": "https://presigned-url.com/a.pdf",
+            "b.pdf": "https://presigned-url.com/b.pdf",
+        }
+        assert mock_s3_client.generate_presigned_url.call_count == 2
+
+    def test_cache_hit_within_ttl(self, signer, mock_s3_client, mock_clock):
+        # Arrange
+        signer.sign("a.pdf")
+        mock_clock.return_value = 2999.0
+
+        # Act
+        signer.sign("a.pdf")
+
+        # Assert
+        assert mock_s3_client.generate_presigned_url.call_count == 1
+
+    def test_cache_expires_after_ttl(self, signer, mock_s3_client, mock_clock):
+        # Arrange
+        signer.sign("a.pdf")
+        mock_clock.return_value = 3000.0
+
+        # Act
+        signer.sign("a.pdf")
+
+        # Assert
+        assert mock_s3_client.generate_presigned_url.call_count == 2
+
+    def test_evicts_least_recently_used(self, signer, mock_s3_client):
+        # Arrange
+        signer.sign_many(["a.pdf", "b.pdf"])
+        signer.sign("a.pdf")
+
+        # Act
+        signer.sign("c.pdf")
+        signer.sign("a.pdf")
+        signer.sign("b.pdf")
+
+        # Assert: a.pdf stayed cached, b.pdf was evicted and signed again
+        assert mock_s3_client.generate_presigned_url.call_count == 4
+
+    def test_client_error_is_not_cached(self, signer, mock_s3_client):
+        # Arrange
+        mock_s3_client.generate_presigned_url.side_effect = ClientError(
+            {"Error": {"Code": "InvalidRequest", "Message": "Invalid request"}},
+            "generate_presigned_url",
+        )
+
+        # Act
+        result = signer.sign_many(["a.pdf"])
+        signer.sign("a.pdf")
+
+        # Assert
+        assert result == {"a.pdf": None}
+        assert mock_s3_client.generate_presigned_url.call_count == 2
+
+    def test_clear(self, signer, mock_s3_client):
+        # Arrange
+        signer.sign("a.pdf")
+
+        # Act
+        signer.clear()
+        signer.sign("a.pdf")
+
+        # Assert
+        assert mock_s3_client.generate_presigned_url.call_count == 2
+
+    @patch("src.arrangements.s3_signer.time.time")
+    def test_url_version_changes_before_urls_expire(self, mock_time, signer):
+        # Arrange
+        mock_time.return_value = 6000.0
+        version = signer.url_version()
+
+        # Act
+        mock_time.return_value = 6599.0
+        same_version = signer.url_version()
+        mock_time.return_value = 6600.0
+        next_version = signer.url_version()
+
+        # Assert
+        assert same_version == version
+        assert next_version == version + 1
+
+
+@patch("src.arrangements.s3_signer.boto3.client")
+def test_get_signer_reuses_shared_signer(mock_boto3_client):
+    # Arrange
+    with patch.object(s3_signer, "_signer", None):
+        # Act
+        signer = s3_signer.get_signer()
+
+        # Assert
+        assert s3_signer.get_signer() is signer
+        assert s3_signer.init_signer() is not signer
+        mock_boto3_client.assert_called()
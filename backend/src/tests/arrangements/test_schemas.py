@@ -257,6 +257,16 @@ class TestCreateArrangementRequest:
                 recurring_occurrences=3 if field != "recurring_occurrences" else 0,
             )  # type: ignore
 
+    def test_series_not_recurring(self):
+        with pytest.raises(ValueError):
+            CreateArrangementRequest(
+                requester_staff_id=1,
+                wfh_date=datetime.strptime("2099-12-31", "%Y-%m-%d").date(),
+                wfh_type=WfhType.FULL,
+                is_recurring=False,
+                is_series=True,
+            )  # type: ignore
+
     def test_wfh_date_less_than_24h(self):
         wfh_date = datetime.now(singapore_timezone).date() + timedelta(hours=23)
 
@@ -1,5 +1,5 @@
-from datetime import datetime
-from typing import List
+from dataclasses import asdict
+from datetime import date, datetime
 from unittest.mock import MagicMock, patch
 from zoneinfo import ZoneInfo
 
@@ -12,21 +12,30 @@ from fastapi.testclient import TestClient
 from src.app import app
 from src.arrangements.commons import dataclasses as dc
 from src.arrangements.commons import exceptions as arrangement_exceptions
-from src.arrangements.commons.enums import Action, ApprovalStatus
+from src.arrangements.commons.enums import (
+    Action,
+    ApprovalStatus,
+    PaginationMode,
+    RecurringFrequencyUnit,
+    SubordinatesScope,
+    WfhType,
+)
 from src.arrangements.services import (
+    AUTO_REJECT_STATUS_REASON,
+    _load_team_arrangements_json,
     auto_reject_old_requests,
     create_arrangements_from_request,
-    get_all_arrangements,
     get_arrangement_by_id,
     get_arrangement_logs,
-    get_personal_arrangements,
-    get_subordinates_arrangements,
-    get_team_arrangements,
+    get_arrangement_stats,
     update_arrangement_approval_status,
+    update_arrangements_approval_status,
+    update_series_approval_status,
 )
+from src.arrangements.utils import encode_cursor
 from src.employees import exceptions as employee_exceptions
-from src.employees.models import DelegateLog
 from src.employees.schemas import EmployeeBase
+from src.notifications.exceptions import EmailNotificationException
 from src.tests.test_utils import mock_db_session  # noqa: F401, E261
 
 client = TestClient(app)
@@ -180,226 +189,210 @@ class TestGetArrangementById:
             get_arrangement_by_id(mock_db_session, arrangement_id=1)
 
 
-class TestGetAllArrangements:
-    @patch("src.arrangements.commons.dataclasses.ArrangementResponse.from_dict")
-    @patch("src.arrangements.crud.get_arrangements")
-    def test_success(self, mock_get_arrangements, mock_convert, mock_db_session):
-        # Arrange
-        mock_get_arrangements.return_value = [MagicMock(spec=dc.ArrangementResponse)]
-
-        # Act
-        get_all_arrangements(mock_db_session, filters=dc.ArrangementFilters())
-
-        # Assert
-        mock_get_arrangements.assert_called_once()
-        mock_convert.assert_called()
-
-
-class TestGetPersonalArrangements:
+class TestLoadTeamArrangementsJson:
     @pytest.mark.parametrize(
-        ("current_approval_status", "num_arrangements"),
-        [
-            ([ApprovalStatus.PENDING_APPROVAL], 1),
-            ([ApprovalStatus.PENDING_APPROVAL], 3),
-            ([ApprovalStatus.PENDING_APPROVAL], 0),
-            ([ApprovalStatus.PENDING_APPROVAL, ApprovalStatus.APPROVED], 1),
-            ([], 1),
-        ],
+        ("page_size", "expected_cursor"),
+        [(5, encode_cursor("2024-10-12", 1)), (3, None)],
     )
-    @patch("src.arrangements.services.create_presigned_url")
-    @patch("src.arrangements.commons.dataclasses.ArrangementResponse.from_dict")
-    @patch("src.arrangements.crud.get_arrangements")
-    def test_success(
+    @patch("src.arrangements.services.format_arrangement_rows")
+    @patch("src.arrangements.crud.get_team_arrangements")
+    def test_cursor_pagination(
         self,
-        mock_get_arrangements,
-        mock_convert,
-        mock_create_presigned_url,
-        current_approval_status,
-        num_arrangements,
+        mock_get_team_arrangements,
+        mock_format_arrangement_rows,
+        page_size,
+        expected_cursor,
         mock_db_session,
+        mock_arrangement_data,
     ):
         # Arrange
-        mock_get_arrangements.return_value = [
-            MagicMock(spec=dc.ArrangementResponse)
-        ] * num_arrangements
-
-        group_by_date = (
-            False  # always False since it is deprecated, but retained for backwards compatibility
-        )
-        filters = dc.ArrangementFilters(group_by_date=group_by_date)
+        mock_get_team_arrangements.return_value = [mock_arrangement_data] * page_size, 17
+        mock_format_arrangement_rows.side_effect = lambda rows, presign: rows
 
         # Act
-        get_personal_arrangements(mock_db_session, staff_id=1, filters=filters)
+        arrangements, pagination_meta = _load_team_arrangements_json(
+            db=mock_db_session,
+            staff_id=1,
+            filters=dc.ArrangementFilters(group_by_date=False),
+            pagination=dc.PaginationConfig(items_per_page=5, pagination_mode=PaginationMode.CURSOR),
+        )
 
         # Assert
-        mock_get_arrangements.assert_called_once()
-
-        if num_arrangements == 0:
-            mock_convert.assert_not_called()
-        else:
-            mock_convert.assert_called()
-            assert mock_convert.call_count == num_arrangements
-
-
-class TestGetSubordinatesArrangements:
-    @patch("src.arrangements.services.group_arrangements_by_date")
-    @patch("src.arrangements.services.create_presigned_url")
-    @patch("src.arrangements.commons.dataclasses.ArrangementResponse.from_dict")
-    @patch("src.arrangements.crud.get_arrangements")
-    @pytest.mark.parametrize(
-        ("supporting_docs", "group_by_date"),
-        [
-            ([None, None, None], False),
-            (["/140002/2024-10-12T14:30:00/test_file_1.pdf", None, None], False),
-            (["/140002/2024-10-12T14:30:00/test_file_1.pdf", None, None], False),
-            (
-                [
-                    "/140002/2024-10-12T14:30:00/test_file_1.pdf",
-                    "/140002/2024-10-12T14:30:00/test_file_2.pdf",
-                    "/1/2024-10-12T14:30:00/test_file_3.pdf",
-                ],
-                False,
-            ),
-        ],
-    )
-    def test_success(
+        assert len(arrangements) == page_size
+        assert pagination_meta.total_count == 17
+        assert pagination_meta.page_num is None
+        assert pagination_meta.next_cursor == expected_cursor
+
+    @patch("src.arrangements.services.format_arrangement_rows")
+    @patch("src.arrangements.crud.get_team_arrangements")
+    def test_cursor_after_series_occurrence(
         self,
-        mock_get_arrangements,
-        mock_convert,
-        mock_create_presigned_url,
-        mock_group_arrangements,
-        supporting_docs,
-        group_by_date,
+        mock_get_team_arrangements,
+        mock_format_arrangement_rows,
         mock_db_session,
-        mock_presigned_url,
+        mock_arrangement_data,
     ):
         # Arrange
-        mock_get_arrangements.return_value = [MagicMock(spec=dc.ArrangementResponse)]
-
-        mock_arrangement = MagicMock(spec=dc.ArrangementResponse)
-        mock_arrangement.configure_mock(
-            supporting_doc_1=supporting_docs[0],
-            supporting_doc_2=supporting_docs[1],
-            supporting_doc_3=supporting_docs[2],
-        )
-
-        mock_convert.return_value = mock_arrangement
-        mock_create_presigned_url.side_effect = [mock_presigned_url(doc) for doc in supporting_docs]
-        mock_group_arrangements.return_value = [MagicMock(spec=dc.CreatedArrangementGroupByDate)]
-
-        manager_id = 1
-        items_per_page = 10
-        page_num = 1
+        occurrence = {**mock_arrangement_data, "arrangement_id": None, "batch_id": 7}
+        mock_get_team_arrangements.return_value = [mock_arrangement_data, occurrence], None
+        mock_format_arrangement_rows.side_effect = lambda rows, presign: rows
 
         # Act
-        result = get_subordinates_arrangements(
+        _, pagination_meta = _load_team_arrangements_json(
             db=mock_db_session,
-            manager_id=manager_id,
-            filters=dc.ArrangementFilters(group_by_date=group_by_date),
-            pagination=dc.PaginationConfig(items_per_page=items_per_page, page_num=page_num),
+            staff_id=1,
+            filters=dc.ArrangementFilters(group_by_date=False),
+            pagination=dc.PaginationConfig(items_per_page=2, pagination_mode=PaginationMode.CURSOR),
         )
 
         # Assert
-        mock_get_arrangements.assert_called_once()
-        mock_convert.assert_called()
-        mock_create_presigned_url.assert_called()
-        assert mock_create_presigned_url.call_count == 3
-        if group_by_date:
-            mock_group_arrangements.assert_called_once()
-        else:
-            mock_group_arrangements.assert_not_called()
-
-        assert isinstance(result, tuple)
-        assert len(result) == 2  # return data and pagination metadata
+        assert pagination_meta.next_cursor == encode_cursor("2024-10-12", None, 7)
 
-        arrangements, pagination_meta = result
 
-        assert isinstance(arrangements, List)
-
-        if group_by_date:
-            assert isinstance(arrangements[0], dc.CreatedArrangementGroupByDate)
-        else:
-            assert isinstance(arrangements[0], dc.ArrangementResponse)
+class TestGetArrangementLogs:
+    @patch("src.arrangements.commons.dataclasses.ArrangementLogResponse.from_dict")
+    @patch("src.arrangements.crud.get_arrangement_logs")
+    def test_success(self, mock_get_logs, mock_convert, mock_db_session):
+        mock_get_logs.return_value = [MagicMock(spec=dc.ArrangementLogResponse)], 1
+        mock_convert.return_value = MagicMock(spec=dc.ArrangementLogResponse)
 
-        assert isinstance(pagination_meta, dc.PaginationMeta)
+        get_arrangement_logs(mock_db_session)
 
+        mock_get_logs.assert_called_once()
+        mock_convert.assert_called()
 
-class TestGetTeamArrangements:
-    @pytest.mark.parametrize(
-        "group_by_date",
-        [True, False],
-    )
-    @patch("src.arrangements.services.compute_pagination_meta")
-    @patch("src.arrangements.services.group_arrangements_by_date")
-    @patch("src.arrangements.services.create_presigned_url")
-    @patch("src.arrangements.commons.dataclasses.ArrangementResponse.from_dict")
-    @patch("src.arrangements.crud.get_arrangements")
-    @patch("src.employees.services.get_peers_by_staff_id")
-    def test_success(
-        self,
-        mock_get_peers,
-        mock_get_arrangements,
-        mock_convert,
-        mock_create_presigned_url,
-        mock_group_arrangements,
-        mock_compute_pagination_meta,
-        group_by_date,
-        mock_db_session,
-        mock_arrangement_data,
-        mock_employee,
-    ):
+    @patch("src.arrangements.crud.get_arrangement_logs")
+    def test_offset_pagination(self, mock_get_logs, mock_db_session):
         # Arrange
-        mock_get_peers.return_value = [mock_employee]
-        mock_get_arrangements.return_value = [mock_arrangement_data]
-        mock_convert.return_value = MagicMock(spec=dc.ArrangementResponse)
-        mock_group_arrangements.return_value = [MagicMock(spec=dc.CreatedArrangementGroupByDate)]
-        mock_compute_pagination_meta.return_value = MagicMock(spec=dc.PaginationMeta)
+        mock_get_logs.return_value = [], 25
+        filters = dc.ArrangementLogFilters(requester_staff_id=1)
+        pagination = dc.PaginationConfig(items_per_page=10, page_num=2)
 
         # Act
-        result = get_team_arrangements(
-            db=mock_db_session,
-            staff_id=1,
-            filters=dc.ArrangementFilters(group_by_date=group_by_date),
-            pagination=dc.PaginationConfig(),
-        )
+        _, pagination_meta = get_arrangement_logs(mock_db_session, filters, pagination)
 
         # Assert
-        mock_get_peers.assert_called_once()
-        mock_get_arrangements.assert_called()
-        assert mock_get_arrangements.call_count == 2
-        mock_convert.assert_called()
+        mock_get_logs.assert_called_once_with(mock_db_session, filters, pagination)
+        assert pagination_meta.total_count == 25
+        assert pagination_meta.page_num == 2
+        assert pagination_meta.total_pages == 3
 
-        if group_by_date:
-            mock_group_arrangements.assert_called_once()
-        else:
-            mock_group_arrangements.assert_not_called()
 
-        assert isinstance(result, tuple)
-        assert len(result) == 2  # return data and pagination metadata
+class TestGetArrangementStats:
+    @patch("src.arrangements.crud.get_daily_wfh_rollup")
+    @patch("src.employees.crud.get_headcount_by_department")
+    def test_success(self, mock_get_headcounts, mock_get_counts, mock_db_session):
+        # Arrange
+        mock_get_headcounts.return_value = {"IT": 5, "HR": 3}
+        mock_get_counts.return_value = [
+            {
+                "wfh_date": date(2024, 1, 2),
+                "dept": "IT",
+                "wfh_type": WfhType.FULL,
+                "count": 2,
+                "on_leave_count": 1,
+            },
+            {
+                "wfh_date": date(2024, 1, 1),
+                "dept": "IT",
+                "wfh_type": WfhType.AM,
+                "count": 1,
+                "on_leave_count": 0,
+            },
+            {
+                "wfh_date": date(2024, 1, 2),
+                "dept": "HR",
+                "wfh_type": WfhType.PM,
+                "count": 1,
+                "on_leave_count": None,
+            },
+        ]
+        filters = dc.ArrangementStatsFilters(start_date=date(2024, 1, 1), end_date=date(2024, 1, 2))
+
+        # Act
+        result = get_arrangement_stats(mock_db_session, filters)
 
-        arrangements, pagination_meta = result
+        # Assert
+        mock_get_headcounts.assert_called_once_with(mock_db_session, None, None, 1)
+        mock_get_counts.assert_called_once_with(mock_db_session, filters)
+        assert result.headcount == 8
+        assert result.wfh_counts == {"am": 1, "pm": 1, "full": 2}
+        assert result.on_leave == 1
+        assert [(dept.department, dept.headcount) for dept in result.departments] == [
+            ("HR", 3),
+            ("IT", 5),
+        ]
+        assert result.departments[0].wfh_counts == {"am": 0, "pm": 1, "full": 0}
+        assert result.departments[1].wfh_counts == {"am": 1, "pm": 0, "full": 2}
+        assert [day.wfh_date for day in result.days] == [date(2024, 1, 1), date(2024, 1, 2)]
+        assert result.days[1].wfh_counts == {"am": 0, "pm": 1, "full": 2}
+        assert result.days[1].on_leave == 1
+
+    @patch("src.arrangements.crud.get_daily_wfh_rollup")
+    @patch("src.arrangements.crud.get_arrangement_counts")
+    @patch("src.employees.crud.get_headcount_by_department")
+    def test_other_statuses_are_counted_from_arrangements(
+        self, mock_get_headcounts, mock_get_counts, mock_get_rollup, mock_db_session
+    ):
+        # Arrange
+        mock_get_headcounts.return_value = {"IT": 5}
+        mock_get_counts.return_value = []
+        filters = dc.ArrangementStatsFilters(
+            start_date=date(2024, 1, 1),
+            end_date=date(2024, 1, 1),
+            current_approval_status=[ApprovalStatus.PENDING_APPROVAL],
+        )
 
-        assert isinstance(arrangements, List)
+        # Act
+        get_arrangement_stats(mock_db_session, filters)
 
-        if group_by_date:
-            assert isinstance(arrangements[0], dc.CreatedArrangementGroupByDate)
-        else:
-            assert isinstance(arrangements[0], dc.ArrangementResponse)
+        # Assert
+        mock_get_counts.assert_called_once_with(mock_db_session, filters)
+        mock_get_rollup.assert_not_called()
+
+    @patch("src.arrangements.crud.get_daily_wfh_rollup")
+    @patch("src.arrangements.crud.get_arrangement_counts")
+    @patch("src.employees.crud.get_headcount_by_department")
+    def test_manager_subtree_is_counted_from_arrangements(
+        self, mock_get_headcounts, mock_get_counts, mock_get_rollup, mock_db_session
+    ):
+        # Arrange
+        mock_get_headcounts.return_value = {"IT": 5}
+        mock_get_counts.return_value = []
+        filters = dc.ArrangementStatsFilters(
+            start_date=date(2024, 1, 1),
+            end_date=date(2024, 1, 1),
+            manager_id=1,
+            scope=SubordinatesScope.SUBTREE,
+            depth=2,
+        )
 
-        assert isinstance(pagination_meta, dc.PaginationMeta)
+        # Act
+        get_arrangement_stats(mock_db_session, filters)
 
+        # Assert
+        mock_get_headcounts.assert_called_once_with(mock_db_session, None, 1, 2)
+        mock_get_counts.assert_called_once_with(mock_db_session, filters)
+        mock_get_rollup.assert_not_called()
 
-class TestGetArrangementLogs:
-    @patch("src.arrangements.commons.dataclasses.ArrangementLogResponse.from_dict")
-    @patch("src.arrangements.crud.get_arrangement_logs")
-    def test_success(self, mock_get_logs, mock_convert, mock_db_session):
-        mock_get_logs.return_value = [MagicMock(spec=dc.ArrangementLogResponse)]
-        mock_convert.return_value = MagicMock(spec=dc.ArrangementLogResponse)
+    @patch("src.arrangements.crud.get_daily_wfh_rollup")
+    @patch("src.employees.crud.get_headcount_by_department")
+    def test_no_arrangements(self, mock_get_headcounts, mock_get_counts, mock_db_session):
+        # Arrange
+        mock_get_headcounts.return_value = {"IT": 5}
+        mock_get_counts.return_value = []
+        filters = dc.ArrangementStatsFilters(
+            start_date=date(2024, 1, 1), end_date=date(2024, 1, 1), department="IT"
+        )
 
-        get_arrangement_logs(mock_db_session)
+        # Act
+        result = get_arrangement_stats(mock_db_session, filters)
 
-        mock_get_logs.assert_called_once()
-        mock_convert.assert_called()
+        # Assert
+        mock_get_headcounts.assert_called_once_with(mock_db_session, "IT", None, 1)
+        assert result.headcount == 5
+        assert result.wfh_counts == {"am": 0, "pm": 0, "full": 0}
+        assert result.days == []
 
 
 class TestCreateArrangementsFromRequest:
@@ -423,7 +416,7 @@ class TestCreateArrangementsFromRequest:
     @patch("src.arrangements.crud.create_recurring_request")
     @patch("src.arrangements.commons.dataclasses.RecurringRequestDetails.from_dict")
     @patch("src.arrangements.services.upload_file")
-    @patch("src.employees.crud.get_existing_delegation")
+    @patch("src.arrangements.services.get_delegation_map")
     @patch("src.employees.services.get_manager_by_subordinate_id")
     @patch("src.employees.crud.get_employee_by_staff_id")
     @patch("src.arrangements.services.asdict")
@@ -457,6 +450,7 @@ class TestCreateArrangementsFromRequest:
         mock_wfh_request.configure_mock(
             requester_staff_id=1 if not is_jack_sim else 130002,
             is_recurring=is_recurring,
+            is_series=False,
             update_datetime=datetime.now(singapore_timezone),
             current_approval_status=ApprovalStatus.PENDING_APPROVAL,
             wfh_date=datetime.now(singapore_timezone).date(),
@@ -471,11 +465,8 @@ class TestCreateArrangementsFromRequest:
         if is_jack_sim:
             mock_get_manager.return_value = None, None
 
-        mock_get_delegation.return_value = None
-        if has_delegation:
-            mock_delegation = MagicMock(spec=DelegateLog)
-            mock_delegation.configure_mock(delegate_manager_id=1)
-            mock_get_delegation.return_value = mock_delegation
+        mock_get_delegate_id = mock_get_delegation.return_value.get_delegate_id
+        mock_get_delegate_id.return_value = 1 if has_delegation else None
 
         mock_upload_file.return_value = {"file_url": "https://s3-bucket/test_file.pdf"}
 
@@ -501,11 +492,11 @@ class TestCreateArrangementsFromRequest:
         if is_jack_sim:
             assert mock_wfh_request.current_approval_status == ApprovalStatus.APPROVED
             assert mock_wfh_request.approving_officer is None
-            mock_get_delegation.assert_not_called()
+            mock_get_delegate_id.assert_not_called()
         else:
             assert mock_wfh_request.current_approval_status == ApprovalStatus.PENDING_APPROVAL
             assert mock_wfh_request.approving_officer == mock_manager.staff_id
-            mock_get_delegation.assert_called_once()
+            mock_get_delegate_id.assert_called_once_with(mock_manager.staff_id)
 
         mock_get_employee.assert_called_once()
         mock_get_manager.assert_called_once()
@@ -526,6 +517,53 @@ class TestCreateArrangementsFromRequest:
         mock_create_arrangements.assert_called_once()
         mock_craft_send_email.assert_called_once()
 
+    @pytest.mark.asyncio
+    @patch("src.arrangements.services.craft_and_send_email")
+    @patch("src.arrangements.crud.create_arrangements")
+    @patch("src.arrangements.crud.create_recurring_request")
+    @patch("src.arrangements.crud.create_recurring_series")
+    @patch("src.arrangements.services.get_delegation_map")
+    @patch("src.employees.services.get_manager_by_subordinate_id")
+    @patch("src.employees.crud.get_employee_by_staff_id")
+    async def test_series(
+        self,
+        mock_get_employee,
+        mock_get_manager,
+        mock_get_delegation,
+        mock_create_series,
+        mock_create_recurring,
+        mock_create_arrangements,
+        mock_craft_send_email,
+        mock_db_session,
+        mock_manager,
+        mock_employee,
+    ):
+        # Arrange
+        mock_wfh_request = MagicMock(spec=dc.CreateArrangementRequest)
+        mock_wfh_request.configure_mock(
+            requester_staff_id=1,
+            is_recurring=True,
+            is_series=True,
+            update_datetime=datetime.now(singapore_timezone),
+            current_approval_status=ApprovalStatus.PENDING_APPROVAL,
+            wfh_date=datetime.now(singapore_timezone).date(),
+            batch_id=None,
+            approving_officer=None,
+        )
+        mock_get_employee.return_value = mock_employee
+        mock_get_manager.return_value = mock_manager, None
+        mock_get_delegation.return_value.get_delegate_id.return_value = None
+        mock_create_series.return_value = [MagicMock(spec=dc.ArrangementResponse) for _ in range(2)]
+
+        # Act
+        await create_arrangements_from_request(mock_db_session, mock_wfh_request, [])
+
+        # Assert
+        mock_create_series.assert_called_once_with(db=mock_db_session, request=mock_wfh_request)
+        mock_create_recurring.assert_not_called()
+        mock_create_arrangements.assert_not_called()
+        mock_craft_send_email.assert_called_once()
+
     @pytest.mark.asyncio
     @pytest.mark.parametrize(
         "successful_uploads",
@@ -716,65 +754,568 @@ class TestUpdateArrangementApprovalStatus:
             )
 
 
+@patch("src.arrangements.services.craft_and_send_digest_emails")
+@patch("src.arrangements.services.employee_crud.get_employees_by_ids")
+@patch("src.arrangements.services.crud.update_arrangements_approval_status")
+@patch("src.arrangements.services.crud.get_arrangements_by_ids")
+class TestUpdateArrangementsApprovalStatus:
+    @staticmethod
+    def make_arrangement(arrangement_id, requester_staff_id, approval_status):
+        return {
+            "arrangement_id": arrangement_id,
+            "update_datetime": datetime(2024, 1, 1),
+            "requester_staff_id": requester_staff_id,
+            "wfh_date": date(2024, 1, arrangement_id),
+            "wfh_type": WfhType.FULL,
+            "current_approval_status": approval_status,
+            "approving_officer": 2,
+        }
+
+    @staticmethod
+    def apply_updates(db, updates, action):
+        return [asdict(arrangement) for arrangement, _ in updates]
+
+    @staticmethod
+    def make_update(**kwargs):
+        return dc.BulkUpdateArrangementRequest(
+            update_datetime=datetime(2024, 1, 1),
+            action=Action.APPROVE,
+            approving_officer=2,
+            status_reason="Approved in bulk",
+            **kwargs,
+        )
+
+    @pytest.mark.asyncio
+    async def test_per_item_results(
+        self, mock_get_arrangements, mock_update, mock_get_employees, mock_send, mock_db_session
+    ):
+        mock_get_arrangements.return_value = [
+            self.make_arrangement(1, 10, ApprovalStatus.PENDING_APPROVAL),
+            self.make_arrangement(2, 10, ApprovalStatus.REJECTED),
+            self.make_arrangement(3, 11, ApprovalStatus.PENDING_WITHDRAWAL),
+        ]
+        mock_update.side_effect = self.apply_updates
+
+        results = await update_arrangements_approval_status(
+            mock_db_session, self.make_update(arrangement_ids=[3, 1, 2, 99, 1])
+        )
+
+        assert [(result["arrangement_id"], result["success"]) for result in results] == [
+            (3, True),
+            (1, True),
+            (2, False),
+            (99, False),
+        ]
+        assert results[2]["message"] == str(
+            arrangement_exceptions.ArrangementActionNotAllowedException(
+                ApprovalStatus.REJECTED, Action.APPROVE
+            )
+        )
+        assert results[3]["message"] == "Arrangement with ID 99 not found"
+
+        updates, action = mock_update.call_args.args[1:]
+        assert action == Action.APPROVE
+        assert [
+            (arrangement.arrangement_id, arrangement.current_approval_status, previous_status)
+            for arrangement, previous_status in updates
+        ] == [
+            (3, ApprovalStatus.WITHDRAWN, ApprovalStatus.PENDING_WITHDRAWAL),
+            (1, ApprovalStatus.APPROVED, ApprovalStatus.PENDING_APPROVAL),
+        ]
+        assert all(arrangement.status_reason == "Approved in bulk" for arrangement, _ in updates)
+
+    @pytest.mark.asyncio
+    async def test_status_changed_since_read(
+        self, mock_get_arrangements, mock_update, mock_get_employees, mock_send, mock_db_session
+    ):
+        mock_get_arrangements.return_value = [
+            self.make_arrangement(1, 10, ApprovalStatus.PENDING_APPROVAL),
+            self.make_arrangement(2, 10, ApprovalStatus.PENDING_APPROVAL),
+        ]
+        # Arrangement 2 is no longer pending when the update runs
+        mock_update.side_effect = lambda db, updates, action: self.apply_updates(
+            db, updates[:1], action
+        )
+
+        results = await update_arrangements_approval_status(
+            mock_db_session, self.make_update(arrangement_ids=[1, 2])
+        )
+
+        assert [(result["arrangement_id"], result["success"]) for result in results] == [
+            (1, True),
+            (2, False),
+        ]
+        assert results[1]["message"] == str(
+            arrangement_exceptions.ArrangementStatusChangedException(2)
+        )
+        configs = mock_send.call_args.args[0]
+        assert [
+            [arrangement.arrangement_id for arrangement in config.arrangements]
+            for config in configs
+        ] == [[1]]
+
+    @pytest.mark.asyncio
+    async def test_one_notification_per_requester_and_status(
+        self, mock_get_arrangements, mock_update, mock_get_employees, mock_send, mock_db_session
+    ):
+        mock_get_arrangements.return_value = [
+            self.make_arrangement(1, 10, ApprovalStatus.PENDING_APPROVAL),
+            self.make_arrangement(2, 10, ApprovalStatus.PENDING_APPROVAL),
+            self.make_arrangement(3, 10, ApprovalStatus.PENDING_WITHDRAWAL),
+            self.make_arrangement(4, 11, ApprovalStatus.PENDING_APPROVAL),
+        ]
+        mock_update.side_effect = self.apply_updates
+        employees = {staff_id: MagicMock(staff_id=staff_id) for staff_id in (2, 10, 11)}
+        mock_get_employees.return_value = list(employees.values())
+
+        await update_arrangements_approval_status(mock_db_session, self.make_update(batch_id=1))
+
+        mock_get_employees.assert_called_once_with(mock_db_session, [2, 10, 11])
+        mock_send.assert_called_once()
+        configs = mock_send.call_args.args[0]
+        assert [
+            (
+                config.employee,
+                config.current_approval_status,
+                [arrangement.arrangement_id for arrangement in config.arrangements],
+                config.manager,
+            )
+            for config in configs
+        ] == [
+            (employees[10], ApprovalStatus.APPROVED, [1, 2], employees[2]),
+            (employees[10], ApprovalStatus.WITHDRAWN, [3], employees[2]),
+            (employees[11], ApprovalStatus.APPROVED, [4], employees[2]),
+        ]
+
+    @pytest.mark.asyncio
+    async def test_no_valid_updates(
+        self, mock_get_arrangements, mock_update, mock_get_employees, mock_send, mock_db_session
+    ):
+        mock_get_arrangements.return_value = [
+            self.make_arrangement(1, 10, ApprovalStatus.CANCELLED)
+        ]
+        mock_update.return_value = []
+
+        results = await update_arrangements_approval_status(
+            mock_db_session, self.make_update(arrangement_ids=[1])
+        )
+
+        assert [result["success"] for result in results] == [False]
+        mock_update.assert_called_once_with(mock_db_session, [], Action.APPROVE)
+        mock_send.assert_not_called()
+
+    @pytest.mark.asyncio
+    @patch("src.arrangements.services.crud.get_series", return_value=None)
+    async def test_batch_not_found(
+        self,
+        mock_get_series,
+        mock_get_arrangements,
+        mock_update,
+        mock_get_employees,
+        mock_send,
+        mock_db_session,
+    ):
+        mock_get_arrangements.return_value = []
+
+        with pytest.raises(arrangement_exceptions.BatchNotFoundException):
+            await update_arrangements_approval_status(mock_db_session, self.make_update(batch_id=1))
+
+        mock_update.assert_not_called()
+
+    @pytest.mark.asyncio
+    @patch("src.arrangements.services.crud.get_series", return_value={"batch_id": 1})
+    async def test_series_batch_not_supported(
+        self,
+        mock_get_series,
+        mock_get_arrangements,
+        mock_update,
+        mock_get_employees,
+        mock_send,
+        mock_db_session,
+    ):
+        mock_get_arrangements.return_value = []
+
+        with pytest.raises(arrangement_exceptions.SeriesBatchNotSupportedException):
+            await update_arrangements_approval_status(mock_db_session, self.make_update(batch_id=1))
+
+        mock_get_series.assert_called_once_with(mock_db_session, 1)
+        mock_update.assert_not_called()
+        mock_send.assert_not_called()
+
+
+@patch("src.arrangements.services.craft_and_send_email")
+@patch("src.arrangements.services.employee_crud.get_employee_by_staff_id")
+@patch("src.arrangements.crud.update_series_occurrence_approval_status")
+@patch("src.arrangements.crud.update_series_approval_status")
+@patch("src.arrangements.crud.get_series_occurrences")
+@patch("src.arrangements.crud.get_series")
+class TestUpdateSeriesApprovalStatus:
+    series = {
+        "batch_id": 1,
+        "requester_staff_id": 10,
+        "reason_description": "Weekly class",
+        "start_date": "2024-01-03",
+        "recurring_frequency_number": 1,
+        "recurring_frequency_unit": RecurringFrequencyUnit.WEEKLY,
+        "recurring_occurrences": 2,
+        "request_datetime": "2023-12-02T00:00:00",
+        "wfh_type": WfhType.AM,
+        "current_approval_status": ApprovalStatus.PENDING_APPROVAL,
+        "update_datetime": datetime(2023, 12, 2),
+        "approving_officer": 2,
+    }
+
+    @staticmethod
+    def make_occurrence(day, approval_status=ApprovalStatus.PENDING_APPROVAL):
+        return {
+            "arrangement_id": None,
+            "update_datetime": datetime(2023, 12, 2),
+            "requester_staff_id": 10,
+            "wfh_date": date(2024, 1, day),
+            "wfh_type": WfhType.AM,
+            "current_approval_status": approval_status,
+            "approving_officer": 2,
+            "batch_id": 1,
+            "latest_log_id": None,
+        }
+
+    @staticmethod
+    def make_update(action=Action.APPROVE, wfh_date=None):
+        return dc.UpdateSeriesRequest(
+            batch_id=1,
+            update_datetime=datetime(2024, 1, 1),
+            action=action,
+            approving_officer=2,
+            wfh_date=wfh_date,
+            status_reason="Updated by manager",
+        )
+
+    @pytest.mark.asyncio
+    async def test_series_action(
+        self,
+        mock_get_series,
+        mock_get_occurrences,
+        mock_update_series,
+        mock_update_occurrence,
+        mock_get_employee,
+        mock_send,
+        mock_db_session,
+    ):
+        mock_get_series.return_value = self.series
+        mock_update_series.return_value = [
+            self.make_occurrence(3, ApprovalStatus.APPROVED),
+            self.make_occurrence(10, ApprovalStatus.CANCELLED),
+        ]
+
+        occurrences = await update_series_approval_status(mock_db_session, self.make_update())
+
+        series, previous_approval_status = mock_update_series.call_args.args[1:]
+        assert series.current_approval_status == ApprovalStatus.APPROVED
+        assert series.update_datetime == datetime(2024, 1, 1)
+        assert series.status_reason == "Updated by manager"
+        assert previous_approval_status == ApprovalStatus.PENDING_APPROVAL
+        mock_update_occurrence.assert_not_called()
+
+        assert [occurrence.wfh_date.day for occurrence in occurrences] == [3, 10]
+        config = mock_send.call_args.args[0]
+        assert config.current_approval_status == ApprovalStatus.APPROVED
+        assert config.arrangements == occurrences
+
+    @pytest.mark.asyncio
+    async def test_occurrence_action(
+        self,
+        mock_get_series,
+        mock_get_occurrences,
+        mock_update_series,
+        mock_update_occurrence,
+        mock_get_employee,
+        mock_send,
+        mock_db_session,
+    ):
+        mock_get_series.return_value = self.series
+        mock_get_occurrences.return_value = [self.make_occurrence(10)]
+        mock_update_occurrence.return_value = self.make_occurrence(10, ApprovalStatus.CANCELLED)
+
+        occurrences = await update_series_approval_status(
+            mock_db_session, self.make_update(Action.CANCEL, date(2024, 1, 10))
+        )
+
+        mock_get_occurrences.assert_called_once_with(mock_db_session, 1, date(2024, 1, 10))
+        occurrence, previous_approval_status = mock_update_occurrence.call_args.args[1:]
+        assert occurrence.current_approval_status == ApprovalStatus.CANCELLED
+        assert occurrence.wfh_date == date(2024, 1, 10)
+        assert previous_approval_status == ApprovalStatus.PENDING_APPROVAL
+        mock_update_series.assert_not_called()
+
+        assert [occurrence.current_approval_status for occurrence in occurrences] == [
+            ApprovalStatus.CANCELLED
+        ]
+        mock_send.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_series_not_found(
+        self,
+        mock_get_series,
+        mock_get_occurrences,
+        mock_update_series,
+        mock_update_occurrence,
+        mock_get_employee,
+        mock_send,
+        mock_db_session,
+    ):
+        mock_get_series.return_value = None
+
+        with pytest.raises(arrangement_exceptions.BatchNotFoundException):
+            await update_series_approval_status(mock_db_session, self.make_update())
+
+        mock_update_series.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_occurrence_not_found(
+        self,
+        mock_get_series,
+        mock_get_occurrences,
+        mock_update_series,
+        mock_update_occurrence,
+        mock_get_employee,
+        mock_send,
+        mock_db_session,
+    ):
+        mock_get_series.return_value = self.series
+        mock_get_occurrences.return_value = []
+
+        with pytest.raises(arrangement_exceptions.SeriesOccurrenceNotFoundException):
+            await update_series_approval_status(
+                mock_db_session, self.make_update(Action.CANCEL, date(2024, 1, 4))
+            )
+
+        mock_update_occurrence.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_action_not_allowed(
+        self,
+        mock_get_series,
+        mock_get_occurrences,
+        mock_update_series,
+        mock_update_occurrence,
+        mock_get_employee,
+        mock_send,
+        mock_db_session,
+    ):
+        mock_get_series.return_value = self.series
+
+        with pytest.raises(arrangement_exceptions.ArrangementActionNotAllowedException):
+            await update_series_approval_status(mock_db_session, self.make_update(Action.WITHDRAW))
+
+        mock_update_series.assert_not_called()
+        mock_send.assert_not_called()
+
+
 @pytest.mark.asyncio
-@patch("src.arrangements.services.update_arrangement_approval_status")
-@patch("src.arrangements.crud.get_expiring_requests")
-@patch("src.arrangements.services.get_db")
+@patch("src.arrangements.crud.reject_expiring_occurrences")
+@patch("src.arrangements.crud.get_expiring_occurrences", return_value=[])
+@patch("src.arrangements.services.craft_and_send_digest_emails")
+@patch("src.arrangements.services.employee_crud.get_employees_by_ids")
+@patch("src.arrangements.crud.reject_expiring_requests")
+@patch("src.arrangements.crud.get_expiring_request_ids")
 class TestAutoRejectOldRequests:
-    async def test_success_approving_officer(
-        self, mock_get_db, mock_get_expiring_requests, mock_update
+    @staticmethod
+    def make_rejected(arrangement_id, requester_staff_id=10, delegate_approving_officer=None):
+        return {
+            "arrangement_id": arrangement_id,
+            "update_datetime": datetime(2024, 1, 1),
+            "requester_staff_id": requester_staff_id,
+            "wfh_date": date(2024, 1, 2),
+            "wfh_type": WfhType.FULL,
+            "current_approval_status": ApprovalStatus.REJECTED,
+            "approving_officer": 2,
+            "delegate_approving_officer": delegate_approving_officer,
+        }
+
+    async def test_rejects_in_chunks(
+        self,
+        mock_get_ids,
+        mock_reject,
+        mock_get_employees,
+        mock_send,
+        mock_get_occurrences,
+        mock_reject_occurrences,
+        mock_db_session,
     ):
         # Arrange
-        mock_get_expiring_requests.return_value = [{"arrangement_id": 1, "approving_officer": 2}]
+        mock_get_ids.return_value = [1, 2, 3, 4, 5]
+        mock_reject.side_effect = lambda db, ids, reason: [self.make_rejected(i) for i in ids]
 
         # Act
-        await auto_reject_old_requests()
+        report = await auto_reject_old_requests(mock_db_session, chunk_size=2)
 
         # Assert
-        mock_get_db.assert_called_once()
-        mock_get_expiring_requests.assert_called_once()
-        mock_update.assert_called()
-        assert mock_update.call_count == 1
+        assert [call.args[0] for call in mock_reject.call_args_list] == [mock_db_session] * 3
+        assert [call.args[1] for call in mock_reject.call_args_list] == [[1, 2], [3, 4], [5]]
+        assert mock_send.call_count == 3
+        assert (report.total_count, report.processed_count, report.failed_count) == (5, 5, 0)
+        assert report.duration_seconds >= 0
 
-    async def test_success_delegate_approving_officer(
-        self, mock_get_db, mock_get_expiring_requests, mock_update
+    async def test_success_no_requests(
+        self,
+        mock_get_ids,
+        mock_reject,
+        mock_get_employees,
+        mock_send,
+        mock_get_occurrences,
+        mock_reject_occurrences,
+        mock_db_session,
     ):
         # Arrange
-        mock_get_expiring_requests.return_value = [
-            {"arrangement_id": 1, "delegate_approving_officer": 2}
+        mock_get_ids.return_value = []
+
+        # Act
+        report = await auto_reject_old_requests(mock_db_session)
+
+        # Assert
+        mock_reject.assert_not_called()
+        mock_send.assert_not_called()
+        assert (report.total_count, report.processed_count, report.failed_count) == (0, 0, 0)
+
+    async def test_failed_chunk(
+        self,
+        mock_get_ids,
+        mock_reject,
+        mock_get_employees,
+        mock_send,
+        mock_get_occurrences,
+        mock_reject_occurrences,
+        mock_db_session,
+    ):
+        # Arrange
+        mock_get_ids.return_value = [1, 2, 3]
+        mock_reject.side_effect = [Exception(), [self.make_rejected(3)]]
+
+        # Act
+        report = await auto_reject_old_requests(mock_db_session, chunk_size=2)
+
+        # Assert
+        assert mock_reject.call_count == 2
+        assert (report.processed_count, report.failed_count) == (1, 2)
+        assert report.failed_ids == [1, 2]
+
+    async def test_one_notification_per_requester_and_approving_officer(
+        self,
+        mock_get_ids,
+        mock_reject,
+        mock_get_employees,
+        mock_send,
+        mock_get_occurrences,
+        mock_reject_occurrences,
+        mock_db_session,
+    ):
+        # Arrange
+        mock_get_ids.return_value = [1, 2, 3, 4]
+        mock_reject.return_value = [
+            self.make_rejected(1),
+            self.make_rejected(2),
+            self.make_rejected(3, delegate_approving_officer=5),
+            self.make_rejected(4, requester_staff_id=11),
         ]
+        employees = {staff_id: MagicMock(staff_id=staff_id) for staff_id in (2, 5, 10, 11)}
+        mock_get_employees.return_value = list(employees.values())
 
         # Act
-        await auto_reject_old_requests()
+        await auto_reject_old_requests(mock_db_session)
 
         # Assert
-        mock_get_db.assert_called_once()
-        mock_get_expiring_requests.assert_called_once()
-        mock_update.assert_called()
-        assert mock_update.call_count == 1
+        configs = mock_send.call_args.args[0]
+        assert [
+            (
+                config.employee,
+                config.manager,
+                [arrangement.arrangement_id for arrangement in config.arrangements],
+                config.auto_reject,
+            )
+            for config in configs
+        ] == [
+            (employees[10], employees[2], [1, 2], True),
+            (employees[10], employees[5], [3], True),
+            (employees[11], employees[2], [4], True),
+        ]
+        mock_get_employees.assert_called_once_with(mock_db_session, [10, 2, 5, 11])
 
-    async def test_success_no_requests(self, mock_get_db, mock_get_expiring_requests, mock_update):
+    async def test_email_failure(
+        self,
+        mock_get_ids,
+        mock_reject,
+        mock_get_employees,
+        mock_send,
+        mock_get_occurrences,
+        mock_reject_occurrences,
+        mock_db_session,
+    ):
         # Arrange
-        mock_get_expiring_requests.return_value = []
+        mock_get_ids.return_value = [1]
+        mock_reject.return_value = [self.make_rejected(1)]
+        mock_send.side_effect = EmailNotificationException(["staff10@example.com"])
 
         # Act
-        await auto_reject_old_requests()
+        report = await auto_reject_old_requests(mock_db_session)
 
         # Assert
-        mock_get_expiring_requests.assert_called_once()
-        mock_update.assert_not_called()
+        assert (report.processed_count, report.failed_count) == (1, 0)
+        assert report.failed_emails == ["staff10@example.com"]
 
-    async def test_failure_unknown(self, mock_get_db, mock_get_expiring_requests, mock_update):
+    async def test_rejects_series_occurrences_after_arrangements(
+        self,
+        mock_get_ids,
+        mock_reject,
+        mock_get_employees,
+        mock_send,
+        mock_get_occurrences,
+        mock_reject_occurrences,
+        mock_db_session,
+    ):
         # Arrange
-        mock_get_expiring_requests.return_value = [
-            {"arrangement_id": 1, "approving_officer": 1},
-            {"arrangement_id": 2, "approving_officer": 1},
+        mock_get_ids.return_value = [1]
+        mock_reject.return_value = [self.make_rejected(1)]
+        occurrence_keys = [(7, date(2024, 1, 3)), (7, date(2024, 1, 10)), (8, date(2024, 1, 4))]
+        mock_get_occurrences.return_value = occurrence_keys
+        mock_reject_occurrences.side_effect = lambda db, keys, reason: [
+            {**self.make_rejected(None), "batch_id": batch_id, "wfh_date": wfh_date}
+            for batch_id, wfh_date in keys
         ]
-        mock_update.side_effect = [Exception, None]
 
         # Act
-        await auto_reject_old_requests()
+        report = await auto_reject_old_requests(mock_db_session, chunk_size=2)
+
+        # Assert
+        assert [call.args[1:] for call in mock_reject_occurrences.call_args_list] == [
+            (occurrence_keys[:2], AUTO_REJECT_STATUS_REASON),
+            (occurrence_keys[2:], AUTO_REJECT_STATUS_REASON),
+        ]
+        assert mock_send.call_count == 3
+        assert [
+            (arrangement.batch_id, arrangement.wfh_date)
+            for arrangement in mock_send.call_args.args[0][0].arrangements
+        ] == occurrence_keys[2:]
+        assert (report.total_count, report.processed_count, report.failed_count) == (4, 4, 0)
+
+    async def test_failed_occurrence_chunk(
+        self,
+        mock_get_ids,
+        mock_reject,
+        mock_get_employees,
+        mock_send,
+        mock_get_occurrences,
+        mock_reject_occurrences,
+        mock_db_session,
+    ):
+        # Arrange
+        mock_get_ids.return_value = []
+        mock_get_occurrences.return_value = [(7, date(2024, 1, 3))]
+        mock_reject_occurrences.side_effect = Exception()
+
+        # Act
+        report = await auto_reject_old_requests(mock_db_session)
 
         # Assert
-        mock_update.assert_called()
-        assert mock_update.call_count == 2
+        assert (report.processed_count, report.failed_count) == (0, 1)
+        assert report.failed_ids == []
+        assert report.failed_occurrences == [(7, date(2024, 1, 3))]
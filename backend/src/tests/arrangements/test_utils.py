@@ -17,17 +17,27 @@ from src.arrangements.commons.dataclasses import (
     PaginationMeta,
 )
 from src.arrangements.commons.enums import (
+    Action,
     ApprovalStatus,
     RecurringFrequencyUnit,
     WfhType,
 )
+from src.arrangements.commons.exceptions import InvalidCursorException
+from src.arrangements.s3_signer import S3Signer
 from src.arrangements.utils import (
+    compute_cursor_pagination_meta,
     compute_pagination_meta,
-    create_presigned_url,
+    decode_cursor,
     delete_file,
+    encode_cursor,
+    encode_ndjson,
     expand_recurring_arrangement,
+    format_arrangement_log_row,
     format_arrangement_response,
+    format_arrangement_rows,
     format_arrangements_response,
+    get_next_cursor,
+    get_recurring_dates,
     get_tomorrow_date,
     group_arrangements_by_date,
     handle_multi_file_deletion,
@@ -76,13 +86,16 @@ class TestExpandRecurringArrangement:
         recurring_frequency_number,
         recurring_occurrences,
     ):
-        wfh_request = MagicMock(spec=dc.CreateArrangementRequest)
-        wfh_request.configure_mock(
+        wfh_request = dc.CreateArrangementRequest(
+            update_datetime=datetime(2023, 12, 1),
+            requester_staff_id=1,
             wfh_date=self.format_date_string(start_date),
+            wfh_type=WfhType.FULL,
             is_recurring=True,
             recurring_frequency_unit=recurring_frequency_unit,
             recurring_frequency_number=recurring_frequency_number,
             recurring_occurrences=recurring_occurrences,
+            current_approval_status=ApprovalStatus.PENDING_APPROVAL,
         )
 
         result = expand_recurring_arrangement(wfh_request)
@@ -100,6 +113,25 @@ class TestExpandRecurringArrangement:
             assert result[i].wfh_date == self.format_date_string(expected_dates[i])
 
         assert len(result) == recurring_occurrences
+        assert all(arrangement.wfh_type == WfhType.FULL for arrangement in result)
+        assert wfh_request.wfh_date == self.format_date_string(start_date)
+
+
+class TestGetRecurringDates:
+    @pytest.mark.parametrize(
+        ("recurring_frequency_unit", "expected_dates"),
+        [
+            (RecurringFrequencyUnit.WEEKLY, [date(2024, 1, 31), date(2024, 2, 14)]),
+            (RecurringFrequencyUnit.MONTHLY, [date(2024, 1, 31), date(2024, 3, 31)]),
+        ],
+    )
+    def test_frequency_number(self, recurring_frequency_unit, expected_dates):
+        result = get_recurring_dates(date(2024, 1, 31), 2, recurring_frequency_unit, 2)
+
+        assert result == expected_dates
+
+    def test_no_occurrences(self):
+        assert get_recurring_dates(date(2024, 1, 1), 1, RecurringFrequencyUnit.WEEKLY, 0) == []
 
 
 class TestGroupArrangementsByDate:
@@ -269,42 +301,85 @@ def create_mock_arrangement_response(
     )
 
 
-@pytest.mark.asyncio
-async def test_create_presigned_url_success():
-    with patch("boto3.client") as mock_boto3_client:
-        mock_s3 = MagicMock()
-        mock_s3.generate_presigned_url.return_value = "https://presigned-url.com"
-        mock_boto3_client.return_value = mock_s3
-
-        result = create_presigned_url("test/file.jpg")
-
-        assert result == "https://presigned-url.com"
-        mock_s3.generate_presigned_url.assert_called_once()
-
-
-@pytest.mark.asyncio
-async def test_create_presigned_url_with_none():
-    result = create_presigned_url(None)
-    assert result is None
-
+@patch("src.arrangements.utils.get_signer")
+def test_format_arrangement_rows_presign(mock_get_signer):
+    mock_s3 = MagicMock()
+    mock_s3.generate_presigned_url.side_effect = lambda _, Params, ExpiresIn: (
+        f"https://presigned-url.com/{Params['Key']}"
+    )
+    mock_get_signer.return_value = S3Signer(s3_client=mock_s3, bucket_name="test-bucket")
+    row = {
+        "arrangement_id": 1,
+        "update_datetime": datetime(2024, 1, 1),
+        "requester_staff_id": 1,
+        "wfh_date": date(2024, 1, 2),
+        "wfh_type": WfhType.FULL,
+        "current_approval_status": ApprovalStatus.APPROVED,
+        "approving_officer": 2,
+        "delegate_approving_officer": None,
+        "reason_description": None,
+        "batch_id": None,
+        "latest_log_id": 1,
+        "status_reason": None,
+        **{
+            f"requester_info_{key}": None
+            for key in (
+                "staff_id",
+                "staff_fname",
+                "staff_lname",
+                "dept",
+                "position",
+                "country",
+                "email",
+                "reporting_manager",
+                "role",
+            )
+        },
+    }
+    rows = [
+        {**row, "supporting_doc_1": "a.pdf", "supporting_doc_2": "b.pdf", "supporting_doc_3": None},
+        {**row, "supporting_doc_1": "a.pdf", "supporting_doc_2": None, "supporting_doc_3": None},
+    ]
+
+    result = format_arrangement_rows(rows, presign=True)
+
+    assert result[0]["supporting_doc_1"] == "https://presigned-url.com/a.pdf"
+    assert result[0]["supporting_doc_2"] == "https://presigned-url.com/b.pdf"
+    assert result[0]["supporting_doc_3"] is None
+    assert result[1]["supporting_doc_1"] == "https://presigned-url.com/a.pdf"
+    assert result[1]["supporting_doc_2"] is None
+    # Each distinct key is signed once
+    assert mock_s3.generate_presigned_url.call_count == 2
+
+
+def test_format_arrangement_log_row():
+    row = {
+        "log_id": 1,
+        "update_datetime": datetime(2024, 1, 1),
+        "arrangement_id": 1,
+        "requester_staff_id": 1,
+        "wfh_date": date(2024, 1, 2),
+        "wfh_type": WfhType.FULL,
+        "action": Action.REJECT,
+        "previous_approval_status": ApprovalStatus.PENDING_APPROVAL,
+        "updated_approval_status": ApprovalStatus.REJECTED,
+        "approving_officer": 2,
+        "reason_description": None,
+        "batch_id": None,
+        "supporting_doc_1": None,
+        "supporting_doc_2": None,
+        "supporting_doc_3": None,
+        "status_reason": "Clashes with a meeting",
+    }
 
-@pytest.mark.asyncio
-async def test_create_presigned_url_client_error():
-    with patch("boto3.client") as mock_boto3_client:
-        mock_s3 = MagicMock()
-        mock_s3.generate_presigned_url.side_effect = ClientError(
-            {"Error": {"Code": "InvalidRequest", "Message": "Invalid request"}},
-            "generate_presigned_url",
-        )
-        mock_boto3_client.return_value = mock_s3
+    result = format_arrangement_log_row(row)
 
-        result = create_presigned_url("test/file.jpg")
-        assert result is None
+    assert result == schemas.ArrangementLogResponse.model_validate(row).model_dump(mode="json")
+    assert result["status_reason"] == "Clashes with a meeting"
 
 
 def test_compute_pagination_meta():
-    arrangements = [create_mock_arrangement_response() for _ in range(6)]
-    meta = compute_pagination_meta(arrangements, items_per_page=2, page_num=1)
+    meta = compute_pagination_meta(6, items_per_page=2, page_num=1)
 
     assert isinstance(meta, PaginationMeta)
     assert meta.total_count == 6
@@ -362,18 +437,49 @@ def test_format_arrangement_response():
 
 
 def test_compute_pagination_meta_single_page():
-    arrangements = [create_mock_arrangement_response()]
-    meta = compute_pagination_meta(arrangements, items_per_page=5, page_num=1)
+    meta = compute_pagination_meta(1, items_per_page=5, page_num=1)
     assert meta.total_pages == 1
 
 
 def test_compute_pagination_meta_empty_list():
-    arrangements = []
-    meta = compute_pagination_meta(arrangements, items_per_page=5, page_num=1)
+    meta = compute_pagination_meta(0, items_per_page=5, page_num=1)
     assert meta.total_count == 0
     assert meta.total_pages == 0
 
 
+def test_compute_cursor_pagination_meta():
+    meta = compute_cursor_pagination_meta(11, items_per_page=5, next_cursor="abc")
+    assert meta.page_num is None
+    assert meta.total_pages == 3
+    assert meta.next_cursor == "abc"
+
+
+def test_compute_cursor_pagination_meta_without_total_count():
+    meta = compute_cursor_pagination_meta(None, items_per_page=5, next_cursor=None)
+    assert meta.total_count is None
+    assert meta.total_pages is None
+
+
+def test_encode_decode_cursor():
+    cursor = encode_cursor(datetime(2024, 1, 1, 9, 30), 42)
+    assert decode_cursor(cursor) == ["2024-01-01T09:30:00", 42]
+
+
+@pytest.mark.parametrize("cursor", ["not a cursor", "bm90IGpzb24=", "eyJhIjogMX0="])
+def test_decode_cursor_invalid(cursor):
+    with pytest.raises(InvalidCursorException):
+        decode_cursor(cursor)
+
+
+@pytest.mark.parametrize(
+    ("num_items", "expected_cursor"),
+    [(0, None), (3, None), (5, encode_cursor("2024-01-05", 5))],
+)
+def test_get_next_cursor(num_items, expected_cursor):
+    items = [{"wfh_date": f"2024-01-0{i}", "arrangement_id": i} for i in range(1, num_items + 1)]
+    assert get_next_cursor(items, 5, "wfh_date", "arrangement_id") == expected_cursor
+
+
 @freezegun.freeze_time("2024-01-01")
 def test_get_tomorrow_date():
     result = get_tomorrow_date()
@@ -382,12 +488,6 @@ def test_get_tomorrow_date():
     assert result == expected
 
 
-@pytest.mark.asyncio
-async def test_create_presigned_url_empty_string():
-    result = create_presigned_url("")
-    assert result is None
-
-
 def test_format_arrangements_response_with_arrangement_list():
     # Create a mock arrangement with all required fields
     arrangement = ArrangementResponse(
@@ -418,3 +518,17 @@ def test_format_arrangements_response_with_arrangement_list():
     assert result[0].arrangement_id == 1
     assert result[0].requester_staff_id == 1001
     assert result[0].current_approval_status == ApprovalStatus.PENDING_APPROVAL
+
+
+@pytest.mark.parametrize(
+    ("num_items", "expected_chunk_sizes"),
+    [(0, []), (2, [2]), (3, [3]), (7, [3, 3, 1])],
+)
+def test_encode_ndjson(num_items, expected_chunk_sizes):
+    items = [{"id": i, "name": "Zoë"} for i in range(num_items)]
+
+    chunks = list(encode_ndjson(items, lines_per_chunk=3))
+
+    assert [chunk.count(b"\n") for chunk in chunks] == expected_chunk_sizes
+    lines = b"".join(chunks).decode("utf-8").splitlines()
+    assert lines == [f'{{"id":{i},"name":"Zoë"}}' for i in range(num_items)]
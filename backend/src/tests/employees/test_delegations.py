@@ -0,0 +1,134 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from src.arrangements.commons.models import LatestArrangement  # noqa: F401
+from src.auth.models import Auth  # noqa: F401
+from src.employees.delegations import DelegationMap, get_delegation_map
+from src.employees.models import Base, DelegateLog, DelegationStatus, Employee
+from src.tests.test_utils import count_queries
+
+# 1 delegated to 2 twice, and the later delegation is the latest accepted one. 3 is waiting for 4.
+DELEGATIONS = [
+    (1, 2, DelegationStatus.accepted, datetime(2024, 1, 2)),
+    (1, 5, DelegationStatus.accepted, datetime(2024, 1, 1)),
+    (3, 4, DelegationStatus.pending, datetime(2024, 1, 3)),
+]
+
+
+def create_db():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+    db.add_all(
+        Employee(
+            staff_id=staff_id,
+            staff_fname=f"First{staff_id}",
+            staff_lname=f"Last{staff_id}",
+            dept="IT",
+            position="Manager",
+            country="SG",
+            email=f"staff{staff_id}@example.com",
+            role=1,
+            reporting_manager=1,
+        )
+        for staff_id in [1, 2, 3]
+    )
+    db.add_all(
+        [
+            DelegateLog(
+                manager_id=1, delegate_manager_id=2, status_of_delegation=DelegationStatus.accepted
+            ),
+            DelegateLog(
+                manager_id=2, delegate_manager_id=3, status_of_delegation=DelegationStatus.rejected
+            ),
+        ]
+    )
+    db.commit()
+    return db
+
+
+@pytest.fixture
+def delegation_map():
+    return DelegationMap(DELEGATIONS)
+
+
+def test_get_delegate_id(delegation_map):
+    assert delegation_map.get_delegate_id(1) == 2
+    assert delegation_map.get_delegate_id(3) == 4
+    assert delegation_map.get_delegate_id(2) is None
+
+
+def test_get_accepted_delegate_id(delegation_map):
+    assert delegation_map.get_accepted_delegate_id(1) == 2
+    assert delegation_map.get_accepted_delegate_id(3) is None
+
+
+@pytest.mark.parametrize(
+    ("manager_id", "delegate_manager_id", "has_delegation"),
+    [(1, 6, True), (6, 4, True), (6, None, False), (2, 1, False)],
+)
+def test_has_delegation(delegation_map, manager_id, delegate_manager_id, has_delegation):
+    assert delegation_map.has_delegation(manager_id, delegate_manager_id) == has_delegation
+
+
+def test_get_locked_staff_ids(delegation_map):
+    assert delegation_map.get_locked_staff_ids([1, 2, 4, 6]) == {1, 2, 4}
+
+
+def test_map_is_loaded_once():
+    db = create_db()
+    get_delegation_map(db)
+
+    with count_queries(db.get_bind()) as queries:
+        delegation_map = get_delegation_map(db)
+
+    # The rejected delegation is not active
+    assert len(queries) == 0
+    assert delegation_map.get_locked_staff_ids([1, 2, 3]) == {1, 2}
+
+
+def test_map_is_rebuilt_after_delegations_change():
+    db = create_db()
+    delegation_map = get_delegation_map(db)
+
+    db.query(DelegateLog).filter(
+        DelegateLog.manager_id == 1
+    ).one().status_of_delegation = DelegationStatus.undelegated
+    db.commit()
+
+    assert get_delegation_map(db) is not delegation_map
+    assert get_delegation_map(db).get_delegate_id(1) is None
+
+
+def test_map_is_unchanged_by_rolled_back_changes():
+    db = create_db()
+    delegation_map = get_delegation_map(db)
+
+    db.add(DelegateLog(manager_id=3, delegate_manager_id=1))
+    db.flush()
+    db.rollback()
+
+    assert get_delegation_map(db) is delegation_map
+
+
+def test_get_locked_staff_ids_from_delegate_logs():
+    db = create_db()
+    db.add_all(
+        [
+            DelegateLog(
+                manager_id=3, delegate_manager_id=4, status_of_delegation=DelegationStatus.rejected
+            ),
+            DelegateLog(
+                manager_id=5, delegate_manager_id=6, status_of_delegation=DelegationStatus.pending
+            ),
+        ]
+    )
+    db.commit()
+
+    delegation_map = get_delegation_map(db)
+
+    # 1 and 2 are in an accepted delegation, 5 and 6 in a pending one
+    assert delegation_map.get_locked_staff_ids([1, 2, 3, 4, 6, 999]) == {1, 2, 6}
+    assert delegation_map.get_locked_staff_ids([]) == set()
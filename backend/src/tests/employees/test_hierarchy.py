@@ -0,0 +1,105 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from src.arrangements.commons.models import LatestArrangement  # noqa: F401
+from src.auth.models import Auth  # noqa: F401
+from src.employees.hierarchy import OrgHierarchy, get_org_hierarchy
+from src.employees.models import Base, Employee
+from src.tests.test_utils import count_queries
+
+# 1 is the CEO, who reports to themself. 4 and 5 report to each other.
+REPORTING_LINES = [(1, 1), (2, 1), (3, 1), (6, 2), (7, 2), (4, 5), (5, 4), (8, None), (9, 404)]
+
+
+def create_db():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+    db.add_all(
+        Employee(
+            staff_id=staff_id,
+            staff_fname=f"First{staff_id}",
+            staff_lname=f"Last{staff_id}",
+            dept="IT",
+            position="Staff",
+            country="SG",
+            email=f"staff{staff_id}@example.com",
+            role=2,
+            reporting_manager=reporting_manager,
+        )
+        for staff_id, reporting_manager in [(1, 1), (2, 1), (3, 2)]
+    )
+    db.commit()
+    return db
+
+
+@pytest.fixture
+def hierarchy():
+    return OrgHierarchy(REPORTING_LINES)
+
+
+@pytest.mark.parametrize(
+    ("staff_id", "manager_id"),
+    [(1, None), (2, 1), (6, 2), (4, 5), (8, None), (9, None), (404, None)],
+)
+def test_get_manager_id(hierarchy, staff_id, manager_id):
+    assert hierarchy.get_manager_id(staff_id) == manager_id
+
+
+def test_get_subordinate_ids(hierarchy):
+    assert hierarchy.get_subordinate_ids(1) == [1, 2, 3]
+    assert hierarchy.get_subordinate_ids(2) == [6, 7]
+    assert hierarchy.get_subordinate_ids(3) == []
+    assert hierarchy.get_subordinate_ids(None) == [8]
+
+
+def test_get_peer_ids(hierarchy):
+    assert hierarchy.get_peer_ids(6) == [6, 7]
+    assert hierarchy.get_peer_ids(2) == [1, 2, 3]
+    assert hierarchy.get_peer_ids(404) == []
+
+
+@pytest.mark.parametrize(
+    ("staff_id", "depth"), [(1, 0), (2, 1), (7, 2), (8, 0), (9, 0), (4, None), (404, None)]
+)
+def test_get_depth(hierarchy, staff_id, depth):
+    assert hierarchy.get_depth(staff_id) == depth
+
+
+def test_get_descendant_ids(hierarchy):
+    assert hierarchy.get_descendant_ids(1) == [2, 3, 6, 7]
+    assert hierarchy.get_descendant_ids(1, max_depth=1) == [2, 3]
+    assert hierarchy.get_descendant_ids(1, max_depth=0) == []
+    assert hierarchy.get_descendant_ids(4) == [5]
+
+
+def test_hierarchy_is_loaded_once():
+    db = create_db()
+    get_org_hierarchy(db)
+
+    with count_queries(db.get_bind()) as queries:
+        hierarchy = get_org_hierarchy(db)
+
+    assert len(queries) == 0
+    assert hierarchy.get_subordinate_ids(1) == [1, 2]
+
+
+def test_hierarchy_is_rebuilt_after_employees_change():
+    db = create_db()
+    hierarchy = get_org_hierarchy(db)
+
+    db.get(Employee, 3).reporting_manager = 1
+    db.commit()
+
+    assert get_org_hierarchy(db) is not hierarchy
+    assert get_org_hierarchy(db).get_subordinate_ids(1) == [1, 2, 3]
+
+
+def test_hierarchies_are_kept_per_engine():
+    db = create_db()
+    other_db = create_db()
+    other_db.get(Employee, 3).reporting_manager = 1
+    other_db.commit()
+
+    assert get_org_hierarchy(db).get_subordinate_ids(2) == [3]
+    assert get_org_hierarchy(other_db).get_subordinate_ids(2) == []
@@ -2,8 +2,10 @@ from datetime import datetime
 from unittest.mock import MagicMock, patch
 from zoneinfo import ZoneInfo
 
+import pytest
 from fastapi.testclient import TestClient
 from src.app import app
+from src.employees.dataclasses import DelegationPaginationConfig
 from src.employees.exceptions import EmployeeNotFoundException, ManagerNotFoundException
 from src.employees.models import DelegationStatus
 from src.employees.schemas import DelegateLogCreate
@@ -381,6 +383,27 @@ class TestViewDelegationsRoute:
         assert response.status_code == 200
         assert response.json() == mock_delegations
 
+    @patch("src.employees.services.view_delegations")
+    def test_view_delegations_pagination(self, mock_view_delegations):
+        # Arrange
+        mock_view_delegations.return_value = {}
+
+        # Act
+        response = client.get(
+            "/employees/manager/viewdelegations/1", params={"items_per_page": 5, "page_num": 2}
+        )
+
+        # Assert
+        assert response.status_code == 200
+        pagination = mock_view_delegations.call_args.args[2]
+        assert pagination == DelegationPaginationConfig(items_per_page=5, page_num=2)
+
+    @pytest.mark.parametrize("params", [{"page_num": 0}, {"items_per_page": 0}])
+    def test_view_delegations_invalid_pagination(self, params):
+        response = client.get("/employees/manager/viewdelegations/1", params=params)
+
+        assert response.status_code == 422
+
     @patch("src.employees.services.view_delegations")
     def test_view_delegations_failure(self, mock_view_delegations):
         # Arrange
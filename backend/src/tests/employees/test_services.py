@@ -7,12 +7,14 @@ from sqlalchemy import Enum, create_engine
 from sqlalchemy.orm import Session, sessionmaker
 from src.auth.models import Auth
 from src.employees import schemas
-from src.employees.dataclasses import EmployeeFilters
+from src.employees.dataclasses import DelegationPaginationConfig, EmployeeFilters
+from src.employees.delegations import get_delegation_map
 from src.employees.exceptions import (
     EmployeeGenericNotFoundException,
     EmployeeNotFoundException,
     ManagerWithIDNotFoundException,
 )
+from src.employees.hierarchy import get_org_hierarchy
 from src.employees.models import Base, DelegateLog, DelegationStatus, Employee
 from src.employees.services import (
     DelegationApprovalStatus,
@@ -29,6 +31,7 @@ from src.employees.services import (
     view_all_delegations,
     view_delegations,
 )
+from src.tests.test_utils import count_queries
 
 # Configure the in-memory SQLite database
 engine = create_engine("sqlite:///:memory:")
@@ -407,6 +410,121 @@ def test_get_manager_by_subordinate_id_locked_peers(test_db):
     assert peer1 not in unlocked_peers
 
 
+def test_get_manager_by_subordinate_id_query_count_is_independent_of_team_size(test_db):
+    def add_team(manager_id, team_size):
+        test_db.add_all(
+            Employee(
+                staff_id=staff_id,
+                staff_fname="Team",
+                staff_lname="Member",
+                dept="IT",
+                position="Staff",
+                country="SG",
+                email=f"member{staff_id}@example.com",
+                role=2,
+                reporting_manager=manager_id,
+            )
+            for staff_id in range(manager_id, manager_id + team_size + 1)
+        )
+        # Lock one member of the team
+        test_db.add(
+            DelegateLog(
+                manager_id=manager_id + 1,
+                delegate_manager_id=manager_id + 2,
+                status_of_delegation=DelegationStatus.accepted,
+            )
+        )
+
+    add_team(100, 3)
+    add_team(200, 30)
+    test_db.commit()
+
+    # Build the org hierarchy index and the delegation map beforehand
+    get_org_hierarchy(test_db)
+    get_delegation_map(test_db)
+    query_counts = []
+    for staff_id in [101, 201]:
+        with count_queries(engine) as queries:
+            _, unlocked_peers = get_manager_by_subordinate_id(test_db, staff_id)
+        query_counts.append(len(queries))
+        assert not any("delegate_logs" in query for query in queries)
+        assert staff_id not in [peer.staff_id for peer in unlocked_peers]
+
+    assert query_counts[0] == query_counts[1]
+
+
+def test_view_all_delegations_query_count_is_independent_of_history_length(test_db):
+    test_db.add_all(
+        Employee(
+            staff_id=staff_id,
+            staff_fname="Delegating",
+            staff_lname=f"Manager{staff_id}",
+            email=f"manager{staff_id}@example.com",
+            dept="IT",
+            position="Manager",
+            country="SG",
+            role=1,
+        )
+        for staff_id in [60, 61, 62]
+    )
+    test_db.add_all(
+        DelegateLog(
+            manager_id=manager_id,
+            delegate_manager_id=delegate_manager_id,
+            status_of_delegation=DelegationStatus.undelegated,
+            date_of_delegation=datetime(2024, 1, day),
+        )
+        for day in range(1, 11)
+        for manager_id, delegate_manager_id in [(60, 62), (61, 60)]
+    )
+    test_db.commit()
+
+    with count_queries(engine) as queries:
+        result = view_all_delegations(60, test_db)
+
+    assert len(queries) == 2
+    assert len(result["sent_delegations"]) == 10
+    assert result["sent_delegations"][0]["date_of_delegation"] == datetime(2024, 1, 10)
+    assert result["sent_delegations"][0]["delegate_manager_name"] == "Delegating Manager62"
+    assert result["received_delegations"][0]["manager_name"] == "Delegating Manager61"
+    assert not result["pagination_meta"]["has_more"]
+
+    result = view_all_delegations(60, test_db, DelegationPaginationConfig(items_per_page=4))
+
+    assert [delegation["date_of_delegation"].day for delegation in result["sent_delegations"]] == [
+        10,
+        9,
+        8,
+        7,
+    ]
+    assert result["pagination_meta"] == {"page_num": 1, "items_per_page": 4, "has_more": True}
+
+
+def test_view_delegations_pagination(test_db):
+    test_db.add_all(
+        DelegateLog(
+            manager_id=70,
+            delegate_manager_id=delegate_manager_id,
+            status_of_delegation=DelegationStatus.pending,
+            date_of_delegation=datetime(2024, 1, delegate_manager_id - 70),
+        )
+        for delegate_manager_id in [71, 72, 73]
+    )
+    test_db.commit()
+
+    result = view_delegations(70, test_db, DelegationPaginationConfig(items_per_page=2, page_num=2))
+
+    assert result["sent_delegations"] == [
+        {
+            "staff_id": 71,
+            "full_name": "Unknown",
+            "date_of_delegation": datetime(2024, 1, 1),
+            "status_of_delegation": DelegationStatus.pending,
+        }
+    ]
+    assert not result["pagination_meta"]["has_more"]
+
+
 def test_view_delegations_empty(test_db):
     result = view_delegations(1, test_db)
     assert result["sent_delegations"] == []
@@ -0,0 +1,94 @@
+import pytest
+from sqlalchemy import create_engine, update
+from sqlalchemy.orm import sessionmaker
+from src.arrangements.commons.models import LatestArrangement  # noqa: F401
+from src.auth.models import Auth  # noqa: F401
+from src.employees.models import Base, DelegateLog, Employee
+from src.employees.version import get_delegations_version, get_employees_version
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+    db.add(
+        Employee(
+            staff_id=1,
+            staff_fname="Jane",
+            staff_lname="Smith",
+            dept="HR",
+            position="Staff",
+            country="SG",
+            email="jane.smith@example.com",
+            role=2,
+        )
+    )
+    db.commit()
+    yield db
+    db.close()
+    Base.metadata.drop_all(engine)
+
+
+def test_version_changes_on_commit(db):
+    version = get_employees_version()
+
+    db.get(Employee, 1).staff_fname = "Janet"
+    db.flush()
+    assert get_employees_version() == version
+
+    db.commit()
+    assert get_employees_version() != version
+
+
+def test_version_changes_on_bulk_update(db):
+    version = get_employees_version()
+
+    db.execute(update(Employee).where(Employee.staff_id == 1).values(dept="IT"))
+    db.commit()
+
+    assert get_employees_version() != version
+
+
+def test_version_is_unchanged_by_rollback(db):
+    version = get_employees_version()
+
+    db.get(Employee, 1).staff_fname = "Janet"
+    db.flush()
+    db.rollback()
+    db.commit()
+
+    assert get_employees_version() == version
+
+
+def test_version_is_unchanged_by_other_writes(db):
+    version = get_employees_version()
+
+    db.add(DelegateLog(manager_id=1, delegate_manager_id=1))
+    db.commit()
+    db.query(Employee).all()
+    db.commit()
+
+    assert get_employees_version() == version
+
+
+def test_version_changes_when_table_is_recreated(db):
+    version = get_employees_version()
+
+    Base.metadata.drop_all(db.get_bind(), tables=[Employee.__table__])
+    assert get_employees_version() != version
+
+    version = get_employees_version()
+    Base.metadata.create_all(db.get_bind(), tables=[Employee.__table__])
+    assert get_employees_version() != version
+
+
+def test_delegations_version_changes_on_delegation_commit(db):
+    version = get_delegations_version()
+    employees_version = get_employees_version()
+
+    db.add(DelegateLog(manager_id=1, delegate_manager_id=1))
+    db.commit()
+
+    assert get_delegations_version() != version
+    assert get_employees_version() == employees_version
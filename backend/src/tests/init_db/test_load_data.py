@@ -202,7 +202,7 @@ def test_load_latest_arrangement_data_from_csv(mock_db_session, mocker):
     # Verify the calls to LatestArrangement
     for _, row in df.iterrows():
         # Convert date fields from strings to datetime objects
-        wfh_date = datetime.strptime(row["wfh_date"], "%Y-%m-%d")
+        wfh_date = datetime.strptime(row["wfh_date"], "%Y-%m-%d").date()
         update_datetime = datetime.strptime(row["update_datetime"], "%Y-%m-%dT%H:%M:%SZ")
 
         # Assert calls with only necessary fields for clarity
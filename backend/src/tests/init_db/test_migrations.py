@@ -0,0 +1,142 @@
+from datetime import date
+
+import pytest
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.orm import sessionmaker
+from src.arrangements.commons.models import (
+    ArrangementLog,
+    Base,
+    LatestArrangement,
+    RecurringRequest,
+)
+from src.auth.models import Auth  # noqa: F401
+from src.employees.models import Employee  # noqa: F401
+from src.init_db.migrations import (
+    add_arrangement_log_columns,
+    add_recurring_series_columns,
+    create_search_indexes,
+    migrate_wfh_date_to_date,
+)
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    yield engine
+    Base.metadata.drop_all(engine)
+
+
+def test_migrate_wfh_date_to_date(engine):
+    # Rows written before wfh_date was a Date column, from CSV and from the API
+    with engine.begin() as connection:
+        for wfh_date in ("2025-05-03 00:00:00", "2025-05-04"):
+            connection.execute(
+                text(
+                    "INSERT INTO latest_arrangements "
+                    "(update_datetime, requester_staff_id, wfh_date, wfh_type, "
+                    "current_approval_status) "
+                    "VALUES ('2025-05-01 00:00:00', 1, :wfh_date, 'FULL', 'PENDING_APPROVAL')"
+                ),
+                {"wfh_date": wfh_date},
+            )
+
+    migrate_wfh_date_to_date(engine)
+    migrate_wfh_date_to_date(engine)  # running again is a no-op
+
+    db = sessionmaker(bind=engine)()
+    wfh_dates = [arrangement.wfh_date for arrangement in db.query(LatestArrangement).all()]
+    in_range = db.query(LatestArrangement).filter(LatestArrangement.wfh_date >= date(2025, 5, 3))
+    db.close()
+
+    assert wfh_dates == [date(2025, 5, 3), date(2025, 5, 4)]
+    assert in_range.count() == 2
+
+
+@pytest.mark.parametrize(
+    ("model", "index_name"),
+    [
+        (LatestArrangement, "ix_latest_arrangements_status_wfh_date"),
+        (ArrangementLog, "ix_arrangement_logs_requester_update_datetime"),
+    ],
+)
+def test_migrate_creates_missing_indexes(engine, model, index_name):
+    with engine.begin() as connection:
+        connection.execute(text(f"DROP INDEX {index_name}"))
+
+    migrate_wfh_date_to_date(engine)
+
+    table = model.__table__
+    index_names = {index["name"] for index in inspect(engine).get_indexes(table.name)}
+    assert {index.name for index in table.indexes} <= index_names
+
+
+def test_create_search_indexes(engine):
+    with engine.begin() as connection:
+        connection.execute(
+            text(
+                "INSERT INTO employees (staff_id, staff_fname, staff_lname, dept, position, "
+                "country, email, role) VALUES (1, 'Jane', 'Smith', 'HR', 'Staff', 'SG', 'a', 2)"
+            )
+        )
+        connection.execute(text("DROP TABLE employees_fts"))
+
+    create_search_indexes(engine)
+    create_search_indexes(engine)  # running again is a no-op
+
+    with engine.begin() as connection:
+        connection.execute(text("UPDATE employees SET staff_lname = 'Smithson'"))
+        matches = connection.execute(
+            text("SELECT rowid FROM employees_fts WHERE employees_fts MATCH 'mithso'")
+        ).all()
+
+    assert matches == [(1,)]
+
+
+def test_add_recurring_series_columns(engine):
+    # The recurring_requests table as created before series
+    with engine.begin() as connection:
+        connection.execute(text("DROP TABLE recurring_requests"))
+        connection.execute(
+            text(
+                "CREATE TABLE recurring_requests (batch_id INTEGER PRIMARY KEY, "
+                "request_datetime VARCHAR(50) NOT NULL, requester_staff_id INTEGER NOT NULL, "
+                "reason_description VARCHAR(255), start_date VARCHAR(50) NOT NULL, "
+                "recurring_frequency_number INTEGER NOT NULL, "
+                "recurring_frequency_unit VARCHAR(5) NOT NULL, "
+                "recurring_occurrences INTEGER NOT NULL)"
+            )
+        )
+        connection.execute(
+            text(
+                "INSERT INTO recurring_requests VALUES "
+                "(1, '2025-05-01T00:00:00', 1, NULL, '2025-05-03', 1, 'WEEKLY', 2)"
+            )
+        )
+
+    add_recurring_series_columns(engine)
+    add_recurring_series_columns(engine)  # running again is a no-op
+
+    table = RecurringRequest.__table__
+    column_names = {column["name"] for column in inspect(engine).get_columns(table.name)}
+    index_names = {index["name"] for index in inspect(engine).get_indexes(table.name)}
+    db = sessionmaker(bind=engine)()
+    batch = db.query(RecurringRequest).one()
+    db.close()
+
+    assert {column.name for column in table.columns} <= column_names
+    assert {index.name for index in table.indexes} <= index_names
+    assert batch.is_series is False
+    assert batch.current_approval_status is None
+
+
+def test_add_arrangement_log_columns(engine):
+    with engine.begin() as connection:
+        connection.execute(text("ALTER TABLE arrangement_logs DROP COLUMN status_reason"))
+
+    add_arrangement_log_columns(engine)
+    add_arrangement_log_columns(engine)  # running again is a no-op
+
+    table = ArrangementLog.__table__
+    column_names = {column["name"] for column in inspect(engine).get_columns(table.name)}
+    assert {column.name for column in table.columns} <= column_names
@@ -0,0 +1,179 @@
+import asyncio
+import threading
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from apscheduler.triggers.cron import CronTrigger
+from src.jobs.definitions import JOBS
+from src.jobs.runner import Job, JobRunner
+
+
+@pytest.fixture
+def mock_session_factory():
+    session_factory = MagicMock()
+    session_factory.return_value.__enter__.return_value = MagicMock(name="db")
+    return session_factory
+
+
+def make_job(name, func):
+    return Job(name=name, func=func, trigger=CronTrigger(hour=0, minute=0))
+
+
+class TestJobRunner:
+    async def test_async_job_runs_with_its_own_session(self, mock_session_factory):
+        # Arrange
+        async def job(db):
+            return db
+
+        runner = JobRunner([make_job("job", job)], session_factory=mock_session_factory)
+
+        # Act
+        result = await runner.run("job")
+
+        # Assert
+        db = mock_session_factory.return_value.__enter__.return_value
+        assert result is db
+        mock_session_factory.return_value.__exit__.assert_called_once()
+        metrics = runner.metrics["job"]
+        assert (metrics.runs, metrics.failures, metrics.last_result) == (1, 0, db)
+        assert metrics.last_duration_seconds >= 0
+        assert metrics.last_started_at is not None
+
+    async def test_sync_job_runs_in_a_worker_thread(self, mock_session_factory):
+        # Arrange
+        def job(db):
+            return threading.get_ident()
+
+        runner = JobRunner([make_job("job", job)], session_factory=mock_session_factory)
+
+        # Act
+        thread_id = await runner.run("job")
+
+        # Assert
+        assert thread_id != threading.get_ident()
+        mock_session_factory.return_value.__exit__.assert_called_once()
+
+    async def test_failure_is_recorded(self, mock_session_factory):
+        # Arrange
+        async def job(db):
+            raise RuntimeError("Database is locked")
+
+        runner = JobRunner([make_job("job", job)], session_factory=mock_session_factory)
+
+        # Act
+        result = await runner.run("job")
+        await runner.run("job")
+
+        # Assert
+        assert result is None
+        metrics = runner.metrics["job"]
+        assert (metrics.runs, metrics.failures, metrics.last_error) == (
+            2,
+            2,
+            "Database is locked",
+        )
+        assert mock_session_factory.return_value.__exit__.call_count == 2
+
+    async def test_concurrency_is_bounded(self, mock_session_factory):
+        # Arrange
+        running = []
+        max_running = []
+
+        async def job(db):
+            running.append(db)
+            max_running.append(len(running))
+            await asyncio.sleep(0.01)
+            running.pop()
+
+        runner = JobRunner(
+            [make_job("a", job), make_job("b", job), make_job("c", job)],
+            session_factory=mock_session_factory,
+            max_concurrency=2,
+        )
+
+        # Act
+        await asyncio.gather(runner.run("a"), runner.run("b"), runner.run("c"))
+
+        # Assert
+        assert max(max_running) == 2
+        assert all(metrics.runs == 1 for metrics in runner.metrics.values())
+
+    def test_duplicate_job_names(self):
+        async def job(db):
+            pass
+
+        with pytest.raises(ValueError):
+            JobRunner([make_job("job", job), make_job("job", job)])
+
+    async def test_start_schedules_the_declared_jobs(self):
+        # Arrange
+        runner = JobRunner(JOBS)
+
+        # Act
+        runner.start()
+        try:
+            scheduled_ids = {job.id for job in runner._scheduler.get_jobs()}
+        finally:
+            runner.shutdown()
+
+        # Assert
+        assert scheduled_ids == {"auto_reject_job", "rebuild_daily_wfh_rollup"}
+
+
+class TestAutoRejectJob:
+    @staticmethod
+    def blocking_query(result):
+        def query(*args):
+            time.sleep(0.2)
+            return result
+
+        return query
+
+    @patch("src.arrangements.services.craft_and_send_digest_emails", new_callable=AsyncMock)
+    @patch("src.arrangements.services.employee_crud.get_employees_by_ids")
+    @patch("src.arrangements.crud.reject_expiring_requests")
+    @patch("src.arrangements.crud.get_expiring_request_ids")
+    async def test_loop_keeps_serving_while_the_job_queries(
+        self,
+        mock_get_ids,
+        mock_reject,
+        mock_get_employees,
+        mock_send,
+        mock_session_factory,
+    ):
+        # Arrange
+        mock_get_ids.side_effect = self.blocking_query([1])
+        mock_reject.side_effect = self.blocking_query(
+            [
+                {
+                    "arrangement_id": 1,
+                    "update_datetime": None,
+                    "requester_staff_id": 10,
+                    "wfh_date": None,
+                    "wfh_type": None,
+                    "current_approval_status": None,
+                    "approving_officer": 2,
+                }
+            ]
+        )
+        mock_get_employees.side_effect = self.blocking_query([])
+        runner = JobRunner(JOBS, session_factory=mock_session_factory)
+        tick_times = []
+
+        async def serve():
+            # Stands in for the requests served by the loop during the job
+            while True:
+                tick_times.append(time.perf_counter())
+                await asyncio.sleep(0.01)
+
+        # Act
+        server = asyncio.create_task(serve())
+        report = await runner.run("auto_reject_job")
+        server.cancel()
+
+        # Assert
+        assert report.processed_count == 1
+        mock_send.assert_awaited_once()
+        assert len(tick_times) > 10
+        assert max(later - earlier for earlier, later in zip(tick_times, tick_times[1:])) < 0.1
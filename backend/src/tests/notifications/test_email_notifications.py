@@ -1040,6 +1040,74 @@ class TestCraftAndSendEmail:
         )
 
 
+@patch("src.notifications.email_notifications.send_email")
+@patch("src.notifications.email_notifications.craft_email_content")
+class TestCraftAndSendDigestEmails:
+    @pytest.mark.asyncio
+    async def test_one_email_per_recipient(
+        self, mock_craft_email, mock_send_email, mock_arrangement_config_factory
+    ):
+        # Arrange
+        employees = [
+            MagicMock(staff_id=staff_id, email=f"{staff_id}@allinone.com.sg") for staff_id in (1, 2)
+        ]
+        manager = MagicMock(staff_id=3, email="3@allinone.com.sg")
+        configs = [
+            mock_arrangement_config_factory(
+                employee=employee,
+                arrangements=[MagicMock()],
+                action=Action.APPROVE,
+                current_approval_status=ApprovalStatus.APPROVED,
+                manager=manager,
+            )
+            for employee in employees
+        ]
+        mock_craft_email.side_effect = [
+            {
+                "employee": {"subject": f"Subject {staff_id}", "content": f"Content {staff_id}"},
+                "manager": {
+                    "subject": f"Manager Subject {staff_id}",
+                    "content": f"Manager Content {staff_id}",
+                },
+            }
+            for staff_id in (1, 2)
+        ]
+
+        # Act
+        await notifications.craft_and_send_digest_emails(configs)
+
+        # Assert
+        sent_emails = {call.args[0]: call.args[1:] for call in mock_send_email.call_args_list}
+        assert mock_send_email.call_count == 3
+        assert sent_emails["1@allinone.com.sg"] == ("Subject 1", "Content 1")
+        assert sent_emails["2@allinone.com.sg"] == ("Subject 2", "Content 2")
+        subject, content = sent_emails["3@allinone.com.sg"]
+        assert subject == "[All-In-One] Digest of 2 WFH Request Notifications"
+        assert "Manager Content 1" in content and "Manager Content 2" in content
+
+    @pytest.mark.asyncio
+    async def test_email_failure(
+        self, mock_craft_email, mock_send_email, mock_arrangement_config_factory
+    ):
+        # Arrange
+        config = mock_arrangement_config_factory(
+            employee=MagicMock(staff_id=1, email="1@allinone.com.sg"),
+            arrangements=[MagicMock()],
+            action=Action.REJECT,
+            current_approval_status=ApprovalStatus.REJECTED,
+            manager=MagicMock(staff_id=3, email="3@allinone.com.sg"),
+        )
+        mock_craft_email.return_value = {
+            "employee": {"subject": "Subject", "content": "Content"},
+            "manager": {"subject": "Subject", "content": "Content"},
+        }
+        mock_send_email.side_effect = HTTPException(status_code=500, detail="Internal Server Error")
+
+        # Act and Assert
+        with pytest.raises(notification_exceptions.EmailNotificationException):
+            await notifications.craft_and_send_digest_emails([config])
+
+
 @pytest.mark.asyncio
 class TestSendEmailComprehensive:
     """Additional test cases to achieve 100% coverage for send_email function."""
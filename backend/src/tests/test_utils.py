@@ -1,6 +1,9 @@
+from contextlib import contextmanager
 from unittest.mock import MagicMock
 
 import pytest
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import Session
 
 
@@ -10,3 +13,18 @@ def mock_db_session(mocker):
     session = MagicMock(spec=Session)
     mocker.patch("src.init_db.load_data.SessionLocal", return_value=session)
     return session
+
+
+@contextmanager
+def count_queries(engine: Engine):
+    # Count the SQL statements executed on the engine within the block
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
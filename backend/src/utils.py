@@ -1,5 +1,7 @@
-from typing import List
+import hashlib
+from typing import Any, List, Optional
 
+from fastapi import Request
 from pydantic import BaseModel
 from sqlalchemy.ext.declarative import DeclarativeMeta
 
@@ -10,3 +12,20 @@ def convert_model_to_pydantic_schema(model_data: List[DeclarativeMeta], schema:
         schema.model_validate(model.__dict__ if hasattr(model, "__dict__") else model)
         for model in model_data
     ]
+
+
+def compute_etag(request: Request, version: Any) -> str:
+    """Compute a weak ETag for the response to a request from the version of its data.
+
+    The path and query parameters are part of the ETag, as they select the data in the response.
+    """
+    key = f"{request.url.path}?{request.url.query}#{version!r}"
+    return f'W/"{hashlib.sha1(key.encode()).hexdigest()}"'
+
+
+def etag_matches(etag: str, if_none_match: Optional[str]) -> bool:
+    """Check if the ETag matches an If-None-Match header, using the weak comparison."""
+    if not if_none_match:
+        return False
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in tags or etag.removeprefix("W/") in tags
@@ -18,8 +18,11 @@ import {
   Chip,
   TablePagination,
   CircularProgress,
+  MenuItem,
+  Stack,
 } from "@mui/material";
 import axios from "axios";
+import qs from "qs";
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 
@@ -42,6 +45,35 @@ type TWFHRequest = {
   wfh_type: string;
 };
 
+type TLogFilters = {
+  requesterStaffId: string;
+  approvingOfficer: string;
+  action: string;
+  approvalStatus: string;
+  startDate: string;
+  endDate: string;
+};
+
+const EMPTY_FILTERS: TLogFilters = {
+  requesterStaffId: "",
+  approvingOfficer: "",
+  action: "",
+  approvalStatus: "",
+  startDate: "",
+  endDate: "",
+};
+
+const ACTIONS = ["create", "approve", "reject", "withdraw", "cancel"];
+
+const APPROVAL_STATUSES = [
+  "pending approval",
+  "pending withdrawal",
+  "approved",
+  "rejected",
+  "withdrawn",
+  "cancelled",
+];
+
 const getChipColor = (status: string | undefined) => {
   if (!status) return "default"; // Default if status is undefined
   switch (status.toLowerCase()) {
@@ -59,9 +91,10 @@ const getChipColor = (status: string | undefined) => {
 export const RequestHistoryPage: React.FC = () => {
   const { user } = useContext(UserContext);
   const [logs, setLogs] = useState<TWFHRequest[]>([]);
-  const [searchTerm, setSearchTerm] = useState("");
+  const [filters, setFilters] = useState<TLogFilters>(EMPTY_FILTERS);
   const [page, setPage] = useState(0);
   const [rowsPerPage, setRowsPerPage] = useState(10);
+  const [totalItems, setTotalItems] = useState(0);
   const [loading, setLoading] = useState(true);
   const [showSnackbar, setShowSnackbar] = useState(false);
   const [snackbarMessage, setSnackbarMessage] = useState("");
@@ -76,16 +109,32 @@ export const RequestHistoryPage: React.FC = () => {
       return;
     }
     fetchLogs();
-  }, [user, navigate]);
+  }, [user, navigate, page, rowsPerPage, filters]);
 
   const handleCloseSnackBar = () => setShowSnackbar(false);
 
+  // The logs are filtered and paginated by the server
   const fetchLogs = async () => {
     try {
-      const response = await axios.get(`${BACKEND_URL}/arrangements/logs/all`);
-      const fetchedLogs = response.data.data; 
-      console.log(response.data);
-      setLogs(fetchedLogs);
+      const response = await axios.get(
+        `${BACKEND_URL}/arrangements/logs/all`,
+        {
+          params: {
+            requester_staff_id: filters.requesterStaffId || undefined,
+            approving_officer: filters.approvingOfficer || undefined,
+            action: filters.action || undefined,
+            approval_status: filters.approvalStatus || undefined,
+            start_date: filters.startDate || undefined,
+            end_date: filters.endDate || undefined,
+            items_per_page: rowsPerPage,
+            page_num: page + 1,
+          },
+          paramsSerializer: (params) =>
+            qs.stringify(params, { arrayFormat: "repeat" }),
+        }
+      );
+      setLogs(response.data.data);
+      setTotalItems(response.data.pagination_meta.total_count);
     } catch (error) {
       console.error("Error fetching arrangement logs:", error);
       setAlertStatus("error");
@@ -96,27 +145,13 @@ export const RequestHistoryPage: React.FC = () => {
     }
   };
 
-  const handleSearch = (e: React.ChangeEvent<HTMLInputElement>) => {
-    setSearchTerm(e.target.value);
-    setPage(0); 
-  };
+  const handleFilterChange =
+    (field: keyof TLogFilters) =>
+    (e: React.ChangeEvent<HTMLInputElement>) => {
+      setFilters({ ...filters, [field]: e.target.value });
+      setPage(0);
+    };
 
-  const filteredLogs = logs.filter(
-    (log) =>
-      log.reason_description
-        ?.toLowerCase()
-        .includes(searchTerm.toLowerCase()) ||
-      log.wfh_type?.toLowerCase().includes(searchTerm.toLowerCase()) ||
-      log.updated_approval_status
-        ?.toLowerCase()
-        .includes(searchTerm.toLowerCase()) || 
-      log.approving_officer
-        .toString()
-        .includes(searchTerm) || 
-      log.requester_staff_id
-        .toString()
-        .includes(searchTerm)
-  );
   const handleChangePage = (_event: unknown, newPage: number) => {
     setPage(newPage);
   };
@@ -145,14 +180,68 @@ export const RequestHistoryPage: React.FC = () => {
       </Typography>
       <Divider sx={{ mb: 2 }} />
 
-      <TextField
-        label="Search by reason, type, or status"
-        variant="outlined"
-        fullWidth
-        margin="normal"
-        value={searchTerm}
-        onChange={handleSearch}
-      />
+      <Stack
+        direction="row"
+        spacing={2}
+        sx={{ my: 2 }}
+        flexWrap="wrap"
+        useFlexGap
+      >
+        <TextField
+          label="Requester ID"
+          type="number"
+          value={filters.requesterStaffId}
+          onChange={handleFilterChange("requesterStaffId")}
+        />
+        <TextField
+          label="Approving Officer ID"
+          type="number"
+          value={filters.approvingOfficer}
+          onChange={handleFilterChange("approvingOfficer")}
+        />
+        <TextField
+          select
+          label="Action"
+          value={filters.action}
+          onChange={handleFilterChange("action")}
+          sx={{ minWidth: 160 }}
+        >
+          <MenuItem value="">All</MenuItem>
+          {ACTIONS.map((action) => (
+            <MenuItem key={action} value={action}>
+              {action}
+            </MenuItem>
+          ))}
+        </TextField>
+        <TextField
+          select
+          label="Approval Status"
+          value={filters.approvalStatus}
+          onChange={handleFilterChange("approvalStatus")}
+          sx={{ minWidth: 200 }}
+        >
+          <MenuItem value="">All</MenuItem>
+          {APPROVAL_STATUSES.map((status) => (
+            <MenuItem key={status} value={status}>
+              {status}
+            </MenuItem>
+          ))}
+        </TextField>
+        <TextField
+          label="Updated From"
+          type="date"
+          value={filters.startDate}
+          onChange={handleFilterChange("startDate")}
+          InputLabelProps={{ shrink: true }}
+        />
+        <TextField
+          label="Updated To"
+          type="date"
+          value={filters.endDate}
+          onChange={handleFilterChange("endDate")}
+          InputLabelProps={{ shrink: true }}
+        />
+      </Stack>
 
       <TableContainer component={Paper}>
         <Table>
@@ -171,43 +260,41 @@ export const RequestHistoryPage: React.FC = () => {
             </TableRow>
           </TableHead>
           <TableBody>
-            {filteredLogs.length === 0 ? (
+            {logs.length === 0 ? (
               <TableRow>
                 <TableCell colSpan={8} align="center">
-                  {searchTerm
+                  {Object.values(filters).some((value) => value)
                     ? "No matching requests found"
                     : "No requests available"}
                 </TableCell>
               </TableRow>
             ) : (
-              filteredLogs
-                .slice(page * rowsPerPage, page * rowsPerPage + rowsPerPage)
-                .map((log) => (
-                  <TableRow key={log.arrangement_id}>
-                    <TableCell>
-                      <Chip
-                        color={getChipColor(log.updated_approval_status)}
-                        label={
-                          log.updated_approval_status.charAt(0).toUpperCase() +
-                          log.updated_approval_status.slice(1)
-                        }
-                      />
-                    </TableCell>
-                    <TableCell>{log.approving_officer || "N/A"}</TableCell>
-                    <TableCell>{log.requester_staff_id || "N/A"}</TableCell>
-                    <TableCell>
-                      {log.wfh_type?.toUpperCase() || "N/A"}
-                    </TableCell>
-                    <TableCell>
-                      {new Date(log.wfh_date).toLocaleDateString() || "N/A"}
-                    </TableCell>
-                    <TableCell>{log.reason_description || "N/A"}</TableCell>
-                    <TableCell>{log.action || "N/A"}</TableCell>
-                    <TableCell>
-                      {new Date(log.update_datetime).toLocaleString() || "N/A"}
-                    </TableCell>
-                  </TableRow>
-                ))
+              logs.map((log) => (
+                <TableRow key={log.log_id}>
+                  <TableCell>
+                    <Chip
+                      color={getChipColor(log.updated_approval_status)}
+                      label={
+                        log.updated_approval_status.charAt(0).toUpperCase() +
+                        log.updated_approval_status.slice(1)
+                      }
+                    />
+                  </TableCell>
+                  <TableCell>{log.approving_officer || "N/A"}</TableCell>
+                  <TableCell>{log.requester_staff_id || "N/A"}</TableCell>
+                  <TableCell>
+                    {log.wfh_type?.toUpperCase() || "N/A"}
+                  </TableCell>
+                  <TableCell>
+                    {new Date(log.wfh_date).toLocaleDateString() || "N/A"}
+                  </TableCell>
+                  <TableCell>{log.reason_description || "N/A"}</TableCell>
+                  <TableCell>{log.action || "N/A"}</TableCell>
+                  <TableCell>
+                    {new Date(log.update_datetime).toLocaleString() || "N/A"}
+                  </TableCell>
+                </TableRow>
+              ))
             )}
           </TableBody>
         </Table>
@@ -216,7 +303,7 @@ export const RequestHistoryPage: React.FC = () => {
       <TablePagination
         component="div"
         rowsPerPageOptions={[10, 20, 30]}
-        count={filteredLogs.length}
+        count={totalItems}
         rowsPerPage={rowsPerPage}
         page={page}
         onPageChange={handleChangePage}
@@ -1,6 +1,5 @@
 import axios from "axios";
 import { useContext, useEffect, useState } from "react";
-import { TWFHRequest } from "../../types/requests";
 import {
   Box,
   CircularProgress,
@@ -33,59 +32,33 @@ export const Statistics = () => {
   useEffect(() => {
     setIsLoading(true);
 
-    const countArrangements = async (arrangements: TWFHRequest[]) => {
-      let counts = {
-        onLeave: 0,
-        wfh_full: 0,
-        wfh_am: 0,
-        wfh_pm: 0,
-      };
-      arrangements.forEach((arrangement) => {
-        switch (arrangement.wfh_type) {
-          case "full":
-            counts.wfh_full++;
-            break;
-          case "am":
-            counts.wfh_am++;
-            break;
-          case "pm":
-            counts.wfh_pm++;
-            break;
-        }
-
-        if (arrangement.reason_description.slice(0, 3) === "OOO") {
-          counts.onLeave++;
-        }
-      });
-
-      const totalEmployees = await getTotalEmployees();
-      const inOffice =
-        totalEmployees -
-        (counts.onLeave + counts.wfh_full + counts.wfh_am + counts.wfh_pm);
-
-      return [
-        counts.onLeave,
-        counts.wfh_full,
-        counts.wfh_am,
-        counts.wfh_pm,
-        inOffice,
-      ];
-    };
-    const getWFHRequests = async () => {
+    // The server counts the arrangements and employees, so only the totals are loaded
+    const getStats = async () => {
+      const date = filters.date.toISOString().split("T")[0];
       const params = {
         department:
           filters.department === "all" ? undefined : filters.department,
-        current_approval_status: ["APPROVED"],
-        start_date: new Date(filters.date.toISOString().split("T")[0]), // strip the time away and convert all to 0s then convert back to a date object
-        end_date: new Date(filters.date.toISOString().split("T")[0]),
+        start_date: date,
+        end_date: date,
       };
 
       try {
-        const response = await axios.get(`${BACKEND_URL}/arrangements`, {
-          params,
-        });
-        const arrangementData = await countArrangements(response.data.data);
-        setData(arrangementData);
+        const response = await axios.get(
+          `${BACKEND_URL}/arrangements/stats`,
+          { params }
+        );
+        const { headcount, on_leave, wfh_counts } = response.data.data;
+        const inOffice =
+          headcount -
+          (on_leave + wfh_counts.full + wfh_counts.am + wfh_counts.pm);
+
+        setData([
+          on_leave,
+          wfh_counts.full,
+          wfh_counts.am,
+          wfh_counts.pm,
+          inOffice,
+        ]);
       } catch (error) {
         console.error(error);
       } finally {
@@ -93,18 +66,7 @@ export const Statistics = () => {
       }
     };
 
-    const getTotalEmployees = async () => {
-      const response = await axios.get(`${BACKEND_URL}/employees`, {
-        params: {
-          department:
-            filters.department !== "all" ? filters.department : undefined,
-        },
-      });
-
-      return response.data.length;
-    };
-
-    getWFHRequests();
+    getStats();
   }, [filters, BACKEND_URL]);
 
   return (